@@ -37,7 +37,7 @@ def get_company_or_404(company_id: str, current_user: User, db: Session) -> Comp
 # ============== Account Endpoints ==============
 
 @router.get("/accounts", response_model=List[AccountResponse])
-async def list_accounts(
+def list_accounts(
     company_id: str,
     account_type: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -86,7 +86,7 @@ async def list_accounts(
 
 
 @router.post("/accounts", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
-async def create_account(
+def create_account(
     company_id: str,
     data: AccountCreate,
     current_user: User = Depends(get_current_active_user),
@@ -122,7 +122,7 @@ async def create_account(
 
 
 @router.get("/accounts/{account_id}", response_model=AccountResponse)
-async def get_account(
+def get_account(
     company_id: str,
     account_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -158,7 +158,7 @@ async def get_account(
 
 
 @router.put("/accounts/{account_id}", response_model=AccountResponse)
-async def update_account(
+def update_account(
     company_id: str,
     account_id: str,
     data: AccountUpdate,
@@ -202,7 +202,7 @@ async def update_account(
 
 
 @router.delete("/accounts/{account_id}")
-async def delete_account(
+def delete_account(
     company_id: str,
     account_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -230,7 +230,7 @@ async def delete_account(
 
 
 @router.post("/accounts/{account_id}/opening-balance")
-async def set_opening_balance(
+def set_opening_balance(
     company_id: str,
     account_id: str,
     amount: float,
@@ -271,7 +271,7 @@ async def set_opening_balance(
 
 
 @router.get("/accounts/{account_id}/ledger")
-async def get_account_ledger(
+def get_account_ledger(
     company_id: str,
     account_id: str,
     from_date: Optional[date] = None,
@@ -308,7 +308,7 @@ async def get_account_ledger(
 # ============== Transaction Endpoints ==============
 
 @router.get("/transactions", response_model=TransactionListResponse)
-async def list_transactions(
+def list_transactions(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -404,7 +404,7 @@ async def list_transactions(
 
 
 @router.post("/transactions", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-async def create_transaction(
+def create_transaction(
     company_id: str,
     data: TransactionCreate,
     auto_post: bool = Query(False),
@@ -462,7 +462,7 @@ async def create_transaction(
 
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionResponse)
-async def get_transaction(
+def get_transaction(
     company_id: str,
     transaction_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -514,7 +514,7 @@ async def get_transaction(
 
 
 @router.post("/transactions/{transaction_id}/post", response_model=TransactionResponse)
-async def post_transaction(
+def post_transaction(
     company_id: str,
     transaction_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -560,7 +560,7 @@ async def post_transaction(
 
 
 @router.post("/transactions/{transaction_id}/reverse", response_model=TransactionResponse)
-async def reverse_transaction(
+def reverse_transaction(
     company_id: str,
     transaction_id: str,
     reason: Optional[str] = None,
@@ -607,7 +607,7 @@ async def reverse_transaction(
 
 
 @router.post("/transactions/{transaction_id}/reconcile")
-async def reconcile_transaction(
+def reconcile_transaction(
     company_id: str,
     transaction_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -631,7 +631,7 @@ async def reconcile_transaction(
 # ============== Bank Import Endpoints ==============
 
 @router.post("/bank-import/preview")
-async def preview_bank_statement(
+def preview_bank_statement(
     company_id: str,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
@@ -647,24 +647,9 @@ async def preview_bank_statement(
         )
     
     try:
-        content = await file.read()
-        # Try different encodings
-        content_str = None
-        for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']:
-            try:
-                content_str = content.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if content_str is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Unable to decode CSV file"
-            )
-        
+        # Streamed from the upload; the encoding is detected by the service
         service = BankImportService(db)
-        preview = service.preview_csv(content_str)
+        preview = service.preview_csv(file.file)
         
         return {
             "filename": file.filename,
@@ -682,7 +667,7 @@ async def preview_bank_statement(
 
 
 @router.post("/bank-import", response_model=BankImportResponse, status_code=status.HTTP_201_CREATED)
-async def upload_bank_statement(
+def upload_bank_statement(
     company_id: str,
     file: UploadFile = File(...),
     bank_account_id: Optional[str] = None,
@@ -706,22 +691,6 @@ async def upload_bank_statement(
         )
     
     try:
-        content = await file.read()
-        # Try different encodings
-        content_str = None
-        for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']:
-            try:
-                content_str = content.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if content_str is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Unable to decode CSV file"
-            )
-        
         # Build column mapping if provided
         column_mapping = None
         if description_column:  # At minimum, description is required
@@ -740,10 +709,11 @@ async def upload_bank_statement(
                 column_mapping['balance'] = balance_column
         
         service = BankImportService(db)
+        # Streamed from the upload; the encoding is detected by the service
         bank_import = service.create_import(
             company,
             file.filename,
-            content_str,
+            file.file,
             bank_account_id,
             bank_name,
             column_mapping
@@ -759,7 +729,7 @@ async def upload_bank_statement(
 
 
 @router.get("/bank-imports", response_model=List[BankImportResponse])
-async def list_bank_imports(
+def list_bank_imports(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -775,7 +745,7 @@ async def list_bank_imports(
 
 
 @router.get("/bank-imports/{import_id}", response_model=BankImportDetailResponse)
-async def get_bank_import(
+def get_bank_import(
     company_id: str,
     import_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -819,7 +789,7 @@ async def get_bank_import(
 
 
 @router.post("/bank-imports/{import_id}/process")
-async def process_bank_import(
+def process_bank_import(
     company_id: str,
     import_id: str,
     data: BankImportProcessRequest,
@@ -855,7 +825,7 @@ async def process_bank_import(
 
 
 @router.delete("/bank-imports/{import_id}")
-async def delete_bank_import(
+def delete_bank_import(
     company_id: str,
     import_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -879,7 +849,7 @@ async def delete_bank_import(
 # ============== Report Endpoints ==============
 
 @router.get("/reports/trial-balance")
-async def get_trial_balance(
+def get_trial_balance(
     company_id: str,
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
@@ -901,7 +871,7 @@ async def get_trial_balance(
 
 
 @router.get("/reports/profit-loss")
-async def get_profit_loss(
+def get_profit_loss(
     company_id: str,
     from_date: date,
     to_date: date,
@@ -925,7 +895,7 @@ async def get_profit_loss(
 
 
 @router.get("/reports/balance-sheet")
-async def get_balance_sheet(
+def get_balance_sheet(
     company_id: str,
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
@@ -947,7 +917,7 @@ async def get_balance_sheet(
 
 
 @router.get("/reports/cash-flow")
-async def get_cash_flow(
+def get_cash_flow(
     company_id: str,
     from_date: date,
     to_date: date,
@@ -971,7 +941,7 @@ async def get_cash_flow(
 
 
 @router.get("/reports/account-summary")
-async def get_account_summary(
+def get_account_summary(
     company_id: str,
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
@@ -993,7 +963,7 @@ async def get_account_summary(
 
 
 @router.get("/reports/outstanding-receivables")
-async def get_outstanding_receivables(
+def get_outstanding_receivables(
     company_id: str,
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1008,7 +978,7 @@ async def get_outstanding_receivables(
 
 
 @router.get("/reports/outstanding-payables")
-async def get_outstanding_payables(
+def get_outstanding_payables(
     company_id: str,
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1023,23 +993,26 @@ async def get_outstanding_payables(
 
 
 @router.get("/reports/aging")
-async def get_aging_report(
+def get_aging_report(
     company_id: str,
     report_type: str = Query("receivables", pattern="^(receivables|payables)$"),
     as_of_date: Optional[date] = None,
+    bucket: Optional[str] = Query(None, pattern="^(current|1_30|31_60|61_90|over_90)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get aging analysis of receivables or payables."""
+    """Get aging analysis of receivables or payables, with an optional page of one bucket's invoices."""
     company = get_company_or_404(company_id, current_user, db)
     service = ReportService(db)
     
     as_of_dt = datetime.combine(as_of_date, datetime.max.time()) if as_of_date else None
-    return service.get_aging_report(company, report_type, as_of_dt)
+    return service.get_aging_report(company, report_type, as_of_dt, bucket, page, page_size)
 
 
 @router.get("/reports/party-statement/{party_id}")
-async def get_party_statement(
+def get_party_statement(
     company_id: str,
     party_id: str,
     party_type: str = Query("customer", pattern="^(customer|vendor)$"),
@@ -1059,7 +1032,7 @@ async def get_party_statement(
 
 
 @router.get("/reports/day-book")
-async def get_day_book(
+def get_day_book(
     company_id: str,
     date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1076,7 +1049,7 @@ async def get_day_book(
 # ============== Account Mapping Endpoints ==============
 
 @router.get("/account-mappings")
-async def list_account_mappings(
+def list_account_mappings(
     company_id: str,
     mapping_type: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1121,7 +1094,7 @@ async def list_account_mappings(
 
 
 @router.get("/account-mappings/{mapping_id}")
-async def get_account_mapping(
+def get_account_mapping(
     company_id: str,
     mapping_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1167,7 +1140,7 @@ class AccountMappingUpdate(BaseModel):
 
 
 @router.put("/account-mappings/{mapping_id}")
-async def update_account_mapping(
+def update_account_mapping(
     company_id: str,
     mapping_id: str,
     data: AccountMappingUpdate,
@@ -1235,7 +1208,7 @@ async def update_account_mapping(
 
 
 @router.post("/account-mappings/reset")
-async def reset_account_mappings(
+def reset_account_mappings(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1255,7 +1228,7 @@ async def reset_account_mappings(
 # ============== Payroll Account Config Endpoints ==============
 
 @router.get("/payroll-account-configs")
-async def list_payroll_account_configs(
+def list_payroll_account_configs(
     company_id: str,
     component_type: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1302,7 +1275,7 @@ class PayrollAccountConfigUpdate(BaseModel):
 
 
 @router.put("/payroll-account-configs/{config_id}")
-async def update_payroll_account_config(
+def update_payroll_account_config(
     company_id: str,
     config_id: str,
     data: PayrollAccountConfigUpdate,
@@ -23,7 +23,8 @@ from app.database.models import (
 )
 from app.database.payroll_models import Employee
 from app.auth.dependencies import get_current_active_user
-from app.services.pdf_service import PDFService
+from app.services.pdf_render_service import PDFRenderService
+from app.api.execution import ExecutionPolicy, execution_policy
 
 router = APIRouter(tags=["Additional Features"])
 
@@ -112,7 +113,7 @@ class SerialNumberCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/serial-numbers")
-async def list_serial_numbers(
+def list_serial_numbers(
     company_id: str,
     status: Optional[str] = None,
     product_id: Optional[str] = None,
@@ -158,7 +159,7 @@ async def list_serial_numbers(
 
 
 @router.post("/companies/{company_id}/serial-numbers")
-async def create_serial_number(
+def create_serial_number(
     company_id: str,
     data: SerialNumberCreate,
     current_user: User = Depends(get_current_active_user),
@@ -202,7 +203,7 @@ async def create_serial_number(
 
 
 @router.get("/companies/{company_id}/serial-numbers/summary")
-async def serial_numbers_summary(
+def serial_numbers_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -238,7 +239,7 @@ class PriceLevelCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/price-levels")
-async def list_price_levels(
+def list_price_levels(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -262,7 +263,7 @@ async def list_price_levels(
 
 
 @router.post("/companies/{company_id}/price-levels")
-async def create_price_level(
+def create_price_level(
     company_id: str,
     data: PriceLevelCreate,
     current_user: User = Depends(get_current_active_user),
@@ -301,7 +302,7 @@ class DiscountRuleCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/discount-rules")
-async def list_discount_rules(
+def list_discount_rules(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -328,7 +329,7 @@ async def list_discount_rules(
 
 
 @router.post("/companies/{company_id}/discount-rules")
-async def create_discount_rule(
+def create_discount_rule(
     company_id: str,
     data: DiscountRuleCreate,
     current_user: User = Depends(get_current_active_user),
@@ -358,7 +359,7 @@ async def create_discount_rule(
 
 
 @router.get("/companies/{company_id}/discount-rules/{rule_id}")
-async def get_discount_rule(
+def get_discount_rule(
     company_id: str,
     rule_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -391,7 +392,7 @@ async def get_discount_rule(
 
 
 @router.delete("/companies/{company_id}/discount-rules/{rule_id}")
-async def delete_discount_rule(
+def delete_discount_rule(
     company_id: str,
     rule_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -417,7 +418,7 @@ async def delete_discount_rule(
 # ==================== MANUFACTURING ORDERS ====================
 
 @router.get("/companies/{company_id}/manufacturing-orders")
-async def list_manufacturing_orders(
+def list_manufacturing_orders(
     company_id: str,
     status: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -467,7 +468,7 @@ class ManufacturingOrderCreate(BaseModel):
 
 
 @router.post("/companies/{company_id}/manufacturing-orders")
-async def create_manufacturing_order(
+def create_manufacturing_order(
     company_id: str,
     data: ManufacturingOrderCreate,
     current_user: User = Depends(get_current_active_user),
@@ -504,7 +505,7 @@ async def create_manufacturing_order(
 # ==================== BILL OF MATERIALS ====================
 
 @router.get("/companies/{company_id}/bill-of-materials")
-async def list_bill_of_materials(
+def list_bill_of_materials(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -538,7 +539,7 @@ async def list_bill_of_materials(
 # ==================== STOCK VERIFICATION ====================
 
 @router.get("/companies/{company_id}/stock-adjustments")
-async def list_stock_adjustments(
+def list_stock_adjustments(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -578,7 +579,7 @@ async def list_stock_adjustments(
 
 
 @router.get("/companies/{company_id}/inventory/items/{product_id}/stock")
-async def get_product_stock(
+def get_product_stock(
     company_id: str,
     product_id: str,
     godown_id: Optional[str] = Query(None),
@@ -626,7 +627,7 @@ class StockAdjustmentCreate(BaseModel):
 
 
 @router.post("/companies/{company_id}/stock-adjustments")
-async def create_stock_adjustment(
+def create_stock_adjustment(
     company_id: str,
     data: StockAdjustmentCreate,
     current_user: User = Depends(get_current_active_user),
@@ -666,7 +667,7 @@ async def create_stock_adjustment(
 
 
 @router.get("/companies/{company_id}/inventory/items/{product_id}/stock")
-async def get_product_stock(
+def get_product_stock(
     company_id: str,
     product_id: str,
     godown_id: Optional[str] = None,
@@ -710,7 +711,7 @@ class PeriodLockCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/period-locks")
-async def list_period_locks(
+def list_period_locks(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -734,7 +735,7 @@ async def list_period_locks(
 
 
 @router.post("/companies/{company_id}/period-locks")
-async def create_period_lock(
+def create_period_lock(
     company_id: str,
     data: PeriodLockCreate,
     current_user: User = Depends(get_current_active_user),
@@ -761,7 +762,7 @@ async def create_period_lock(
 
 
 @router.post("/companies/{company_id}/period-locks/{lock_id}/deactivate")
-async def deactivate_period_lock(
+def deactivate_period_lock(
     company_id: str,
     lock_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -787,7 +788,7 @@ async def deactivate_period_lock(
 # ==================== AUDIT LOG ====================
 
 @router.get("/companies/{company_id}/audit-logs")
-async def list_audit_logs(
+def list_audit_logs(
     company_id: str,
     table_name: Optional[str] = None,
     action: Optional[str] = None,
@@ -837,7 +838,7 @@ class NarrationTemplateCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/narration-templates")
-async def list_narration_templates(
+def list_narration_templates(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -859,7 +860,7 @@ async def list_narration_templates(
 
 
 @router.post("/companies/{company_id}/narration-templates")
-async def create_narration_template(
+def create_narration_template(
     company_id: str,
     data: NarrationTemplateCreate,
     current_user: User = Depends(get_current_active_user),
@@ -885,7 +886,7 @@ async def create_narration_template(
 # ==================== NOTIFICATIONS ====================
 
 @router.get("/companies/{company_id}/notifications")
-async def list_notifications(
+def list_notifications(
     company_id: str,
     is_read: Optional[bool] = None,
     current_user: User = Depends(get_current_active_user),
@@ -915,7 +916,7 @@ async def list_notifications(
 
 
 @router.post("/companies/{company_id}/notifications/{notification_id}/read")
-async def mark_notification_read(
+def mark_notification_read(
     company_id: str,
     notification_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -938,7 +939,7 @@ async def mark_notification_read(
 
 
 @router.post("/companies/{company_id}/notifications/read-all")
-async def mark_all_notifications_read(
+def mark_all_notifications_read(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1000,7 +1001,7 @@ class RecurringTransactionUpdate(BaseModel):
 
 
 @router.get("/companies/{company_id}/recurring-transactions")
-async def list_recurring_transactions(
+def list_recurring_transactions(
     company_id: str,
     active_only: bool = False,
     current_user: User = Depends(get_current_active_user),
@@ -1063,7 +1064,7 @@ async def list_recurring_transactions(
 
 
 @router.post("/companies/{company_id}/recurring-transactions", status_code=status.HTTP_201_CREATED)
-async def create_recurring_transaction(
+def create_recurring_transaction(
     company_id: str,
     data: RecurringTransactionCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1117,7 +1118,7 @@ async def create_recurring_transaction(
 
 
 @router.get("/companies/{company_id}/recurring-transactions/{recurring_id}")
-async def get_recurring_transaction(
+def get_recurring_transaction(
     company_id: str,
     recurring_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1179,7 +1180,7 @@ async def get_recurring_transaction(
 
 
 @router.put("/companies/{company_id}/recurring-transactions/{recurring_id}")
-async def update_recurring_transaction(
+def update_recurring_transaction(
     company_id: str,
     recurring_id: str,
     data: RecurringTransactionUpdate,
@@ -1237,7 +1238,7 @@ async def update_recurring_transaction(
 
 
 @router.delete("/companies/{company_id}/recurring-transactions/{recurring_id}")
-async def delete_recurring_transaction(
+def delete_recurring_transaction(
     company_id: str,
     recurring_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1264,7 +1265,7 @@ async def delete_recurring_transaction(
 
 
 @router.post("/companies/{company_id}/recurring-transactions/{recurring_id}/pause")
-async def pause_recurring_transaction(
+def pause_recurring_transaction(
     company_id: str,
     recurring_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1291,7 +1292,7 @@ async def pause_recurring_transaction(
 
 
 @router.post("/companies/{company_id}/recurring-transactions/{recurring_id}/resume")
-async def resume_recurring_transaction(
+def resume_recurring_transaction(
     company_id: str,
     recurring_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1322,7 +1323,7 @@ async def resume_recurring_transaction(
 
 
 @router.post("/companies/{company_id}/recurring-transactions/process-due")
-async def process_due_recurring_transactions(
+def process_due_recurring_transactions(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1341,7 +1342,7 @@ async def process_due_recurring_transactions(
 # ==================== DELIVERY NOTES ====================
 
 @router.get("/companies/{company_id}/delivery-notes")
-async def list_delivery_notes(
+def list_delivery_notes(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1395,7 +1396,7 @@ async def list_delivery_notes(
 # ==================== RECEIPT NOTES ====================
 
 @router.get("/companies/{company_id}/receipt-notes")
-async def list_receipt_notes(
+def list_receipt_notes(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1491,7 +1492,7 @@ class SalesReturnCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/next-sales-return-number")
-async def get_next_sales_return_number(
+def get_next_sales_return_number(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1518,7 +1519,7 @@ async def get_next_sales_return_number(
 
 
 @router.get("/companies/{company_id}/sales-returns")
-async def list_sales_returns(
+def list_sales_returns(
     company_id: str,
     status: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1568,7 +1569,7 @@ async def list_sales_returns(
 
 
 @router.get("/companies/{company_id}/sales-returns/{return_id}")
-async def get_sales_return(
+def get_sales_return(
     company_id: str,
     return_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1644,7 +1645,8 @@ async def get_sales_return(
 
 
 @router.get("/companies/{company_id}/sales-returns/{return_id}/pdf")
-async def download_sales_return_pdf(
+@execution_policy(ExecutionPolicy.CPU)
+def download_sales_return_pdf(
     company_id: str,
     return_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1660,19 +1662,18 @@ async def download_sales_return_pdf(
     if not ret:
         raise HTTPException(status_code=404, detail="Sales return not found")
 
-    pdf_service = PDFService()
-    pdf_buffer = pdf_service.generate_sales_return_pdf(ret, company, ret.customer)
+    pdf_bytes = PDFRenderService().render("sales_return", ret, company, ret.customer)
     filename = f"SalesReturn_{ret.return_number or ret.id}.pdf"
 
     return Response(
-        content=pdf_buffer.getvalue(),
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.post("/companies/{company_id}/sales-returns", status_code=status.HTTP_201_CREATED)
-async def create_sales_return(
+def create_sales_return(
     company_id: str,
     data: SalesReturnCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1791,7 +1792,7 @@ async def create_sales_return(
 
 
 @router.put("/companies/{company_id}/sales-returns/{return_id}")
-async def update_sales_return(
+def update_sales_return(
     company_id: str,
     return_id: str,
     data: SalesReturnCreate,
@@ -1962,7 +1963,7 @@ class PurchaseReturnCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/next-purchase-return-number")
-async def get_next_purchase_return_number(
+def get_next_purchase_return_number(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1988,7 +1989,7 @@ async def get_next_purchase_return_number(
 
 
 @router.get("/companies/{company_id}/purchase-returns")
-async def list_purchase_returns(
+def list_purchase_returns(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
@@ -2077,7 +2078,7 @@ async def list_purchase_returns(
 
 
 @router.get("/companies/{company_id}/purchase-returns/{return_id}")
-async def get_purchase_return(
+def get_purchase_return(
     company_id: str,
     return_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -2157,7 +2158,8 @@ async def get_purchase_return(
 
 
 @router.get("/companies/{company_id}/purchase-returns/{return_id}/pdf")
-async def download_purchase_return_pdf(
+@execution_policy(ExecutionPolicy.CPU)
+def download_purchase_return_pdf(
     company_id: str,
     return_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -2173,19 +2175,18 @@ async def download_purchase_return_pdf(
     if not ret:
         raise HTTPException(status_code=404, detail="Purchase return not found")
 
-    pdf_service = PDFService()
-    pdf_buffer = pdf_service.generate_purchase_return_pdf(ret, company, ret.vendor)
+    pdf_bytes = PDFRenderService().render("purchase_return", ret, company, ret.vendor)
     filename = f"PurchaseReturn_{ret.return_number or ret.id}.pdf"
 
     return Response(
-        content=pdf_buffer.getvalue(),
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.post("/companies/{company_id}/purchase-returns", status_code=status.HTTP_201_CREATED)
-async def create_purchase_return(
+def create_purchase_return(
     company_id: str,
     data: PurchaseReturnCreate,
     current_user: User = Depends(get_current_active_user),
@@ -2316,7 +2317,7 @@ async def create_purchase_return(
 
 
 @router.put("/companies/{company_id}/purchase-returns/{return_id}")
-async def update_purchase_return(
+def update_purchase_return(
     company_id: str,
     return_id: str,
     data: PurchaseReturnCreate,
@@ -2452,7 +2453,7 @@ async def update_purchase_return(
 
 
 @router.delete("/companies/{company_id}/purchase-returns/{return_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_purchase_return(
+def delete_purchase_return(
     company_id: str,
     return_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -2490,7 +2491,7 @@ class CreditNoteCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/credit-notes")
-async def list_credit_notes(
+def list_credit_notes(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -2527,7 +2528,7 @@ async def list_credit_notes(
 
 
 @router.post("/companies/{company_id}/credit-notes", status_code=status.HTTP_201_CREATED)
-async def create_credit_note(
+def create_credit_note(
     company_id: str,
     data: CreditNoteCreate,
     current_user: User = Depends(get_current_active_user),
@@ -2638,7 +2639,7 @@ class DebitNoteCreate(BaseModel):
 
 
 @router.get("/companies/{company_id}/debit-notes")
-async def list_debit_notes(
+def list_debit_notes(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -2675,7 +2676,7 @@ async def list_debit_notes(
 
 
 @router.post("/companies/{company_id}/debit-notes", status_code=status.HTTP_201_CREATED)
-async def create_debit_note(
+def create_debit_note(
     company_id: str,
     data: DebitNoteCreate,
     current_user: User = Depends(get_current_active_user),
@@ -2771,7 +2772,7 @@ async def create_debit_note(
 # ==================== BUDGETS ====================
 
 @router.get("/companies/{company_id}/budgets")
-async def list_budgets(
+def list_budgets(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -2813,7 +2814,7 @@ async def list_budgets(
 # ==================== REORDER REPORT ====================
 
 @router.get("/companies/{company_id}/inventory/reorder-report")
-async def reorder_report(
+def reorder_report(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -2845,7 +2846,7 @@ async def reorder_report(
 # ==================== OUTSTANDING SUMMARY ====================
 
 @router.get("/companies/{company_id}/reports/outstanding-summary")
-async def outstanding_summary(
+def outstanding_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -2920,7 +2921,7 @@ async def outstanding_summary(
 # ==================== STOCK VALUATION REPORT ====================
 
 @router.get("/companies/{company_id}/reports/stock-valuation")
-async def stock_valuation_report(
+def stock_valuation_report(
     company_id: str,
     method: str = "average",
     current_user: User = Depends(get_current_active_user),
@@ -2962,7 +2963,7 @@ async def stock_valuation_report(
 # ==================== STOCK MOVEMENT REPORT ====================
 
 @router.get("/companies/{company_id}/reports/stock-movement")
-async def stock_movement_report(
+def stock_movement_report(
     company_id: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -3015,7 +3016,7 @@ async def stock_movement_report(
 # ==================== SALES ANALYSIS ====================
 
 @router.get("/companies/{company_id}/reports/sales-analysis")
-async def sales_analysis_report(
+def sales_analysis_report(
     company_id: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -3091,7 +3092,7 @@ async def sales_analysis_report(
 # ==================== SALES BY CUSTOMER ====================
 
 @router.get("/companies/{company_id}/reports/sales-by-customer")
-async def sales_by_customer_report(
+def sales_by_customer_report(
     company_id: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -3150,7 +3151,7 @@ async def sales_by_customer_report(
 # ==================== SALES BY PRODUCT ====================
 
 @router.get("/companies/{company_id}/reports/sales-by-product")
-async def sales_by_product_report(
+def sales_by_product_report(
     company_id: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -3210,7 +3211,7 @@ async def sales_by_product_report(
 # ==================== HSN SUMMARY ====================
 
 @router.get("/companies/{company_id}/gst/hsn-summary")
-async def hsn_summary_report(
+def hsn_summary_report(
     company_id: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -3282,7 +3283,7 @@ async def hsn_summary_report(
 # ==================== BANK ACCOUNTS (for dropdowns) ====================
 
 @router.get("/companies/{company_id}/bank-accounts-list")
-async def list_bank_accounts(
+def list_bank_accounts(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -3308,7 +3309,7 @@ async def list_bank_accounts(
 # ==================== IMPORT/EXPORT ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/import/template/{template_type}")
-async def download_import_template(
+def download_import_template(
     company_id: str,
     template_type: str,
     current_user: User = Depends(get_current_active_user),
@@ -3334,7 +3335,7 @@ async def download_import_template(
 
 
 @router.post("/companies/{company_id}/import/{import_type}")
-async def import_data(
+def import_data(
     company_id: str,
     import_type: str,
     file: UploadFile = File(...),
@@ -3350,7 +3351,7 @@ async def import_data(
         raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are supported")
     
     try:
-        file_data = await file.read()
+        file_data = file.file.read()
         service = ExcelService(db)
         
         if import_type == 'customers':
@@ -3376,7 +3377,7 @@ async def import_data(
 # ==================== EXPORT ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/export/{export_type}")
-async def export_data(
+def export_data(
     company_id: str,
     export_type: str,
     from_date: Optional[date] = None,
@@ -3531,7 +3532,7 @@ async def export_data(
 # ==================== EXCHANGE RATES ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/exchange-rates")
-async def list_exchange_rates(
+def list_exchange_rates(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -3555,7 +3556,7 @@ async def list_exchange_rates(
 
 
 @router.post("/companies/{company_id}/exchange-rates")
-async def create_exchange_rate(
+def create_exchange_rate(
     company_id: str,
     data: dict,
     current_user: User = Depends(get_current_active_user),
@@ -3591,7 +3592,7 @@ async def create_exchange_rate(
 # ==================== BILL ALLOCATION ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/bill-allocation/outstanding")
-async def get_bill_allocation_outstanding(
+def get_bill_allocation_outstanding(
     company_id: str,
     type: str = Query(..., pattern="^(receivables|payables)$"),
     current_user: User = Depends(get_current_active_user),
@@ -3599,7 +3600,7 @@ async def get_bill_allocation_outstanding(
 ):
     """Get outstanding invoices for bill allocation."""
     from app.services.bill_allocation_service import BillAllocationService
-    from app.database.models import Invoice, PurchaseInvoice, Customer
+    from app.database.models import Customer, Vendor
     
     get_company_or_404(company_id, current_user, db)
     
@@ -3608,18 +3609,16 @@ async def get_bill_allocation_outstanding(
     invoice_type = 'sales' if type == 'receivables' else 'purchase'
     outstanding_list = service.get_outstanding_invoices(company_id, invoice_type=invoice_type)
     
-    # Enrich with party names
+    # Enrich with party names (one query for all parties)
+    party_model, party_key = (Customer, 'customer_id') if invoice_type == 'sales' else (Vendor, 'vendor_id')
+    party_ids = {inv[party_key] for inv in outstanding_list if inv.get(party_key)}
+    party_names = dict(
+        db.query(party_model.id, party_model.name).filter(party_model.id.in_(party_ids)).all()
+    ) if party_ids else {}
+    
     result = []
     for inv in outstanding_list:
-        party_name = "Unknown"
-        if invoice_type == 'sales':
-            if inv.get('customer_id'):
-                customer = db.query(Customer).filter(Customer.id == inv['customer_id']).first()
-                party_name = customer.name if customer else "Unknown"
-        else:
-            if inv.get('vendor_id'):
-                vendor = db.query(Customer).filter(Customer.id == inv['vendor_id']).first()
-                party_name = vendor.name if vendor else "Unknown"
+        party_name = party_names.get(inv.get(party_key)) or "Unknown"
         
         result.append({
             "id": inv['id'],
@@ -3638,7 +3637,7 @@ async def get_bill_allocation_outstanding(
 # ==================== BACKUP ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/backups")
-async def list_backups(
+def list_backups(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -3652,7 +3651,7 @@ async def list_backups(
 
 
 @router.post("/companies/{company_id}/backups")
-async def create_backup(
+def create_backup(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -3675,7 +3674,7 @@ async def create_backup(
 
 
 @router.get("/companies/{company_id}/backups/{backup_id}/download")
-async def download_backup(
+def download_backup(
     company_id: str,
     backup_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -3696,7 +3695,7 @@ async def download_backup(
 
 
 @router.delete("/companies/{company_id}/backups/{backup_id}")
-async def delete_backup(
+def delete_backup(
     company_id: str,
     backup_id: str,
     current_user: User = Depends(get_current_active_user),
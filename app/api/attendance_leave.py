@@ -49,7 +49,7 @@ class BulkAttendanceMark(BaseModel):
 # ==================== ATTENDANCE ENDPOINTS ====================
 
 @router.get("/attendance")
-async def list_attendance(
+def list_attendance(
     company_id: str,
     employee_id: Optional[str] = None,
     date: Optional[date] = None,
@@ -96,7 +96,7 @@ async def list_attendance(
 
 
 @router.post("/attendance")
-async def mark_attendance(
+def mark_attendance(
     company_id: str,
     data: AttendanceMark,
     current_user: User = Depends(get_current_active_user),
@@ -143,7 +143,7 @@ async def mark_attendance(
 
 
 @router.post("/attendance/bulk")
-async def bulk_mark_attendance(
+def bulk_mark_attendance(
     company_id: str,
     data: BulkAttendanceMark,
     current_user: User = Depends(get_current_active_user),
@@ -193,7 +193,7 @@ async def bulk_mark_attendance(
 
 
 @router.get("/attendance/summary/{employee_id}/{month}/{year}")
-async def attendance_summary(
+def attendance_summary(
     company_id: str,
     employee_id: str,
     month: int,
@@ -240,7 +240,7 @@ async def attendance_summary(
 
 
 @router.get("/attendance/report")
-async def attendance_report(
+def attendance_report(
     company_id: str,
     month: int,
     year: int,
@@ -292,7 +292,7 @@ async def attendance_report(
 
 
 @router.get("/attendance/summary")
-async def attendance_summary_alias(
+def attendance_summary_alias(
     company_id: str,
     month: int,
     year: int,
@@ -360,7 +360,7 @@ class LeaveTypeCreate(BaseModel):
 # ==================== LEAVE TYPE ENDPOINTS ====================
 
 @router.get("/leaves/types")
-async def list_leave_types(
+def list_leave_types(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -387,7 +387,7 @@ async def list_leave_types(
 
 
 @router.post("/leaves/types")
-async def create_leave_type(
+def create_leave_type(
     company_id: str,
     data: LeaveTypeCreate,
     current_user: User = Depends(get_current_active_user),
@@ -416,17 +416,17 @@ async def create_leave_type(
 
 # Alias endpoints to match frontend expectations
 @router.get("/leave-types")
-async def list_leave_types_alias(
+def list_leave_types_alias(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """List all leave types (alias for /leaves/types)."""
-    return await list_leave_types(company_id, current_user, db)
+    return list_leave_types(company_id, current_user, db)
 
 
 @router.post("/leave-types")
-async def create_leave_type_alias(
+def create_leave_type_alias(
     company_id: str,
     data: dict,
     current_user: User = Depends(get_current_active_user),
@@ -443,13 +443,13 @@ async def create_leave_type_alias(
         max_carry_forward=data.get("max_carry_forward"),
         description=data.get("description"),
     )
-    return await create_leave_type(company_id, leave_type_data, current_user, db)
+    return create_leave_type(company_id, leave_type_data, current_user, db)
 
 
 # ==================== LEAVE BALANCE ENDPOINTS ====================
 
 @router.get("/leaves/balances")
-async def list_leave_balances(
+def list_leave_balances(
     company_id: str,
     employee_id: Optional[str] = None,
     financial_year: Optional[str] = None,
@@ -492,7 +492,7 @@ async def list_leave_balances(
 
 # Alias endpoint for frontend compatibility
 @router.get("/leave-balances")
-async def list_leave_balances_alias(
+def list_leave_balances_alias(
     company_id: str,
     employee_id: Optional[str] = None,
     financial_year: Optional[str] = None,
@@ -500,11 +500,11 @@ async def list_leave_balances_alias(
     db: Session = Depends(get_db)
 ):
     """List leave balances (alias for /leaves/balances)."""
-    return await list_leave_balances(company_id, employee_id, financial_year, current_user, db)
+    return list_leave_balances(company_id, employee_id, financial_year, current_user, db)
 
 
 @router.post("/leaves/balances/initialize")
-async def initialize_leave_balances(
+def initialize_leave_balances(
     company_id: str,
     financial_year: str,
     current_user: User = Depends(get_current_active_user),
@@ -567,7 +567,7 @@ class LeaveApplicationCreate(BaseModel):
 # ==================== LEAVE APPLICATION ENDPOINTS ====================
 
 @router.get("/leaves/applications")
-async def list_leave_applications(
+def list_leave_applications(
     company_id: str,
     employee_id: Optional[str] = None,
     status: Optional[str] = None,
@@ -620,7 +620,7 @@ async def list_leave_applications(
 
 # Alias endpoint for frontend compatibility
 @router.get("/leave-applications")
-async def list_leave_applications_alias(
+def list_leave_applications_alias(
     company_id: str,
     employee_id: Optional[str] = None,
     status: Optional[str] = None,
@@ -628,11 +628,11 @@ async def list_leave_applications_alias(
     db: Session = Depends(get_db)
 ):
     """List leave applications (alias for /leaves/applications)."""
-    return await list_leave_applications(company_id, employee_id, status, current_user, db)
+    return list_leave_applications(company_id, employee_id, status, current_user, db)
 
 
 @router.post("/leaves/applications")
-async def create_leave_application(
+def create_leave_application(
     company_id: str,
     data: LeaveApplicationCreate,
     current_user: User = Depends(get_current_active_user),
@@ -666,7 +666,7 @@ async def create_leave_application(
 
 
 @router.post("/leaves/applications/{application_id}/approve")
-async def approve_leave_application(
+def approve_leave_application(
     company_id: str,
     application_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -711,7 +711,7 @@ async def approve_leave_application(
 
 
 @router.post("/leaves/applications/{application_id}/reject")
-async def reject_leave_application(
+def reject_leave_application(
     company_id: str,
     application_id: str,
     reason: str = "",
@@ -740,7 +740,7 @@ async def reject_leave_application(
 
 # Alias endpoints for frontend compatibility
 @router.post("/leave-applications/{application_id}/{action}")
-async def leave_application_action_alias(
+def leave_application_action_alias(
     company_id: str,
     application_id: str,
     action: str,
@@ -749,9 +749,9 @@ async def leave_application_action_alias(
 ):
     """Approve or reject leave application (alias endpoint)."""
     if action == "approve":
-        return await approve_leave_application(company_id, application_id, current_user, db)
+        return approve_leave_application(company_id, application_id, current_user, db)
     elif action == "reject":
-        return await reject_leave_application(company_id, application_id, "", current_user, db)
+        return reject_leave_application(company_id, application_id, "", current_user, db)
     else:
         raise HTTPException(status_code=400, detail=f"Unknown action: {action}")
 
@@ -759,7 +759,7 @@ async def leave_application_action_alias(
 # ==================== FORM 16 ====================
 
 @router.get("/form16/{employee_id}/{financial_year}")
-async def generate_form16(
+def generate_form16(
     company_id: str,
     employee_id: str,
     financial_year: str,
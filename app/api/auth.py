@@ -85,7 +85,7 @@ def get_employee_by_email(db: Session, email: str):
     return employee
 # Update the login endpoint
 @router.post("/login", response_model=LoginResponse)
-async def login(data: UserLogin, db: Session = Depends(get_db)):
+def login(data: UserLogin, db: Session = Depends(get_db)):
     """
     Login endpoint for both users and employees.
     First checks if it's a regular user (Supabase), 
@@ -94,7 +94,7 @@ async def login(data: UserLogin, db: Session = Depends(get_db)):
     try:
         # FIRST: Try to login as regular user with Supabase
         try:
-            result = await auth_helper.sign_in(data.email, data.password)
+            result = auth_helper.sign_in_sync(data.email, data.password)
             
             user_info = result.get("user") or {}
             session_info = result.get("session") or {}
@@ -1,7 +1,7 @@
 """
 Banking API - Cheques, PDC, Bank Reconciliation, Recurring Transactions
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
@@ -67,7 +67,7 @@ class ChequeReceive(BaseModel):
 # ==================== CHEQUE ENDPOINTS ====================
 
 @router.post("/companies/{company_id}/cheque-books")
-async def create_cheque_book(
+def create_cheque_book(
     company_id: str,
     data: ChequeBookCreate,
     current_user: User = Depends(get_current_active_user),
@@ -89,7 +89,7 @@ async def create_cheque_book(
 
 
 @router.get("/companies/{company_id}/cheque-books")
-async def list_cheque_books(
+def list_cheque_books(
     company_id: str,
     bank_account_id: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -114,7 +114,7 @@ async def list_cheque_books(
 
 
 @router.post("/companies/{company_id}/cheques/issue")
-async def issue_cheque(
+def issue_cheque(
     company_id: str,
     data: ChequeIssue,
     current_user: User = Depends(get_current_active_user),
@@ -140,7 +140,7 @@ async def issue_cheque(
 
 
 @router.post("/companies/{company_id}/cheques/receive")
-async def receive_cheque(
+def receive_cheque(
     company_id: str,
     data: ChequeReceive,
     current_user: User = Depends(get_current_active_user),
@@ -166,7 +166,7 @@ async def receive_cheque(
 
 
 @router.get("/companies/{company_id}/cheques")
-async def list_cheques(
+def list_cheques(
     company_id: str,
     cheque_type: Optional[str] = None,
     status: Optional[str] = None,
@@ -205,7 +205,7 @@ async def list_cheques(
 
 
 @router.post("/companies/{company_id}/cheques/{cheque_id}/deposit")
-async def deposit_cheque(
+def deposit_cheque(
     company_id: str,
     cheque_id: str,
     bank_account_id: str,
@@ -220,7 +220,7 @@ async def deposit_cheque(
 
 
 @router.post("/companies/{company_id}/cheques/{cheque_id}/clear")
-async def clear_cheque(
+def clear_cheque(
     company_id: str,
     cheque_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -234,7 +234,7 @@ async def clear_cheque(
 
 
 @router.post("/companies/{company_id}/cheques/{cheque_id}/bounce")
-async def bounce_cheque(
+def bounce_cheque(
     company_id: str,
     cheque_id: str,
     reason: Optional[str] = None,
@@ -250,7 +250,7 @@ async def bounce_cheque(
 
 
 @router.post("/companies/{company_id}/cheques/{cheque_id}/cancel")
-async def cancel_cheque(
+def cancel_cheque(
     company_id: str,
     cheque_id: str,
     reason: Optional[str] = None,
@@ -266,7 +266,7 @@ async def cancel_cheque(
 
 
 @router.get("/companies/{company_id}/cheques/{cheque_id}")
-async def get_cheque(
+def get_cheque(
     company_id: str,
     cheque_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -318,7 +318,7 @@ class ChequeUpdate(BaseModel):
 
 
 @router.put("/companies/{company_id}/cheques/{cheque_id}")
-async def update_cheque(
+def update_cheque(
     company_id: str,
     cheque_id: str,
     data: ChequeUpdate,
@@ -352,7 +352,7 @@ async def update_cheque(
 
 
 @router.delete("/companies/{company_id}/cheques/{cheque_id}")
-async def delete_cheque(
+def delete_cheque(
     company_id: str,
     cheque_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -375,7 +375,7 @@ async def delete_cheque(
 
 
 @router.get("/companies/{company_id}/cheques/summary")
-async def cheque_summary(
+def cheque_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -402,7 +402,7 @@ class PDCCreate(BaseModel):
 
 
 @router.post("/companies/{company_id}/pdc")
-async def create_pdc(
+def create_pdc(
     company_id: str,
     data: PDCCreate,
     current_user: User = Depends(get_current_active_user),
@@ -429,7 +429,7 @@ async def create_pdc(
 
 
 @router.get("/companies/{company_id}/pdc")
-async def list_pdc(
+def list_pdc(
     company_id: str,
     pdc_type: Optional[str] = None,
     status: Optional[str] = None,
@@ -454,7 +454,7 @@ async def list_pdc(
 
 
 @router.get("/companies/{company_id}/pdc/maturing")
-async def maturing_pdc(
+def maturing_pdc(
     company_id: str,
     days: int = 7,
     current_user: User = Depends(get_current_active_user),
@@ -475,7 +475,7 @@ async def maturing_pdc(
 
 
 @router.get("/companies/{company_id}/pdc/summary")
-async def pdc_summary(
+def pdc_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -507,7 +507,7 @@ class BulkBankDateRequest(BaseModel):
 # ==================== TALLY-STYLE BRS ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/bank-accounts/{bank_account_id}/unreconciled")
-async def get_unreconciled_entries(
+def get_unreconciled_entries(
     company_id: str,
     bank_account_id: str,
     as_of_date: Optional[str] = None,
@@ -529,7 +529,7 @@ async def get_unreconciled_entries(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/entries/{entry_id}/set-bank-date")
-async def set_entry_bank_date(
+def set_entry_bank_date(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -549,7 +549,7 @@ async def set_entry_bank_date(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/entries/{entry_id}/clear-bank-date")
-async def clear_entry_bank_date(
+def clear_entry_bank_date(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -564,7 +564,7 @@ async def clear_entry_bank_date(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/bulk-reconcile")
-async def bulk_set_bank_dates(
+def bulk_set_bank_dates(
     company_id: str,
     bank_account_id: str,
     data: BulkBankDateRequest,
@@ -579,7 +579,7 @@ async def bulk_set_bank_dates(
 
 
 @router.get("/companies/{company_id}/bank-accounts/{bank_account_id}/brs")
-async def get_brs_report(
+def get_brs_report(
     company_id: str,
     bank_account_id: str,
     as_of_date: str,
@@ -603,7 +603,7 @@ async def get_brs_report(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/auto-reconcile")
-async def auto_reconcile_entries(
+def auto_reconcile_entries(
     company_id: str,
     bank_account_id: str,
     as_of_date: Optional[str] = None,
@@ -647,7 +647,7 @@ class ManualMatchRequest(BaseModel):
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/import-statement")
-async def import_bank_statement(
+def import_bank_statement(
     company_id: str,
     bank_account_id: str,
     data: ImportStatementRequest,
@@ -681,8 +681,40 @@ async def import_bank_statement(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/import-statement/upload")
+def upload_bank_statement_file(
+    company_id: str,
+    bank_account_id: str,
+    file: UploadFile = File(...),
+    bank_name: Optional[str] = None,
+    auto_match: bool = True,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Import a bank statement CSV file to BankStatementEntry table.
+    
+    Same as import-statement, but the file is streamed from the upload
+    instead of being sent as a JSON string - use this for large statements.
+    """
+    get_company_or_404(company_id, current_user, db)
+    service = BankStatementImportService(db)
+    
+    try:
+        return service.import_statement(
+            company_id=company_id,
+            bank_account_id=bank_account_id,
+            content=file.file,
+            file_name=file.filename or "import.csv",
+            bank_name=bank_name,
+            auto_match=auto_match,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/companies/{company_id}/bank-accounts/{bank_account_id}/statement-entries")
-async def get_statement_entries(
+def get_statement_entries(
     company_id: str,
     bank_account_id: str,
     status: Optional[str] = None,
@@ -712,7 +744,7 @@ async def get_statement_entries(
 
 
 @router.get("/companies/{company_id}/bank-accounts/{bank_account_id}/reconciliation-summary")
-async def get_reconciliation_summary(
+def get_reconciliation_summary(
     company_id: str,
     bank_account_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -726,7 +758,7 @@ async def get_reconciliation_summary(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/statement-entries/{entry_id}/create-transaction")
-async def create_transaction_from_entry(
+def create_transaction_from_entry(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -758,7 +790,7 @@ async def create_transaction_from_entry(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/statement-entries/{entry_id}/mark-as-charges")
-async def mark_entry_as_charges(
+def mark_entry_as_charges(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -790,7 +822,7 @@ async def mark_entry_as_charges(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/statement-entries/{entry_id}/manual-match")
-async def manual_match_entries(
+def manual_match_entries(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -816,7 +848,7 @@ async def manual_match_entries(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/statement-entries/{entry_id}/unmatch")
-async def unmatch_statement_entry(
+def unmatch_statement_entry(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -834,7 +866,7 @@ async def unmatch_statement_entry(
 
 
 @router.delete("/companies/{company_id}/bank-accounts/{bank_account_id}/statement-entries/{entry_id}")
-async def delete_statement_entry(
+def delete_statement_entry(
     company_id: str,
     bank_account_id: str,
     entry_id: str,
@@ -852,7 +884,7 @@ async def delete_statement_entry(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/auto-match-statement")
-async def auto_match_statement_entries(
+def auto_match_statement_entries(
     company_id: str,
     bank_account_id: str,
     tolerance_days: int = 3,
@@ -889,7 +921,7 @@ class MonthlyReconciliationUpdate(BaseModel):
 
 
 @router.get("/companies/{company_id}/bank-accounts/{bank_account_id}/monthly-reconciliation/{year}/{month}")
-async def get_monthly_reconciliation(
+def get_monthly_reconciliation(
     company_id: str,
     bank_account_id: str,
     year: int,
@@ -913,7 +945,7 @@ async def get_monthly_reconciliation(
 
 
 @router.put("/companies/{company_id}/bank-accounts/{bank_account_id}/monthly-reconciliation/{recon_id}")
-async def update_monthly_reconciliation(
+def update_monthly_reconciliation(
     company_id: str,
     bank_account_id: str,
     recon_id: str,
@@ -929,7 +961,7 @@ async def update_monthly_reconciliation(
 
 
 @router.post("/companies/{company_id}/bank-accounts/{bank_account_id}/monthly-reconciliation/{recon_id}/close")
-async def close_monthly_reconciliation(
+def close_monthly_reconciliation(
     company_id: str,
     bank_account_id: str,
     recon_id: str,
@@ -946,7 +978,7 @@ async def close_monthly_reconciliation(
 # ==================== LEGACY SESSION-BASED ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/bank-reconciliations")
-async def list_reconciliations(
+def list_reconciliations(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -981,7 +1013,7 @@ async def list_reconciliations(
 
 
 @router.post("/companies/{company_id}/bank-reconciliation")
-async def create_reconciliation(
+def create_reconciliation(
     company_id: str,
     data: ReconciliationCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1017,7 +1049,7 @@ async def create_reconciliation(
 
 
 @router.get("/companies/{company_id}/bank-reconciliation/{recon_id}/entries")
-async def get_reconciliation_entries(
+def get_reconciliation_entries(
     company_id: str,
     recon_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1056,7 +1088,7 @@ async def get_reconciliation_entries(
 
 
 @router.post("/companies/{company_id}/bank-reconciliation/{recon_id}/auto-match")
-async def auto_match_reconciliation(
+def auto_match_reconciliation(
     company_id: str,
     recon_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1075,7 +1107,7 @@ async def auto_match_reconciliation(
 
 
 @router.post("/companies/{company_id}/bank-reconciliation/{recon_id}/reconcile-entry/{entry_id}")
-async def reconcile_entry(
+def reconcile_entry(
     company_id: str,
     recon_id: str,
     entry_id: str,
@@ -1095,7 +1127,7 @@ async def reconcile_entry(
 
 
 @router.post("/companies/{company_id}/bank-reconciliation/{recon_id}/finalize")
-async def finalize_reconciliation(
+def finalize_reconciliation(
     company_id: str,
     recon_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1115,7 +1147,7 @@ async def finalize_reconciliation(
 
 
 @router.get("/companies/{company_id}/bank-reconciliation/{recon_id}/report")
-async def reconciliation_report(
+def reconciliation_report(
     company_id: str,
     recon_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1149,7 +1181,7 @@ async def reconciliation_report(
 # ==================== CASH FLOW FORECAST ====================
 
 @router.get("/companies/{company_id}/cash-forecast")
-async def cash_flow_forecast(
+def cash_flow_forecast(
     company_id: str,
     days: int = 30,
     current_user: User = Depends(get_current_active_user),
@@ -1162,7 +1194,7 @@ async def cash_flow_forecast(
 
 
 @router.get("/companies/{company_id}/cash-forecast/weekly")
-async def weekly_cash_forecast(
+def weekly_cash_forecast(
     company_id: str,
     weeks: int = 4,
     current_user: User = Depends(get_current_active_user),
@@ -72,7 +72,7 @@ def get_creator_user_id_or_403(
 
 
 @router.get("/", response_model=BrandListResponse)
-async def list_brands(
+def list_brands(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -94,7 +94,7 @@ async def list_brands(
 
 
 @router.get("/search", response_model=list[BrandResponse])
-async def search_brands(
+def search_brands(
     company_id: str,
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=100),
@@ -110,7 +110,7 @@ async def search_brands(
 
 
 @router.post("/", response_model=BrandResponse, status_code=status.HTTP_201_CREATED)
-async def create_brand(
+def create_brand(
     company_id: str,
     brand_data: BrandCreate,
     current_user: User = Depends(get_current_active_user),
@@ -128,7 +128,7 @@ async def create_brand(
 
 
 @router.get("/{brand_id}", response_model=BrandResponse)
-async def get_brand(
+def get_brand(
     company_id: str,
     brand_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -146,7 +146,7 @@ async def get_brand(
 
 
 @router.put("/{brand_id}", response_model=BrandResponse)
-async def update_brand(
+def update_brand(
     company_id: str,
     brand_id: str,
     brand_data: BrandUpdate,
@@ -169,7 +169,7 @@ async def update_brand(
 
 
 @router.delete("/{brand_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_brand(
+def delete_brand(
     company_id: str,
     brand_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -16,9 +16,16 @@ from app.database.models import (
 )
 from app.auth.dependencies import get_current_active_user
 from app.services.company_service import CompanyService
+from app.services.sales_rollup_service import SalesRollupService
+from app.services.gst_return_cache_service import (
+    GSTReturnCacheService, RETURN_DASHBOARD_GST_SUMMARY, RETURN_DASHBOARD_ITC_SUMMARY, EARLIEST,
+)
 
 router = APIRouter(prefix="/companies/{company_id}/business", tags=["Business Dashboard"])
 
+# Invoice statuses left out of sales totals
+NON_SALES_STATUSES = [InvoiceStatus.DRAFT, InvoiceStatus.CANCELLED, InvoiceStatus.VOID]
+
 
 def get_company_or_404(company_id: str, current_user: User, db: Session) -> Company:
     """Get company or raise 404."""
@@ -54,6 +61,14 @@ def get_period_dates(period: str = "month") -> tuple:
     return start_date, end_date
 
 
+def _period_bounds(start_date: date, end_date: date) -> tuple:
+    """[start, end) datetimes of an inclusive date range, as the GST return cache keys it."""
+    return (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+    )
+
+
 # ============== Response Models ==============
 
 class BusinessSummary(BaseModel):
@@ -110,7 +125,7 @@ class RecentActivityResponse(BaseModel):
 # ============== Endpoints ==============
 
 @router.get("/summary", response_model=BusinessSummary)
-async def get_business_summary(
+def get_business_summary(
     company_id: str,
     period: str = Query("month", pattern="^(month|quarter|year)$"),
     current_user: User = Depends(get_current_active_user),
@@ -120,13 +135,10 @@ async def get_business_summary(
     company = get_company_or_404(company_id, current_user, db)
     start_date, end_date = get_period_dates(period)
     
-    # Total Sales (from invoices)
-    sales_result = db.query(func.sum(Invoice.total_amount)).filter(
-        Invoice.company_id == company.id,
-        Invoice.invoice_date >= start_date,
-        Invoice.invoice_date <= end_date,
-        Invoice.status.notin_([InvoiceStatus.DRAFT, InvoiceStatus.CANCELLED, InvoiceStatus.VOID])
-    ).scalar() or Decimal("0")
+    # Total Sales (from the daily sales rollup)
+    sales_result = SalesRollupService(db).totals(
+        company.id, from_date=start_date, to_date=end_date, exclude_statuses=NON_SALES_STATUSES,
+    ).total_amount or Decimal("0")
     
     # Total Purchases (from purchase invoices)
     purchases_result = db.query(func.sum(Purchase.total_amount)).filter(
@@ -145,7 +157,7 @@ async def get_business_summary(
 
 
 @router.get("/gst-summary", response_model=GSTSummaryResponse)
-async def get_gst_summary(
+def get_gst_summary(
     company_id: str,
     period: str = Query("month", pattern="^(month|quarter|year)$"),
     current_user: User = Depends(get_current_active_user),
@@ -155,17 +167,17 @@ async def get_gst_summary(
     company = get_company_or_404(company_id, current_user, db)
     start_date, end_date = get_period_dates(period)
     
-    # Output GST (from sales invoices)
-    output_gst = db.query(
-        func.coalesce(func.sum(Invoice.cgst_amount), 0).label('cgst'),
-        func.coalesce(func.sum(Invoice.sgst_amount), 0).label('sgst'),
-        func.coalesce(func.sum(Invoice.igst_amount), 0).label('igst'),
-    ).filter(
-        Invoice.company_id == company.id,
-        Invoice.invoice_date >= start_date,
-        Invoice.invoice_date <= end_date,
-        Invoice.status.notin_([InvoiceStatus.DRAFT, InvoiceStatus.CANCELLED, InvoiceStatus.VOID])
-    ).first()
+    return GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_DASHBOARD_GST_SUMMARY, *_period_bounds(start_date, end_date),
+        GSTSummaryResponse, lambda: _gst_summary(db, company, period, start_date, end_date),
+    )
+
+
+def _gst_summary(db: Session, company: Company, period: str, start_date: date, end_date: date) -> GSTSummaryResponse:
+    # Output GST (from the daily sales rollup)
+    output_gst = SalesRollupService(db).totals(
+        company.id, from_date=start_date, to_date=end_date, exclude_statuses=NON_SALES_STATUSES,
+    )
     
     # Input GST (from purchase invoices)
     input_gst = db.query(
@@ -180,9 +192,9 @@ async def get_gst_summary(
         Purchase.itc_eligible == True
     ).first()
     
-    cgst_out = float(output_gst.cgst or 0)
-    sgst_out = float(output_gst.sgst or 0)
-    igst_out = float(output_gst.igst or 0)
+    cgst_out = float(output_gst.cgst_amount or 0)
+    sgst_out = float(output_gst.sgst_amount or 0)
+    igst_out = float(output_gst.igst_amount or 0)
     cgst_in = float(input_gst.cgst or 0)
     sgst_in = float(input_gst.sgst or 0)
     igst_in = float(input_gst.igst or 0)
@@ -210,7 +222,7 @@ async def get_gst_summary(
 
 
 @router.get("/tds-summary", response_model=TDSSummaryResponse)
-async def get_tds_summary(
+def get_tds_summary(
     company_id: str,
     period: str = Query("month", pattern="^(month|quarter|year)$"),
     current_user: User = Depends(get_current_active_user),
@@ -257,7 +269,7 @@ async def get_tds_summary(
 
 
 @router.get("/itc-summary", response_model=ITCSummaryResponse)
-async def get_itc_summary(
+def get_itc_summary(
     company_id: str,
     period: str = Query("month", pattern="^(month|quarter|year)$"),
     current_user: User = Depends(get_current_active_user),
@@ -267,6 +279,15 @@ async def get_itc_summary(
     company = get_company_or_404(company_id, current_user, db)
     start_date, end_date = get_period_dates(period)
     
+    # Expiring ITC looks at every older purchase, so any earlier purchase invalidates it
+    return GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_DASHBOARD_ITC_SUMMARY, *_period_bounds(start_date, end_date),
+        ITCSummaryResponse, lambda: _itc_summary(db, company, period, start_date, end_date),
+        covers_from=EARLIEST,
+    )
+
+
+def _itc_summary(db: Session, company: Company, period: str, start_date: date, end_date: date) -> ITCSummaryResponse:
     # Available ITC (from eligible purchase invoices not yet claimed)
     available = db.query(
         func.coalesce(func.sum(
@@ -326,7 +347,7 @@ async def get_itc_summary(
 
 
 @router.get("/recent-activity", response_model=RecentActivityResponse)
-async def get_recent_activity(
+def get_recent_activity(
     company_id: str,
     limit: int = Query(10, ge=1, le=50),
     current_user: User = Depends(get_current_active_user),
@@ -395,7 +416,7 @@ async def get_recent_activity(
 
 
 @router.get("/outstanding")
-async def get_outstanding_summary(
+def get_outstanding_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
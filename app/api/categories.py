@@ -74,7 +74,7 @@ def get_creator_user_id_or_403(
 
 
 @router.get("/", response_model=CategoryListResponse)
-async def list_categories(
+def list_categories(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -96,7 +96,7 @@ async def list_categories(
 
 
 @router.get("/search", response_model=list[CategoryResponse])
-async def search_categories(
+def search_categories(
     company_id: str,
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=100),
@@ -112,7 +112,7 @@ async def search_categories(
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
-async def create_category(
+def create_category(
     company_id: str,
     category_data: CategoryCreate,
     current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user),
@@ -130,7 +130,7 @@ async def create_category(
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(
+def get_category(
     company_id: str,
     category_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -148,7 +148,7 @@ async def get_category(
 
 
 @router.put("/{category_id}", response_model=CategoryResponse)
-async def update_category(
+def update_category(
     company_id: str,
     category_id: str,
     category_data: CategoryUpdate,
@@ -171,7 +171,7 @@ async def update_category(
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_category(
+def delete_category(
     company_id: str,
     category_id: str,
     current_user: User = Depends(get_current_active_user),
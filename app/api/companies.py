@@ -15,7 +15,7 @@ from app.auth.dependencies import get_current_user,get_actual_user
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
 @router.post("", response_model=CompanyResponse, status_code=status.HTTP_201_CREATED)
-async def create_company(
+def create_company(
     data: CompanyCreate,
     auth_data: Union[User, Dict[str, Any]] = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -30,7 +30,7 @@ async def create_company(
 
 
 @router.get("", response_model=List[CompanyResponse])
-async def list_companies(
+def list_companies(
     auth_data: Union[User, Dict[str, Any]] = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -53,7 +53,7 @@ async def list_companies(
     
 
 @router.get("/{company_id}", response_model=CompanyResponse)
-async def get_company(
+def get_company(
     company_id: str,
     auth_data: Union[User, Dict[str, Any]] = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -92,7 +92,7 @@ async def get_company(
     
 
 @router.put("/{company_id}", response_model=CompanyResponse)
-async def update_company(
+def update_company(
     company_id: str,
     data: CompanyUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -113,7 +113,7 @@ async def update_company(
 
 
 @router.delete("/{company_id}")
-async def delete_company(
+def delete_company(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -134,7 +134,7 @@ async def delete_company(
 
 # Bank Account routes
 @router.post("/{company_id}/bank-accounts", response_model=BankAccountResponse, status_code=status.HTTP_201_CREATED)
-async def add_bank_account(
+def add_bank_account(
     company_id: str,
     data: BankAccountCreate,
     current_user: User = Depends(get_current_active_user),
@@ -155,7 +155,7 @@ async def add_bank_account(
 
 
 @router.get("/{company_id}/bank-accounts", response_model=List[BankAccountResponse])
-async def list_bank_accounts(
+def list_bank_accounts(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -175,7 +175,7 @@ async def list_bank_accounts(
 
 
 @router.get("/{company_id}/bank-accounts/{bank_account_id}", response_model=BankAccountResponse)
-async def get_bank_account(
+def get_bank_account(
     company_id: str,
     bank_account_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -203,7 +203,7 @@ async def get_bank_account(
 
 
 @router.put("/{company_id}/bank-accounts/{bank_account_id}", response_model=BankAccountResponse)
-async def update_bank_account(
+def update_bank_account(
     company_id: str,
     bank_account_id: str,
     data: BankAccountUpdate,
@@ -233,7 +233,7 @@ async def update_bank_account(
 
 
 @router.delete("/{company_id}/bank-accounts/{bank_account_id}")
-async def delete_bank_account(
+def delete_bank_account(
     company_id: str,
     bank_account_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -262,7 +262,7 @@ async def delete_bank_account(
 
 
 @router.post("/{company_id}/dev-reset")
-async def dev_reset_company_data(
+def dev_reset_company_data(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -274,7 +274,8 @@ async def dev_reset_company_data(
     """
     from app.database.models import (
         Invoice, Customer, Product, Payment, InvoiceItem,
-        Transaction, TransactionEntry, Account, BankImport, BankImportRow
+        Transaction, TransactionEntry, Account, BankImport, BankImportRow,
+        AccountBalanceSnapshot, SalesDailyRollup, GSTReturnCache
     )
     
     service = CompanyService(db)
@@ -311,6 +312,15 @@ async def dev_reset_company_data(
         invoices_deleted = db.query(Invoice).filter(Invoice.company_id == company_id).delete(synchronize_session=False)
         deleted_counts["invoices"] = invoices_deleted
         
+        # 3b. Delete the sales rollup and cached GST returns (the bulk delete
+        # skips the Invoice events that keep them current)
+        db.query(SalesDailyRollup).filter(
+            SalesDailyRollup.company_id == company_id
+        ).delete(synchronize_session=False)
+        db.query(GSTReturnCache).filter(
+            GSTReturnCache.company_id == company_id
+        ).delete(synchronize_session=False)
+        
         # 4. Delete customers
         customers_deleted = db.query(Customer).filter(Customer.company_id == company_id).delete(synchronize_session=False)
         deleted_counts["customers"] = customers_deleted
@@ -343,6 +353,11 @@ async def dev_reset_company_data(
         transactions_deleted = db.query(Transaction).filter(Transaction.company_id == company_id).delete(synchronize_session=False)
         deleted_counts["transactions"] = transactions_deleted
         
+        # 9b. Delete balance snapshots (depend on accounts)
+        db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.company_id == company_id
+        ).delete(synchronize_session=False)
+        
         # 10. Delete accounts (need to handle parent_id self-reference)
         # First set all parent_ids to null, then delete
         db.query(Account).filter(Account.company_id == company_id).update({"parent_id": None}, synchronize_session=False)
@@ -365,7 +380,7 @@ async def dev_reset_company_data(
         )
 
 @router.get("/{company_id}/next-invoice-number")
-async def get_next_invoice_number(
+def get_next_invoice_number(
     company_id: str,
     voucher_type: Optional[str] = None,
     auth_data: Union[User, Dict[str, Any]] = Depends(get_current_user),
@@ -389,6 +404,6 @@ async def get_next_invoice_number(
             raise HTTPException(status_code=403, detail="Not authorized")
     
     company_service = CompanyService(db)
-    next_number = company_service.get_next_invoice_number(company, voucher_type)
+    next_number = company_service.peek_next_invoice_number(company, voucher_type)
     
     return {"invoice_number": next_number}
@@ -120,7 +120,7 @@ class BudgetLineResponse(BaseModel):
 # ==================== COST CENTER ENDPOINTS ====================
 
 @router.post("/cost-centers", response_model=CostCenterResponse, status_code=status.HTTP_201_CREATED)
-async def create_cost_center(
+def create_cost_center(
     company_id: str,
     data: CostCenterCreate,
     current_user: User = Depends(get_current_active_user),
@@ -146,7 +146,7 @@ async def create_cost_center(
 
 
 @router.get("/cost-centers", response_model=List[CostCenterResponse])
-async def list_cost_centers(
+def list_cost_centers(
     company_id: str,
     active_only: bool = True,
     current_user: User = Depends(get_current_active_user),
@@ -162,7 +162,7 @@ async def list_cost_centers(
 
 
 @router.get("/cost-centers/hierarchy")
-async def get_cost_center_hierarchy(
+def get_cost_center_hierarchy(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -177,7 +177,7 @@ async def get_cost_center_hierarchy(
 
 
 @router.get("/cost-centers/{cost_center_id}", response_model=CostCenterResponse)
-async def get_cost_center(
+def get_cost_center(
     company_id: str,
     cost_center_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -196,7 +196,7 @@ async def get_cost_center(
 
 
 @router.put("/cost-centers/{cost_center_id}", response_model=CostCenterResponse)
-async def update_cost_center(
+def update_cost_center(
     company_id: str,
     cost_center_id: str,
     data: CostCenterCreate,
@@ -220,7 +220,7 @@ async def update_cost_center(
 
 
 @router.delete("/cost-centers/{cost_center_id}")
-async def deactivate_cost_center(
+def deactivate_cost_center(
     company_id: str,
     cost_center_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -238,7 +238,7 @@ async def deactivate_cost_center(
 # ==================== COST CATEGORY ENDPOINTS ====================
 
 @router.post("/cost-categories", response_model=CostCategoryResponse, status_code=status.HTTP_201_CREATED)
-async def create_cost_category(
+def create_cost_category(
     company_id: str,
     data: CostCategoryCreate,
     current_user: User = Depends(get_current_active_user),
@@ -264,7 +264,7 @@ async def create_cost_category(
 
 
 @router.get("/cost-categories", response_model=List[CostCategoryResponse])
-async def list_cost_categories(
+def list_cost_categories(
     company_id: str,
     active_only: bool = True,
     current_user: User = Depends(get_current_active_user),
@@ -280,7 +280,7 @@ async def list_cost_categories(
 
 
 @router.post("/cost-categories/initialize")
-async def initialize_cost_categories(
+def initialize_cost_categories(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -297,7 +297,7 @@ async def initialize_cost_categories(
 # ==================== BUDGET ENDPOINTS ====================
 
 @router.post("/budgets", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
-async def create_budget(
+def create_budget(
     company_id: str,
     data: BudgetCreate,
     current_user: User = Depends(get_current_active_user),
@@ -324,7 +324,7 @@ async def create_budget(
 
 
 @router.get("/budgets", response_model=List[BudgetResponse])
-async def list_budgets(
+def list_budgets(
     company_id: str,
     financial_year: Optional[str] = None,
     status: Optional[str] = None,
@@ -343,7 +343,7 @@ async def list_budgets(
 
 
 @router.get("/budgets/{budget_id}", response_model=BudgetResponse)
-async def get_budget(
+def get_budget(
     company_id: str,
     budget_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -362,7 +362,7 @@ async def get_budget(
 
 
 @router.post("/budgets/{budget_id}/approve")
-async def approve_budget(
+def approve_budget(
     company_id: str,
     budget_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -381,7 +381,7 @@ async def approve_budget(
 
 
 @router.post("/budgets/{budget_id}/activate")
-async def activate_budget(
+def activate_budget(
     company_id: str,
     budget_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -402,7 +402,7 @@ async def activate_budget(
 # ==================== BUDGET LINE ENDPOINTS ====================
 
 @router.post("/budgets/{budget_id}/lines", response_model=BudgetLineResponse)
-async def add_budget_line(
+def add_budget_line(
     company_id: str,
     budget_id: str,
     data: BudgetLineCreate,
@@ -430,7 +430,7 @@ async def add_budget_line(
 
 
 @router.get("/budgets/{budget_id}/lines", response_model=List[BudgetLineResponse])
-async def get_budget_lines(
+def get_budget_lines(
     company_id: str,
     budget_id: str,
     account_id: Optional[str] = None,
@@ -448,7 +448,7 @@ async def get_budget_lines(
 
 
 @router.delete("/budgets/{budget_id}/lines/{line_id}")
-async def delete_budget_line(
+def delete_budget_line(
     company_id: str,
     budget_id: str,
     line_id: str,
@@ -470,7 +470,7 @@ async def delete_budget_line(
 # ==================== VARIANCE REPORTS ====================
 
 @router.get("/budgets/{budget_id}/variance")
-async def get_variance_report(
+def get_variance_report(
     company_id: str,
     budget_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -486,7 +486,7 @@ async def get_variance_report(
 
 
 @router.get("/budgets/summary/{financial_year}")
-async def get_budget_summary(
+def get_budget_summary(
     company_id: str,
     financial_year: str,
     current_user: User = Depends(get_current_active_user),
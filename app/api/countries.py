@@ -22,7 +22,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.get("", response_model=List[CountryResponse])
-async def list_countries(
+def list_countries(
     company_id: str,
     is_active: Optional[bool] = Query(None),
     current_user: User = Depends(get_current_active_user),
@@ -37,7 +37,7 @@ async def list_countries(
 
 
 @router.post("", response_model=CountryResponse, status_code=status.HTTP_201_CREATED)
-async def create_country(
+def create_country(
     company_id: str,
     data: CountryCreate,
     current_user: User = Depends(get_current_active_user),
@@ -68,7 +68,7 @@ async def create_country(
 
 
 @router.put("/{country_id}", response_model=CountryResponse)
-async def update_country(
+def update_country(
     company_id: str,
     country_id: str,
     data: CountryUpdate,
@@ -108,7 +108,7 @@ async def update_country(
 
 
 @router.delete("/{country_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_country(
+def delete_country(
     company_id: str,
     country_id: str,
     current_user: User = Depends(get_current_active_user),
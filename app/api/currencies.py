@@ -83,7 +83,7 @@ class ConversionResponse(BaseModel):
 # ==================== ENDPOINTS ====================
 
 @router.post("/initialize")
-async def initialize_currencies(
+def initialize_currencies(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -98,7 +98,7 @@ async def initialize_currencies(
 
 
 @router.get("", response_model=List[CurrencyResponse])
-async def list_currencies(
+def list_currencies(
     company_id: str,
     active_only: bool = True,
     current_user: User = Depends(get_current_active_user),
@@ -114,7 +114,7 @@ async def list_currencies(
 
 
 @router.post("", response_model=CurrencyResponse, status_code=status.HTTP_201_CREATED)
-async def create_currency(
+def create_currency(
     company_id: str,
     data: CurrencyCreate,
     current_user: User = Depends(get_current_active_user),
@@ -139,7 +139,7 @@ async def create_currency(
 
 
 @router.get("/{code}", response_model=CurrencyResponse)
-async def get_currency(
+def get_currency(
     company_id: str,
     code: str,
     current_user: User = Depends(get_current_active_user),
@@ -160,7 +160,7 @@ async def get_currency(
 # ==================== EXCHANGE RATES ====================
 
 @router.post("/exchange-rates")
-async def set_exchange_rate(
+def set_exchange_rate(
     company_id: str,
     data: ExchangeRateCreate,
     current_user: User = Depends(get_current_active_user),
@@ -191,7 +191,7 @@ async def set_exchange_rate(
 
 
 @router.get("/exchange-rates/{from_code}/{to_code}")
-async def get_exchange_rate(
+def get_exchange_rate(
     company_id: str,
     from_code: str,
     to_code: str,
@@ -217,7 +217,7 @@ async def get_exchange_rate(
 
 
 @router.get("/exchange-rates/{from_code}/{to_code}/history")
-async def get_rate_history(
+def get_rate_history(
     company_id: str,
     from_code: str,
     to_code: str,
@@ -244,7 +244,7 @@ async def get_rate_history(
 # ==================== CONVERSION ====================
 
 @router.post("/convert", response_model=ConversionResponse)
-async def convert_currency(
+def convert_currency(
     company_id: str,
     data: ConversionRequest,
     current_user: User = Depends(get_current_active_user),
@@ -279,7 +279,7 @@ async def convert_currency(
 # ==================== FOREX REPORTS ====================
 
 @router.get("/forex/summary")
-async def get_forex_summary(
+def get_forex_summary(
     company_id: str,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
@@ -296,7 +296,7 @@ async def get_forex_summary(
 
 
 @router.get("/forex/exposure")
-async def get_currency_exposure(
+def get_currency_exposure(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.database.connection import get_db
-from app.database.models import User, Company
+from app.database.models import User, Company, Customer
 from app.schemas.customer import (
     CustomerCreate,
     CustomerUpdate,
@@ -15,27 +15,12 @@ from app.schemas.customer import (
 )
 from app.services.customer_service import CustomerService
 from app.services.company_service import CompanyService
+from app.services.geo_index_service import GeoIndexService
 from app.auth.dependencies import get_current_active_user
-import math
 
 router = APIRouter(prefix="/companies/{company_id}/customers", tags=["Customers"])
 
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two coordinates in meters."""
-    R = 6371000
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = (
-        math.sin(dphi / 2) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-
 def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
     """Helper to get company or raise 404."""
     # Employee auth returns a dict; handle that here.
@@ -62,7 +47,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.post("", response_model=CustomerResponse, status_code=status.HTTP_201_CREATED)
-async def create_customer(
+def create_customer(
     company_id: str,
     data: CustomerCreate,
     current_user: User = Depends(get_current_active_user),
@@ -76,7 +61,7 @@ async def create_customer(
 
 
 @router.get("", response_model=CustomerListResponse)
-async def list_customers(
+def list_customers(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -101,7 +86,7 @@ async def list_customers(
 
 
 @router.get("/search")
-async def search_customers(
+def search_customers(
     company_id: str,
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=50),
@@ -116,7 +101,7 @@ async def search_customers(
 
 
 @router.get("/types", response_model=CustomerTypeListResponse)
-async def list_customer_types(
+def list_customer_types(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
@@ -131,7 +116,7 @@ async def list_customer_types(
 
 
 @router.post("/types", response_model=CustomerTypeResponse, status_code=status.HTTP_201_CREATED)
-async def create_customer_type(
+def create_customer_type(
     company_id: str,
     data: CustomerTypeCreate,
     current_user: User = Depends(get_current_active_user),
@@ -148,7 +133,7 @@ async def create_customer_type(
 
 
 @router.delete("/types/{customer_type_id}")
-async def delete_customer_type(
+def delete_customer_type(
     company_id: str,
     customer_type_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -164,8 +149,24 @@ async def delete_customer_type(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
 
+def nearby_customer_response(customer: Customer, distance_m: float) -> dict:
+    return {
+        "id": customer.id,
+        "name": customer.name,
+        "contact": customer.contact,
+        "city": customer.billing_city,
+        "state": customer.billing_state,
+        "district": customer.district,
+        "area": customer.area,
+        "latitude": customer.location_lat,
+        "longitude": customer.location_lng,
+        "location_address": customer.location_address,
+        "distance_km": round(distance_m / 1000, 2),
+    }
+
+
 @router.get("/nearby")
-async def get_nearby_customers(
+def get_nearby_customers(
     company_id: str,
     latitude: float = Query(..., ge=-90, le=90),
     longitude: float = Query(..., ge=-180, le=180),
@@ -174,40 +175,32 @@ async def get_nearby_customers(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    """Get nearby customers based on coordinates."""
+    """Get customers within radius_km of a coordinate, nearest first."""
     company = get_company_or_404(company_id, current_user, db)
-    service = CustomerService(db)
-    # Fetch all customers with location for this company
-    customers, _ = service.get_customers(company, page=1, page_size=10000)
+    service = GeoIndexService(db)
+    nearby = service.customers_within(company.id, latitude, longitude, radius_km, limit)
+    return [nearby_customer_response(customer, distance_m) for customer, distance_m in nearby]
 
-    results = []
-    for customer in customers:
-        if customer.location_lat is None or customer.location_lng is None:
-            continue
-        distance_m = haversine_distance(
-            latitude, longitude, customer.location_lat, customer.location_lng
-        )
-        if distance_m <= radius_km * 1000:
-            results.append({
-                "id": customer.id,
-                "name": customer.name,
-                "contact": customer.contact,
-                "city": customer.billing_city,
-                "state": customer.billing_state,
-                "district": customer.district,
-                "area": customer.area,
-                "latitude": customer.location_lat,
-                "longitude": customer.location_lng,
-                "location_address": customer.location_address,
-                "distance_km": round(distance_m / 1000, 2),
-            })
 
-    results.sort(key=lambda x: x["distance_km"])
-    return results[:limit]
+@router.get("/nearest")
+def get_nearest_customers(
+    company_id: str,
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    count: int = Query(10, ge=1, le=100),
+    max_radius_km: float = Query(500, gt=0, le=2000),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Get the nearest customers to a coordinate."""
+    company = get_company_or_404(company_id, current_user, db)
+    service = GeoIndexService(db)
+    nearest = service.nearest_customers(company.id, latitude, longitude, count, max_radius_km)
+    return [nearby_customer_response(customer, distance_m) for customer, distance_m in nearest]
 
 
 @router.post("/geocode-missing")
-async def geocode_missing_customers(
+def geocode_missing_customers(
     company_id: str,
     limit: int = Query(50, ge=1, le=500),
     current_user: User = Depends(get_current_active_user),
@@ -238,7 +231,7 @@ async def geocode_missing_customers(
 
 
 @router.get("/{customer_id}", response_model=CustomerResponse)
-async def get_customer(
+def get_customer(
     company_id: str,
     customer_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -259,7 +252,7 @@ async def get_customer(
 
 
 @router.put("/{customer_id}", response_model=CustomerResponse)
-async def update_customer(
+def update_customer(
     company_id: str,
     customer_id: str,
     data: CustomerUpdate,
@@ -282,7 +275,7 @@ async def update_customer(
 
 
 @router.delete("/{customer_id}")
-async def delete_customer(
+def delete_customer(
     company_id: str,
     customer_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -305,7 +298,7 @@ async def delete_customer(
 
 # Export/Import routes
 @router.post("/import")
-async def import_customers(
+def import_customers(
     company_id: str,
     customers_data: List[dict],
     current_user: User = Depends(get_current_active_user),
@@ -339,7 +332,7 @@ async def import_customers(
 
 
 @router.get("/export")
-async def export_customers(
+def export_customers(
     company_id: str,
     format: str = Query("csv", pattern="^(csv|json|excel)$"),
     current_user: User = Depends(get_current_active_user),
@@ -413,7 +406,7 @@ async def export_customers(
 
 # Statistics and reports
 @router.get("/statistics/summary")
-async def get_customers_summary(
+def get_customers_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -439,7 +432,7 @@ async def get_customers_summary(
 
 
 @router.get("/statistics/by-state")
-async def get_customers_by_state(
+def get_customers_by_state(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -452,7 +445,7 @@ async def get_customers_by_state(
 
 
 @router.get("/statistics/top-customers")
-async def get_top_customers(
+def get_top_customers(
     company_id: str,
     limit: int = Query(10, ge=1, le=50),
     period: str = Query("all", pattern="^(day|week|month|quarter|year|all)$"),
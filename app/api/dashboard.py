@@ -22,7 +22,7 @@ def get_company_or_404(company_id: str, current_user, db: Session) -> Company:
     return company
     
 @router.get("/summary")
-async def get_dashboard_summary(
+def get_dashboard_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -70,7 +70,7 @@ async def get_dashboard_summary(
 
 
 @router.get("/recent-invoices")
-async def get_recent_invoices(
+def get_recent_invoices(
     company_id: str,
     limit: int = 5,
     current_user: User = Depends(get_current_active_user),
@@ -97,7 +97,7 @@ async def get_recent_invoices(
 
 
 @router.get("/outstanding-invoices")
-async def get_outstanding_invoices(
+def get_outstanding_invoices(
     company_id: str,
     limit: int = 10,
     current_user: User = Depends(get_current_active_user),
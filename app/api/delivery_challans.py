@@ -316,10 +316,11 @@ class DCResponse(BaseModel):
 
 class DCListResponse(BaseModel):
     items: List[DCResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class PendingDispatchResponse(BaseModel):
@@ -334,7 +335,7 @@ class PendingDispatchResponse(BaseModel):
 # ==================== ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/delivery-challans/next-number", response_model=NextDCNumberResponse)
-async def get_next_dc_number(
+def get_next_dc_number(
     company_id: str,
     dc_type: Optional[str] = Query("dc_out", description="Type of DC: 'dc_out' or 'dc_in'"),
     current_user: User = Depends(get_current_active_user),
@@ -391,7 +392,7 @@ async def get_next_dc_number(
 
 
 @router.post("/companies/{company_id}/delivery-challans/dc-out", response_model=DCResponse)
-async def create_dc_out(
+def create_dc_out(
     company_id: str,
     data: DCOutCreate,
     current_user: User = Depends(get_current_active_user),
@@ -457,7 +458,7 @@ async def create_dc_out(
 
 
 @router.post("/companies/{company_id}/delivery-challans/dc-in", response_model=DCResponse)
-async def create_dc_in(
+def create_dc_in(
     company_id: str,
     data: DCInCreate,
     current_user: User = Depends(get_current_active_user),
@@ -518,7 +519,7 @@ async def create_dc_in(
 
 
 @router.post("/companies/{company_id}/invoices/{invoice_id}/create-dc", response_model=DCResponse)
-async def create_dc_from_invoice(
+def create_dc_from_invoice(
     company_id: str,
     invoice_id: str,
     data: CreateFromInvoiceRequest,
@@ -582,7 +583,7 @@ async def create_dc_from_invoice(
 
 
 @router.get("/companies/{company_id}/delivery-challans", response_model=DCListResponse)
-async def list_delivery_challans(
+def list_delivery_challans(
     company_id: str,
     dc_type: Optional[str] = None,
     status: Optional[str] = None,
@@ -593,10 +594,12 @@ async def list_delivery_challans(
     to_date: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes precedence over page)"),
+    include_totals: bool = Query(True, description="Include total and total_pages"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List delivery challans with filters."""
+    """List delivery challans with filters, newest first."""
     get_company_or_404(company_id, current_user, db)
     service = DeliveryChallanService(db)
     
@@ -630,18 +633,23 @@ async def list_delivery_challans(
         except ValueError:
             pass
     
-    result = service.list_delivery_challans(
-        company_id=company_id,
-        dc_type=dc_type_enum,
-        status=status_enum,
-        custom_status=custom_status,
-        customer_id=customer_id,
-        invoice_id=invoice_id,
-        from_date=from_dt,
-        to_date=to_dt,
-        page=page,
-        page_size=page_size,
-    )
+    try:
+        result = service.list_delivery_challans(
+            company_id=company_id,
+            dc_type=dc_type_enum,
+            status=status_enum,
+            custom_status=custom_status,
+            customer_id=customer_id,
+            invoice_id=invoice_id,
+            from_date=from_dt,
+            to_date=to_dt,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            include_totals=include_totals,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "items": [_dc_to_response(dc, db, include_items=False) for dc in result["items"]],
@@ -649,11 +657,12 @@ async def list_delivery_challans(
         "page": result["page"],
         "page_size": result["page_size"],
         "total_pages": result["total_pages"],
+        "next_cursor": result["next_cursor"],
     }
 
 
 @router.get("/companies/{company_id}/delivery-challans/{dc_id}", response_model=DCResponse)
-async def get_delivery_challan(
+def get_delivery_challan(
     company_id: str,
     dc_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -671,7 +680,7 @@ async def get_delivery_challan(
 
 
 @router.put("/companies/{company_id}/delivery-challans/{dc_id}", response_model=DCResponse)
-async def update_delivery_challan(
+def update_delivery_challan(
     company_id: str,
     dc_id: str,
     data: DCUpdateRequest,
@@ -696,7 +705,7 @@ async def update_delivery_challan(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/dispatch", response_model=DCResponse)
-async def dispatch_dc(
+def dispatch_dc(
     company_id: str,
     dc_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -718,7 +727,7 @@ async def dispatch_dc(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/in-transit", response_model=DCResponse)
-async def mark_in_transit(
+def mark_in_transit(
     company_id: str,
     dc_id: str,
     data: MarkInTransitRequest,
@@ -738,7 +747,7 @@ async def mark_in_transit(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/delivered", response_model=DCResponse)
-async def mark_delivered(
+def mark_delivered(
     company_id: str,
     dc_id: str,
     data: MarkDeliveredRequest,
@@ -758,7 +767,7 @@ async def mark_delivered(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/received", response_model=DCResponse)
-async def mark_received(
+def mark_received(
     company_id: str,
     dc_id: str,
     data: MarkReceivedRequest,
@@ -781,7 +790,7 @@ async def mark_received(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/link-invoice", response_model=DCResponse)
-async def link_dc_to_invoice(
+def link_dc_to_invoice(
     company_id: str,
     dc_id: str,
     data: LinkToInvoiceRequest,
@@ -810,7 +819,7 @@ async def link_dc_to_invoice(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/cancel", response_model=DCResponse)
-async def cancel_dc(
+def cancel_dc(
     company_id: str,
     dc_id: str,
     data: CancelRequest,
@@ -833,7 +842,7 @@ async def cancel_dc(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/create-return", response_model=DCResponse)
-async def create_return_dc(
+def create_return_dc(
     company_id: str,
     dc_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -897,7 +906,7 @@ async def create_return_dc(
 
 
 @router.delete("/companies/{company_id}/delivery-challans/{dc_id}")
-async def delete_dc(
+def delete_dc(
     company_id: str,
     dc_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -919,7 +928,7 @@ async def delete_dc(
 
 
 @router.get("/companies/{company_id}/pending-dispatches", response_model=List[PendingDispatchResponse])
-async def get_pending_dispatches(
+def get_pending_dispatches(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -951,7 +960,7 @@ async def get_pending_dispatches(
 
 
 @router.get("/companies/{company_id}/invoices/{invoice_id}/delivery-challans", response_model=List[DCResponse])
-async def get_dcs_for_invoice(
+def get_dcs_for_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -966,7 +975,7 @@ async def get_dcs_for_invoice(
 
 
 @router.post("/companies/{company_id}/delivery-challans/{dc_id}/update-stock", response_model=DCResponse)
-async def update_stock_for_dc(
+def update_stock_for_dc(
     company_id: str,
     dc_id: str,
     current_user: User = Depends(get_current_active_user),
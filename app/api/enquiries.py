@@ -549,7 +549,7 @@ def get_next_enquiry_number(
 
 
 @router.post("/enquiries/formdata", response_model=EnquiryResponse)
-async def create_enquiry_formdata(
+def create_enquiry_formdata(
     company_id: str,
     enquiry_no: str = Form(...),
     enquiry_date: date = Form(...),
@@ -672,7 +672,7 @@ async def create_enquiry_formdata(
             file_path = upload_dir / safe_filename
             
             # Save file
-            content = await file.read()
+            content = file.file.read()
             with open(file_path, "wb") as buffer:
                 buffer.write(content)
             
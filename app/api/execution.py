@@ -0,0 +1,80 @@
+"""Execution policies for request handlers that do blocking work.
+
+The services use the synchronous SQLAlchemy Session and other blocking
+libraries (ReportLab, qrcode), so that work must never run on the event loop.
+Each endpoint runs under one of these policies:
+
+- ``ExecutionPolicy.DB`` - plain ``def`` handlers. FastAPI runs them on the
+  default worker thread pool, which ``configure_worker_pools`` bounds to the
+  size of the database connection pool.
+- ``ExecutionPolicy.CPU`` - handlers decorated with ``@execution_policy(CPU)``
+  (PDF/QR rendering). They run on a separate, smaller pool so long renders
+  cannot starve ordinary DB-bound requests.
+
+``async def`` handlers and dependencies are only for code that awaits I/O
+(websockets); they hand any blocking part to ``run_blocking``. Login and
+``get_current_user`` query the database and call Supabase, so they are plain
+``def`` too. Uploads
+are read through ``UploadFile.file`` in plain ``def`` handlers instead.
+"""
+import functools
+from enum import Enum
+from typing import Any, Callable, Dict, TypeVar
+
+import anyio
+import anyio.to_thread
+
+from app.config import settings
+
+
+T = TypeVar("T")
+
+
+class ExecutionPolicy(str, Enum):
+    """Worker pool a handler's blocking work runs on."""
+    DB = "db"
+    CPU = "cpu"
+
+
+_limiters: Dict[ExecutionPolicy, anyio.CapacityLimiter] = {}
+
+
+def configure_worker_pools() -> None:
+    """Size the worker pools. Must be called from the running event loop (startup)."""
+    default_limiter = anyio.to_thread.current_default_thread_limiter()
+    default_limiter.total_tokens = settings.DB_WORKER_THREADS
+    _limiters[ExecutionPolicy.DB] = default_limiter
+    _limiters[ExecutionPolicy.CPU] = anyio.CapacityLimiter(settings.CPU_WORKER_THREADS)
+
+
+def _get_limiter(policy: ExecutionPolicy) -> anyio.CapacityLimiter:
+    if policy not in _limiters:
+        configure_worker_pools()
+    return _limiters[policy]
+
+
+async def run_blocking(
+    func: Callable[..., T],
+    *args: Any,
+    policy: ExecutionPolicy = ExecutionPolicy.DB,
+    **kwargs: Any,
+) -> T:
+    """Run a blocking callable on the worker pool of ``policy``."""
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=_get_limiter(policy),
+    )
+
+
+def execution_policy(policy: ExecutionPolicy):
+    """Run a plain ``def`` endpoint on the worker pool of ``policy``.
+
+    The wrapper keeps the endpoint's signature, so FastAPI still resolves its
+    parameters and dependencies as usual.
+    """
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await run_blocking(func, *args, policy=policy, **kwargs)
+        return wrapper
+    return decorator
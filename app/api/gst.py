@@ -6,7 +6,10 @@ import json
 from app.database.connection import get_db
 from app.database.models import User, Company
 from app.schemas.gst import GSTR1Response, GSTR3BResponse, GSTSummary
-from app.services.gst_service import GSTService
+from app.services.gst_service import GSTService, period_bounds
+from app.services.gst_return_cache_service import (
+    GSTReturnCacheService, RETURN_GSTR1, RETURN_GSTR3B, RETURN_GST_SUMMARY,
+)
 from app.services.company_service import CompanyService
 from app.auth.dependencies import get_current_active_user
 
@@ -26,7 +29,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.get("/summary", response_model=GSTSummary)
-async def get_gst_summary(
+def get_gst_summary(
     company_id: str,
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
@@ -37,13 +40,16 @@ async def get_gst_summary(
     company = get_company_or_404(company_id, current_user, db)
     
     gst_service = GSTService(db)
-    summary = gst_service.get_gst_summary(company, month, year)
+    summary = GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_GST_SUMMARY, *period_bounds(month, year), GSTSummary,
+        lambda: gst_service.get_gst_summary(company, month, year),
+    )
     
     return summary
 
 
 @router.get("/gstr1", response_model=GSTR1Response)
-async def get_gstr1_report(
+def get_gstr1_report(
     company_id: str,
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
@@ -60,13 +66,16 @@ async def get_gstr1_report(
         )
     
     gst_service = GSTService(db)
-    report = gst_service.generate_gstr1(company, month, year)
+    report = GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_GSTR1, *period_bounds(month, year), GSTR1Response,
+        lambda: gst_service.generate_gstr1(company, month, year),
+    )
     
     return report
 
 
 @router.get("/gstr1/download")
-async def download_gstr1_json(
+def download_gstr1_json(
     company_id: str,
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
@@ -83,7 +92,10 @@ async def download_gstr1_json(
         )
     
     gst_service = GSTService(db)
-    report = gst_service.generate_gstr1(company, month, year)
+    report = GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_GSTR1, *period_bounds(month, year), GSTR1Response,
+        lambda: gst_service.generate_gstr1(company, month, year),
+    )
     
     # Convert to JSON format compatible with GST portal
     json_data = report.model_dump()
@@ -110,7 +122,7 @@ async def download_gstr1_json(
 
 
 @router.get("/gstr3b", response_model=GSTR3BResponse)
-async def get_gstr3b_report(
+def get_gstr3b_report(
     company_id: str,
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
@@ -127,13 +139,16 @@ async def get_gstr3b_report(
         )
     
     gst_service = GSTService(db)
-    report = gst_service.generate_gstr3b(company, month, year)
+    report = GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_GSTR3B, *period_bounds(month, year), GSTR3BResponse,
+        lambda: gst_service.generate_gstr3b(company, month, year),
+    )
     
     return report
 
 
 @router.get("/gstr3b/download")
-async def download_gstr3b_json(
+def download_gstr3b_json(
     company_id: str,
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
@@ -150,7 +165,10 @@ async def download_gstr3b_json(
         )
     
     gst_service = GSTService(db)
-    report = gst_service.generate_gstr3b(company, month, year)
+    report = GSTReturnCacheService(db).get_or_build(
+        company.id, RETURN_GSTR3B, *period_bounds(month, year), GSTR3BResponse,
+        lambda: gst_service.generate_gstr3b(company, month, year),
+    )
     
     # Convert to JSON format
     json_data = report.model_dump()
@@ -175,8 +193,19 @@ async def download_gstr3b_json(
     )
 
 
+@router.get("/cache-metrics")
+def get_gst_cache_metrics(
+    company_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """GST return cache hit/miss counters (this process) and the company's cached entries."""
+    company = get_company_or_404(company_id, current_user, db)
+    return GSTReturnCacheService(db).get_stats(company.id)
+
+
 @router.get("/state-codes")
-async def get_state_codes():
+def get_state_codes():
     """Get list of Indian state codes for GST."""
     from app.database.models import INDIAN_STATE_CODES
     return [
@@ -45,7 +45,7 @@ class ITCReconcileRequest(BaseModel):
 # ============== E-Invoice Endpoints ==============
 
 @router.post("/e-invoice/generate")
-async def generate_einvoice(
+def generate_einvoice(
     company_id: str,
     data: EInvoiceRequest,
     current_user: User = Depends(get_current_active_user),
@@ -80,7 +80,7 @@ async def generate_einvoice(
 
 
 @router.post("/e-invoice/cancel")
-async def cancel_einvoice(
+def cancel_einvoice(
     company_id: str,
     data: EInvoiceRequest,
     reason: str = Query(..., min_length=1),
@@ -105,7 +105,7 @@ async def cancel_einvoice(
 
 
 @router.get("/e-invoice/{invoice_id}")
-async def get_einvoice_details(
+def get_einvoice_details(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -139,7 +139,7 @@ async def get_einvoice_details(
 # ============== E-Way Bill Endpoints ==============
 
 @router.post("/eway-bill/generate")
-async def generate_eway_bill(
+def generate_eway_bill(
     company_id: str,
     data: EWayBillRequest,
     current_user: User = Depends(get_current_active_user),
@@ -173,7 +173,7 @@ async def generate_eway_bill(
 
 
 @router.get("/eway-bill/check/{invoice_id}")
-async def check_eway_bill_required(
+def check_eway_bill_required(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -204,7 +204,7 @@ async def check_eway_bill_required(
 # ============== ITC Reconciliation Endpoints ==============
 
 @router.get("/itc/summary")
-async def get_itc_summary(
+def get_itc_summary(
     company_id: str,
     from_date: date,
     to_date: date,
@@ -222,7 +222,7 @@ async def get_itc_summary(
 
 
 @router.post("/itc/reconcile")
-async def reconcile_itc(
+def reconcile_itc(
     company_id: str,
     data: ITCReconcileRequest,
     current_user: User = Depends(get_current_active_user),
@@ -240,7 +240,7 @@ async def reconcile_itc(
 # ============== GSTR-1 Summary ==============
 
 @router.get("/gstr1/summary")
-async def get_gstr1_summary(
+def get_gstr1_summary(
     company_id: str,
     from_date: date,
     to_date: date,
@@ -29,7 +29,7 @@ class GSTR2BImportRequest(BaseModel):
 
 
 @router.post("/import-gstr2b")
-async def import_gstr2b(
+def import_gstr2b(
     company_id: str,
     data: GSTR2BImportRequest,
     current_user: User = Depends(get_current_active_user),
@@ -52,7 +52,7 @@ async def import_gstr2b(
 
 
 @router.post("/upload-gstr2b")
-async def upload_gstr2b_file(
+def upload_gstr2b_file(
     company_id: str,
     return_period: str,
     file: UploadFile = File(...),
@@ -64,7 +64,7 @@ async def upload_gstr2b_file(
     
     # Read and parse JSON file
     try:
-        content = await file.read()
+        content = file.file.read()
         json_data = json.loads(content.decode("utf-8"))
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON file")
@@ -85,7 +85,7 @@ async def upload_gstr2b_file(
 
 
 @router.post("/reconcile")
-async def reconcile_gstr2b(
+def reconcile_gstr2b(
     company_id: str,
     data: GSTR2BImportRequest,
     current_user: User = Depends(get_current_active_user),
@@ -108,7 +108,7 @@ async def reconcile_gstr2b(
 
 
 @router.post("/itc-summary")
-async def get_itc_summary(
+def get_itc_summary(
     company_id: str,
     data: GSTR2BImportRequest,
     current_user: User = Depends(get_current_active_user),
@@ -135,7 +135,7 @@ async def get_itc_summary(
 
 
 @router.get("/unmatched-invoices")
-async def get_unmatched_invoices(
+def get_unmatched_invoices(
     company_id: str,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
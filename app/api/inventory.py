@@ -240,7 +240,7 @@ class StockSummaryResponse(BaseModel):
 # ============== Stock Groups ==============
 
 @router.post("/groups", response_model=StockGroupResponse, status_code=status.HTTP_201_CREATED)
-async def create_stock_group(
+def create_stock_group(
     company_id: str,
     data: StockGroupCreate,
     current_user: User = Depends(get_current_active_user),
@@ -260,7 +260,7 @@ async def create_stock_group(
 
 
 @router.get("/groups", response_model=List[StockGroupResponse])
-async def list_stock_groups(
+def list_stock_groups(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -274,7 +274,7 @@ async def list_stock_groups(
 # ============== Godowns ==============
 
 @router.post("/godowns", response_model=GodownResponse, status_code=status.HTTP_201_CREATED)
-async def create_godown(
+def create_godown(
     company_id: str,
     data: GodownCreate,
     current_user: User = Depends(get_current_active_user),
@@ -296,7 +296,7 @@ async def create_godown(
 
 
 @router.get("/godowns", response_model=List[GodownResponse])
-async def list_godowns(
+def list_godowns(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -310,7 +310,7 @@ async def list_godowns(
 # ============== Stock Items ==============
 
 @router.post("/items", response_model=StockItemResponse, status_code=status.HTTP_201_CREATED)
-async def create_stock_item(
+def create_stock_item(
     company_id: str,
     data: StockItemCreate,
     current_user: User = Depends(get_current_active_user),
@@ -340,7 +340,7 @@ async def create_stock_item(
 
 
 @router.get("/items", response_model=List[StockItemResponse])
-async def list_stock_items(
+def list_stock_items(
     company_id: str,
     group_id: Optional[str] = None,
     search: Optional[str] = None,
@@ -361,7 +361,7 @@ async def list_stock_items(
 
 
 @router.get("/items/{item_id}", response_model=StockItemResponse)
-async def get_stock_item(
+def get_stock_item(
     company_id: str,
     item_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -378,7 +378,7 @@ async def get_stock_item(
 
 
 @router.put("/items/{item_id}", response_model=StockItemResponse)
-async def update_stock_item(
+def update_stock_item(
     company_id: str,
     item_id: str,
     data: StockItemUpdate,
@@ -399,7 +399,7 @@ async def update_stock_item(
 # ============== Stock Movements ==============
 
 @router.post("/stock-in", response_model=StockEntryResponse, status_code=status.HTTP_201_CREATED)
-async def record_stock_in(
+def record_stock_in(
     company_id: str,
     data: StockInRequest,
     current_user: User = Depends(get_current_active_user),
@@ -440,7 +440,7 @@ async def record_stock_in(
 
 
 @router.post("/stock-out", response_model=StockEntryResponse, status_code=status.HTTP_201_CREATED)
-async def record_stock_out(
+def record_stock_out(
     company_id: str,
     data: StockOutRequest,
     current_user: User = Depends(get_current_active_user),
@@ -481,7 +481,7 @@ async def record_stock_out(
 
 
 @router.post("/transfer", status_code=status.HTTP_201_CREATED)
-async def transfer_stock(
+def transfer_stock(
     company_id: str,
     data: StockTransferRequest,
     current_user: User = Depends(get_current_active_user),
@@ -508,7 +508,7 @@ async def transfer_stock(
 
 
 @router.get("/entries", response_model=List[StockEntryResponse])
-async def list_stock_entries(
+def list_stock_entries(
     company_id: str,
     item_id: Optional[str] = None,
     godown_id: Optional[str] = None,
@@ -556,7 +556,7 @@ async def list_stock_entries(
 # ============== Batches ==============
 
 @router.post("/batches", response_model=BatchResponse, status_code=status.HTTP_201_CREATED)
-async def create_batch(
+def create_batch(
     company_id: str,
     data: BatchCreate,
     current_user: User = Depends(get_current_active_user),
@@ -583,7 +583,7 @@ async def create_batch(
 
 
 @router.get("/items/{item_id}/batches", response_model=List[BatchResponse])
-async def list_batches(
+def list_batches(
     company_id: str,
     item_id: str,
     include_empty: bool = False,
@@ -604,7 +604,7 @@ async def list_batches(
 # ============== BOM ==============
 
 @router.post("/bom", response_model=BOMResponse, status_code=status.HTTP_201_CREATED)
-async def create_bom(
+def create_bom(
     company_id: str,
     data: BOMCreate,
     current_user: User = Depends(get_current_active_user),
@@ -627,7 +627,7 @@ async def create_bom(
 
 
 @router.get("/bom", response_model=List[BOMResponse])
-async def list_boms(
+def list_boms(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -639,7 +639,7 @@ async def list_boms(
 
 
 @router.post("/produce", response_model=StockEntryResponse, status_code=status.HTTP_201_CREATED)
-async def produce_from_bom(
+def produce_from_bom(
     company_id: str,
     data: ProductionRequest,
     current_user: User = Depends(get_current_active_user),
@@ -678,7 +678,7 @@ async def produce_from_bom(
 # ============== Reports ==============
 
 @router.get("/summary", response_model=StockSummaryResponse)
-async def get_stock_summary(
+def get_stock_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -690,16 +690,17 @@ async def get_stock_summary(
 
 
 @router.get("/valuation")
-async def get_stock_valuation(
+def get_stock_valuation(
     company_id: str,
+    as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get stock valuation report."""
+    """Get stock valuation report, optionally as of a past date."""
     company = get_company_or_404(company_id, current_user, db)
     service = InventoryService(db)
     
-    valuation = service.get_stock_valuation(company)
+    valuation = service.get_stock_valuation(company, as_of_date)
     total_value = sum(item["value"] for item in valuation)
     
     return {
@@ -709,7 +710,7 @@ async def get_stock_valuation(
 
 
 @router.get("/stock-by-warehouse/{product_id}")
-async def get_stock_by_warehouse(
+def get_stock_by_warehouse(
     company_id: str,
     product_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -739,19 +740,22 @@ async def get_stock_by_warehouse(
 # ============== Advanced Reports ==============
 
 @router.get("/stock-ledger/{product_id}")
-async def get_stock_ledger(
+def get_stock_ledger(
     company_id: str,
     product_id: str,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     godown_id: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Get stock ledger for a product (item-wise transaction history with running balance).
     
-    Returns all stock movements for the product with running balance calculation.
+    Returns one page of stock movements for the product with running balance;
+    opening, inward, outward and closing cover the whole date range.
     """
     company = get_company_or_404(company_id, current_user, db)
     service = InventoryService(db)
@@ -762,11 +766,13 @@ async def get_stock_ledger(
         from_date=from_date,
         to_date=to_date,
         godown_id=godown_id,
+        page=page,
+        page_size=page_size,
     )
 
 
 @router.get("/stock-by-brand")
-async def get_stock_by_brand(
+def get_stock_by_brand(
     company_id: str,
     include_zero_stock: bool = Query(False),
     current_user: User = Depends(get_current_active_user),
@@ -798,7 +804,7 @@ async def get_stock_by_brand(
 
 
 @router.get("/stock-by-category")
-async def get_stock_by_category(
+def get_stock_by_category(
     company_id: str,
     include_zero_stock: bool = Query(False),
     current_user: User = Depends(get_current_active_user),
@@ -830,7 +836,7 @@ async def get_stock_by_category(
 
 
 @router.get("/stock-list")
-async def get_stock_list(
+def get_stock_list(
     company_id: str,
     brand_id: Optional[str] = Query(None),
     category_id: Optional[str] = Query(None),
@@ -859,7 +865,7 @@ async def get_stock_list(
 
 
 @router.get("/negative-stock")
-async def get_negative_stock(
+def get_negative_stock(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -882,7 +888,7 @@ async def get_negative_stock(
 
 
 @router.post("/generate-sku")
-async def generate_sku(
+def generate_sku(
     company_id: str,
     product_name: str = Query(...),
     category_id: Optional[str] = Query(None),
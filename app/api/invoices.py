@@ -1,12 +1,13 @@
 """Invoice API routes."""
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date
 from decimal import Decimal
 
 from app.database.connection import get_db
-from app.database.models import User, Company, InvoiceStatus, SalesOrder
+from app.database.models import User, Company, InvoiceStatus, SalesOrder, InvoiceExportJob, InvoiceExportStatus
 from app.schemas.invoice import (
     InvoiceCreate, InvoiceUpdate, InvoiceResponse,
     InvoiceItemCreate, InvoiceItemResponse,
@@ -17,8 +18,10 @@ from app.services.invoice_service import InvoiceService
 from app.services.payment_service import PaymentService
 from app.services.customer_service import CustomerService
 from app.services.company_service import CompanyService
-from app.services.pdf_service import PDFService
+from app.services.pdf_render_service import PDFRenderService
+from app.services.invoice_export_service import InvoiceExportService, submit_invoice_export
 from app.auth.dependencies import get_current_active_user
+from app.api.execution import ExecutionPolicy, execution_policy
 
 router = APIRouter(prefix="/companies/{company_id}/invoices", tags=["Invoices"])
 
@@ -64,7 +67,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.post("", response_model=InvoiceResponse, status_code=status.HTTP_201_CREATED)
-async def create_invoice(
+def create_invoice(
     company_id: str,
     data: InvoiceCreate,
     current_user: User = Depends(get_current_active_user),
@@ -111,7 +114,7 @@ async def create_invoice(
     return response
 
 @router.get("/dashboard/summary")
-async def get_dashboard_summary(
+def get_dashboard_summary(
     company_id: str,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -174,10 +177,12 @@ async def get_dashboard_summary(
     return response_data
 
 @router.get("", response_model=InvoiceListResponse)
-async def list_invoices(
+def list_invoices(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes precedence over page)"),
+    include_totals: bool = Query(True, description="Include count and amount totals of the filtered listing"),
     search: Optional[str] = None,
     status: Optional[str] = None,
     from_date: Optional[date] = None,
@@ -187,24 +192,29 @@ async def list_invoices(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List invoices for a company."""
+    """List invoices for a company, newest first."""
     company = get_company_or_404(company_id, current_user, db)
     
     invoice_service = InvoiceService(db)
-    invoices, total, summary = invoice_service.get_invoices(
-        company=company,
-        page=page,
-        page_size=page_size,
-        voucher_type=voucher_type,  # Pass voucher_type
-        status=status,
-        customer_id=customer_id,
-        from_date=from_date,
-        to_date=to_date,
-        search=search
-    )
+    try:
+        result = invoice_service.list_invoices(
+            company=company,
+            page_size=page_size,
+            cursor=cursor,
+            page=page,
+            include_totals=include_totals,
+            voucher_type=voucher_type,  # Pass voucher_type
+            status=status,
+            customer_id=customer_id,
+            from_date=from_date,
+            to_date=to_date,
+            search=search
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     invoice_responses = []
-    for invoice in invoices:
+    for invoice in result["items"]:
         response = InvoiceResponse.model_validate(invoice)
         if invoice.customer:
             response.customer_name = invoice.customer.name
@@ -213,21 +223,153 @@ async def list_invoices(
             response.customer_phone = _preferred_customer_phone(invoice.customer)
         invoice_responses.append(response)
     
+    if not include_totals:
+        return InvoiceListResponse(
+            invoices=invoice_responses,
+            page=page,
+            page_size=page_size,
+            next_cursor=result["next_cursor"],
+            total_amount=None,
+            total_paid=None,
+            total_pending=None,
+            total_invoices=None,
+        )
+    
     total_invoices = invoice_service.get_total_invoices_count(company)
 
     return InvoiceListResponse(
         invoices=invoice_responses,
-        total=total,
+        total=result["total"],
         page=page,
         page_size=page_size,
-        total_amount=summary["total_amount"],
-        total_paid=summary["total_paid"],
-        total_pending=summary["total_pending"],
+        next_cursor=result["next_cursor"],
+        total_amount=result["total_amount"],
+        total_paid=result["total_paid"],
+        total_pending=result["total_pending"],
         total_invoices=total_invoices
     )
 
+# Bulk PDF export routes
+def get_export_or_404(company: Company, export_id: str, db: Session) -> InvoiceExportJob:
+    job = db.query(InvoiceExportJob).filter(
+        InvoiceExportJob.id == export_id,
+        InvoiceExportJob.company_id == company.id,
+    ).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    return job
+
+
+@router.post("/exports")
+def create_invoice_export(
+    company_id: str,
+    from_date: date = Query(..., description="First invoice date"),
+    to_date: date = Query(..., description="Last invoice date (inclusive)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Export all invoices dated in a range as a ZIP of PDFs.
+    
+    Built in the background; poll the export for progress, then download it.
+    """
+    company = get_company_or_404(company_id, current_user, db)
+    
+    service = InvoiceExportService(db)
+    requested_by = None if isinstance(current_user, dict) else current_user.id
+    try:
+        job = service.create(company, from_date, to_date, requested_by)
+        job = service.start(job.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    submit_invoice_export(job.id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "message": "Invoice export started",
+            **InvoiceExportService.get_progress(job),
+        },
+    )
+
+
+@router.get("/exports/{export_id}")
+def get_invoice_export(
+    company_id: str,
+    export_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get progress and per-invoice errors of an export."""
+    company = get_company_or_404(company_id, current_user, db)
+    return InvoiceExportService.get_progress(get_export_or_404(company, export_id, db))
+
+
+@router.post("/exports/{export_id}/retry")
+def retry_invoice_export(
+    company_id: str,
+    export_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Rebuild a failed export, or one whose job has stopped."""
+    company = get_company_or_404(company_id, current_user, db)
+    job = get_export_or_404(company, export_id, db)
+    
+    try:
+        job = InvoiceExportService(db).start(job.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    submit_invoice_export(job.id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "message": "Invoice export restarted",
+            **InvoiceExportService.get_progress(job),
+        },
+    )
+
+
+@router.get("/exports/{export_id}/download")
+def download_invoice_export(
+    company_id: str,
+    export_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Download a finished export. Supports Range requests for resuming."""
+    company = get_company_or_404(company_id, current_user, db)
+    job = get_export_or_404(company, export_id, db)
+    
+    if job.status != InvoiceExportStatus.COMPLETED or not job.file_path:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Export is not complete")
+    
+    return FileResponse(
+        job.file_path,
+        media_type="application/zip",
+        filename=f"Invoices_{job.from_date:%Y%m%d}_{job.to_date:%Y%m%d}.zip",
+    )
+
+
+@router.delete("/exports/{export_id}")
+def delete_invoice_export(
+    company_id: str,
+    export_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete an export and its file."""
+    company = get_company_or_404(company_id, current_user, db)
+    job = get_export_or_404(company, export_id, db)
+    
+    if job.status == InvoiceExportStatus.PROCESSING:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Export is being built")
+    
+    InvoiceExportService(db).delete(job)
+    return {"message": "Export deleted"}
+
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
-async def get_invoice(
+def get_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -276,7 +418,7 @@ async def get_invoice(
 
 
 @router.put("/{invoice_id}", response_model=InvoiceResponse)
-async def update_invoice(
+def update_invoice(
     company_id: str,
     invoice_id: str,
     data: InvoiceUpdate,
@@ -306,7 +448,7 @@ async def update_invoice(
 
 
 @router.post("/{invoice_id}/finalize", response_model=InvoiceResponse)
-async def finalize_invoice(
+def finalize_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -335,7 +477,7 @@ async def finalize_invoice(
 
 
 @router.post("/{invoice_id}/allocate-stock")
-async def allocate_stock_for_invoice(
+def allocate_stock_for_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -371,7 +513,7 @@ async def allocate_stock_for_invoice(
 
 
 @router.post("/{invoice_id}/cancel", response_model=InvoiceResponse)
-async def cancel_invoice(
+def cancel_invoice(
     company_id: str,
     invoice_id: str,
     data: Optional[StatusChangeRequest] = None,
@@ -402,7 +544,7 @@ async def cancel_invoice(
 
 
 @router.delete("/{invoice_id}")
-async def delete_invoice(
+def delete_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -431,7 +573,7 @@ async def delete_invoice(
 
 
 @router.post("/{invoice_id}/refund", response_model=InvoiceResponse)
-async def refund_invoice(
+def refund_invoice(
     company_id: str,
     invoice_id: str,
     data: Optional[StatusChangeRequest] = None,
@@ -463,7 +605,7 @@ async def refund_invoice(
 
 
 @router.post("/{invoice_id}/void", response_model=InvoiceResponse)
-async def void_invoice(
+def void_invoice(
     company_id: str,
     invoice_id: str,
     data: Optional[StatusChangeRequest] = None,
@@ -494,7 +636,7 @@ async def void_invoice(
 
 
 @router.post("/{invoice_id}/write-off", response_model=InvoiceResponse)
-async def write_off_invoice(
+def write_off_invoice(
     company_id: str,
     invoice_id: str,
     data: Optional[StatusChangeRequest] = None,
@@ -526,7 +668,7 @@ async def write_off_invoice(
 
 # Item routes
 @router.post("/{invoice_id}/items", response_model=InvoiceItemResponse, status_code=status.HTTP_201_CREATED)
-async def add_invoice_item(
+def add_invoice_item(
     company_id: str,
     invoice_id: str,
     data: InvoiceItemCreate,
@@ -556,7 +698,7 @@ async def add_invoice_item(
 
 
 @router.delete("/{invoice_id}/items/{item_id}")
-async def remove_invoice_item(
+def remove_invoice_item(
     company_id: str,
     invoice_id: str,
     item_id: str,
@@ -592,7 +734,7 @@ async def remove_invoice_item(
 
 # Payment routes
 @router.post("/{invoice_id}/payments", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
-async def record_payment(
+def record_payment(
     company_id: str,
     invoice_id: str,
     data: PaymentCreate,
@@ -623,7 +765,7 @@ async def record_payment(
 
 
 @router.get("/{invoice_id}/payments")
-async def list_payments(
+def list_payments(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -648,7 +790,8 @@ async def list_payments(
 
 # PDF and QR routes
 @router.get("/{invoice_id}/pdf")
-async def download_invoice_pdf(
+@execution_policy(ExecutionPolicy.CPU)
+def download_invoice_pdf(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -666,20 +809,20 @@ async def download_invoice_pdf(
             detail="Invoice not found"
         )
     
-    pdf_service = PDFService()
-    pdf_buffer = pdf_service.generate_invoice_pdf(invoice, company, invoice.customer)
+    pdf_bytes = PDFRenderService().render("invoice", invoice, company, invoice.customer)
     
     filename = f"Invoice_{invoice.invoice_number}.pdf"
     
     return Response(
-        content=pdf_buffer.getvalue(),
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.get("/{invoice_id}/qr", response_model=UPIQRResponse)
-async def get_invoice_qr(
+@execution_policy(ExecutionPolicy.CPU)
+def get_invoice_qr(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -716,7 +859,7 @@ async def get_invoice_qr(
 
 # Mark paid via UPI webhook (simplified)
 @router.post("/{invoice_id}/mark-paid")
-async def mark_invoice_paid(
+def mark_invoice_paid(
     company_id: str,
     invoice_id: str,
     upi_transaction_id: Optional[str] = None,
@@ -14,6 +14,7 @@ from app.services.order_service import OrderService
 from app.services.invoice_service import InvoiceService
 from app.services.company_service import CompanyService
 from app.services.purchase_service import PurchaseService
+from app.services.listing_service import keyset_page, listing_totals
 from app.schemas.invoice import InvoiceCreate, InvoiceResponse, InvoiceItemCreate, VoucherType
 from app.auth.dependencies import get_current_active_user
 from app.database.models import User, CreatorType  ,Company, OrderStatus, PurchaseOrder, Vendor  # Add PurchaseOrd 
@@ -406,7 +407,7 @@ class ReceiptNoteResponse(BaseModel):
 # ============== Sales Order Endpoints ==============
 
 @router.post("/sales", response_model=SalesOrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_sales_order(
+def create_sales_order(
     company_id: str,
     data: SalesOrderCreate,
     current_user: User = Depends(get_current_active_user),
@@ -528,7 +529,7 @@ async def create_sales_order(
         raise HTTPException(status_code=400, detail=str(e))
     
 @router.get("/sales", response_model=List[SalesOrderResponse])
-async def list_sales_orders(
+def list_sales_orders(
     company_id: str,
     customer_id: Optional[str] = None,
     status: Optional[str] = None,
@@ -633,7 +634,7 @@ async def list_sales_orders(
 
 
 @router.get("/sales/{order_id}", response_model=SalesOrderResponse)
-async def get_sales_order(
+def get_sales_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -716,7 +717,7 @@ async def get_sales_order(
 
 
 @router.put("/sales/{order_id}", response_model=SalesOrderResponse)
-async def update_sales_order(
+def update_sales_order(
     company_id: str,
     order_id: str,
     data: SalesOrderUpdate,
@@ -840,7 +841,7 @@ async def update_sales_order(
 
 
 @router.post("/sales/{order_id}/confirm")
-async def confirm_sales_order(
+def confirm_sales_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -859,7 +860,7 @@ async def confirm_sales_order(
 
 
 @router.post("/sales/{order_id}/cancel")
-async def cancel_sales_order(
+def cancel_sales_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -878,7 +879,7 @@ async def cancel_sales_order(
 
 
 @router.delete("/sales/{order_id}")
-async def delete_sales_order(
+def delete_sales_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -906,7 +907,7 @@ async def delete_sales_order(
 # ============== Purchase Order Endpoints ==============
 
 @router.get("/purchase/next-number")
-async def get_next_purchase_order_number(
+def get_next_purchase_order_number(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -917,7 +918,7 @@ async def get_next_purchase_order_number(
     return {"order_number": service.get_next_purchase_order_number(company)}
 
 @router.post("/purchase", response_model=PurchaseOrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_purchase_order(
+def create_purchase_order(
     company_id: str,
     data: PurchaseOrderCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1050,7 +1051,7 @@ async def create_purchase_order(
     )
 
 @router.get("/purchase", response_model=dict)
-async def list_purchase_orders(
+def list_purchase_orders(
     company_id: str,
     vendor_id: Optional[str] = None,
     status: Optional[str] = None,
@@ -1062,10 +1063,12 @@ async def list_purchase_orders(
     creator_type: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes precedence over page)"),
+    include_totals: bool = Query(True, description="Include summary and pagination totals"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List purchase orders with filtering and pagination."""
+    """List purchase orders with filtering, newest first (keyset paginated, see listing_service)."""
     company = get_company_or_404(company_id, current_user, db)
     
     # Apply filters
@@ -1102,24 +1105,27 @@ async def list_purchase_orders(
     if to_date:
         query = query.filter(func.date(PurchaseOrder.order_date) <= to_date)
     
-    # Get total count and total amount for the filtered query before pagination
-    total = query.count()
-    filtered_total_amount = query.with_entities(func.sum(PurchaseOrder.total_amount)).scalar() or Decimal("0")
-    filtered_currency_totals = (
-        query.with_entities(
-            PurchaseOrder.currency,
-            func.sum(PurchaseOrder.total_amount),
+    try:
+        orders, next_cursor = keyset_page(query, PurchaseOrder, page_size, cursor=cursor, page=page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Count, total amount and per-currency totals from one cached aggregate
+    totals = None
+    if include_totals:
+        filters = {
+            "vendor_id": vendor_id,
+            "status": status.strip().lower() if status else None,
+            "currency": currency.strip().upper() if currency else None,
+            "search": search.strip() if search else None,
+            "from_date": from_date,
+            "to_date": to_date,
+        }
+        totals = listing_totals(
+            query, PurchaseOrder, company.id, filters,
+            sums={"total_amount": PurchaseOrder.total_amount},
+            group_by=PurchaseOrder.currency,
         )
-        .group_by(PurchaseOrder.currency)
-        .all()
-    )
-    
-    # Apply pagination
-    offset = (page - 1) * page_size
-    orders = query.order_by(PurchaseOrder.order_date.desc())\
-                 .offset(offset)\
-                 .limit(page_size)\
-                 .all()
     
     # Collect creator IDs for batch querying
     user_ids = []
@@ -1209,26 +1215,34 @@ async def list_purchase_orders(
         })
     
     # Return with pagination and summary info
+    summary = None
+    total = None
+    if totals is not None:
+        total = totals["total"]
+        currency_totals: Dict[str, Decimal] = {}
+        for order_currency, group in totals["groups"]:
+            key = order_currency or "INR"
+            currency_totals[key] = currency_totals.get(key, Decimal("0")) + group["total_amount"]
+        summary = {
+            "total_orders": total,
+            "total_amount": totals["total_amount"],
+            "currency_totals": currency_totals,
+        }
+
     return {
         "purchases": orders_response,
-        "summary": {
-            "total_orders": total,
-            "total_amount": filtered_total_amount,
-            "currency_totals": {
-                (currency or "INR"): amount or Decimal("0")
-                for currency, amount in filtered_currency_totals
-            },
-        },
+        "summary": summary,
         "pagination": {
             "page": page,
             "page_size": page_size,
             "total": total,
-            "pages": (total + page_size - 1) // page_size
-        }
+            "pages": (total + page_size - 1) // page_size if total is not None else None,
+        },
+        "next_cursor": next_cursor,
     }
 
 @router.get("/purchase/{order_id}", response_model=PurchaseOrderResponse)
-async def get_purchase_order(
+def get_purchase_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1321,7 +1335,7 @@ async def get_purchase_order(
     return response
 
 @router.put("/purchase/{order_id}", response_model=PurchaseOrderResponse)
-async def update_purchase_order(
+def update_purchase_order(
     company_id: str,
     order_id: str,
     data: PurchaseOrderUpdate,
@@ -1500,7 +1514,7 @@ async def update_purchase_order(
         raise HTTPException(status_code=400, detail=str(e))
     
 @router.post("/purchase/{order_id}/confirm")
-async def confirm_purchase_order(
+def confirm_purchase_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1519,7 +1533,7 @@ async def confirm_purchase_order(
 
 
 @router.post("/purchase/{order_id}/cancel")
-async def cancel_purchase_order(
+def cancel_purchase_order(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1538,7 +1552,7 @@ async def cancel_purchase_order(
 
 
 @router.post("/purchase/{order_id}/convert-to-invoice")
-async def convert_purchase_order_to_invoice(
+def convert_purchase_order_to_invoice(
     company_id: str,
     order_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1619,7 +1633,7 @@ async def convert_purchase_order_to_invoice(
 # ============== Delivery Note Endpoints ==============
 
 @router.post("/delivery-notes", response_model=DeliveryNoteResponse, status_code=status.HTTP_201_CREATED)
-async def create_delivery_note(
+def create_delivery_note(
     company_id: str,
     data: DeliveryNoteCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1658,7 +1672,7 @@ async def create_delivery_note(
 
 
 @router.get("/delivery-notes", response_model=List[DeliveryNoteResponse])
-async def list_delivery_notes(
+def list_delivery_notes(
     company_id: str,
     sales_order_id: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1687,7 +1701,7 @@ async def list_delivery_notes(
 
 
 @router.get("/delivery-notes/{note_id}", response_model=DeliveryNoteResponse)
-async def get_delivery_note(
+def get_delivery_note(
     company_id: str,
     note_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1719,7 +1733,7 @@ async def get_delivery_note(
 
 
 @router.delete("/delivery-notes/{note_id}")
-async def delete_delivery_note(
+def delete_delivery_note(
     company_id: str,
     note_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1764,7 +1778,7 @@ async def delete_delivery_note(
 # ============== Receipt Note Endpoints ==============
 
 @router.post("/receipt-notes", response_model=ReceiptNoteResponse, status_code=status.HTTP_201_CREATED)
-async def create_receipt_note(
+def create_receipt_note(
     company_id: str,
     data: ReceiptNoteCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1802,7 +1816,7 @@ async def create_receipt_note(
 
 
 @router.get("/receipt-notes", response_model=List[ReceiptNoteResponse])
-async def list_receipt_notes(
+def list_receipt_notes(
     company_id: str,
     purchase_order_id: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1830,7 +1844,7 @@ async def list_receipt_notes(
 
 
 @router.get("/receipt-notes/{note_id}", response_model=ReceiptNoteResponse)
-async def get_receipt_note(
+def get_receipt_note(
     company_id: str,
     note_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1861,7 +1875,7 @@ async def get_receipt_note(
 
 
 @router.delete("/receipt-notes/{note_id}")
-async def delete_receipt_note(
+def delete_receipt_note(
     company_id: str,
     note_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -30,6 +30,7 @@ from app.database.payroll_models import (
 )
 from app.auth.dependencies import get_current_active_user
 from app.services.payroll_service import PayrollService
+from app.services.payroll_job_service import PayrollJobService, submit_payroll_job
 from app.services.loan_service import LoanService
 from app.services.pf_service import PFService
 from app.services.esi_service import ESIService
@@ -509,7 +510,7 @@ class LoanResponse(BaseModel):
 # ==================== DEPARTMENTS ====================
 
 @router.post("/departments", response_model=DepartmentResponse, status_code=status.HTTP_201_CREATED)
-async def create_department(
+def create_department(
     company_id: str,
     data: DepartmentCreate,
     current_user: User = Depends(get_current_active_user),
@@ -530,7 +531,7 @@ async def create_department(
 
 
 @router.get("/departments", response_model=List[DepartmentResponse])
-async def list_departments(
+def list_departments(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -549,7 +550,7 @@ async def list_departments(
 # ==================== DESIGNATIONS ====================
 
 @router.post("/designations", response_model=DesignationResponse, status_code=status.HTTP_201_CREATED)
-async def create_designation(
+def create_designation(
     company_id: str,
     data: DesignationCreate,
     current_user: User = Depends(get_current_active_user),
@@ -608,7 +609,7 @@ async def create_designation(
             detail=f"Error creating designation: {str(e)}"
         )
 @router.get("/designations", response_model=List[DesignationResponse])
-async def list_designations(
+def list_designations(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -625,7 +626,7 @@ async def list_designations(
 
 
 @router.get("/designations/paginated", response_model=DesignationListResponse)
-async def get_paginated_designations(
+def get_paginated_designations(
     company_id: str,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
@@ -725,7 +726,7 @@ async def get_paginated_designations(
 
 
 @router.post("/designations/{designation_id}/permissions", response_model=dict)
-async def set_designation_permissions(
+def set_designation_permissions(
     company_id: str,
     designation_id: str,
     permissions: List[str],
@@ -761,7 +762,7 @@ async def set_designation_permissions(
 
 
 @router.get("/designations/{designation_id}/permissions", response_model=dict)
-async def get_designation_permissions(
+def get_designation_permissions(
     company_id: str,
     designation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -787,7 +788,7 @@ async def get_designation_permissions(
         }
     }
 @router.get("/designations/search", response_model=dict)
-async def search_designations(
+def search_designations(
     company_id: str,
     search: str = Query(..., description="Search term"),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
@@ -830,7 +831,7 @@ async def search_designations(
 
 
 @router.get("/designations/active", response_model=dict)
-async def get_active_designations(
+def get_active_designations(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -850,7 +851,7 @@ async def get_active_designations(
 
 
 @router.get("/designations/stats", response_model=DesignationStatsResponse)
-async def get_designation_stats(
+def get_designation_stats(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -908,7 +909,7 @@ async def get_designation_stats(
     }
 
 @router.get("/designations/{designation_id}", response_model=dict)
-async def get_designation_by_id(
+def get_designation_by_id(
     company_id: str,
     designation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -951,7 +952,7 @@ async def get_designation_by_id(
 
 
 @router.put("/designations/{designation_id}", response_model=dict)
-async def update_designation(
+def update_designation(
     company_id: str,
     designation_id: str,
     data: DesignationUpdate,
@@ -1027,7 +1028,7 @@ async def update_designation(
         )
 
 @router.delete("/designations/{designation_id}", response_model=dict)
-async def delete_designation(
+def delete_designation(
     company_id: str,
     designation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1066,7 +1067,7 @@ async def delete_designation(
 
 
 @router.patch("/designations/{designation_id}/status", response_model=dict)
-async def toggle_designation_status(
+def toggle_designation_status(
     company_id: str,
     designation_id: str,
     is_active: bool = Query(..., description="Set active status"),
@@ -1095,7 +1096,7 @@ async def toggle_designation_status(
 
 
 @router.post("/designations/{designation_id}/permissions", response_model=dict)
-async def set_designation_permissions(
+def set_designation_permissions(
     company_id: str,
     designation_id: str,
     permissions: List[str],
@@ -1127,7 +1128,7 @@ async def set_designation_permissions(
 
 
 @router.get("/designations/{designation_id}/permissions", response_model=dict)
-async def get_designation_permissions(
+def get_designation_permissions(
     company_id: str,
     designation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1158,7 +1159,7 @@ async def get_designation_permissions(
 # ==================== EMPLOYEES ====================
 
 @router.post("/upload-image")
-async def upload_employee_image(
+def upload_employee_image(
     company_id: str,
     employee_id: Optional[str] = Form(None),
     image: UploadFile = File(...),
@@ -1179,7 +1180,7 @@ async def upload_employee_image(
         )
     
     # Validate file size (max 2MB)
-    contents = await image.read()
+    contents = image.file.read()
     if len(contents) > 2 * 1024 * 1024:  # 2MB
         raise HTTPException(
             status_code=400,
@@ -1198,7 +1199,7 @@ async def upload_employee_image(
     file_path = os.path.join(upload_dir, unique_filename)
     
     # Reset file pointer and save
-    await image.seek(0)
+    image.file.seek(0)
     with open(file_path, "wb") as f:
         f.write(contents)
     
@@ -1225,7 +1226,7 @@ async def upload_employee_image(
 
     
 @router.post("/employees", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
-async def create_employee(
+def create_employee(
     company_id: str,
     data: EmployeeCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1395,7 +1396,7 @@ async def create_employee(
 
 
 @router.get("/employees", response_model=List[EmployeeResponse])
-async def list_employees(
+def list_employees(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -1448,7 +1449,7 @@ async def list_employees(
     return employees
 
 @router.get("/employees/{employee_id}", response_model=EmployeeResponse)
-async def get_employee(
+def get_employee(
     company_id: str,
     employee_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1469,7 +1470,7 @@ async def get_employee(
 
 
 @router.put("/employees/{employee_id}", response_model=EmployeeResponse)
-async def update_employee(
+def update_employee(
     company_id: str,
     employee_id: str,
     data: EmployeeUpdate,
@@ -1526,7 +1527,7 @@ async def update_employee(
 
 
 @router.delete("/employees/{employee_id}")
-async def deactivate_employee(
+def deactivate_employee(
     company_id: str,
     employee_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1552,7 +1553,7 @@ async def deactivate_employee(
 # ==================== SALARY COMPONENTS ====================
 
 @router.post("/salary-components", response_model=SalaryComponentResponse, status_code=status.HTTP_201_CREATED)
-async def create_salary_component(
+def create_salary_component(
     company_id: str,
     data: SalaryComponentCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1579,7 +1580,7 @@ async def create_salary_component(
 
 
 @router.get("/salary-components", response_model=List[SalaryComponentResponse])
-async def list_salary_components(
+def list_salary_components(
     company_id: str,
     component_type: Optional[SalaryComponentType] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1595,7 +1596,7 @@ async def list_salary_components(
 
 
 @router.post("/salary-components/initialize")
-async def initialize_default_components(
+def initialize_default_components(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1612,7 +1613,7 @@ async def initialize_default_components(
 # ==================== SALARY STRUCTURE ====================
 
 @router.post("/employees/{employee_id}/salary-structure")
-async def create_salary_structure(
+def create_salary_structure(
     company_id: str,
     employee_id: str,
     data: SalaryStructureCreate,
@@ -1648,7 +1649,7 @@ async def create_salary_structure(
 
 
 @router.get("/employees/{employee_id}/salary-structure")
-async def get_salary_structure(
+def get_salary_structure(
     company_id: str,
     employee_id: str,
     as_of: Optional[date] = None,
@@ -1680,7 +1681,7 @@ async def get_salary_structure(
 # ==================== PAYROLL RUN ====================
 
 @router.post("/run", response_model=PayrollRunResponse, status_code=status.HTTP_201_CREATED)
-async def create_payroll_run(
+def create_payroll_run(
     company_id: str,
     data: PayrollRunCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1704,7 +1705,7 @@ async def create_payroll_run(
 
 
 @router.get("/run", response_model=List[PayrollRunResponse])
-async def list_payroll_runs(
+def list_payroll_runs(
     company_id: str,
     year: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
@@ -1726,8 +1727,29 @@ async def list_payroll_runs(
     return runs
 
 
+@router.get("/run/{payroll_run_id}/progress")
+def get_payroll_run_progress(
+    company_id: str,
+    payroll_run_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get processing progress and per-employee errors of a payroll run."""
+    company = get_company_or_404(company_id, current_user, db)
+    
+    payroll_run = db.query(PayrollRun).filter(
+        PayrollRun.id == payroll_run_id,
+        PayrollRun.company_id == company.id,
+    ).first()
+    
+    if not payroll_run:
+        raise HTTPException(status_code=404, detail="Payroll run not found")
+    
+    return PayrollJobService.get_progress(payroll_run)
+
+
 @router.get("/run/{month}/{year}", response_model=PayrollRunResponse)
-async def get_payroll_run(
+def get_payroll_run(
     company_id: str,
     month: int,
     year: int,
@@ -1750,14 +1772,21 @@ async def get_payroll_run(
 
 
 @router.post("/run/{payroll_run_id}/process")
-async def process_payroll(
+def process_payroll(
     company_id: str,
     payroll_run_id: str,
     working_days: int = Query(30, ge=1, le=31),
+    background: bool = Query(False, description="Process in the background; poll /progress"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Process payroll for all employees."""
+    """
+    Process payroll for all employees.
+    
+    Processes within the request by default. With ``background=true`` it
+    returns 202 at once and clients poll /progress; calling it again for a
+    run whose job has stopped resumes where it left off.
+    """
     company = get_company_or_404(company_id, current_user, db)
     
     payroll_run = db.query(PayrollRun).filter(
@@ -1768,6 +1797,20 @@ async def process_payroll(
     if not payroll_run:
         raise HTTPException(status_code=404, detail="Payroll run not found")
     
+    if background:
+        try:
+            payroll_run = PayrollJobService(db).start(payroll_run_id, working_days)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        submit_payroll_job(payroll_run.id)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": "Payroll processing started",
+                **PayrollJobService.get_progress(payroll_run),
+            },
+        )
+    
     service = PayrollService(db)
     
     try:
@@ -1782,7 +1825,7 @@ async def process_payroll(
 
 
 @router.post("/run/{payroll_run_id}/finalize")
-async def finalize_payroll(
+def finalize_payroll(
     company_id: str,
     payroll_run_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1811,7 +1854,7 @@ async def finalize_payroll(
 # ==================== PAYSLIPS ====================
 
 @router.get("/payslip/{employee_id}/{month}/{year}")
-async def get_payslip(
+def get_payslip(
     company_id: str,
     employee_id: str,
     month: int,
@@ -1832,7 +1875,7 @@ async def get_payslip(
 
 
 @router.get("/payslips/{month}/{year}")
-async def list_payslips(
+def list_payslips(
     company_id: str,
     month: int,
     year: int,
@@ -1866,7 +1909,7 @@ async def list_payslips(
 # ==================== LOANS ====================
 
 @router.post("/loans", response_model=LoanResponse, status_code=status.HTTP_201_CREATED)
-async def create_loan(
+def create_loan(
     company_id: str,
     data: LoanCreate,
     current_user: User = Depends(get_current_active_user),
@@ -1894,7 +1937,7 @@ async def create_loan(
 
 
 @router.get("/loans", response_model=List[LoanResponse])
-async def list_loans(
+def list_loans(
     company_id: str,
     employee_id: Optional[str] = None,
     status_filter: Optional[LoanStatus] = None,
@@ -1918,7 +1961,7 @@ async def list_loans(
 
 
 @router.get("/loans/{loan_id}")
-async def get_loan_statement(
+def get_loan_statement(
     company_id: str,
     loan_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1937,7 +1980,7 @@ async def get_loan_statement(
 
 
 @router.post("/loans/{loan_id}/approve")
-async def approve_loan(
+def approve_loan(
     company_id: str,
     loan_id: str,
     disbursement_date: Optional[date] = None,
@@ -1957,7 +2000,7 @@ async def approve_loan(
 
 
 @router.post("/loans/{loan_id}/disburse")
-async def disburse_loan(
+def disburse_loan(
     company_id: str,
     loan_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1976,7 +2019,7 @@ async def disburse_loan(
 
 
 @router.get("/loans/{loan_id}/eligibility")
-async def check_loan_eligibility(
+def check_loan_eligibility(
     company_id: str,
     employee_id: str,
     loan_type: LoanType,
@@ -2008,7 +2051,7 @@ async def check_loan_eligibility(
 # ==================== REPORTS ====================
 
 @router.get("/reports/pf/{month}/{year}")
-async def get_pf_report(
+def get_pf_report(
     company_id: str,
     month: int,
     year: int,
@@ -2030,7 +2073,7 @@ async def get_pf_report(
 
 
 @router.get("/reports/esi/{month}/{year}")
-async def get_esi_report(
+def get_esi_report(
     company_id: str,
     month: int,
     year: int,
@@ -2052,7 +2095,7 @@ async def get_esi_report(
 
 
 @router.get("/reports/pt/{month}/{year}")
-async def get_pt_report(
+def get_pt_report(
     company_id: str,
     month: int,
     year: int,
@@ -2071,7 +2114,7 @@ async def get_pt_report(
 # ==================== SETTINGS ====================
 
 @router.get("/settings")
-async def get_payroll_settings(
+def get_payroll_settings(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -2102,7 +2145,7 @@ async def get_payroll_settings(
 
 
 @router.put("/settings")
-async def update_payroll_settings(
+def update_payroll_settings(
     company_id: str,
     data: dict,
     current_user: User = Depends(get_current_active_user),
@@ -2133,7 +2176,7 @@ async def update_payroll_settings(
 
 
 @router.get("/test-employee-property")
-async def test_employee_property(
+def test_employee_property(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -81,7 +81,7 @@ def get_unit_or_404(db: Session, company_id: str, unit_id: str) -> CompanyProduc
 
 
 @router.get("", response_model=CompanyProductUnitListResponse)
-async def list_product_units(
+def list_product_units(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=500),
@@ -113,7 +113,7 @@ async def list_product_units(
 
 
 @router.post("", response_model=CompanyProductUnitResponse, status_code=status.HTTP_201_CREATED)
-async def create_product_unit(
+def create_product_unit(
     company_id: str,
     payload: CompanyProductUnitCreate,
     current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user),
@@ -146,7 +146,7 @@ async def create_product_unit(
 
 
 @router.put("/{unit_id}", response_model=CompanyProductUnitResponse)
-async def update_product_unit(
+def update_product_unit(
     company_id: str,
     unit_id: str,
     payload: CompanyProductUnitUpdate,
@@ -182,7 +182,7 @@ async def update_product_unit(
 
 
 @router.delete("/{unit_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_product_unit(
+def delete_product_unit(
     company_id: str,
     unit_id: str,
     current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user),
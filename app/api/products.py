@@ -26,7 +26,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-async def create_product(
+def create_product(
     company_id: str,
     # Product fields as form data
     name: str = Form(...),
@@ -111,7 +111,7 @@ async def create_product(
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
-async def update_product(
+def update_product(
     company_id: str,
     product_id: str,
     # Product fields as form data (all optional for update)
@@ -225,7 +225,7 @@ async def update_product(
 
 
 @router.get("", response_model=ProductListResponse)
-async def list_products(
+def list_products(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -267,7 +267,7 @@ async def list_products(
 
 
 @router.get("/search")
-async def search_products(
+def search_products(
     company_id: str,
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=50),
@@ -294,7 +294,7 @@ async def search_products(
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(
+def get_product(
     company_id: str,
     product_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -326,7 +326,7 @@ async def get_product(
 
 
 @router.delete("/{product_id}")
-async def delete_product(
+def delete_product(
     company_id: str,
     product_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -349,7 +349,7 @@ async def delete_product(
 
 
 @router.post("/{product_id}/images")
-async def upload_product_images(
+def upload_product_images(
     company_id: str,
     product_id: str,
     main_image: Optional[UploadFile] = File(None),
@@ -387,7 +387,7 @@ async def upload_product_images(
 
 
 @router.get("/{product_id}/images")
-async def get_product_images(
+def get_product_images(
     company_id: str,
     product_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -11,10 +11,11 @@ from app.database.connection import get_db
 from app.database.models import User, Company
 from app.services.proforma_service import ProformaInvoiceService
 from app.services.invoice_service import InvoiceService
-from app.services.pdf_service import PDFService
+from app.services.pdf_render_service import PDFRenderService
 from app.services.company_service import CompanyService
 from app.schemas.invoice import InvoiceCreate, InvoiceItemCreate, InvoiceType, VoucherType
 from app.auth.dependencies import get_current_active_user
+from app.api.execution import ExecutionPolicy, execution_policy
 
 router = APIRouter(prefix="/companies/{company_id}/proforma-invoices", tags=["Proforma Invoices"])
 
@@ -195,7 +196,7 @@ class ConvertToInvoiceRequest(BaseModel):
 # ============== Proforma Invoice Endpoints ==============
 
 @router.post("/", response_model=ProformaInvoiceResponse, status_code=status.HTTP_201_CREATED)
-async def create_proforma_invoice(
+def create_proforma_invoice(
     company_id: str,
     data: ProformaInvoiceCreate,
     current_user: User = Depends(get_current_active_user),
@@ -323,7 +324,7 @@ async def create_proforma_invoice(
 
 
 @router.get("/next-number")
-async def get_next_proforma_invoice_number(
+def get_next_proforma_invoice_number(
     company_id: str,
     proforma_date: Optional[date] = Query(None),
     current_user: User = Depends(get_current_active_user),
@@ -339,7 +340,7 @@ async def get_next_proforma_invoice_number(
 
 
 @router.get("/", response_model=List[ProformaInvoiceResponse])
-async def list_proforma_invoices(
+def list_proforma_invoices(
     company_id: str,
     customer_id: Optional[str] = None,
     from_date: Optional[date] = None,
@@ -424,7 +425,7 @@ async def list_proforma_invoices(
 
 
 @router.get("/{invoice_id}", response_model=ProformaInvoiceResponse)
-async def get_proforma_invoice(
+def get_proforma_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -496,7 +497,7 @@ async def get_proforma_invoice(
 
 
 @router.put("/{invoice_id}", response_model=ProformaInvoiceResponse)
-async def update_proforma_invoice(
+def update_proforma_invoice(
     company_id: str,
     invoice_id: str,
     data: ProformaInvoiceUpdate,
@@ -579,7 +580,7 @@ async def update_proforma_invoice(
 
 
 @router.delete("/{invoice_id}")
-async def delete_proforma_invoice(
+def delete_proforma_invoice(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -598,7 +599,7 @@ async def delete_proforma_invoice(
 
 
 @router.post("/{invoice_id}/convert-to-invoice")
-async def convert_to_invoice(
+def convert_to_invoice(
     company_id: str,
     invoice_id: str,
     data: Optional[ConvertToInvoiceRequest] = None,
@@ -672,7 +673,8 @@ async def convert_to_invoice(
 
 
 @router.get("/{invoice_id}/download")
-async def download_proforma_pdf(
+@execution_policy(ExecutionPolicy.CPU)
+def download_proforma_pdf(
     company_id: str,
     invoice_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -686,12 +688,11 @@ async def download_proforma_pdf(
     if not invoice:
         raise HTTPException(status_code=404, detail="Proforma invoice not found")
 
-    pdf_service = PDFService()
-    pdf_buffer = pdf_service.generate_proforma_pdf(invoice, company, invoice.customer)
+    pdf_bytes = PDFRenderService().render("proforma", invoice, company, invoice.customer)
     filename = f"Proforma_{invoice.invoice_number}.pdf"
 
     return Response(
-        content=pdf_buffer.getvalue(),
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"'
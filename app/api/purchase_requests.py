@@ -43,7 +43,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.post("", response_model=PurchaseRequestResponse, status_code=status.HTTP_201_CREATED)
-async def create_purchase_request(
+def create_purchase_request(
     company_id: str,
     data: PurchaseRequestCreate,
     current_user: User = Depends(get_current_active_user),
@@ -117,7 +117,7 @@ async def create_purchase_request(
     
 
 @router.get("", response_model=PurchaseRequestListResponse)
-async def list_purchase_requests(
+def list_purchase_requests(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -213,7 +213,7 @@ async def list_purchase_requests(
 
 
 @router.get("/{request_id}", response_model=PurchaseRequestResponse)
-async def get_purchase_request(
+def get_purchase_request(
     company_id: str,
     request_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -279,7 +279,7 @@ async def get_purchase_request(
 
 
 @router.get("/by-number/{purchase_req_no}", response_model=PurchaseRequestResponse)
-async def get_purchase_request_by_number(
+def get_purchase_request_by_number(
     company_id: str,
     purchase_req_no: str,
     current_user: User = Depends(get_current_active_user),
@@ -345,7 +345,7 @@ async def get_purchase_request_by_number(
 
 
 @router.put("/{request_id}/status", response_model=PurchaseRequestResponse)
-async def update_purchase_request_status(
+def update_purchase_request_status(
     company_id: str,
     request_id: str,
     data: PurchaseRequestUpdate,
@@ -414,7 +414,7 @@ async def update_purchase_request_status(
     return response_data
 
 @router.put("/{request_id}", response_model=PurchaseRequestResponse)
-async def update_purchase_request(
+def update_purchase_request(
     company_id: str,
     request_id: str,
     data: PurchaseRequestUpdate,
@@ -487,7 +487,7 @@ async def update_purchase_request(
 
 
 @router.delete("/{request_id}")
-async def delete_purchase_request(
+def delete_purchase_request(
     company_id: str,
     request_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -516,7 +516,7 @@ async def delete_purchase_request(
 
 
 @router.get("/stats/summary", response_model=PurchaseRequestStats)
-async def get_purchase_request_stats(
+def get_purchase_request_stats(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -530,7 +530,7 @@ async def get_purchase_request_stats(
 
 
 @router.get("/by-creator/{user_id}")
-async def get_purchase_requests_by_creator(
+def get_purchase_requests_by_creator(
     company_id: str,
     user_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -598,7 +598,7 @@ async def get_purchase_requests_by_creator(
 
 
 @router.get("/by-make/{make}")
-async def get_purchase_requests_by_make(
+def get_purchase_requests_by_make(
     company_id: str,
     make: str,
     current_user: User = Depends(get_current_active_user),
@@ -666,7 +666,7 @@ async def get_purchase_requests_by_make(
 
 
 @router.get("/recent")
-async def get_recent_purchase_requests(
+def get_recent_purchase_requests(
     company_id: str,
     limit: int = Query(10, ge=1, le=50),
     current_user: User = Depends(get_current_active_user),
@@ -734,7 +734,7 @@ async def get_recent_purchase_requests(
 
 
 @router.get("/summary/by-user")
-async def get_purchase_requests_summary_by_user(
+def get_purchase_requests_summary_by_user(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -748,7 +748,7 @@ async def get_purchase_requests_summary_by_user(
 
 
 @router.get("/{request_id}/item-approval-summary", response_model=PurchaseRequestItemApprovalSummary)
-async def get_item_approval_summary(
+def get_item_approval_summary(
     company_id: str,
     request_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -770,7 +770,7 @@ async def get_item_approval_summary(
 
 
 @router.put("/{request_id}/bulk-item-approval", response_model=PurchaseRequestResponse)
-async def bulk_update_item_approval(
+def bulk_update_item_approval(
     company_id: str,
     request_id: str,
     data: List[PurchaseRequestItemApprovalUpdate],
@@ -843,7 +843,7 @@ async def bulk_update_item_approval(
 
 
 @router.post("/search", response_model=PurchaseRequestSearchResponse)
-async def search_purchase_requests(
+def search_purchase_requests(
     company_id: str,
     search_term: str = Body(..., embed=True),
     limit: int = Body(20, embed=True),
@@ -912,7 +912,7 @@ async def search_purchase_requests(
 
 
 @router.post("/bulk-update")
-async def bulk_update_purchase_requests(
+def bulk_update_purchase_requests(
     company_id: str,
     data: PurchaseRequestBulkUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -948,7 +948,7 @@ async def bulk_update_purchase_requests(
 
 
 @router.post("/export")
-async def export_purchase_requests(
+def export_purchase_requests(
     company_id: str,
     data: PurchaseRequestExportRequest,
     current_user: User = Depends(get_current_active_user),
@@ -11,8 +11,9 @@ from app.database.models import User, Company, PurchaseType, PurchaseInvoiceStat
 from app.services.purchase_service import PurchaseService
 from app.services.company_service import CompanyService
 from app.services.vendor_service import VendorService
-from app.services.pdf_service import PDFService
+from app.services.pdf_render_service import PDFRenderService
 from app.auth.dependencies import get_current_active_user
+from app.api.execution import ExecutionPolicy, execution_policy
 
 router = APIRouter(prefix="/api/purchases", tags=["Purchases"])
 
@@ -320,10 +321,11 @@ class PurchaseResponse(BaseModel):
 class PurchaseListResponse(BaseModel):
     """Schema for paginated purchase list."""
     items: List[PurchaseResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class PurchaseUpdate(BaseModel):
@@ -384,7 +386,7 @@ class PurchaseSummaryResponse(BaseModel):
 
 # ==================== PURCHASE ENDPOINTS ====================
 @router.post("", response_model=PurchaseResponse, status_code=status.HTTP_201_CREATED)
-async def create_purchase(
+def create_purchase(
     company_id: str = Query(..., description="Company ID"),
     data: PurchaseCreate = Body(...),
     current_user: User = Depends(get_current_active_user),
@@ -536,10 +538,12 @@ async def create_purchase(
 
 
 @router.get("", response_model=PurchaseListResponse)
-async def list_purchases(
+def list_purchases(
     company_id: str = Query(..., description="Company ID"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes precedence over page)"),
+    include_totals: bool = Query(True, description="Include total and total_pages"),
     purchase_type: Optional[str] = Query(None, description="Filter by purchase type"),
     vendor_id: Optional[str] = Query(None, description="Filter by vendor"),
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -548,7 +552,7 @@ async def list_purchases(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List purchases with filters."""
+    """List purchases with filters, newest first."""
     company = get_company_or_404(company_id, current_user, db)
     
     purchase_service = PurchaseService(db)
@@ -571,19 +575,27 @@ async def list_purchases(
                 detail=f"Invalid status. Must be one of: {valid_statuses}"
             )
     
-    purchases, total = purchase_service.get_purchases(
-        company_id=company.id,
-        purchase_type=purchase_type,
-        vendor_id=vendor_id,
-        status=status,
-        from_date=from_date,
-        to_date=to_date,
-        page=page,
-        page_size=page_size
-    )
+    try:
+        result = purchase_service.list_purchases(
+            company_id=company.id,
+            purchase_type=purchase_type,
+            vendor_id=vendor_id,
+            status=status,
+            from_date=from_date,
+            to_date=to_date,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            include_totals=include_totals,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    items = [_build_purchase_response(purchase) for purchase in purchases]
-    total_pages = (total + page_size - 1) // page_size if page_size > 0 else 1
+    items = [_build_purchase_response(purchase) for purchase in result["items"]]
+    total = result["total"]
+    total_pages = None
+    if total is not None:
+        total_pages = (total + page_size - 1) // page_size if page_size > 0 else 1
     
     return PurchaseListResponse(
         items=items,
@@ -591,11 +603,12 @@ async def list_purchases(
         page=page,
         page_size=page_size,
         total_pages=total_pages,
+        next_cursor=result["next_cursor"],
     )
 
 
 @router.get("/next-number")
-async def get_next_purchase_number(
+def get_next_purchase_number(
     company_id: str = Query(..., description="Company ID"),
     purchase_date: Optional[date] = Query(None, description="Purchase date for FY"),
     current_user: User = Depends(get_current_active_user),
@@ -609,7 +622,7 @@ async def get_next_purchase_number(
 
 
 @router.get("/{purchase_id}", response_model=PurchaseResponse)
-async def get_purchase(
+def get_purchase(
     company_id: str = Query(..., description="Company ID"),
     purchase_id: str = Path(..., description="Purchase ID"),
     current_user: User = Depends(get_current_active_user),
@@ -631,7 +644,7 @@ async def get_purchase(
 
 
 @router.put("/{purchase_id}", response_model=PurchaseResponse)
-async def update_purchase(
+def update_purchase(
     company_id: str = Query(..., description="Company ID"),
     purchase_id: str = Path(..., description="Purchase ID"),
     data: PurchaseUpdate = Body(...),
@@ -683,7 +696,7 @@ async def update_purchase(
 
 
 @router.delete("/{purchase_id}", status_code=status.HTTP_200_OK)
-async def delete_purchase(
+def delete_purchase(
     company_id: str = Query(..., description="Company ID"),
     purchase_id: str = Path(..., description="Purchase ID"),
     current_user: User = Depends(get_current_active_user),
@@ -705,7 +718,7 @@ async def delete_purchase(
 
 
 @router.post("/{purchase_id}/payments", response_model=PurchasePaymentResponse)
-async def add_payment_to_purchase(
+def add_payment_to_purchase(
     company_id: str = Query(..., description="Company ID"),
     purchase_id: str = Path(..., description="Purchase ID"),
     data: PurchasePaymentCreate = Body(...),
@@ -758,7 +771,8 @@ async def add_payment_to_purchase(
 
 
 @router.get("/{purchase_id}/pdf")
-async def download_purchase_pdf(
+@execution_policy(ExecutionPolicy.CPU)
+def download_purchase_pdf(
     company_id: str = Query(..., description="Company ID"),
     purchase_id: str = Path(..., description="Purchase ID"),
     current_user: User = Depends(get_current_active_user),
@@ -776,19 +790,18 @@ async def download_purchase_pdf(
             detail="Purchase not found"
         )
 
-    pdf_service = PDFService()
-    pdf_buffer = pdf_service.generate_purchase_pdf(purchase, company, purchase.vendor)
+    pdf_bytes = PDFRenderService().render("purchase", purchase, company, purchase.vendor)
     filename = f"Purchase_{purchase.purchase_number or purchase.id}.pdf"
 
     return Response(
-        content=pdf_buffer.getvalue(),
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.get("/{purchase_id}/summary")
-async def get_purchase_summary(
+def get_purchase_summary(
     company_id: str = Query(..., description="Company ID"),
     purchase_id: str = Path(..., description="Purchase ID"),
     current_user: User = Depends(get_current_active_user),
@@ -859,7 +872,7 @@ async def get_purchase_summary(
 
 
 @router.get("/reports/summary", response_model=PurchaseSummaryResponse)
-async def get_purchases_summary(
+def get_purchases_summary(
     company_id: str = Query(..., description="Company ID"),
     from_date: Optional[datetime] = Query(None, description="Start date for summary"),
     to_date: Optional[datetime] = Query(None, description="End date for summary"),
@@ -880,7 +893,7 @@ async def get_purchases_summary(
 
 
 @router.get("/reports/by-vendor")
-async def get_purchases_by_vendor(
+def get_purchases_by_vendor(
     company_id: str = Query(..., description="Company ID"),
     from_date: Optional[datetime] = Query(None, description="Start date"),
     to_date: Optional[datetime] = Query(None, description="End date"),
@@ -891,13 +904,14 @@ async def get_purchases_by_vendor(
     company = get_company_or_404(company_id, current_user, db)
     
     purchase_service = PurchaseService(db)
-    purchases, _ = purchase_service.get_purchases(
+    purchases = purchase_service.list_purchases(
         company_id=company.id,
         from_date=from_date,
         to_date=to_date,
         page=1,
-        page_size=1000  # Get all for reporting
-    )
+        page_size=1000,  # Get all for reporting
+        include_totals=False,
+    )["items"]
     
     # Group by vendor
     vendor_summary = {}
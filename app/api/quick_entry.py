@@ -104,7 +104,7 @@ class QuickEntryOptions(BaseModel):
 # Endpoints
 
 @router.post("/quick-entry", response_model=QuickEntryResponse, status_code=status.HTTP_201_CREATED)
-async def create_quick_entry(
+def create_quick_entry(
     company_id: str,
     data: QuickEntryCreate,
     current_user: User = Depends(get_current_active_user),
@@ -204,7 +204,7 @@ async def create_quick_entry(
 
 
 @router.get("/quick-entry", response_model=List[QuickEntryResponse])
-async def list_quick_entries(
+def list_quick_entries(
     company_id: str,
     entry_type: Optional[str] = None,
     category: Optional[str] = None,
@@ -254,7 +254,7 @@ async def list_quick_entries(
 
 
 @router.get("/quick-entry/options", response_model=QuickEntryOptions)
-async def get_quick_entry_options(
+def get_quick_entry_options(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -314,7 +314,7 @@ async def get_quick_entry_options(
 
 
 @router.get("/quick-entry/summary")
-async def get_quick_entry_summary(
+def get_quick_entry_summary(
     company_id: str,
     from_date: date,
     to_date: date,
@@ -314,10 +314,11 @@ class QuotationResponse(BaseModel):
 
 class QuotationListResponse(BaseModel):
     items: List[QuotationResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ConvertToInvoiceRequest(BaseModel):
@@ -346,7 +347,7 @@ class ExcelNotesResponse(BaseModel):
 # ==================== ENDPOINTS ====================
 
 @router.get("/companies/{company_id}/contact-persons", response_model=List[ContactPersonResponse])
-async def get_contact_persons(
+def get_contact_persons(
     company_id: str,
     customer_id: Optional[str] = Query(None, description="Filter by customer ID"),
     current_user: User = Depends(get_current_active_user),
@@ -369,7 +370,7 @@ async def get_contact_persons(
 
 
 @router.get("/companies/{company_id}/sales-engineers", response_model=List[SalesEngineerResponse])
-async def get_sales_engineers(
+def get_sales_engineers(
     company_id: str,
     search: Optional[str] = Query(None, description="Search by name or employee code"),
     include_without_designation: bool = Query(False, description="Include employees without designations"),
@@ -476,7 +477,7 @@ async def get_sales_engineers(
 
 
 @router.get("/companies/{company_id}/customers/{customer_id}/contact-persons", response_model=List[ContactPersonResponse])
-async def get_customer_contact_persons(
+def get_customer_contact_persons(
     company_id: str,
     customer_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -504,7 +505,7 @@ async def get_customer_contact_persons(
 
 
 @router.post("/companies/{company_id}/quotations", response_model=QuotationResponse)
-async def create_quotation(
+def create_quotation(
     company_id: str,
     data: str = Form(...),
     excel_file: Optional[UploadFile] = File(None),
@@ -548,7 +549,7 @@ async def create_quotation(
         excel_file_content = None
         excel_filename = None
         if excel_file:
-            excel_file_content = await excel_file.read()
+            excel_file_content = excel_file.file.read()
             excel_filename = excel_file.filename or "excel_data.csv"
         
         # Create quotation using service
@@ -658,7 +659,7 @@ async def create_quotation(
     
     
 @router.get("/companies/{company_id}/quotations", response_model=QuotationListResponse)
-async def list_quotations(
+def list_quotations(
     company_id: str,
     status: Optional[str] = None,
     customer_id: Optional[str] = None,
@@ -667,10 +668,12 @@ async def list_quotations(
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes precedence over page)"),
+    include_totals: bool = Query(True, description="Include total and total_pages"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List quotations with filters."""
+    """List quotations with filters, newest first."""
     company = get_company_or_404(company_id, current_user, db)
     service = QuotationService(db)
     
@@ -693,16 +696,21 @@ async def list_quotations(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     
-    result = service.list_quotations(
-        company_id=company_id,
-        status=status_enum,
-        customer_id=customer_id,
-        from_date=from_dt,
-        to_date=to_dt,
-        search=search,
-        page=page,
-        page_size=page_size,
-    )
+    try:
+        result = service.list_quotations(
+            company_id=company_id,
+            status=status_enum,
+            customer_id=customer_id,
+            from_date=from_dt,
+            to_date=to_dt,
+            search=search,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            include_totals=include_totals,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "items": [_quotation_to_response(q, db, include_items=False) for q in result["items"]],
@@ -710,10 +718,11 @@ async def list_quotations(
         "page": result["page"],
         "page_size": result["page_size"],
         "total_pages": result["total_pages"],
+        "next_cursor": result["next_cursor"],
     }
 
 @router.get("/companies/{company_id}/quotations/next-number")
-async def get_next_quotation_number(
+def get_next_quotation_number(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -766,7 +775,7 @@ async def get_next_quotation_number(
         
 
 @router.get("/companies/{company_id}/quotations/{quotation_id}", response_model=QuotationResponse)
-async def get_quotation(
+def get_quotation(
     company_id: str,
     quotation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -784,7 +793,7 @@ async def get_quotation(
 
 
 @router.get("/companies/{company_id}/quotations/{quotation_id}/excel-notes", response_model=ExcelNotesResponse)
-async def get_excel_notes(
+def get_excel_notes(
     company_id: str,
     quotation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -806,7 +815,7 @@ async def get_excel_notes(
     }
 
 @router.put("/companies/{company_id}/quotations/{quotation_id}", response_model=QuotationResponse)
-async def update_quotation(
+def update_quotation(
     company_id: str,
     quotation_id: str,
     data: str = Form(...),
@@ -842,7 +851,7 @@ async def update_quotation(
         excel_file_content = None
         excel_filename = None
         if excel_file:
-            excel_file_content = await excel_file.read()
+            excel_file_content = excel_file.file.read()
             excel_filename = excel_file.filename or "excel_data.csv"
         
         # Convert items to dict if provided - INCLUDING SUB-ITEMS
@@ -940,7 +949,7 @@ async def update_quotation(
     
 
 @router.delete("/companies/{company_id}/quotations/{quotation_id}")
-async def delete_quotation(
+def delete_quotation(
     company_id: str,
     quotation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -962,7 +971,7 @@ async def delete_quotation(
 
 
 @router.post("/companies/{company_id}/quotations/{quotation_id}/send", response_model=QuotationResponse)
-async def send_quotation(
+def send_quotation(
     company_id: str,
     quotation_id: str,
     data: SendRequest,
@@ -985,7 +994,7 @@ async def send_quotation(
 
 
 @router.post("/companies/{company_id}/quotations/{quotation_id}/approve", response_model=QuotationResponse)
-async def approve_quotation(
+def approve_quotation(
     company_id: str,
     quotation_id: str,
     data: ApprovalRequest,
@@ -1008,7 +1017,7 @@ async def approve_quotation(
 
 
 @router.post("/companies/{company_id}/quotations/{quotation_id}/reject", response_model=QuotationResponse)
-async def reject_quotation(
+def reject_quotation(
     company_id: str,
     quotation_id: str,
     data: RejectionRequest,
@@ -1031,7 +1040,7 @@ async def reject_quotation(
 
 
 @router.post("/companies/{company_id}/quotations/{quotation_id}/convert")
-async def convert_to_invoice(
+def convert_to_invoice(
     company_id: str,
     quotation_id: str,
     data: ConvertToInvoiceRequest,
@@ -1072,7 +1081,7 @@ async def convert_to_invoice(
 
 
 @router.post("/companies/{company_id}/quotations/{quotation_id}/revise", response_model=QuotationResponse)
-async def revise_quotation(
+def revise_quotation(
     company_id: str,
     quotation_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -1091,7 +1100,7 @@ async def revise_quotation(
 
 
 @router.post("/companies/{company_id}/quotations/check-expired")
-async def check_expired_quotations(
+def check_expired_quotations(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1109,7 +1118,7 @@ class CompareQuotationsRequest(BaseModel):
 
 
 @router.get("/companies/{company_id}/quotations/reports/items")
-async def get_quotation_items_report(
+def get_quotation_items_report(
     company_id: str,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
@@ -1132,7 +1141,7 @@ async def get_quotation_items_report(
 
 
 @router.post("/companies/{company_id}/quotations/compare")
-async def compare_quotations(
+def compare_quotations(
     company_id: str,
     data: CompareQuotationsRequest,
     current_user: User = Depends(get_current_active_user),
@@ -1,10 +1,10 @@
 """
 Advanced Reports API - Ledger, Aging, Ratios, Day Book
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, date
 from io import BytesIO
 
@@ -31,7 +31,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 # ==================== LEDGER ====================
 
 @router.get("/companies/{company_id}/reports/ledger/{account_id}")
-async def get_ledger(
+def get_ledger(
     company_id: str,
     account_id: str,
     from_date: Optional[str] = None,
@@ -85,7 +85,7 @@ async def get_ledger(
 
 
 @router.get("/companies/{company_id}/reports/day-book")
-async def get_day_book(
+def get_day_book(
     company_id: str,
     date: str,
     voucher_type: Optional[str] = None,
@@ -101,7 +101,7 @@ async def get_day_book(
 
 
 @router.get("/companies/{company_id}/reports/voucher-register")
-async def get_voucher_register(
+def get_voucher_register(
     company_id: str,
     from_date: str,
     to_date: str,
@@ -119,7 +119,7 @@ async def get_voucher_register(
 
 
 @router.get("/companies/{company_id}/reports/cash-bank-book")
-async def get_cash_bank_book(
+def get_cash_bank_book(
     company_id: str,
     from_date: str,
     to_date: str,
@@ -138,27 +138,71 @@ async def get_cash_bank_book(
 
 # ==================== AGING ====================
 
+def parse_aging_buckets(buckets: Optional[str]) -> Optional[List[int]]:
+    """Parse comma-separated bucket edges such as ``0,30,60,90``."""
+    if not buckets:
+        return None
+    try:
+        edges = [int(edge) for edge in buckets.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Buckets must be comma-separated whole days")
+    if len(edges) < 2 or edges[0] != 0 or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise HTTPException(
+            status_code=400,
+            detail="Buckets must start at 0 and increase, with at least two edges",
+        )
+    return edges
+
+
 @router.get("/companies/{company_id}/reports/aging/receivables")
-async def get_receivables_aging(
+def get_receivables_aging(
+    company_id: str,
+    as_of_date: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    buckets: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    get_company_or_404(company_id, current_user, db)
+    service = AgingReportService(db)
+    
+    aod = datetime.fromisoformat(as_of_date) if as_of_date else None
+    
+    return service.get_receivables_aging(company_id, aod, customer_id, parse_aging_buckets(buckets))
+
+
+@router.get("/companies/{company_id}/reports/aging/receivables/details")
+def get_receivables_aging_details(
     company_id: str,
     as_of_date: Optional[str] = None,
     customer_id: Optional[str] = None,
+    bucket: Optional[str] = None,
+    buckets: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """Outstanding invoices behind the receivables aging, a page at a time."""
     get_company_or_404(company_id, current_user, db)
     service = AgingReportService(db)
     
     aod = datetime.fromisoformat(as_of_date) if as_of_date else None
     
-    return service.get_receivables_aging(company_id, aod, customer_id)
+    try:
+        return service.get_receivables_aging_details(
+            company_id, aod, customer_id, bucket, parse_aging_buckets(buckets), page, page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/companies/{company_id}/reports/aging/payables")
-async def get_payables_aging(
+def get_payables_aging(
     company_id: str,
     as_of_date: Optional[str] = None,
     vendor_id: Optional[str] = None,
+    buckets: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -167,13 +211,39 @@ async def get_payables_aging(
     
     aod = datetime.fromisoformat(as_of_date) if as_of_date else None
     
-    return service.get_payables_aging(company_id, aod, vendor_id)
+    return service.get_payables_aging(company_id, aod, vendor_id, parse_aging_buckets(buckets))
+
+
+@router.get("/companies/{company_id}/reports/aging/payables/details")
+def get_payables_aging_details(
+    company_id: str,
+    as_of_date: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    bucket: Optional[str] = None,
+    buckets: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Unpaid purchases behind the payables aging, a page at a time."""
+    get_company_or_404(company_id, current_user, db)
+    service = AgingReportService(db)
+    
+    aod = datetime.fromisoformat(as_of_date) if as_of_date else None
+    
+    try:
+        return service.get_payables_aging_details(
+            company_id, aod, vendor_id, bucket, parse_aging_buckets(buckets), page, page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ==================== RATIOS ====================
 
 @router.get("/companies/{company_id}/reports/ratios")
-async def get_ratio_analysis(
+def get_ratio_analysis(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -187,7 +257,7 @@ async def get_ratio_analysis(
 # ==================== EXCEL EXPORT ====================
 
 @router.get("/companies/{company_id}/reports/export/ledger/{account_id}")
-async def export_ledger_excel(
+def export_ledger_excel(
     company_id: str,
     account_id: str,
     from_date: Optional[str] = None,
@@ -214,7 +284,7 @@ async def export_ledger_excel(
 
 
 @router.get("/companies/{company_id}/reports/export/aging")
-async def export_aging_excel(
+def export_aging_excel(
     company_id: str,
     report_type: str = "receivables",
     current_user: User = Depends(get_current_active_user),
@@ -225,10 +295,23 @@ async def export_aging_excel(
     aging_service = AgingReportService(db)
     excel_service = ExcelService(db)
     
+    as_of = datetime.utcnow()
     if report_type == "receivables":
-        data = aging_service.get_receivables_aging(company_id)
+        data = aging_service.get_receivables_aging(company_id, as_of)
+        get_details = aging_service.get_receivables_aging_details
     else:
-        data = aging_service.get_payables_aging(company_id)
+        data = aging_service.get_payables_aging(company_id, as_of)
+        get_details = aging_service.get_payables_aging_details
+    
+    # The sheet lists every invoice, so walk the drill-down pages
+    data['details'] = []
+    page = 1
+    while True:
+        result = get_details(company_id, as_of, page=page, page_size=1000)
+        data['details'].extend(result['details'])
+        if not result['has_more']:
+            break
+        page += 1
     
     excel_data = excel_service.export_report(data, 'aging')
     
@@ -2,7 +2,7 @@
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -233,7 +233,7 @@ def _item_to_response(item: StockJournalItem) -> dict:
 # ==================== ENDPOINTS ====================
 
 @router.post("/companies/{company_id}/stock-journals", response_model=StockJournalResponse, status_code=status.HTTP_201_CREATED)
-async def create_stock_journal(
+def create_stock_journal(
     company_id: str,
     data: StockJournalCreate,
     current_user: User = Depends(get_current_active_user),
@@ -271,7 +271,7 @@ async def create_stock_journal(
 
 
 @router.get("/companies/{company_id}/stock-journals", response_model=StockJournalListResponse)
-async def list_stock_journals(
+def list_stock_journals(
     company_id: str,
     journal_type: Optional[str] = None,
     status: Optional[str] = None,
@@ -334,7 +334,7 @@ async def list_stock_journals(
 
 
 @router.get("/companies/{company_id}/stock-journals/{journal_id}", response_model=StockJournalResponse)
-async def get_stock_journal(
+def get_stock_journal(
     company_id: str,
     journal_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -352,7 +352,7 @@ async def get_stock_journal(
 
 
 @router.post("/companies/{company_id}/stock-journals/{journal_id}/confirm", response_model=StockJournalResponse)
-async def confirm_stock_journal(
+def confirm_stock_journal(
     company_id: str,
     journal_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -374,7 +374,7 @@ async def confirm_stock_journal(
 
 
 @router.post("/companies/{company_id}/stock-journals/{journal_id}/cancel", response_model=StockJournalResponse)
-async def cancel_stock_journal(
+def cancel_stock_journal(
     company_id: str,
     journal_id: str,
     data: CancelRequest,
@@ -397,7 +397,7 @@ async def cancel_stock_journal(
 
 
 @router.delete("/companies/{company_id}/stock-journals/{journal_id}")
-async def delete_stock_journal(
+def delete_stock_journal(
     company_id: str,
     journal_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -421,7 +421,7 @@ async def delete_stock_journal(
 # ==================== QUICK OPERATIONS ====================
 
 @router.post("/companies/{company_id}/stock-journals/transfer", response_model=StockJournalResponse, status_code=status.HTTP_201_CREATED)
-async def create_inter_godown_transfer(
+def create_inter_godown_transfer(
     company_id: str,
     data: InterGodownTransferCreate,
     current_user: User = Depends(get_current_active_user),
@@ -449,7 +449,7 @@ async def create_inter_godown_transfer(
 
 
 @router.post("/companies/{company_id}/stock-journals/conversion", response_model=StockJournalResponse, status_code=status.HTTP_201_CREATED)
-async def create_product_conversion(
+def create_product_conversion(
     company_id: str,
     data: ProductConversionCreate,
     current_user: User = Depends(get_current_active_user),
@@ -478,7 +478,7 @@ async def create_product_conversion(
 
 
 @router.post("/companies/{company_id}/stock-journals/adjustment", response_model=StockJournalResponse, status_code=status.HTTP_201_CREATED)
-async def create_stock_adjustment(
+def create_stock_adjustment(
     company_id: str,
     data: StockAdjustmentCreate,
     current_user: User = Depends(get_current_active_user),
@@ -509,7 +509,7 @@ async def create_stock_adjustment(
 
 
 @router.post("/companies/{company_id}/stock-journals/manufacturing", response_model=StockJournalResponse, status_code=status.HTTP_201_CREATED)
-async def create_manufacturing_from_bom(
+def create_manufacturing_from_bom(
     company_id: str,
     data: ManufacturingFromBOMCreate,
     current_user: User = Depends(get_current_active_user),
@@ -539,19 +539,21 @@ async def create_manufacturing_from_bom(
 # ==================== STOCK LEDGER ====================
 
 @router.get("/companies/{company_id}/stock-ledger/{product_id}")
-async def get_stock_ledger(
+def get_stock_ledger(
     company_id: str,
     product_id: str,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
     godown_id: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Get stock ledger for a product (Tally-style item movement report).
     
-    Shows all stock movements with running balance.
+    Shows one page of stock movements with running balance.
     """
     get_company_or_404(company_id, current_user, db)
     service = StockJournalService(db)
@@ -575,11 +577,13 @@ async def get_stock_ledger(
         from_date=fd,
         to_date=td,
         godown_id=godown_id,
+        page=page,
+        page_size=page_size,
     )
 
 
 @router.get("/companies/{company_id}/godown-stock-summary")
-async def get_godown_stock_summary(
+def get_godown_stock_summary(
     company_id: str,
     godown_id: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -154,7 +154,7 @@ class PendingDepositResponse(BaseModel):
 # ==================== TDS SECTION ENDPOINTS ====================
 
 @router.post("/sections/initialize", response_model=List[TDSSectionResponse])
-async def initialize_tds_sections(
+def initialize_tds_sections(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -169,7 +169,7 @@ async def initialize_tds_sections(
 
 
 @router.get("/sections", response_model=List[TDSSectionResponse])
-async def list_tds_sections(
+def list_tds_sections(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -184,7 +184,7 @@ async def list_tds_sections(
 
 
 @router.post("/sections", response_model=TDSSectionResponse, status_code=status.HTTP_201_CREATED)
-async def create_tds_section(
+def create_tds_section(
     company_id: str,
     data: TDSSectionCreate,
     current_user: User = Depends(get_current_active_user),
@@ -209,7 +209,7 @@ async def create_tds_section(
 
 
 @router.get("/sections/{section_id}", response_model=TDSSectionResponse)
-async def get_tds_section(
+def get_tds_section(
     company_id: str,
     section_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -233,7 +233,7 @@ async def get_tds_section(
 # ==================== TDS CALCULATION ENDPOINTS ====================
 
 @router.post("/calculate", response_model=TDSCalculationResponse)
-async def calculate_tds(
+def calculate_tds(
     company_id: str,
     data: TDSCalculateRequest,
     current_user: User = Depends(get_current_active_user),
@@ -266,7 +266,7 @@ async def calculate_tds(
 # ==================== TDS ENTRY ENDPOINTS ====================
 
 @router.post("/entries", response_model=TDSEntryResponse, status_code=status.HTTP_201_CREATED)
-async def create_tds_entry(
+def create_tds_entry(
     company_id: str,
     data: TDSEntryCreate,
     current_user: User = Depends(get_current_active_user),
@@ -297,7 +297,7 @@ async def create_tds_entry(
 
 
 @router.get("/entries", response_model=List[TDSEntryResponse])
-async def list_tds_entries(
+def list_tds_entries(
     company_id: str,
     vendor_id: Optional[str] = None,
     section_code: Optional[str] = None,
@@ -326,7 +326,7 @@ async def list_tds_entries(
 # ==================== TDS DEPOSIT ENDPOINTS ====================
 
 @router.post("/deposit", response_model=List[TDSEntryResponse])
-async def record_tds_deposit(
+def record_tds_deposit(
     company_id: str,
     data: TDSDepositRequest,
     current_user: User = Depends(get_current_active_user),
@@ -356,7 +356,7 @@ async def record_tds_deposit(
 
 
 @router.get("/pending-deposits", response_model=List[PendingDepositResponse])
-async def get_pending_deposits(
+def get_pending_deposits(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -373,7 +373,7 @@ async def get_pending_deposits(
 # ==================== TDS REPORTS ====================
 
 @router.get("/summary", response_model=TDSSummaryResponse)
-async def get_tds_summary(
+def get_tds_summary(
     company_id: str,
     financial_year: str,
     quarter: Optional[str] = None,
@@ -390,7 +390,7 @@ async def get_tds_summary(
 
 
 @router.get("/vendor-statement/{vendor_id}", response_model=VendorTDSStatementResponse)
-async def get_vendor_tds_statement(
+def get_vendor_tds_statement(
     company_id: str,
     vendor_id: str,
     financial_year: str,
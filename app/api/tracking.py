@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from pydantic import BaseModel, Field, validator
 import json
+import logging
 
 from app.database.connection import get_db
 from app.database.tracking_models import (
@@ -17,8 +18,15 @@ from app.database.tracking_models import (
 )
 from app.database.payroll_models import Employee
 from app.database.models import Company, Customer, Enquiry
+from app.services.geo_index_service import GeoIndexService
+from app.services.location_ingest_service import LocationIngestService, tracking_lookup_cache
+from app.services.tracking_hub import MAX_MESSAGE_BYTES, company_topic, tracking_hub
+from app.services.trip_route_service import (
+    TripRouteService, DEFAULT_MAX_ACCURACY_M, DEFAULT_MAX_SPEED_KMH
+)
 
 router = APIRouter(prefix="/api/companies/{company_id}", tags=["tracking"])
+logger = logging.getLogger(__name__)
 
 def normalize_timestamp(ts: Optional[datetime]) -> Optional[datetime]:
     if ts is None:
@@ -44,6 +52,9 @@ class LocationData(BaseModel):
     is_background: bool = False
     timestamp: datetime
 
+class LocationBatchRequest(BaseModel):
+    locations: List[LocationData] = Field(..., min_length=1, max_length=1000)
+
 class StartTripRequest(BaseModel):
     start_km: Decimal = Field(..., gt=0)
     start_location: LocationData
@@ -203,6 +214,7 @@ def bind_device(
     db.add(device_binding)
     db.commit()
     db.refresh(device_binding)
+    tracking_lookup_cache.invalidate_engineer(company_id, engineer_id)
     
     return {"message": "Device bound successfully", "binding_id": device_binding.id}
 
@@ -254,41 +266,25 @@ def get_nearby_customers(
     db: Session = Depends(get_db)
 ):
     """Get nearby customers based on a coordinate."""
-    # Approximate bounding box to reduce query size
-    lat_delta = radius_km / 111.0
-    lng_delta = radius_km / (111.0 * max(math.cos(math.radians(latitude)), 0.01))
-
-    candidates = db.query(Customer).filter(
-        Customer.company_id == company_id,
-        Customer.is_active == True,
-        Customer.location_lat.isnot(None),
-        Customer.location_lng.isnot(None),
-        Customer.location_lat.between(latitude - lat_delta, latitude + lat_delta),
-        Customer.location_lng.between(longitude - lng_delta, longitude + lng_delta),
-    ).all()
-
-    results = []
-    for customer in candidates:
-        distance_m = haversine_distance(
-            latitude, longitude, customer.location_lat, customer.location_lng
-        )
-        if distance_m <= radius_km * 1000:
-            results.append({
-                "id": customer.id,
-                "name": customer.name,
-                "contact": customer.contact,
-                "city": customer.billing_city,
-                "state": customer.billing_state,
-                "district": customer.district,
-                "area": customer.area,
-                "latitude": customer.location_lat,
-                "longitude": customer.location_lng,
-                "location_address": customer.location_address,
-                "distance_km": round(distance_m / 1000, 2),
-            })
-
-    results.sort(key=lambda x: x["distance_km"])
-    return results[:limit]
+    service = GeoIndexService(db)
+    nearby = service.customers_within(company_id, latitude, longitude, radius_km, limit)
+
+    return [
+        {
+            "id": customer.id,
+            "name": customer.name,
+            "contact": customer.contact,
+            "city": customer.billing_city,
+            "state": customer.billing_state,
+            "district": customer.district,
+            "area": customer.area,
+            "latitude": customer.location_lat,
+            "longitude": customer.location_lng,
+            "location_address": customer.location_address,
+            "distance_km": round(distance_m / 1000, 2),
+        }
+        for customer, distance_m in nearby
+    ]
 
 @router.get("/engineers/{engineer_id}/current-trip")
 def get_current_trip(
@@ -793,6 +789,20 @@ def mark_visit_out(
 
 # ==================== LIVE LOCATION TRACKING ====================
 
+def location_to_fix(data: LocationData) -> Dict[str, Any]:
+    return {
+        "latitude": data.latitude,
+        "longitude": data.longitude,
+        "accuracy": data.accuracy,
+        "altitude": data.altitude,
+        "speed": data.speed,
+        "heading": data.heading,
+        "device_id": data.device_id,
+        "is_mock_location": data.is_mock_location,
+        "is_background": data.is_background,
+        "recorded_at": normalize_timestamp(data.timestamp),
+    }
+
 @router.post("/location/update")
 def update_location(
     company_id: str,
@@ -801,88 +811,38 @@ def update_location(
     db: Session = Depends(get_db)
 ):
     """Update engineer's location (called every 5-10 seconds)."""
-    # Check device binding
-    device_binding = db.query(SalesEngineerDevice).filter(
-        SalesEngineerDevice.company_id == company_id,
-        SalesEngineerDevice.engineer_id == engineer_id,
-        SalesEngineerDevice.device_id == data.device_id,
-        SalesEngineerDevice.is_active == True
-    ).first()
-    
-    if not device_binding:
-        device_binding = SalesEngineerDevice(
-            company_id=company_id,
-            engineer_id=engineer_id,
-            device_id=data.device_id,
-            device_model="web",
-            device_os="web",
-            device_version="browser",
-            background_tracking_enabled=True,
-            is_active=True
-        )
-        db.add(device_binding)
-    
-    # Get current trip
-    tracking_status = db.query(EngineerTrackingStatus).filter(
-        EngineerTrackingStatus.company_id == company_id,
-        EngineerTrackingStatus.engineer_id == engineer_id
-    ).first()
-    
-    loc_ts = normalize_timestamp(data.timestamp)
-    if not tracking_status:
-        tracking_status = EngineerTrackingStatus(
-            company_id=company_id,
-            engineer_id=engineer_id,
-            status=TrackingStatus.IDLE,
-            current_trip_id=None,
-            current_lat=data.latitude,
-            current_lng=data.longitude,
-            last_location_update=loc_ts,
-            device_id=data.device_id,
-            is_online=True,
-            gps_enabled=True
-        )
-        db.add(tracking_status)
+    service = LocationIngestService(db)
+    service.ingest(company_id, engineer_id, [location_to_fix(data)], skip_existing=False)
     
-    # Create location log
-    location_log = LocationLog(
-        company_id=company_id,
-        engineer_id=engineer_id,
-        trip_id=tracking_status.current_trip_id,
-        latitude=data.latitude,
-        longitude=data.longitude,
-        accuracy=data.accuracy,
-        altitude=data.altitude,
-        speed=data.speed,
-        heading=data.heading,
-        device_id=data.device_id,
-        is_mock_location=data.is_mock_location,
-        is_background=data.is_background,
-        recorded_at=loc_ts
+    return {"message": "Location updated"}
+
+@router.post("/location/batch")
+def update_location_batch(
+    company_id: str,
+    engineer_id: str,
+    data: LocationBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """Upload buffered fixes (offline / background tracking) in one request.
+    
+    Fixes already received (same device and timestamp) are skipped, so the
+    app can safely retry an upload.
+    """
+    service = LocationIngestService(db)
+    result = service.ingest(
+        company_id,
+        engineer_id,
+        [location_to_fix(location) for location in data.locations],
     )
     
-    db.add(location_log)
-    
-    # Update tracking status
-    tracking_status.current_lat = data.latitude
-    tracking_status.current_lng = data.longitude
-    tracking_status.last_location_update = loc_ts
-    tracking_status.is_online = True
-    tracking_status.device_id = data.device_id
-    
-    if data.is_mock_location:
-        # Flag for fake GPS
-        tracking_status.has_fraud_flag = True
-        # Also flag the current trip
-        trip = db.query(Trip).filter(Trip.id == tracking_status.current_trip_id).first()
-        if trip:
-            trip.has_fraud_flag = True
-            trip.fraud_reason = FraudFlagReason.FAKE_GPS_DETECTED
-            trip.fraud_score = 100
-    
-    db.commit()
-    
-    return {"message": "Location updated"}
+    latest = result["latest_fix"]
+    return {
+        "message": "Locations updated",
+        "received": result["received"],
+        "stored": result["stored"],
+        "duplicates": result["duplicates"],
+        "latest_recorded_at": latest["recorded_at"] if latest else None,
+    }
 
 # ==================== ADMIN DASHBOARD ENDPOINTS ====================
 
@@ -969,9 +929,13 @@ def get_trips(
 def get_trip_route(
     company_id: str,
     trip_id: str,
+    tolerance_m: Optional[float] = Query(None, ge=0, description="Simplification tolerance in metres (0 = all points)"),
+    max_points: Optional[int] = Query(None, ge=2, description="Maximum points in the returned polyline"),
+    max_accuracy_m: Optional[float] = Query(DEFAULT_MAX_ACCURACY_M, gt=0, description="Drop fixes less accurate than this"),
+    max_speed_kmh: Optional[float] = Query(DEFAULT_MAX_SPEED_KMH, gt=0, description="Drop GPS spikes faster than this"),
     db: Session = Depends(get_db)
 ):
-    """Get GPS route for a trip."""
+    """Get GPS route for a trip (jitter-filtered, simplified polyline)."""
     trip = db.query(Trip).filter(
         Trip.id == trip_id,
         Trip.company_id == company_id
@@ -980,52 +944,14 @@ def get_trip_route(
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
     
-    # Get all location logs for this trip
-    location_logs = db.query(LocationLog).filter(
-        LocationLog.trip_id == trip_id
-    ).order_by(LocationLog.recorded_at).all()
-    
-    # Calculate GPS distance
-    total_distance = 0
-    route_points = []
-    
-    for i in range(len(location_logs) - 1):
-        lat1, lon1 = location_logs[i].latitude, location_logs[i].longitude
-        lat2, lon2 = location_logs[i+1].latitude, location_logs[i+1].longitude
-        
-        distance = haversine_distance(lat1, lon1, lat2, lon2)
-        total_distance += distance
-        
-        route_points.append({
-            "lat": lat1,
-            "lng": lon1,
-            "timestamp": location_logs[i].recorded_at,
-            "speed": location_logs[i].speed,
-            "accuracy": location_logs[i].accuracy
-        })
-    
-    # Add last point
-    if location_logs:
-        last = location_logs[-1]
-        route_points.append({
-            "lat": last.latitude,
-            "lng": last.longitude,
-            "timestamp": last.recorded_at,
-            "speed": last.speed,
-            "accuracy": last.accuracy
-        })
-    
-    # Update trip with GPS distance if not set
-    if not trip.gps_distance_km:
-        trip.gps_distance_km = Decimal(str(total_distance / 1000))  # Convert to km
-        db.commit()
-    
-    return {
-        "trip_id": trip_id,
-        "gps_distance_km": float(total_distance / 1000),
-        "route_points": route_points,
-        "total_points": len(route_points)
-    }
+    service = TripRouteService(db)
+    return service.get_route(
+        trip,
+        tolerance_m=tolerance_m,
+        max_points=max_points,
+        max_accuracy_m=max_accuracy_m,
+        max_speed_kmh=max_speed_kmh,
+    )
 
 @router.get("/visits")
 def get_visits(
@@ -1410,54 +1336,41 @@ def get_fraud_detection_report(
 
 # ==================== WEBSOCKET FOR REAL-TIME UPDATES ====================
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-    
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-    
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-    
-    async def send_personal_message(self, message: str, client_id: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
-    
-    async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
-
-manager = ConnectionManager()
-
 @router.websocket("/ws/live-tracking")
 async def websocket_live_tracking(websocket: WebSocket, company_id: str):
-    await manager.connect(websocket, f"admin_{company_id}")
+    await websocket.accept()
+    topic = company_topic(company_id)
+    subscriber = await tracking_hub.subscribe(topic, websocket.send_text)
     try:
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(f"admin_{company_id}")
+        pass
+    finally:
+        await tracking_hub.unsubscribe(topic, subscriber)
 
 @router.websocket("/ws/engineer/{engineer_id}")
 async def websocket_engineer_tracking(websocket: WebSocket, company_id: str, engineer_id: str):
-    await manager.connect(websocket, f"engineer_{company_id}_{engineer_id}")
+    await websocket.accept()
     try:
         while True:
             data = await websocket.receive_text()
-            # Handle engineer updates
-            # Broadcast to admin clients
-            await manager.broadcast(data)
+            if len(data.encode("utf-8")) > MAX_MESSAGE_BYTES:
+                await websocket.send_text(json.dumps({"type": "error", "detail": "Message too large"}))
+                continue
+            # Forward engineer updates to the company's admin clients
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                message = {"data": data}
+            # The socket's engineer, whatever the client claims
+            message["engineer_id"] = engineer_id
+            try:
+                await tracking_hub.publish(company_topic(company_id), message)
+            except Exception as e:
+                logger.warning("Tracking update from engineer %s not published: %s", engineer_id, e)
     except WebSocketDisconnect:
-        manager.disconnect(f"engineer_{company_id}_{engineer_id}")
-
-
-
-
-
-
-
-
+        pass
@@ -7,7 +7,7 @@ from fastapi.responses import JSONResponse
 router = APIRouter(tags=["Upload"])
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+def upload_file(file: UploadFile = File(...)):
     """Upload a file."""
     # Validate file type
     allowed_extensions = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
@@ -20,7 +20,7 @@ async def upload_file(file: UploadFile = File(...)):
         )
     
     # Validate file size (max 2MB)
-    contents = await file.read()
+    contents = file.file.read()
     if len(contents) > 2 * 1024 * 1024:  # 2MB
         raise HTTPException(
             status_code=400,
@@ -36,7 +36,7 @@ async def upload_file(file: UploadFile = File(...)):
     file_path = os.path.join(upload_dir, unique_filename)
     
     # Reset file pointer and save
-    await file.seek(0)
+    file.file.seek(0)
     with open(file_path, "wb") as f:
         f.write(contents)
     
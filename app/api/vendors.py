@@ -34,7 +34,7 @@ def get_company_or_404(company_id: str, user: User, db: Session) -> Company:
 
 
 @router.post("", response_model=VendorResponse, status_code=status.HTTP_201_CREATED)
-async def create_vendor(
+def create_vendor(
     company_id: str,
     data: VendorCreate,
     current_user: User = Depends(get_current_active_user),
@@ -48,7 +48,7 @@ async def create_vendor(
 
 
 @router.get("", response_model=VendorListResponse)
-async def list_vendors(
+def list_vendors(
     company_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -73,7 +73,7 @@ async def list_vendors(
 
 
 @router.get("/search")
-async def search_vendors(
+def search_vendors(
     company_id: str,
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=50),
@@ -88,7 +88,7 @@ async def search_vendors(
 
 
 @router.get("/{vendor_id}", response_model=VendorResponse)
-async def get_vendor(
+def get_vendor(
     company_id: str,
     vendor_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -109,7 +109,7 @@ async def get_vendor(
 
 
 @router.put("/{vendor_id}", response_model=VendorResponse)
-async def update_vendor(
+def update_vendor(
     company_id: str,
     vendor_id: str,
     data: VendorUpdate,
@@ -132,7 +132,7 @@ async def update_vendor(
 
 
 @router.delete("/{vendor_id}")
-async def delete_vendor(
+def delete_vendor(
     company_id: str,
     vendor_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -154,7 +154,7 @@ async def delete_vendor(
 
 
 @router.patch("/{vendor_id}/toggle-active")
-async def toggle_vendor_active(
+def toggle_vendor_active(
     company_id: str,
     vendor_id: str,
     is_active: bool = Query(..., description="Set active status"),
@@ -177,7 +177,7 @@ async def toggle_vendor_active(
 
 
 @router.get("/{vendor_id}/opening-balance-items")
-async def get_vendor_opening_balance_items(
+def get_vendor_opening_balance_items(
     company_id: str,
     vendor_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -199,7 +199,7 @@ async def get_vendor_opening_balance_items(
 
 
 @router.post("/{vendor_id}/opening-balance-items")
-async def add_opening_balance_item(
+def add_opening_balance_item(
     company_id: str,
     vendor_id: str,
     data: OpeningBalanceItemCreate,
@@ -222,7 +222,7 @@ async def add_opening_balance_item(
 
 
 @router.get("/{vendor_id}/contact-persons")
-async def get_vendor_contact_persons(
+def get_vendor_contact_persons(
     company_id: str,
     vendor_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -244,7 +244,7 @@ async def get_vendor_contact_persons(
 
 
 @router.post("/{vendor_id}/contact-persons")
-async def add_contact_person(
+def add_contact_person(
     company_id: str,
     vendor_id: str,
     data: ContactPersonCreate,
@@ -267,7 +267,7 @@ async def add_contact_person(
 
 
 @router.get("/{vendor_id}/bank-details")
-async def get_vendor_bank_details(
+def get_vendor_bank_details(
     company_id: str,
     vendor_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -289,7 +289,7 @@ async def get_vendor_bank_details(
 
 
 @router.post("/{vendor_id}/bank-details")
-async def add_bank_detail(
+def add_bank_detail(
     company_id: str,
     vendor_id: str,
     data: BankDetailCreate,
@@ -312,7 +312,7 @@ async def add_bank_detail(
 
 
 @router.patch("/{vendor_id}/bank-details/{bank_detail_id}/set-primary")
-async def set_primary_bank_detail(
+def set_primary_bank_detail(
     company_id: str,
     vendor_id: str,
     bank_detail_id: str,
@@ -336,7 +336,7 @@ async def set_primary_bank_detail(
 
 # Export/Import routes
 @router.post("/import")
-async def import_vendors(
+def import_vendors(
     company_id: str,
     vendors_data: List[dict],
     current_user: User = Depends(get_current_active_user),
@@ -370,7 +370,7 @@ async def import_vendors(
 
 
 @router.get("/export")
-async def export_vendors(
+def export_vendors(
     company_id: str,
     format: str = Query("csv", pattern="^(csv|json|excel)$"),
     current_user: User = Depends(get_current_active_user),
@@ -451,7 +451,7 @@ async def export_vendors(
 
 # Statistics and reports
 @router.get("/statistics/summary")
-async def get_vendors_summary(
+def get_vendors_summary(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -477,7 +477,7 @@ async def get_vendors_summary(
 
 
 @router.get("/statistics/by-state")
-async def get_vendors_by_state(
+def get_vendors_by_state(
     company_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -490,7 +490,7 @@ async def get_vendors_by_state(
 
 
 @router.get("/statistics/top-vendors")
-async def get_top_vendors(
+def get_top_vendors(
     company_id: str,
     limit: int = Query(10, ge=1, le=50),
     period: str = Query("all", pattern="^(day|week|month|quarter|year|all)$"),
@@ -128,7 +128,7 @@ def _visit_to_response(visit: Visit, db: Session) -> dict:
 # ==================== VISIT ENDPOINTS ====================
 
 @router.post("/visits", response_model=VisitResponse)
-async def create_visit(
+def create_visit(
     company_id: str,
     data: VisitCreate,
     current_user: User = Depends(get_current_active_user),
@@ -152,7 +152,7 @@ async def create_visit(
 
 
 @router.get("/visits")
-async def list_visits(
+def list_visits(
     company_id: str,
     employee_id: Optional[str] = Query(None),
     customer_id: Optional[str] = Query(None),
@@ -185,7 +185,7 @@ async def list_visits(
 
 
 @router.get("/visits/{visit_id}", response_model=VisitResponse)
-async def get_visit(
+def get_visit(
     company_id: str,
     visit_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -203,7 +203,7 @@ async def get_visit(
 
 
 @router.put("/visits/{visit_id}", response_model=VisitResponse)
-async def update_visit(
+def update_visit(
     company_id: str,
     visit_id: str,
     data: VisitUpdate,
@@ -227,7 +227,7 @@ async def update_visit(
 
 
 @router.post("/visits/{visit_id}/check-in", response_model=VisitResponse)
-async def check_in(
+def check_in(
     company_id: str,
     visit_id: str,
     data: CheckInRequest,
@@ -252,7 +252,7 @@ async def check_in(
 
 
 @router.post("/visits/{visit_id}/check-out", response_model=VisitResponse)
-async def check_out(
+def check_out(
     company_id: str,
     visit_id: str,
     data: CheckOutRequest,
@@ -279,7 +279,7 @@ async def check_out(
 
 
 @router.post("/visits/{visit_id}/cancel", response_model=VisitResponse)
-async def cancel_visit(
+def cancel_visit(
     company_id: str,
     visit_id: str,
     reason: Optional[str] = None,
@@ -301,7 +301,7 @@ async def cancel_visit(
 # ==================== REPORT ENDPOINTS ====================
 
 @router.get("/visits/reports/trip")
-async def get_trip_report(
+def get_trip_report(
     company_id: str,
     employee_id: Optional[str] = Query(None),
     from_date: Optional[date] = Query(None),
@@ -322,7 +322,7 @@ async def get_trip_report(
 
 
 @router.get("/visits/reports/km-summary")
-async def get_km_summary(
+def get_km_summary(
     company_id: str,
     employee_id: Optional[str] = Query(None),
     from_date: Optional[date] = Query(None),
@@ -9,6 +9,7 @@ from app.database.models import User
 from app.database.payroll_models import Employee, Designation
 from app.config import settings
 from app.auth.supabase_client import auth_helper
+from app.auth.token_cache import token_cache, attach_user, verify_supabase_jwt
 
 # HTTP Bearer token scheme
 security = HTTPBearer(auto_error=False)
@@ -37,12 +38,15 @@ async def get_token_from_header(
     return None
 
 
-async def verify_supabase_token(token: str) -> Optional[dict]:
+def verify_supabase_token(token: str) -> Optional[dict]:
     """Verify Supabase JWT token."""
+    if settings.SUPABASE_JWT_SECRET:
+        # Verify the signature locally - no round trip to Supabase
+        return verify_supabase_jwt(token)
+    
     try:
-        # For Supabase, we can verify the token using their API
-        user = await auth_helper.get_user(token)
-        return user
+        # Otherwise ask the Supabase API (blocking; callers run on the thread pool)
+        return auth_helper.get_user_sync(token)
     except Exception:
         return None
 
@@ -63,13 +67,16 @@ def is_employee(auth_data: Union[User, Dict[str, Any]]) -> bool:
     """Check if auth data is for an employee."""
     return isinstance(auth_data, dict) and auth_data.get("is_employee") == True
 
-async def get_current_user(
+def get_current_user(
     token: Optional[str] = Depends(get_token_from_header),
     db: Session = Depends(get_db)
 ) -> Union[User, Dict[str, Any]]:
     """
     Get current authenticated user or employee.
     Returns either a User object or employee dict based on token type.
+    
+    A plain ``def``: it queries the database and may call Supabase, so
+    FastAPI runs it on the worker thread pool, not the event loop.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,6 +87,21 @@ async def get_current_user(
     if not token:
         raise credentials_exception
     
+    # Tokens verified by an earlier request need no network call or query
+    cached = token_cache.get(token)
+    if cached is not None and cached.user is None:
+        return AuthPayload(cached.payload)
+    if cached is not None:
+        user = attach_user(db, cached.user)
+        if user is not None and user.is_active:
+            payload = AuthPayload(cached.payload)
+            payload["data"] = user
+            return payload
+        # Deactivated or deleted since the token was cached
+        token_cache.invalidate_user(cached.user.id)
+        if user is not None:
+            return AuthPayload({"type": "user", "data": user, "is_employee": False})
+    
     # FIRST: Try to decode as employee JWT token
     try:
         payload = jwt.decode(token, EMPLOYEE_SECRET_KEY, algorithms=[ALGORITHM])
@@ -113,7 +135,7 @@ async def get_current_user(
                     designation_id = designation_id or str(employee.designation_id)
             
             # Return employee data as dict (not User object)
-            return AuthPayload({
+            employee_payload = {
                 "type": "employee",
                 "id": employee_id,
                 "company_id": company_id,
@@ -122,7 +144,9 @@ async def get_current_user(
                 "designation_id": designation_id,
                 "permissions": permissions,
                 "is_employee": True
-            })
+            }
+            token_cache.set(token, employee_payload)
+            return AuthPayload(employee_payload)
     except JWTError:
         # Not an employee token, continue to try other token types
         pass
@@ -153,7 +177,7 @@ async def get_current_user(
         })
     
     # THIRD: Verify token with Supabase (regular user)
-    supabase_user = await verify_supabase_token(token)
+    supabase_user = verify_supabase_token(token)
     if not supabase_user:
         raise credentials_exception
     
@@ -172,6 +196,8 @@ async def get_current_user(
         db.commit()
         db.refresh(user)
     
+    token_cache.set(token, {"type": "user", "is_employee": False}, user)
+    
     # Mark as regular user
     return AuthPayload({
         "type": "user",
@@ -210,7 +236,7 @@ async def get_current_active_user(
         )
     
     
-async def get_optional_user(
+def get_optional_user(
     token: Optional[str] = Depends(get_token_from_header),
     db: Session = Depends(get_db)
 ) -> Optional[User]:
@@ -219,7 +245,7 @@ async def get_optional_user(
         return None
     
     try:
-        return await get_current_user(token, db)
+        return get_current_user(token, db)
     except HTTPException:
         return None
 
@@ -75,6 +75,10 @@ class SupabaseAuth:
     
     async def sign_in(self, email: str, password: str) -> dict:
         """Sign in a user."""
+        return self.sign_in_sync(email, password)
+    
+    def sign_in_sync(self, email: str, password: str) -> dict:
+        """Sign in a user (blocking Supabase call)."""
         if not self.client:
             # Mock signin for development
             return {
@@ -129,6 +133,10 @@ class SupabaseAuth:
     
     async def get_user(self, access_token: str) -> Optional[dict]:
         """Get user from access token."""
+        return self.get_user_sync(access_token)
+    
+    def get_user_sync(self, access_token: str) -> Optional[dict]:
+        """Get user from access token (blocking Supabase call)."""
         if not self.client:
             # Mock user for development
             return {
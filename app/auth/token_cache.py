@@ -0,0 +1,181 @@
+"""Cache of verified bearer tokens.
+
+``get_current_user`` runs on every authenticated request. Verifying a Supabase
+token means a network round trip to Supabase plus a ``User`` lookup, so the
+result is cached here, keyed by a SHA-256 hash of the token (raw tokens are
+never kept in memory). An entry lives for ``AUTH_TOKEN_CACHE_TTL`` seconds but
+never past the token's own ``exp`` claim, and the cache holds at most
+``AUTH_TOKEN_CACHE_SIZE`` entries (least recently used evicted first).
+
+When ``SUPABASE_JWT_SECRET`` is configured, Supabase tokens are verified
+locally with the project's JWT secret and Supabase is not called at all.
+
+Access changes must not wait for the TTL: a cache hit re-reads the user's
+``is_active`` column (a primary key lookup), and a user found deactivated or
+deleted has all of their cached tokens dropped. ``get_current_user`` is a
+plain ``def`` dependency, so that lookup runs on the worker thread pool,
+never on the event loop.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from jose import jwt, JWTError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from app.config import settings
+from app.database.models import User
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_token_expiry(token: str) -> Optional[float]:
+    """``exp`` claim of a JWT as a unix timestamp, without verifying it."""
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    return float(exp) if exp is not None else None
+
+
+def verify_supabase_jwt(token: str) -> Optional[dict]:
+    """Verify a Supabase access token locally.
+
+    Returns the same identity dict as ``SupabaseAuth.get_user``, or None if
+    local verification is not configured or the token is invalid.
+    """
+    if not settings.SUPABASE_JWT_SECRET:
+        return None
+
+    try:
+        claims = jwt.decode(
+            token,
+            settings.SUPABASE_JWT_SECRET,
+            algorithms=[settings.JWT_ALGORITHM],
+            audience="authenticated",
+        )
+    except JWTError:
+        return None
+
+    if not claims.get("sub"):
+        return None
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "user_metadata": claims.get("user_metadata") or {},
+    }
+
+
+class CachedAuth:
+    """A cache entry: the auth payload of one verified token."""
+
+    __slots__ = ("payload", "user", "expires_at")
+
+    def __init__(self, payload: Dict[str, Any], user: Optional[User], expires_at: float):
+        self.payload = payload
+        self.user = user
+        self.expires_at = expires_at
+
+
+class TokenCache:
+    """Thread-safe LRU cache of verified tokens with per-entry expiry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedAuth]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[CachedAuth]:
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, token: str, payload: Dict[str, Any], user: Optional[User] = None) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        expires_at = time.time() + self.ttl
+        token_expiry = get_token_expiry(token)
+        if token_expiry is not None:
+            expires_at = min(expires_at, token_expiry)
+        if expires_at <= time.time():
+            return
+
+        entry = CachedAuth(payload, _detached_copy(user) if user is not None else None, expires_at)
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(hash_token(token), None)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token of a user (e.g. after deactivation)."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.user is not None and e.user.id == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _detached_copy(user: User) -> User:
+    """Copy the loaded columns of ``user`` into a detached instance.
+
+    The copy is independent of the request session that loaded it, and can be
+    attached to a later session with ``attach_user`` without a query.
+    """
+    mapper = User.__mapper__
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def attach_user(db: Session, user: User) -> Optional[User]:
+    """
+    Attach a cached user to the request session.
+
+    Only ``is_active`` is read from the database, so deactivation applies
+    at once. Returns None if the user no longer exists. Blocking: call it
+    from sync code (the thread pool), not from a coroutine.
+    """
+    row = db.query(User.is_active).filter(User.id == user.id).first()
+    if row is None:
+        return None
+    attached = db.merge(user, load=False)
+    set_committed_value(attached, "is_active", row.is_active)
+    return attached
+
+
+token_cache = TokenCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+)
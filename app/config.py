@@ -1,4 +1,6 @@
 """Application configuration settings."""
+import os
+import tempfile
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 from typing import Optional
@@ -17,14 +19,52 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
     SUPABASE_SERVICE_KEY: Optional[str] = None
+    SUPABASE_JWT_SECRET: Optional[str] = None  # enables local token verification
     
     # Database settings
     DATABASE_URL: str = ""
     
+    # Worker pools for blocking request work (see app/api/execution.py)
+    DB_WORKER_THREADS: int = 15  # pool_size + max_overflow of the DB engine
+    CPU_WORKER_THREADS: int = 4  # PDF / QR rendering
+    
     # JWT settings
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
     
+    # Live tracking pub/sub (see app/services/tracking_hub.py)
+    TRACKING_HUB_BACKEND: str = "memory"  # "memory" or "postgres" (LISTEN/NOTIFY, multi-worker)
+    TRACKING_HUB_QUEUE_SIZE: int = 100  # pending messages per WebSocket subscriber
+    
+    # Background payroll processing (see app/services/payroll_job_service.py)
+    PAYROLL_CHUNK_SIZE: int = 500  # employees computed and committed together
+    PAYROLL_WORKER_PROCESSES: int = 2  # 0 or 1 computes in the job thread
+    PAYROLL_STALE_AFTER_SECONDS: int = 300  # no committed chunk for this long = crashed job
+    
+    # Bank statement import (see app/services/bank_import_service.py)
+    BANK_IMPORT_BATCH_SIZE: int = 1000  # parsed rows inserted together
+    
+    # GST return result cache (see app/services/gst_return_cache_service.py)
+    GST_RETURN_CACHE_TTL: int = 300  # seconds for open periods; locked periods never expire
+    
+    # PDF rendering (see app/services/pdf_render_service.py)
+    PDF_WORKER_PROCESSES: int = 2  # 0 or 1 renders in the request thread
+    PDF_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "gst_invoice_pro", "pdf_cache")  # outside the repo
+    PDF_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # least recently used PDFs removed beyond this
+    
+    # Bulk invoice PDF export (see app/services/invoice_export_service.py)
+    INVOICE_EXPORT_DIR: str = os.path.join(tempfile.gettempdir(), "gst_invoice_pro", "invoice_exports")  # outside the repo
+    INVOICE_EXPORT_CHUNK_SIZE: int = 100  # invoices loaded, rendered and recorded together
+    INVOICE_EXPORT_STALE_AFTER_SECONDS: int = 300  # no committed chunk for this long = crashed job
+    
+    # Document listing totals (see app/services/listing_service.py)
+    LISTING_TOTALS_CACHE_TTL: int = 30  # seconds; this worker's own writes invalidate at once
+    LISTING_TOTALS_CACHE_SIZE: int = 5000
+    
+    # Verified-token cache (see app/auth/token_cache.py)
+    AUTH_TOKEN_CACHE_TTL: int = 300  # seconds, capped by the token's exp
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    
     # UPI settings
     UPI_ID: str = ""  # Default UPI ID for demo
     
@@ -8,11 +8,20 @@ from app.database.models import (
     Product,
     Invoice,
     InvoiceItem,
+    SalesDailyRollup,
+    InvoiceExportJob,
+    InvoiceExportStatus,
     Payment,
     BankAccount,
     Account,
     Transaction,
     TransactionEntry,
+    AccountBalanceSnapshot,
+    StockBalance,
+    StockBalanceSnapshot,
+    StockCostLayer,
+    StockCostLayerConsumption,
+    DocumentSequence,
     # Multi-currency
     Currency,
     ExchangeRate,
@@ -44,6 +53,7 @@ from app.database.models import (
     # Accounting
     BillAllocation,
     PeriodLock,
+    GSTReturnCache,
     AuditLog,
     NarrationTemplate,
     Scenario,
@@ -118,11 +128,20 @@ __all__ = [
     "Product",
     "Invoice",
     "InvoiceItem",
+    "SalesDailyRollup",
+    "InvoiceExportJob",
+    "InvoiceExportStatus",
     "Payment",
     "BankAccount",
     "Account",
     "Transaction",
     "TransactionEntry",
+    "AccountBalanceSnapshot",
+    "StockBalance",
+    "StockBalanceSnapshot",
+    "StockCostLayer",
+    "StockCostLayerConsumption",
+    "DocumentSequence",
     # Multi-currency
     "Currency",
     "ExchangeRate",
@@ -154,6 +173,7 @@ __all__ = [
     # Accounting
     "BillAllocation",
     "PeriodLock",
+    "GSTReturnCache",
     "AuditLog",
     "NarrationTemplate",
     "Scenario",
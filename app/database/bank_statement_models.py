@@ -5,7 +5,7 @@ These are NOT transactions - they are records imported from bank statements
 used for reconciliation purposes only.
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Numeric, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, String, Numeric, DateTime, Boolean, ForeignKey, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 
@@ -51,6 +51,10 @@ class BankStatementEntry(Base):
     # Running balance as per bank
     balance = Column(Numeric(14, 2))
     
+    # Content fingerprint (bank account, date, amount, reference, balance) -
+    # re-imported overlapping statements skip rows already stored
+    fingerprint = Column(String(64))
+    
     # Reconciliation
     status = Column(SQLEnum(BankStatementEntryStatus), default=BankStatementEntryStatus.PENDING)
     matched_entry_id = Column(String(36), ForeignKey("transaction_entries.id", ondelete="SET NULL"))
@@ -70,6 +74,10 @@ class BankStatementEntry(Base):
     bank_account = relationship("BankAccount")
     matched_entry = relationship("TransactionEntry", foreign_keys=[matched_entry_id])
     booked_transaction = relationship("Transaction", foreign_keys=[booked_transaction_id])
+    
+    __table_args__ = (
+        Index("uq_bank_statement_entry_fingerprint", "fingerprint", unique=True),
+    )
 
 
 class MonthlyBankReconciliation(Base):
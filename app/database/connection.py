@@ -95,6 +95,8 @@ def ensure_tracking_columns():
         ("trips", "has_fraud_flag", "BOOLEAN"),
         ("trips", "fraud_reason", "VARCHAR(50)"),
         ("trips", "fraud_score", "INTEGER"),
+        ("trips", "route_polyline", "JSON"),
+        ("trips", "route_raw_points", "INTEGER"),
     ]
 
     def column_exists(conn, table_name: str, column_name: str) -> bool:
@@ -0,0 +1,122 @@
+"""Geohash encoding and cell covering for spatial lookups.
+
+A geohash is a base-32 string whose prefixes are nested lat/lng cells, so
+"all points in a cell" is a string range scan on an ordinary B-tree index.
+``covering_cells`` returns the cells (at one precision) covering a circle,
+which turns a radius query into a handful of index range lookups.
+"""
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+DEFAULT_PRECISION = 9  # ~4.8 m x 4.8 m cells
+EARTH_RADIUS_M = 6371000.0
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = DEFAULT_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # even bits encode longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_for(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Geohash of a stored location, or None if it is incomplete."""
+    if latitude is None or longitude is None:
+        return None
+    return encode_geohash(latitude, longitude)
+
+
+def prefix_upper_bound(cell: str) -> Optional[str]:
+    """
+    Smallest geohash after every geohash starting with ``cell`` (exclusive
+    range end), or None if there is none ("zz..."). Built from the next
+    base-32 digit, so the range holds under any collation that orders digits
+    before letters, not only "C".
+    """
+    for position in range(len(cell) - 1, -1, -1):
+        index = BASE32.index(cell[position])
+        if index + 1 < len(BASE32):
+            return cell[:position] + BASE32[index + 1]
+    return None
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(lat degrees, lng degrees) of a cell at ``precision``."""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle."""
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    lng_delta = min(math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)), 180.0)
+    return (
+        max(latitude - lat_delta, -90.0),
+        min(latitude + lat_delta, 90.0),
+        max(longitude - lng_delta, -180.0),
+        min(longitude + lng_delta, 180.0),
+    )
+
+
+def covering_cells(latitude: float, longitude: float, radius_m: float, max_cells: int = 16) -> List[str]:
+    """Geohash cells covering the circle, at the finest precision using at most ``max_cells``."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_m)
+
+    for precision in range(DEFAULT_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        lat_start = math.floor((min_lat + 90.0) / lat_step)
+        lat_end = math.floor((min(max_lat, 90.0 - 1e-9) + 90.0) / lat_step)
+        lng_start = math.floor((min_lng + 180.0) / lng_step)
+        lng_end = math.floor((min(max_lng, 180.0 - 1e-9) + 180.0) / lng_step)
+        if (lat_end - lat_start + 1) * (lng_end - lng_start + 1) > max_cells:
+            continue
+
+        cells = set()
+        for i in range(lat_start, lat_end + 1):
+            for j in range(lng_start, lng_end + 1):
+                cells.add(encode_geohash(
+                    -90.0 + (i + 0.5) * lat_step,
+                    -180.0 + (j + 0.5) * lng_step,
+                    precision,
+                ))
+        return sorted(cells)
+    return [""]  # whole world
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
@@ -20,9 +20,11 @@ from sqlalchemy import (
     Float,
     Index,
     UniqueConstraint,
+    event,
 )
-from sqlalchemy.orm import relationship, synonym
+from sqlalchemy.orm import Session, column_property, relationship, synonym
 from app.database.connection import Base
+from app.database.geohash import geohash_for
 import uuid
 from sqlalchemy.sql import func
 
@@ -106,6 +108,14 @@ class BankImportStatus(str, PyEnum):
     FAILED = "failed"
 
 
+class InvoiceExportStatus(str, PyEnum):
+    """Bulk invoice PDF export job status."""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class BankImportRowStatus(str, PyEnum):
     """Bank import row status."""
     PENDING = "pending"
@@ -907,6 +917,7 @@ class Customer(Base):
     location_lat = Column(Float)
     location_lng = Column(Float)
     location_address = Column(String(500))
+    geohash = Column(String(12))  # Kept in sync with location_lat/lng (see app/database/geohash.py)
     
     # Shipping Address
     shipping_address = Column(Text)
@@ -939,6 +950,7 @@ class Customer(Base):
     __table_args__ = (
         Index("idx_customer_location", "location_lat", "location_lng"),
         Index("idx_customer_district", "district", "area"),
+        Index("idx_customer_company_geohash", "company_id", "geohash"),
     )
     # Compatibility aliases for code that expects these attribute names
     @property
@@ -977,6 +989,13 @@ class Customer(Base):
         return f"<Customer(id={self.id}, name='{self.name}', company_id={self.company_id})>"
 
 
+@event.listens_for(Customer, "before_insert")
+@event.listens_for(Customer, "before_update")
+def _sync_customer_geohash(mapper, connection, target):
+    """Keep the geohash index column in step with location_lat/lng."""
+    target.geohash = geohash_for(target.location_lat, target.location_lng)
+
+
 class Product(Base):
     """Product/Service model - Unified product with inventory tracking."""
     __tablename__ = "items"
@@ -1257,6 +1276,8 @@ class Invoice(Base):
         Index("idx_invoice_company", "company_id"),
         Index("idx_invoice_customer", "customer_id"),
         Index("idx_invoice_date", "invoice_date"),
+        Index("idx_invoice_company_date", "company_id", "invoice_date", "id"),
+        Index("idx_invoice_company_created", "company_id", "created_at", "id"),
         Index("idx_invoice_status", "status"),
         Index("idx_invoice_ticket", "sales_ticket_id"),
     )
@@ -1319,6 +1340,114 @@ class InvoiceItem(Base):
         return f"<InvoiceItem {self.description[:30]}>"
 
 
+class SalesDailyRollup(Base):
+    """Daily sales totals - invoices summed per company, day, voucher type, status,
+    salesperson and customer.
+
+    Kept current from Invoice mapper events, so dashboards sum a few rollup rows
+    instead of the invoice history. Salesperson/customer keys are '' for
+    invoices without one; the customer is also keyed by the invoice's own
+    customer_name so walk-in names and renamed customers report as invoiced.
+    """
+    __tablename__ = "sales_daily_rollups"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    sale_date = Column(Date, nullable=False)
+    voucher_type = Column(String(20), nullable=False, default="")  # InvoiceVoucher value
+    status = Column(String(20), nullable=False, default="")  # InvoiceStatus value
+    sales_person_key = Column(String(36), nullable=False, default="")  # employee id or ""
+    customer_key = Column(String(36), nullable=False, default="")  # customer id or ""
+    customer_name = Column(String(255), nullable=False, default="")  # name on the invoice or ""
+
+    invoice_count = Column(Integer, default=0, nullable=False)
+    subtotal = Column(Numeric(18, 2), default=0, nullable=False)
+    discount_amount = Column(Numeric(18, 2), default=0, nullable=False)
+    cgst_amount = Column(Numeric(18, 2), default=0, nullable=False)
+    sgst_amount = Column(Numeric(18, 2), default=0, nullable=False)
+    igst_amount = Column(Numeric(18, 2), default=0, nullable=False)
+    cess_amount = Column(Numeric(18, 2), default=0, nullable=False)
+    total_tax = Column(Numeric(18, 2), default=0, nullable=False)
+    total_amount = Column(Numeric(18, 2), default=0, nullable=False)
+    amount_paid = Column(Numeric(18, 2), default=0, nullable=False)
+    balance_due = Column(Numeric(18, 2), default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "uq_sales_rollup_key",
+            "company_id", "sale_date", "voucher_type", "status", "sales_person_key", "customer_key",
+            "customer_name",
+            unique=True,
+        ),
+        Index("idx_sales_rollup_company_status", "company_id", "status"),
+    )
+
+    def __repr__(self):
+        return f"<SalesDailyRollup {self.sale_date} {self.status}: {self.invoice_count}>"
+
+
+class InvoiceExportJob(Base):
+    """Bulk export of a company's invoices for a date range as one ZIP of PDFs.
+
+    Built in the background by app/services/invoice_export_service.py, which
+    records progress and a heartbeat per chunk; the finished file is served
+    with HTTP range support so large downloads can resume.
+    """
+    __tablename__ = "invoice_export_jobs"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    requested_by = Column(String(36), ForeignKey("users.id", ondelete="SET NULL"))
+    from_date = Column(Date, nullable=False)
+    to_date = Column(Date, nullable=False)  # inclusive
+
+    status = Column(Enum(InvoiceExportStatus), default=InvoiceExportStatus.PENDING, nullable=False)
+    total_invoices = Column(Integer, default=0)
+    processed_invoices = Column(Integer, default=0)
+    failed_invoices = Column(Integer, default=0)
+    errors = Column(JSON)  # [{"invoice_id", "invoice_number", "error"}]
+    error_message = Column(Text)
+
+    file_path = Column(String(500))
+    file_size = Column(Integer)
+
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_invoice_export_company", "company_id", "created_at"),
+        Index("idx_invoice_export_status", "status"),
+    )
+
+    def __repr__(self):
+        return f"<InvoiceExportJob {self.from_date} to {self.to_date} {self.status}>"
+
+
+@event.listens_for(Invoice, "after_insert")
+def _invoice_inserted(mapper, connection, target):
+    """Add the invoice to the daily sales rollup."""
+    from app.services.sales_rollup_service import apply_invoice
+    apply_invoice(connection, target)
+
+
+@event.listens_for(Invoice, "before_update")
+def _invoice_updating(mapper, connection, target):
+    """Move the invoice's stored totals out of the rollup and its new ones in."""
+    from app.services.sales_rollup_service import reapply_invoice
+    reapply_invoice(connection, target)
+
+
+@event.listens_for(Invoice, "before_delete")
+def _invoice_deleting(mapper, connection, target):
+    """Take the invoice's stored totals back out of the rollup."""
+    from app.services.sales_rollup_service import release_invoice
+    release_invoice(connection, target.id)
+
+
 class Payment(Base):
     """Payment model - tracks payments against invoices."""
     __tablename__ = "payments"
@@ -1681,6 +1810,7 @@ class Transaction(Base):
         Index("idx_transaction_date", "transaction_date"),
         Index("idx_transaction_reference", "reference_type", "reference_id"),
         Index("idx_transaction_status", "status"),
+        Index("idx_transaction_company_status_date", "company_id", "status", "transaction_date"),
     )
 
     def __repr__(self):
@@ -1729,6 +1859,63 @@ class TransactionEntry(Base):
         return f"<TransactionEntry {self.debit_amount or self.credit_amount}>"
 
 
+class AccountBalanceSnapshot(Base):
+    """Daily account balance snapshot - cumulative posted totals through snapshot_date.
+
+    Rows exist only for days on which the account had posted activity and are
+    maintained by BalanceSnapshotService when transactions are posted or reversed.
+    """
+    __tablename__ = "account_balance_snapshots"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    account_id = Column(String(36), ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    snapshot_date = Column(Date, nullable=False)
+
+    # Cumulative totals of posted entries dated up to the end of snapshot_date
+    total_debit = Column(Numeric(18, 2), default=0, nullable=False)
+    total_credit = Column(Numeric(18, 2), default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_balance_snapshot_account_date", "company_id", "account_id", "snapshot_date", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<AccountBalanceSnapshot {self.account_id} {self.snapshot_date}>"
+
+
+class DocumentSequence(Base):
+    """Persistent document number counter - one row per company, sequence and financial year.
+
+    Values are handed out by SequenceService with an atomic row-locked increment,
+    so concurrent requests never receive the same number.
+    """
+    __tablename__ = "document_sequences"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+
+    # e.g. "invoice:sales:INV", "voucher:receipt", "journal_entry"
+    sequence_key = Column(String(100), nullable=False)
+    # e.g. "2024-2025"; empty for sequences that never reset
+    financial_year = Column(String(9), nullable=False, default="")
+
+    # Last value handed out
+    current_value = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_document_sequence_key", "company_id", "sequence_key", "financial_year", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<DocumentSequence {self.sequence_key} {self.financial_year} {self.current_value}>"
+
+
 class BankImport(Base):
     """Bank import model - Tracks CSV import batches."""
     __tablename__ = "bank_imports"
@@ -1750,6 +1937,7 @@ class BankImport(Base):
     matched_rows = Column(Integer, default=0)
     created_rows = Column(Integer, default=0)
     ignored_rows = Column(Integer, default=0)
+    duplicate_rows = Column(Integer, default=0)  # already imported (same fingerprint)
     
     # Error tracking
     error_message = Column(Text)
@@ -1806,6 +1994,9 @@ class BankImportRow(Base):
     # Raw data for debugging
     raw_data = Column(JSON)
     
+    # Content fingerprint (bank account, date, amount, reference, balance)
+    fingerprint = Column(String(64))
+    
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -1816,6 +2007,7 @@ class BankImportRow(Base):
     __table_args__ = (
         Index("idx_import_row_import", "import_id"),
         Index("idx_import_row_status", "status"),
+        Index("uq_import_row_fingerprint", "fingerprint", unique=True),
     )
 
     def __repr__(self):
@@ -1921,20 +2113,25 @@ class StockEntry(Base):
     __tablename__ = "stock_entries"
 
     id = Column(String(36), primary_key=True, default=generate_uuid)
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
-    product_id = Column(String(36), ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
-    godown_id = Column(String(36), ForeignKey("godowns.id", ondelete="SET NULL"))
-    batch_id = Column(String(36), ForeignKey("batches.id", ondelete="SET NULL"))
+    # Balance-affecting columns keep their previous value on change (active_history)
+    # so the stock balance listeners below can move an edited entry
+    company_id = column_property(Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False), active_history=True)
+    product_id = column_property(Column(String(36), ForeignKey("items.id", ondelete="CASCADE"), nullable=False), active_history=True)
+    godown_id = column_property(Column(String(36), ForeignKey("godowns.id", ondelete="SET NULL")), active_history=True)
+    batch_id = column_property(Column(String(36), ForeignKey("batches.id", ondelete="SET NULL")), active_history=True)
     
     # Movement details
-    entry_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    entry_date = column_property(Column(DateTime, nullable=False, default=datetime.utcnow), active_history=True)
     movement_type = Column(Enum(StockMovementType), nullable=False)
     
     # Quantity (positive for in, negative for out)
-    quantity = Column(Numeric(14, 3), nullable=False)
+    quantity = column_property(Column(Numeric(14, 3), nullable=False), active_history=True)
     unit = Column(String(20))
     rate = Column(Numeric(14, 2), default=0)
     value = Column(Numeric(14, 2), default=0)
+    # Valuation cost (FIFO / LIFO / weighted average), signed like quantity;
+    # set on insert from the cost layers (see app/services/stock_valuation_service.py)
+    cost_value = Column(Numeric(14, 2))
     
     # Reference
     reference_type = Column(String(50))  # invoice, purchase_order, stock_journal, etc.
@@ -1959,12 +2156,167 @@ class StockEntry(Base):
         Index("idx_stock_entry_company", "company_id"),
         Index("idx_stock_entry_item", "product_id"),
         Index("idx_stock_entry_date", "entry_date"),
+        Index("idx_stock_entry_item_date", "product_id", "entry_date"),
     )
 
     def __repr__(self):
         return f"<StockEntry {self.movement_type} - {self.quantity}>"
 
 
+class StockBalance(Base):
+    """Current stock of a product per godown and batch.
+
+    Maintained from StockEntry inserts/updates/deletes in the same flush (see
+    app/services/stock_balance_service.py). Entries without a godown or batch
+    are keyed by an empty string, so the key is unique without NULLs.
+    """
+    __tablename__ = "stock_balances"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(String(36), ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    godown_key = Column(String(36), nullable=False, default="")  # godown id or ""
+    batch_key = Column(String(36), nullable=False, default="")  # batch id or ""
+
+    quantity = Column(Numeric(18, 3), default=0, nullable=False)
+    value = Column(Numeric(18, 2), default=0, nullable=False)  # sum of entry cost values
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_stock_balance_key", "product_id", "godown_key", "batch_key", unique=True),
+        Index("idx_stock_balance_company", "company_id"),
+    )
+
+    def __repr__(self):
+        return f"<StockBalance {self.product_id} {self.godown_key}/{self.batch_key}: {self.quantity}>"
+
+
+class StockBalanceSnapshot(Base):
+    """Monthly stock snapshot - cumulative movements through the end of a month.
+
+    Rows exist only for months in which the product/godown/batch had movements;
+    an opening balance is the latest earlier snapshot plus the entries after it.
+    """
+    __tablename__ = "stock_balance_snapshots"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(String(36), ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    godown_key = Column(String(36), nullable=False, default="")
+    batch_key = Column(String(36), nullable=False, default="")
+    period_start = Column(Date, nullable=False)  # first day of the month
+
+    # Cumulative totals of entries dated up to the end of the month
+    total_inward = Column(Numeric(18, 3), default=0, nullable=False)
+    total_outward = Column(Numeric(18, 3), default=0, nullable=False)
+    closing_quantity = Column(Numeric(18, 3), default=0, nullable=False)
+    closing_value = Column(Numeric(18, 2), default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_stock_snapshot_key_period", "product_id", "godown_key", "batch_key", "period_start", unique=True),
+        Index("idx_stock_snapshot_company", "company_id"),
+    )
+
+    def __repr__(self):
+        return f"<StockBalanceSnapshot {self.product_id} {self.period_start}: {self.closing_quantity}>"
+
+
+class StockCostLayer(Base):
+    """Cost layer - a receipt of stock at one unit cost, consumed by issues.
+
+    One row per inward movement per product and godown (plus an opening layer
+    for the item's opening stock, without an entry); ``remaining_quantity``
+    falls as FIFO/LIFO issues consume it.
+    """
+    __tablename__ = "stock_cost_layers"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(String(36), ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    godown_key = Column(String(36), nullable=False, default="")  # godown id or ""
+    entry_id = Column(String(36))  # receipt (or reversed issue) entry; None = opening stock
+
+    layer_date = Column(DateTime, nullable=False)
+    unit_cost = Column(Numeric(14, 4), default=0, nullable=False)
+    quantity = Column(Numeric(14, 3), default=0, nullable=False)
+    remaining_quantity = Column(Numeric(14, 3), default=0, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_cost_layer_open", "product_id", "godown_key", "remaining_quantity"),
+        Index("idx_cost_layer_entry", "entry_id"),
+        Index("idx_cost_layer_company", "company_id"),
+    )
+
+    def __repr__(self):
+        return f"<StockCostLayer {self.product_id} {self.remaining_quantity} @ {self.unit_cost}>"
+
+
+class StockCostLayerConsumption(Base):
+    """What one issue took from one cost layer.
+
+    Deleting or editing the issue puts exactly these quantities back into
+    their layers. A row without a layer is the part issued beyond the layers
+    (negative stock), which has nothing to put back.
+    """
+    __tablename__ = "stock_cost_layer_consumptions"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    entry_id = Column(String(36), nullable=False)  # issue entry
+    layer_id = Column(String(36), ForeignKey("stock_cost_layers.id", ondelete="CASCADE"))
+    quantity = Column(Numeric(14, 3), default=0, nullable=False)
+
+    __table_args__ = (
+        Index("idx_cost_consumption_entry", "entry_id"),
+        Index("idx_cost_consumption_layer", "layer_id"),
+        Index("idx_cost_consumption_company", "company_id"),
+    )
+
+
+@event.listens_for(StockEntry, "before_insert")
+def _stock_entry_valued(mapper, connection, target):
+    """Cost the movement against the item's cost layers."""
+    from app.services.stock_valuation_service import value_stock_entry
+    value_stock_entry(connection, target)
+
+
+@event.listens_for(StockEntry, "after_insert")
+def _stock_entry_inserted(mapper, connection, target):
+    """Add the movement to stock balances and snapshots."""
+    from app.services.stock_balance_service import apply_stock_movement
+    apply_stock_movement(
+        connection, target.company_id, target.product_id, target.godown_id,
+        target.batch_id, target.entry_date, target.quantity, value=target.cost_value,
+    )
+
+
+@event.listens_for(StockEntry, "after_delete")
+def _stock_entry_deleted(mapper, connection, target):
+    """Take the movement back out of cost layers, stock balances and snapshots."""
+    from app.services.stock_balance_service import apply_stock_movement
+    from app.services.stock_valuation_service import release_stock_entry
+    release_stock_entry(
+        connection, target.id, target.company_id, target.product_id, target.godown_id,
+        target.entry_date, target.quantity, target.cost_value,
+    )
+    apply_stock_movement(
+        connection, target.company_id, target.product_id, target.godown_id,
+        target.batch_id, target.entry_date, target.quantity, reverse=True, value=target.cost_value,
+    )
+
+
+@event.listens_for(StockEntry, "after_update")
+def _stock_entry_updated(mapper, connection, target):
+    """Move an edited entry's quantity and cost from its old key/date to the new one."""
+    from app.services.stock_balance_service import reapply_stock_movement
+    reapply_stock_movement(connection, target)
+
+
 class StockJournal(Base):
     """
     Stock Journal Voucher model - For recording stock adjustments, transfers, and manufacturing.
@@ -2339,6 +2691,7 @@ class PurchaseOrder(Base):
 
     __table_args__ = (
         Index("idx_purchase_order_company", "company_id"),
+        Index("idx_purchase_order_company_created", "company_id", "created_at", "id"),
         Index("idx_purchase_order_vendor", "vendor_id"),
         Index("idx_purchase_order_status", "status"),
     )
@@ -3115,6 +3468,7 @@ class Purchase(Base):
     tds_entries = relationship("TDSEntry", back_populates="purchase", cascade="all, delete-orphan")
     __table_args__ = (
         Index("idx_purchase_company", "company_id"),
+        Index("idx_purchase_company_created", "company_id", "created_at", "id"),
         Index("idx_purchase_vendor", "vendor_id"),
         Index("idx_purchase_date", "invoice_date"),
         Index("idx_purchase_type", "purchase_type"),
@@ -4277,6 +4631,79 @@ class PeriodLock(Base):
         return f"<PeriodLock {self.locked_from} to {self.locked_to}>"
 
 
+class GSTReturnCache(Base):
+    """Cached GST return / GST dashboard result of one company, return type and period.
+
+    Entries for periods locked with ``PeriodLockService.lock_gst_period`` do
+    not expire (``expires_at`` is NULL); open periods expire after
+    ``GST_RETURN_CACHE_TTL`` seconds. Writing an invoice, purchase or return
+    dated in [covers_from, period_end) deletes the entry.
+    """
+    __tablename__ = "gst_return_cache"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    return_type = Column(String(30), nullable=False)  # gstr1, gstr3b, gst_summary, ...
+
+    period_start = Column(DateTime, nullable=False)
+    period_end = Column(DateTime, nullable=False)  # exclusive
+    covers_from = Column(DateTime, nullable=False)  # earliest document date the result depends on
+
+    payload = Column(Text, nullable=False)  # JSON of the response model
+    is_locked = Column(Boolean, default=False, nullable=False)
+    expires_at = Column(DateTime)  # NULL = locked period, kept until invalidated
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_gst_return_cache_key", "company_id", "return_type", "period_start", "period_end", unique=True),
+        Index("idx_gst_return_cache_cover", "company_id", "period_end", "covers_from"),
+    )
+
+    def __repr__(self):
+        return f"<GSTReturnCache {self.return_type} {self.period_start:%Y-%m} locked={self.is_locked}>"
+
+
+@event.listens_for(Session, "after_flush")
+def _gst_documents_flushed(session, flush_context):
+    """Drop cached GST results for periods touched by flushed GST documents."""
+    from app.services.gst_return_cache_service import invalidate_flushed
+    invalidate_flushed(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _gst_documents_committed(session):
+    """Drop them again once committed, in case a reader cached the old figures meanwhile."""
+    from app.services.gst_return_cache_service import invalidate_committed
+    invalidate_committed(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _gst_documents_rolled_back(session):
+    from app.services.gst_return_cache_service import discard_pending
+    discard_pending(session)
+
+
+@event.listens_for(Session, "before_flush")
+def _listed_documents_flushing(session, flush_context, instances):
+    """Note companies whose invoice/quotation/purchase/challan listing totals change."""
+    from app.services.listing_service import collect_pending
+    collect_pending(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _listed_documents_committed(session):
+    from app.services.listing_service import bump_pending
+    bump_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _listed_documents_rolled_back(session):
+    """Also on rollback: totals may have been cached from the uncommitted rows."""
+    from app.services.listing_service import bump_pending
+    bump_pending(session)
+
+
 class AuditLog(Base):
     """Audit trail for all changes."""
     __tablename__ = "audit_logs"
@@ -4802,6 +5229,7 @@ class Quotation(Base):
   
     __table_args__ = (
         Index("idx_quotation_company", "company_id"),
+        Index("idx_quotation_company_created", "company_id", "created_at", "id"),
         Index("idx_quotation_customer", "customer_id"),
         Index("idx_quotation_date", "quotation_date"),
         Index("idx_quotation_status", "status"),
@@ -4948,6 +5376,7 @@ class DeliveryChallan(Base):
 
     __table_args__ = (
         Index("idx_dc_company", "company_id"),
+        Index("idx_dc_company_created", "company_id", "created_at", "id"),
         Index("idx_dc_customer", "customer_id"),
         Index("idx_dc_type", "dc_type"),
         Index("idx_dc_date", "dc_date"),
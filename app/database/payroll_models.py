@@ -447,6 +447,13 @@ class PayrollRun(Base):
     # Linked transaction (when finalized)
     transaction_id = Column(String(36), ForeignKey("transactions.id", ondelete="SET NULL"))
     
+    # Background processing progress (see PayrollJobService)
+    working_days = Column(Integer)
+    failed_employees = Column(Integer, default=0)
+    processing_errors = Column(JSON)  # [{"employee_id": "...", "employee_code": "...", "error": "..."}]
+    processing_started_at = Column(DateTime)
+    processing_heartbeat_at = Column(DateTime)  # Last committed chunk; stale = crashed job
+    
     notes = Column(Text)
     
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -538,6 +545,7 @@ class PayrollEntry(Base):
     __table_args__ = (
         Index("idx_payroll_entry_run", "payroll_run_id"),
         Index("idx_payroll_entry_employee", "employee_id"),
+        Index("uq_payroll_entry_run_employee", "payroll_run_id", "employee_id", unique=True),
     )
 
     def __repr__(self):
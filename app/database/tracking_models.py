@@ -156,6 +156,8 @@ class Trip(Base):
     manual_distance_km = Column(Numeric(10, 2))  # Calculated from odometer
     gps_distance_km = Column(Numeric(10, 2))  # Calculated from GPS
     system_distance_km = Column(Numeric(10, 2))  # System calculated (primary)
+    route_polyline = Column(JSON)  # Simplified route, cached once the trip is completed
+    route_raw_points = Column(Integer)  # GPS fixes the cached route was built from
     
     status = Column(Enum(TripStatus, values_callable=enum_values), default=TripStatus.DRAFT)
     
@@ -292,6 +294,7 @@ class LocationLog(Base):
         Index("idx_location_engineer", "engineer_id"),
         Index("idx_location_trip", "trip_id"),
         Index("idx_location_time", "recorded_at"),
+        Index("idx_location_engineer_device_time", "engineer_id", "device_id", "recorded_at"),
     )
 
 class PetrolClaim(Base):
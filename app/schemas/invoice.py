@@ -492,15 +492,16 @@ class InvoiceResponse(BaseModel):
 class InvoiceListResponse(BaseModel):
     """Schema for invoice list response."""
     invoices: List[InvoiceResponse]
-    total: int
+    total: Optional[int] = None  # None when totals were not requested
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # pass as ``cursor`` for the next page; None on the last page
     
     # Summary
-    total_amount: Decimal = Decimal("0")
-    total_paid: Decimal = Decimal("0")
-    total_pending: Decimal = Decimal("0")
-    total_invoices: int = 0 
+    total_amount: Optional[Decimal] = Decimal("0")
+    total_paid: Optional[Decimal] = Decimal("0")
+    total_pending: Optional[Decimal] = Decimal("0")
+    total_invoices: Optional[int] = 0 
 
 
 class InvoiceSummary(BaseModel):
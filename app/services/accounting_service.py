@@ -10,6 +10,8 @@ from app.database.models import (
     AccountMapping, AccountMappingType, PayrollAccountConfig
 )
 from app.database.payroll_models import SalaryComponent
+from app.services.balance_snapshot_service import BalanceSnapshotService
+from app.services.sequence_service import SequenceService
 from app.schemas.accounting import (
     AccountCreate, AccountUpdate, TransactionCreate, TransactionEntryCreate,
     DEFAULT_CHART_OF_ACCOUNTS, AccountType as SchemaAccountType
@@ -45,20 +47,11 @@ class AccountingService:
         if not account:
             return Decimal("0")
         
-        query = self.db.query(
-            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
-            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
-        ).join(Transaction).filter(
-            TransactionEntry.account_id == account_id,
-            Transaction.status == TransactionStatus.POSTED
+        # Nearest daily snapshot plus the entries dated after it
+        totals = BalanceSnapshotService(self.db).get_account_totals(
+            account.company_id, [account_id], as_of_date
         )
-        
-        if as_of_date:
-            query = query.filter(Transaction.transaction_date <= as_of_date)
-        
-        result = query.first()
-        total_debit = Decimal(str(result.total_debit or 0))
-        total_credit = Decimal(str(result.total_credit or 0))
+        total_debit, total_credit = totals.get(account_id, (Decimal("0"), Decimal("0")))
         
         # Assets and Expenses have debit-normal balances
         # Liabilities, Equity, Revenue have credit-normal balances
@@ -112,34 +105,23 @@ class AccountingService:
         accounts = self.db.query(Account).filter(Account.id.in_(account_ids)).all()
         account_types = {a.id: a.account_type for a in accounts}
         
-        # Query all balances at once
-        query = self.db.query(
-            TransactionEntry.account_id,
-            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
-            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
-        ).join(Transaction).filter(
-            TransactionEntry.account_id.in_(account_ids),
-            Transaction.status == TransactionStatus.POSTED
-        )
-        
-        if as_of_date:
-            query = query.filter(Transaction.transaction_date <= as_of_date)
-        
-        results = query.group_by(TransactionEntry.account_id).all()
-        
         balances = {}
         for account_id in account_ids:
             balances[account_id] = Decimal("0")
         
-        for row in results:
-            account_id = row.account_id
-            total_debit = Decimal(str(row.total_debit or 0))
-            total_credit = Decimal(str(row.total_credit or 0))
-            
-            if account_types.get(account_id) in [AccountType.ASSET, AccountType.EXPENSE]:
-                balances[account_id] = total_debit - total_credit
-            else:
-                balances[account_id] = total_credit - total_debit
+        # Query all balances at once (per company, from the daily snapshots)
+        snapshot_service = BalanceSnapshotService(self.db)
+        ids_by_company = {}
+        for account in accounts:
+            ids_by_company.setdefault(account.company_id, []).append(account.id)
+        
+        for company_id, company_account_ids in ids_by_company.items():
+            totals = snapshot_service.get_account_totals(company_id, company_account_ids, as_of_date)
+            for account_id, (total_debit, total_credit) in totals.items():
+                if account_types.get(account_id) in [AccountType.ASSET, AccountType.EXPENSE]:
+                    balances[account_id] = total_debit - total_credit
+                else:
+                    balances[account_id] = total_credit - total_debit
         
         return balances
     
@@ -237,6 +219,7 @@ class AccountingService:
         )
         self.db.add(credit_entry)
         
+        BalanceSnapshotService(self.db).apply_transaction(transaction)
         self.db.commit()
         return transaction
     
@@ -626,21 +609,23 @@ class AccountingService:
     # ============== Transaction Operations ==============
     
     def _get_next_transaction_number(self, company: Company) -> str:
-        """Get next transaction number for a company."""
-        # Get the max transaction number
-        result = self.db.query(func.max(Transaction.transaction_number)).filter(
-            Transaction.company_id == company.id
-        ).scalar()
-        
-        if result:
-            # Extract number and increment
-            try:
-                num = int(result.replace("JE-", ""))
-                return f"JE-{num + 1:06d}"
-            except ValueError:
-                pass
-        
-        return "JE-000001"
+        """Get next transaction number for a company from its journal entry counter."""
+        def seed() -> int:
+            # Continue after the highest legacy JE- number
+            result = self.db.query(func.max(Transaction.transaction_number)).filter(
+                Transaction.company_id == company.id,
+                Transaction.transaction_number.like("JE-%")
+            ).scalar()
+            
+            if result:
+                try:
+                    return int(result.replace("JE-", ""))
+                except ValueError:
+                    pass
+            return 0
+        
+        number = SequenceService(self.db).next_value(company.id, "journal_entry", seed=seed)
+        return f"JE-{number:06d}"
     
     def create_journal_entry(
         self,
@@ -701,12 +686,13 @@ class AccountingService:
         return transaction
     
     def post_transaction(self, transaction: Transaction) -> Transaction:
-        """Post a transaction. Balances are calculated from transactions, not stored."""
+        """Post a transaction. Balances are calculated from transactions and
+        the daily balance snapshots are updated incrementally."""
         if transaction.status != TransactionStatus.DRAFT:
             raise ValueError("Only draft transactions can be posted")
         
-        # No need to update account balances - they are calculated from transaction entries
         transaction.status = TransactionStatus.POSTED
+        BalanceSnapshotService(self.db).apply_transaction(transaction)
         self.db.commit()
         self.db.refresh(transaction)
         return transaction
@@ -748,6 +734,8 @@ class AccountingService:
         transaction.reversed_by_id = reversal.id
         reversal.reverses_id = transaction.id
         
+        # The original no longer counts towards posted balances
+        BalanceSnapshotService(self.db).apply_transaction(transaction, sign=-1)
         self.db.commit()
         return reversal
     
@@ -1087,6 +1075,11 @@ class AccountingService:
         total_cost = Decimal("0")
         
         for entry in stock_entries:
+            # Valuation cost recorded with the movement (FIFO / LIFO / weighted average)
+            if entry.cost_value is not None:
+                total_cost += abs(Decimal(str(entry.cost_value)))
+                continue
+            
             # Get product for cost calculation
             product = self.db.query(Product).filter(Product.id == entry.product_id).first()
             if not product:
@@ -1135,7 +1128,8 @@ class AccountingService:
     def reverse_stock_reduction_entries(
         self, 
         invoice: Invoice,
-        reason: str = None
+        reason: str = None,
+        stock_entries: Optional[list] = None,
     ) -> Optional[Transaction]:
         """
         Reverse COGS entries when stock is restored (invoice cancelled/refunded).
@@ -1146,6 +1140,8 @@ class AccountingService:
         Args:
             invoice: The invoice being cancelled/refunded
             reason: Optional reason for the reversal
+            stock_entries: StockEntry objects that restored the stock; their
+                valuation cost is reversed instead of the standard cost
         
         Returns:
             Transaction if created, None if no entries needed
@@ -1164,7 +1160,13 @@ class AccountingService:
         # Calculate total cost value from invoice items that had stock reduced
         total_cost = Decimal("0")
         
-        for item in invoice.items:
+        if stock_entries is not None:
+            total_cost = sum(
+                (abs(Decimal(str(entry.cost_value or 0))) for entry in stock_entries),
+                Decimal("0"),
+            )
+        
+        for item in (invoice.items if stock_entries is None else []):
             if not item.stock_reduced or not item.warehouse_allocation:
                 continue
             
@@ -5,25 +5,64 @@ Features:
 - Receivables aging
 - Payables aging
 - Customizable aging buckets
+- Paginated invoice-level drill-down
+
+Aging is computed in the database. ``(as_of - due).days <= edge`` is the same
+as ``due > as_of - (edge + 1) days``, so each bucket edge becomes a cutoff
+datetime and a CASE over the due date (invoice date when there is none)
+assigns the bucket; outstanding amounts are then summed per party and bucket
+with the party name joined in. Only one row per party and bucket comes back,
+however many invoices are outstanding. Invoice-level rows are served a page
+at a time by the ``*_details`` methods.
 """
 from decimal import Decimal, ROUND_HALF_UP
-from typing import List, Dict, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
+
+from app.database.models import Invoice, Purchase, Customer, Vendor
+
+
+DEFAULT_BUCKETS = [0, 30, 60, 90, 180]  # Standard buckets
+
+
+def bucket_cutoffs(as_of_date: datetime, buckets: List[int]) -> List[datetime]:
+    """Due dates after ``cutoffs[i]`` fall in bucket ``i`` or an earlier one."""
+    return [as_of_date - timedelta(days=edge + 1) for edge in buckets[1:]]
+
 
-from app.database.models import Invoice, Purchase, Customer
+def bucket_case(due_date, as_of_date: datetime, buckets: List[int]):
+    """SQL CASE giving the bucket index of ``due_date``."""
+    return case(
+        *[(due_date > cutoff, index) for index, cutoff in enumerate(bucket_cutoffs(as_of_date, buckets))],
+        else_=len(buckets) - 1,
+    )
 
 
 class AgingReportService:
     """Service for aging analysis reports."""
-    
+
     def __init__(self, db: Session):
         self.db = db
-    
+
     def _round(self, amount) -> float:
         return float(Decimal(str(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-    
+
+    # ==================== RECEIVABLES ====================
+
+    def _receivables_query(self, columns, company_id: str, as_of_date: datetime, customer_id: Optional[str]):
+        query = self.db.query(*columns).outerjoin(
+            Customer, Customer.id == Invoice.customer_id
+        ).filter(
+            Invoice.company_id == company_id,
+            Invoice.outstanding_amount > 0,
+            Invoice.invoice_date <= as_of_date,
+        )
+        if customer_id:
+            query = query.filter(Invoice.customer_id == customer_id)
+        return query
+
     def get_receivables_aging(
         self,
         company_id: str,
@@ -31,178 +70,232 @@ class AgingReportService:
         customer_id: str = None,
         buckets: List[int] = None,
     ) -> Dict:
-        """Get receivables aging report."""
-        if not as_of_date:
-            as_of_date = datetime.utcnow()
-        
-        if not buckets:
-            buckets = [0, 30, 60, 90, 180]  # Standard buckets
-        
-        # Get outstanding invoices
-        query = self.db.query(Invoice).filter(
-            Invoice.company_id == company_id,
-            Invoice.outstanding_amount > 0,
-            Invoice.invoice_date <= as_of_date,
+        """Get receivables aging report, by customer and bucket."""
+        as_of_date = as_of_date or datetime.utcnow()
+        buckets = buckets or DEFAULT_BUCKETS
+
+        due_date = func.coalesce(Invoice.due_date, Invoice.invoice_date)
+        bucket = bucket_case(due_date, as_of_date, buckets).label('bucket')
+        rows = self._receivables_query(
+            (
+                Invoice.customer_id.label('party_id'),
+                Customer.name.label('party_name'),
+                bucket,
+                func.sum(Invoice.outstanding_amount).label('outstanding'),
+                func.count(Invoice.id).label('invoice_count'),
+            ),
+            company_id, as_of_date, customer_id,
+        ).group_by(Invoice.customer_id, Customer.name, bucket).all()
+
+        return self._aging_report('receivables_aging', 'customer', as_of_date, buckets, rows)
+
+    def get_receivables_aging_details(
+        self,
+        company_id: str,
+        as_of_date: datetime = None,
+        customer_id: str = None,
+        bucket: str = None,
+        buckets: List[int] = None,
+        page: int = 1,
+        page_size: int = 100,
+    ) -> Dict:
+        """One page of outstanding invoices (of one bucket), oldest due first."""
+        as_of_date = as_of_date or datetime.utcnow()
+        buckets = buckets or DEFAULT_BUCKETS
+
+        due_date = func.coalesce(Invoice.due_date, Invoice.invoice_date)
+        query = self._receivables_query(
+            (
+                Invoice.id, Invoice.invoice_number, Invoice.invoice_date, Invoice.due_date,
+                Invoice.total_amount, Invoice.outstanding_amount.label('outstanding'),
+                Invoice.customer_id.label('party_id'), Customer.name.label('party_name'),
+            ),
+            company_id, as_of_date, customer_id,
         )
-        
-        if customer_id:
-            query = query.filter(Invoice.customer_id == customer_id)
-        
-        invoices = query.all()
-        
-        # Initialize bucket totals
+        return self._details_page(
+            'receivables_aging', 'customer', query, due_date, Invoice.id,
+            as_of_date, buckets, bucket, page, page_size,
+        )
+
+    # ==================== PAYABLES ====================
+
+    def _payables_query(self, columns, company_id: str, as_of_date: datetime, vendor_id: Optional[str]):
+        query = self.db.query(*columns).outerjoin(
+            Vendor, Vendor.id == Purchase.vendor_id
+        ).filter(
+            Purchase.company_id == company_id,
+            Purchase.deleted_at.is_(None),
+            Purchase.balance_due > 0,
+            Purchase.invoice_date <= as_of_date,
+        )
+        if vendor_id:
+            query = query.filter(Purchase.vendor_id == vendor_id)
+        return query
+
+    def get_payables_aging(
+        self,
+        company_id: str,
+        as_of_date: datetime = None,
+        vendor_id: str = None,
+        buckets: List[int] = None,
+    ) -> Dict:
+        """Get payables aging report, by vendor and bucket."""
+        as_of_date = as_of_date or datetime.utcnow()
+        buckets = buckets or DEFAULT_BUCKETS
+
+        due_date = func.coalesce(Purchase.due_date, Purchase.invoice_date)
+        bucket = bucket_case(due_date, as_of_date, buckets).label('bucket')
+        rows = self._payables_query(
+            (
+                Purchase.vendor_id.label('party_id'),
+                Vendor.name.label('party_name'),
+                bucket,
+                func.sum(Purchase.balance_due).label('outstanding'),
+                func.count(Purchase.id).label('invoice_count'),
+            ),
+            company_id, as_of_date, vendor_id,
+        ).group_by(Purchase.vendor_id, Vendor.name, bucket).all()
+
+        return self._aging_report('payables_aging', 'vendor', as_of_date, buckets, rows)
+
+    def get_payables_aging_details(
+        self,
+        company_id: str,
+        as_of_date: datetime = None,
+        vendor_id: str = None,
+        bucket: str = None,
+        buckets: List[int] = None,
+        page: int = 1,
+        page_size: int = 100,
+    ) -> Dict:
+        """One page of unpaid purchases (of one bucket), oldest due first."""
+        as_of_date = as_of_date or datetime.utcnow()
+        buckets = buckets or DEFAULT_BUCKETS
+
+        due_date = func.coalesce(Purchase.due_date, Purchase.invoice_date)
+        query = self._payables_query(
+            (
+                Purchase.id, Purchase.purchase_number.label('invoice_number'), Purchase.invoice_date,
+                Purchase.due_date, Purchase.total_amount, Purchase.balance_due.label('outstanding'),
+                Purchase.vendor_id.label('party_id'), Vendor.name.label('party_name'),
+            ),
+            company_id, as_of_date, vendor_id,
+        )
+        return self._details_page(
+            'payables_aging', 'vendor', query, due_date, Purchase.id,
+            as_of_date, buckets, bucket, page, page_size,
+        )
+
+    # ==================== SHARED ====================
+
+    def _aging_report(
+        self,
+        report_type: str,
+        party: str,
+        as_of_date: datetime,
+        buckets: List[int],
+        rows: List[Any],
+    ) -> Dict:
+        """Assemble the report from (party, bucket) aggregate rows."""
         bucket_labels = self._create_bucket_labels(buckets)
         totals = {label: Decimal('0') for label in bucket_labels}
-        
-        # Customer-wise breakdown
-        customer_aging = {}
-        details = []
-        
-        for inv in invoices:
-            due_date = inv.due_date or inv.invoice_date
-            days_overdue = (as_of_date - due_date).days
-            bucket = self._get_bucket(days_overdue, buckets)
-            bucket_label = bucket_labels[bucket]
-            
-            outstanding = inv.outstanding_amount or Decimal('0')
+
+        party_aging = {}
+        invoice_count = 0
+
+        for row in rows:
+            bucket_label = bucket_labels[row.bucket]
+            outstanding = Decimal(str(row.outstanding or 0))
             totals[bucket_label] += outstanding
-            
-            # Add to customer totals
-            cust_id = inv.customer_id or 'unknown'
-            cust_name = inv.customer.name if inv.customer else 'Unknown'
-            
-            if cust_id not in customer_aging:
-                customer_aging[cust_id] = {
-                    'customer_id': cust_id,
-                    'customer_name': cust_name,
+            invoice_count += row.invoice_count
+
+            party_id = row.party_id or 'unknown'
+            if party_id not in party_aging:
+                party_aging[party_id] = {
+                    f'{party}_id': party_id,
+                    f'{party}_name': row.party_name or 'Unknown',
                     'buckets': {label: Decimal('0') for label in bucket_labels},
                     'total': Decimal('0'),
+                    'invoice_count': 0,
                 }
-            
-            customer_aging[cust_id]['buckets'][bucket_label] += outstanding
-            customer_aging[cust_id]['total'] += outstanding
-            
-            details.append({
-                'invoice_id': inv.id,
-                'invoice_number': inv.invoice_number,
-                'invoice_date': inv.invoice_date.strftime('%Y-%m-%d'),
-                'due_date': due_date.strftime('%Y-%m-%d') if due_date else None,
-                'days_overdue': days_overdue,
-                'bucket': bucket_label,
-                'customer_id': cust_id,
-                'customer_name': cust_name,
-                'total_amount': self._round(inv.total_amount or 0),
-                'outstanding': self._round(outstanding),
-            })
-        
-        # Convert customer aging to list
-        customer_list = []
-        for cust in customer_aging.values():
-            cust['buckets'] = {k: self._round(v) for k, v in cust['buckets'].items()}
-            cust['total'] = self._round(cust['total'])
-            customer_list.append(cust)
-        
-        customer_list.sort(key=lambda x: x['total'], reverse=True)
-        
+
+            party_aging[party_id]['buckets'][bucket_label] += outstanding
+            party_aging[party_id]['total'] += outstanding
+            party_aging[party_id]['invoice_count'] += row.invoice_count
+
+        party_list = []
+        for entry in party_aging.values():
+            entry['buckets'] = {k: self._round(v) for k, v in entry['buckets'].items()}
+            entry['total'] = self._round(entry['total'])
+            party_list.append(entry)
+
+        party_list.sort(key=lambda x: x['total'], reverse=True)
+
         return {
-            'report_type': 'receivables_aging',
+            'report_type': report_type,
             'as_of_date': as_of_date.strftime('%Y-%m-%d'),
             'buckets': bucket_labels,
             'summary': {k: self._round(v) for k, v in totals.items()},
             'total_outstanding': self._round(sum(totals.values())),
-            'invoice_count': len(invoices),
-            'customer_count': len(customer_aging),
-            'by_customer': customer_list,
-            'details': details,
+            'invoice_count': invoice_count,
+            f'{party}_count': len(party_aging),
+            f'by_{party}': party_list,
         }
-    
-    def get_payables_aging(
+
+    def _details_page(
         self,
-        company_id: str,
-        as_of_date: datetime = None,
-        vendor_id: str = None,
-        buckets: List[int] = None,
+        report_type: str,
+        party: str,
+        query,
+        due_date,
+        id_column,
+        as_of_date: datetime,
+        buckets: List[int],
+        bucket: Optional[str],
+        page: int,
+        page_size: int,
     ) -> Dict:
-        """Get payables aging report."""
-        if not as_of_date:
-            as_of_date = datetime.utcnow()
-        
-        if not buckets:
-            buckets = [0, 30, 60, 90, 180]
-        
-        query = self.db.query(Purchase).filter(
-            Purchase.company_id == company_id,
-            Purchase.outstanding_amount > 0,
-            Purchase.invoice_date <= as_of_date,
-        )
-        
-        if vendor_id:
-            query = query.filter(Purchase.vendor_id == vendor_id)
-        
-        invoices = query.all()
-        
         bucket_labels = self._create_bucket_labels(buckets)
-        totals = {label: Decimal('0') for label in bucket_labels}
-        
-        vendor_aging = {}
+        if bucket is not None:
+            if bucket not in bucket_labels:
+                raise ValueError(f"Unknown bucket '{bucket}'. Buckets: {', '.join(bucket_labels)}")
+            index = bucket_labels.index(bucket)
+            cutoffs = bucket_cutoffs(as_of_date, buckets)
+            if index < len(cutoffs):
+                query = query.filter(due_date > cutoffs[index])
+            if index > 0:
+                query = query.filter(due_date <= cutoffs[index - 1])
+
+        rows = query.order_by(due_date, id_column).offset((page - 1) * page_size).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+
         details = []
-        
-        for inv in invoices:
-            due_date = inv.due_date or inv.invoice_date
-            days_overdue = (as_of_date - due_date).days
-            bucket = self._get_bucket(days_overdue, buckets)
-            bucket_label = bucket_labels[bucket]
-            
-            outstanding = inv.outstanding_amount or Decimal('0')
-            totals[bucket_label] += outstanding
-            
-            vendor_id_val = inv.vendor_id or 'unknown'
-            vendor_name = inv.vendor.name if inv.vendor else 'Unknown'
-            
-            if vendor_id_val not in vendor_aging:
-                vendor_aging[vendor_id_val] = {
-                    'vendor_id': vendor_id_val,
-                    'vendor_name': vendor_name,
-                    'buckets': {label: Decimal('0') for label in bucket_labels},
-                    'total': Decimal('0'),
-                }
-            
-            vendor_aging[vendor_id_val]['buckets'][bucket_label] += outstanding
-            vendor_aging[vendor_id_val]['total'] += outstanding
-            
+        for row in rows[:page_size]:
+            due = row.due_date or row.invoice_date
+            days_overdue = (as_of_date - due).days
             details.append({
-                'invoice_id': inv.id,
-                'invoice_number': inv.invoice_number,
-                'invoice_date': inv.invoice_date.strftime('%Y-%m-%d'),
-                'due_date': due_date.strftime('%Y-%m-%d') if due_date else None,
+                'invoice_id': row.id,
+                'invoice_number': row.invoice_number,
+                'invoice_date': row.invoice_date.strftime('%Y-%m-%d'),
+                'due_date': due.strftime('%Y-%m-%d') if due else None,
                 'days_overdue': days_overdue,
-                'bucket': bucket_label,
-                'vendor_id': vendor_id_val,
-                'vendor_name': vendor_name,
-                'total_amount': self._round(inv.total_amount or 0),
-                'outstanding': self._round(outstanding),
+                'bucket': bucket_labels[self._get_bucket(days_overdue, buckets)],
+                f'{party}_id': row.party_id or 'unknown',
+                f'{party}_name': row.party_name or 'Unknown',
+                'total_amount': self._round(row.total_amount or 0),
+                'outstanding': self._round(row.outstanding or 0),
             })
-        
-        vendor_list = []
-        for vendor in vendor_aging.values():
-            vendor['buckets'] = {k: self._round(v) for k, v in vendor['buckets'].items()}
-            vendor['total'] = self._round(vendor['total'])
-            vendor_list.append(vendor)
-        
-        vendor_list.sort(key=lambda x: x['total'], reverse=True)
-        
+
         return {
-            'report_type': 'payables_aging',
+            'report_type': report_type,
             'as_of_date': as_of_date.strftime('%Y-%m-%d'),
-            'buckets': bucket_labels,
-            'summary': {k: self._round(v) for k, v in totals.items()},
-            'total_outstanding': self._round(sum(totals.values())),
-            'invoice_count': len(invoices),
-            'vendor_count': len(vendor_aging),
-            'by_vendor': vendor_list,
+            'bucket': bucket,
+            'page': page,
+            'page_size': page_size,
+            'has_more': has_more,
             'details': details,
         }
-    
+
     def _create_bucket_labels(self, buckets: List[int]) -> List[str]:
         """Create labels for aging buckets."""
         labels = []
@@ -214,16 +307,16 @@ class AgingReportService:
             else:
                 labels.append(f'{b+1}-{buckets[i+1]}')
         return labels
-    
+
     def _get_bucket(self, days: int, buckets: List[int]) -> int:
         """Determine which bucket a number of days falls into."""
         if days < 0:
             days = 0
-        
+
         for i, b in enumerate(buckets):
             if i == len(buckets) - 1:
                 return i
             if days <= buckets[i + 1]:
                 return i
-        
+
         return len(buckets) - 1
@@ -0,0 +1,354 @@
+"""Balance snapshot service - materialized daily account balances.
+
+Each AccountBalanceSnapshot row holds an account's cumulative posted debit and
+credit totals through the end of its snapshot_date. Rows are written only for
+days with activity, so an as-of-date balance is the nearest earlier snapshot
+plus the few entries dated after it, instead of a SUM over the whole ledger.
+"""
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, func, or_, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database.models import (
+    AccountBalanceSnapshot, Transaction, TransactionEntry, TransactionStatus,
+    generate_uuid
+)
+
+
+Totals = Tuple[Decimal, Decimal]
+
+
+def _to_date(value: Union[datetime, date, str]) -> date:
+    """Normalize a transaction date (or a SQL ``date()`` result) to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+class BalanceSnapshotService:
+    """Maintains and reads per-account daily balance snapshots."""
+
+    REBUILD_BATCH_SIZE = 5000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ============== Incremental Maintenance ==============
+
+    def apply_transaction(self, transaction: Transaction, sign: int = 1) -> None:
+        """Fold a transaction's entries into the snapshots.
+
+        Call with ``sign=1`` right after a transaction becomes POSTED and with
+        ``sign=-1`` right after a POSTED transaction stops being posted
+        (e.g. reversed). Pending changes are flushed first so the snapshot
+        for the transaction's day is computed from the current ledger.
+        """
+        self.db.flush()
+
+        rows = self.db.query(
+            TransactionEntry.account_id,
+            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
+            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
+        ).filter(
+            TransactionEntry.transaction_id == transaction.id
+        ).group_by(TransactionEntry.account_id).all()
+
+        day = _to_date(transaction.transaction_date)
+        for row in rows:
+            self._apply_delta(
+                transaction.company_id,
+                row.account_id,
+                day,
+                Decimal(str(row.total_debit or 0)) * sign,
+                Decimal(str(row.total_credit or 0)) * sign,
+            )
+
+    def _apply_delta(
+        self,
+        company_id: str,
+        account_id: str,
+        day: date,
+        debit: Decimal,
+        credit: Decimal
+    ) -> None:
+        """Shift the snapshots on and after ``day`` by a debit/credit delta."""
+        if debit == 0 and credit == 0:
+            return
+
+        exists = self.db.query(AccountBalanceSnapshot.id).filter(
+            AccountBalanceSnapshot.company_id == company_id,
+            AccountBalanceSnapshot.account_id == account_id,
+            AccountBalanceSnapshot.snapshot_date == day
+        ).first()
+
+        if exists:
+            self._shift_snapshots(company_id, account_id, day, debit, credit, include_day=True)
+            return
+
+        # Later days already carry the cumulative totals without this change
+        self._shift_snapshots(company_id, account_id, day, debit, credit, include_day=False)
+
+        total_debit, total_credit = self._cumulative_through(company_id, account_id, day)
+        try:
+            with self.db.begin_nested():
+                self.db.add(AccountBalanceSnapshot(
+                    company_id=company_id,
+                    account_id=account_id,
+                    snapshot_date=day,
+                    total_debit=total_debit,
+                    total_credit=total_credit,
+                ))
+        except IntegrityError:
+            # A concurrent writer created the day's row first - fold our delta into it
+            self.db.query(AccountBalanceSnapshot).filter(
+                AccountBalanceSnapshot.company_id == company_id,
+                AccountBalanceSnapshot.account_id == account_id,
+                AccountBalanceSnapshot.snapshot_date == day
+            ).update({
+                AccountBalanceSnapshot.total_debit: AccountBalanceSnapshot.total_debit + debit,
+                AccountBalanceSnapshot.total_credit: AccountBalanceSnapshot.total_credit + credit,
+            }, synchronize_session=False)
+
+    def _shift_snapshots(
+        self,
+        company_id: str,
+        account_id: str,
+        day: date,
+        debit: Decimal,
+        credit: Decimal,
+        include_day: bool
+    ) -> None:
+        date_filter = (
+            AccountBalanceSnapshot.snapshot_date >= day if include_day
+            else AccountBalanceSnapshot.snapshot_date > day
+        )
+        self.db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.company_id == company_id,
+            AccountBalanceSnapshot.account_id == account_id,
+            date_filter
+        ).update({
+            AccountBalanceSnapshot.total_debit: AccountBalanceSnapshot.total_debit + debit,
+            AccountBalanceSnapshot.total_credit: AccountBalanceSnapshot.total_credit + credit,
+            AccountBalanceSnapshot.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+
+    def _cumulative_through(self, company_id: str, account_id: str, day: date) -> Totals:
+        """Posted totals of one account through the end of ``day``."""
+        previous = self.db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.company_id == company_id,
+            AccountBalanceSnapshot.account_id == account_id,
+            AccountBalanceSnapshot.snapshot_date < day
+        ).order_by(AccountBalanceSnapshot.snapshot_date.desc()).first()
+
+        query = self.db.query(
+            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
+            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
+        ).join(Transaction).filter(
+            TransactionEntry.account_id == account_id,
+            Transaction.status == TransactionStatus.POSTED,
+            Transaction.transaction_date < _start_of_day(day + timedelta(days=1))
+        )
+
+        base_debit = Decimal("0")
+        base_credit = Decimal("0")
+        if previous:
+            base_debit = Decimal(str(previous.total_debit or 0))
+            base_credit = Decimal(str(previous.total_credit or 0))
+            query = query.filter(
+                Transaction.transaction_date >= _start_of_day(previous.snapshot_date + timedelta(days=1))
+            )
+
+        result = query.first()
+        return (
+            base_debit + Decimal(str(result.total_debit or 0)),
+            base_credit + Decimal(str(result.total_credit or 0)),
+        )
+
+    # ============== Reads ==============
+
+    def get_account_totals(
+        self,
+        company_id: str,
+        account_ids: Optional[Iterable[str]] = None,
+        as_of_date: Optional[datetime] = None
+    ) -> Dict[str, Totals]:
+        """Posted debit/credit totals per account as of a date (or overall).
+
+        Reads the latest snapshot of each account dated before ``as_of_date``
+        and adds only the entries dated after it, in two queries. Accounts
+        without snapshots fall back to their full entry history. Accounts
+        without any posted entries are absent from the result.
+        """
+        account_ids = list(account_ids) if account_ids is not None else None
+        if account_ids is not None and not account_ids:
+            return {}
+
+        snapshots = self._get_latest_snapshots(company_id, account_ids, as_of_date)
+
+        # Group snapshotted accounts by the first day not covered by their snapshot
+        accounts_by_start: Dict[date, List[str]] = defaultdict(list)
+        for account_id, (snapshot_date, _, _) in snapshots.items():
+            accounts_by_start[snapshot_date + timedelta(days=1)].append(account_id)
+
+        windows = [
+            and_(
+                TransactionEntry.account_id.in_(ids),
+                Transaction.transaction_date >= _start_of_day(start)
+            )
+            for start, ids in accounts_by_start.items()
+        ]
+        if account_ids is not None:
+            unsnapshotted = [a for a in account_ids if a not in snapshots]
+            if unsnapshotted:
+                windows.append(TransactionEntry.account_id.in_(unsnapshotted))
+        elif snapshots:
+            windows.append(TransactionEntry.account_id.notin_(list(snapshots)))
+        else:
+            windows.append(true())
+
+        totals: Dict[str, Totals] = {
+            account_id: (debit, credit)
+            for account_id, (_, debit, credit) in snapshots.items()
+        }
+
+        if not windows:
+            return totals
+
+        query = self.db.query(
+            TransactionEntry.account_id,
+            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
+            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
+        ).join(Transaction).filter(
+            Transaction.company_id == company_id,
+            Transaction.status == TransactionStatus.POSTED,
+            or_(*windows)
+        )
+        if as_of_date is not None:
+            query = query.filter(Transaction.transaction_date <= as_of_date)
+
+        for row in query.group_by(TransactionEntry.account_id):
+            debit, credit = totals.get(row.account_id, (Decimal("0"), Decimal("0")))
+            totals[row.account_id] = (
+                debit + Decimal(str(row.total_debit or 0)),
+                credit + Decimal(str(row.total_credit or 0)),
+            )
+
+        return totals
+
+    def _get_latest_snapshots(
+        self,
+        company_id: str,
+        account_ids: Optional[List[str]],
+        as_of_date: Optional[datetime]
+    ) -> Dict[str, Tuple[date, Decimal, Decimal]]:
+        """Latest snapshot per account strictly before the as-of day."""
+        latest = self.db.query(
+            AccountBalanceSnapshot.account_id,
+            func.max(AccountBalanceSnapshot.snapshot_date).label('snapshot_date')
+        ).filter(AccountBalanceSnapshot.company_id == company_id)
+        if account_ids is not None:
+            latest = latest.filter(AccountBalanceSnapshot.account_id.in_(account_ids))
+        if as_of_date is not None:
+            latest = latest.filter(AccountBalanceSnapshot.snapshot_date < _to_date(as_of_date))
+        latest = latest.group_by(AccountBalanceSnapshot.account_id).subquery()
+
+        rows = self.db.query(
+            AccountBalanceSnapshot.account_id,
+            AccountBalanceSnapshot.snapshot_date,
+            AccountBalanceSnapshot.total_debit,
+            AccountBalanceSnapshot.total_credit
+        ).join(
+            latest,
+            and_(
+                AccountBalanceSnapshot.account_id == latest.c.account_id,
+                AccountBalanceSnapshot.snapshot_date == latest.c.snapshot_date
+            )
+        ).filter(AccountBalanceSnapshot.company_id == company_id).all()
+
+        return {
+            row.account_id: (
+                _to_date(row.snapshot_date),
+                Decimal(str(row.total_debit or 0)),
+                Decimal(str(row.total_credit or 0)),
+            )
+            for row in rows
+        }
+
+    # ============== Backfill ==============
+
+    def rebuild(self, company_id: Optional[str] = None) -> int:
+        """Regenerate snapshots from the full posted ledger.
+
+        Replaces all snapshots of one company (or of every company) and returns
+        the number of rows written. Commits when done.
+        """
+        delete_query = self.db.query(AccountBalanceSnapshot)
+        if company_id:
+            delete_query = delete_query.filter(AccountBalanceSnapshot.company_id == company_id)
+        delete_query.delete(synchronize_session=False)
+
+        day_column = func.date(Transaction.transaction_date)
+        query = self.db.query(
+            Transaction.company_id,
+            TransactionEntry.account_id,
+            day_column.label('day'),
+            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
+            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
+        ).join(Transaction).filter(
+            Transaction.status == TransactionStatus.POSTED
+        )
+        if company_id:
+            query = query.filter(Transaction.company_id == company_id)
+        query = query.group_by(
+            Transaction.company_id, TransactionEntry.account_id, day_column
+        ).order_by(
+            Transaction.company_id, TransactionEntry.account_id, day_column
+        )
+
+        written = 0
+        batch = []
+        current_account = None
+        running_debit = running_credit = Decimal("0")
+        now = datetime.utcnow()
+
+        for row in query.yield_per(self.REBUILD_BATCH_SIZE):
+            if row.account_id != current_account:
+                current_account = row.account_id
+                running_debit = running_credit = Decimal("0")
+            running_debit += Decimal(str(row.total_debit or 0))
+            running_credit += Decimal(str(row.total_credit or 0))
+            batch.append({
+                "company_id": row.company_id,
+                "account_id": row.account_id,
+                "snapshot_date": _to_date(row.day),
+                "total_debit": running_debit,
+                "total_credit": running_credit,
+                "updated_at": now,
+            })
+            if len(batch) >= self.REBUILD_BATCH_SIZE:
+                self._insert_batch(batch)
+                written += len(batch)
+                batch = []
+
+        if batch:
+            self._insert_batch(batch)
+            written += len(batch)
+
+        self.db.commit()
+        return written
+
+    def _insert_batch(self, batch: List[dict]) -> None:
+        for row in batch:
+            row["id"] = generate_uuid()
+        self.db.bulk_insert_mappings(AccountBalanceSnapshot, batch)
@@ -1,11 +1,26 @@
-"""Bank import service for CSV parsing and transaction creation."""
+"""
+Bank import service for CSV parsing and transaction creation.
+
+Statements are streamed: the uploaded file is decoded and parsed one row at
+a time and rows are inserted in batches of ``BANK_IMPORT_BATCH_SIZE``, so a
+multi-year statement never sits in memory as a whole. Each stored row
+carries a fingerprint of (date, amount, reference, balance) with a unique
+index; re-importing an overlapping statement skips the rows already stored
+with one lookup per batch.
+"""
+import codecs
 import csv
+import hashlib
 import io
 import re
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from decimal import Decimal, InvalidOperation
-from typing import List, Optional, Tuple, Dict, Any, Union
+from itertools import chain, islice
+from typing import List, Optional, Tuple, Dict, Any, Union, BinaryIO, Iterable, Iterator, TextIO
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database.models import (
     BankImport, BankImportRow, Company, BankAccount, Transaction,
     BankImportStatus, BankImportRowStatus, Account
@@ -14,6 +29,133 @@ from app.schemas.accounting import (
     TransactionCreate, TransactionEntryCreate, ReferenceType
 )
 from app.services.accounting_service import AccountingService
+from app.services.bank_matching_engine import BankMatchingEngine
+
+
+StatementSource = Union[str, bytes, BinaryIO]
+
+
+def _detect_encoding(stream: BinaryIO) -> str:
+    """UTF-8 if the whole file decodes as UTF-8, else Latin-1. Rewinds the stream."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in iter(lambda: stream.read(1 << 16), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin-1"
+    finally:
+        stream.seek(0)
+
+
+def open_statement(source: StatementSource) -> TextIO:
+    """Text stream over CSV content, raw bytes or an uploaded (binary) file."""
+    if isinstance(source, str):
+        # Handle BOM
+        return io.StringIO(source[1:] if source.startswith('\ufeff') else source, newline='')
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return io.TextIOWrapper(source, encoding=_detect_encoding(source), newline='')
+
+
+def read_statement(source: StatementSource) -> Tuple[List[str], List[Dict[str, str]], Iterator[Dict[str, str]]]:
+    """
+    Open a statement CSV for streaming.
+    
+    Returns (headers, first 5 rows for format detection, iterator over all rows).
+    """
+    reader = csv.DictReader(open_statement(source))
+    headers = [h for h in (reader.fieldnames or []) if h is not None]
+    # Filter out None keys
+    rows = ({k: v for k, v in row.items() if k is not None} for row in reader)
+    sample_rows = list(islice(rows, 5))
+    return headers, sample_rows, chain(sample_rows, rows)
+
+
+class RowFingerprinter:
+    """
+    Content fingerprints for the rows of one statement file.
+    
+    The fingerprint hashes the scope (the bank account, or the import itself
+    when it has no account, so statements of different accounts never
+    deduplicate against each other), date, signed amount, reference and
+    balance. Identical rows on the same date - e.g. two equal
+    charges in a statement without a balance column - get an occurrence
+    number, so both are kept while re-importing the file still yields the
+    same fingerprints. Occurrences are counted over the whole file, so the
+    rows need not be in date order.
+    """
+    
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._seen: Dict[Tuple[Optional[date], str, str, str], int] = {}
+    
+    def __call__(
+        self,
+        row_date: Optional[datetime],
+        amount: Decimal,
+        reference: Optional[str],
+        balance: Optional[Decimal],
+    ) -> str:
+        day = row_date.date() if isinstance(row_date, datetime) else row_date
+        key = (
+            f"{Decimal(amount):.2f}",
+            (reference or "").strip().upper(),
+            f"{Decimal(balance):.2f}" if balance is not None else "",
+        )
+        occurrence = self._seen.get((day, *key), 0)
+        self._seen[(day, *key)] = occurrence + 1
+        
+        payload = "|".join([self.scope, day.isoformat() if day else "", *key, str(occurrence)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def insert_unique_rows(db: Session, model, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert a batch of row dicts, skipping fingerprints already stored.
+    
+    One ``IN`` lookup per batch instead of a query per row; ON CONFLICT DO
+    NOTHING (PostgreSQL, SQLite) also covers a concurrent import of the same
+    statement. Returns the number of rows actually inserted.
+    """
+    by_fingerprint: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        by_fingerprint.setdefault(row["fingerprint"], row)
+    
+    existing = {
+        fingerprint for (fingerprint,) in db.query(model.fingerprint).filter(
+            model.fingerprint.in_(list(by_fingerprint))
+        )
+    }
+    new_rows = [row for fingerprint, row in by_fingerprint.items() if fingerprint not in existing]
+    if not new_rows:
+        return 0
+    
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_ignore
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as insert_ignore
+    else:
+        db.execute(insert(model.__table__), new_rows)
+        return len(new_rows)
+    
+    # Rows skipped by ON CONFLICT (a concurrent import) are not returned
+    statement = insert_ignore(model.__table__).on_conflict_do_nothing().returning(
+        model.__table__.c.fingerprint
+    )
+    return len(db.execute(statement, new_rows).all())
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_cached(date_str: str, formats: Tuple[str, ...]) -> Optional[datetime]:
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
 
 
 class BankCSVParser:
@@ -29,18 +171,28 @@ class BankCSVParser:
         """Parse a single row and return standardized data."""
         raise NotImplementedError
     
+    def iter_parsed(self, rows: Iterable[Dict[str, str]]) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Parse rows one at a time.
+        
+        Yields (row_number, parsed row) for every row; the parsed row is
+        None for rows that fail to parse.
+        """
+        for row_number, row in enumerate(rows, 1):
+            try:
+                parsed = self.parse_row(row, row_number)
+            except Exception:
+                # Skip rows that fail to parse
+                parsed = None
+            yield row_number, parsed
+    
     def _parse_date(self, date_str: str, formats: List[str]) -> Optional[datetime]:
         """Try to parse date with multiple formats."""
         if not date_str:
             return None
         
-        date_str = date_str.strip()
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        return None
+        # Statements repeat each date on many rows - strptime dominates parsing
+        return _parse_date_cached(date_str.strip(), tuple(formats))
     
     def _parse_amount(self, amount_str: str) -> Decimal:
         """Parse amount string to Decimal."""
@@ -361,22 +513,10 @@ class BankImportService:
             GenericParser(),  # Fallback
         ]
     
-    def preview_csv(self, content: str) -> Dict[str, Any]:
+    def preview_csv(self, content: StatementSource) -> Dict[str, Any]:
         """Preview CSV content and return headers and sample rows for mapping."""
         try:
-            # Handle BOM
-            if content.startswith('\ufeff'):
-                content = content[1:]
-            
-            reader = csv.DictReader(io.StringIO(content))
-            headers = [h for h in (reader.fieldnames or []) if h is not None]
-            
-            # Get sample rows
-            sample_rows = []
-            for i, row in enumerate(reader):
-                if i >= 5:
-                    break
-                sample_rows.append({k: v for k, v in row.items() if k is not None})
+            headers, sample_rows, rows = read_statement(content)
             
             # Try auto-detect
             detected_bank = None
@@ -389,40 +529,26 @@ class BankImportService:
                 'headers': headers,
                 'sample_rows': sample_rows,
                 'detected_bank': detected_bank,
-                'row_count': sum(1 for _ in csv.DictReader(io.StringIO(content))),
+                'row_count': sum(1 for _ in rows),
             }
         except Exception as e:
             raise ValueError(f"Failed to parse CSV: {str(e)}")
     
-    def detect_bank_format(self, content: str) -> Tuple[BankCSVParser, List[str], List[Dict[str, str]]]:
+    def _select_parser(self, headers: List[str], sample_rows: List[Dict[str, str]]) -> BankCSVParser:
+        """Find the parser for a statement's headers and first rows."""
+        sample = [list(row.values()) for row in sample_rows]
+        for parser in self.parsers:
+            if parser.can_parse(headers, sample):
+                return parser
+        
+        # Fallback to generic
+        return self.parsers[-1]
+    
+    def detect_bank_format(self, content: StatementSource) -> Tuple[BankCSVParser, List[str], List[Dict[str, str]]]:
         """Detect bank format from CSV content."""
-        # Try to parse CSV
         try:
-            # Handle BOM
-            if content.startswith('\ufeff'):
-                content = content[1:]
-            
-            reader = csv.DictReader(io.StringIO(content))
-            headers = [h for h in (reader.fieldnames or []) if h is not None]
-            
-            # Get sample rows
-            sample_rows = []
-            rows_list = []
-            for i, row in enumerate(reader):
-                # Filter out None keys
-                clean_row = {k: v for k, v in row.items() if k is not None}
-                rows_list.append(clean_row)
-                if i < 5:
-                    sample_rows.append(list(clean_row.values()))
-            
-            # Find matching parser
-            for parser in self.parsers:
-                if parser.can_parse(headers, sample_rows):
-                    return parser, headers, rows_list
-            
-            # Fallback to generic
-            return self.parsers[-1], headers, rows_list
-            
+            headers, sample_rows, rows = read_statement(content)
+            return self._select_parser(headers, sample_rows), headers, list(rows)
         except Exception as e:
             raise ValueError(f"Failed to parse CSV: {str(e)}")
     
@@ -430,12 +556,18 @@ class BankImportService:
         self,
         company: Company,
         file_name: str,
-        content: str,
+        content: StatementSource,
         bank_account_id: Optional[str] = None,
         bank_name: Optional[str] = None,
-        column_mapping: Optional[Dict[str, str]] = None
+        column_mapping: Optional[Dict[str, str]] = None,
+        batch_size: Optional[int] = None,
     ) -> BankImport:
-        """Create a bank import from CSV content.
+        """Create a bank import from CSV content or an uploaded file.
+        
+        Rows are parsed and inserted in batches as the file is read; rows
+        already imported for the same bank account (by fingerprint) are
+        counted in ``duplicate_rows`` and skipped. Without ``bank_account_id``
+        only repeats within this file are matched.
         
         Args:
             column_mapping: Optional custom mapping like {
@@ -447,19 +579,18 @@ class BankImportService:
                 'balance': 'Balance'
             }
         """
-        # Handle BOM
-        if content.startswith('\ufeff'):
-            content = content[1:]
+        batch_size = batch_size or settings.BANK_IMPORT_BATCH_SIZE
+        try:
+            headers, sample_rows, rows = read_statement(content)
+        except Exception as e:
+            raise ValueError(f"Failed to parse CSV: {str(e)}")
         
         # Use custom mapping or auto-detect
         if column_mapping:
             parser = CustomMappingParser(column_mapping)
-            reader = csv.DictReader(io.StringIO(content))
-            headers = [h for h in (reader.fieldnames or []) if h is not None]
-            rows = [{k: v for k, v in row.items() if k is not None} for row in reader]
             detected_bank = bank_name or "Custom"
         else:
-            parser, headers, rows = self.detect_bank_format(content)
+            parser = self._select_parser(headers, sample_rows)
             detected_bank = bank_name or parser.bank_name
         
         # Create import record
@@ -469,39 +600,55 @@ class BankImportService:
             file_name=file_name,
             bank_name=detected_bank,
             status=BankImportStatus.PROCESSING,
-            total_rows=len(rows),
         )
         
         self.db.add(bank_import)
         self.db.flush()
         
-        # Parse and create rows
+        # Parse and insert rows in batches
+        fingerprint = RowFingerprinter(bank_account_id or f"import:{bank_import.id}")
+        total = 0
+        candidates = 0
         processed = 0
-        for i, row in enumerate(rows, 1):
-            try:
-                parsed = parser.parse_row(row, i)
+        batch: List[Dict[str, Any]] = []
+        try:
+            for total, parsed in parser.iter_parsed(rows):
+                if not parsed or not (parsed['debit_amount'] > 0 or parsed['credit_amount'] > 0):
+                    continue
                 
-                if parsed and (parsed['debit_amount'] > 0 or parsed['credit_amount'] > 0):
-                    import_row = BankImportRow(
-                        import_id=bank_import.id,
-                        row_number=parsed['row_number'],
-                        transaction_date=parsed['transaction_date'],
-                        value_date=parsed['value_date'],
-                        description=parsed['description'],
-                        reference_number=parsed['reference_number'],
-                        debit_amount=parsed['debit_amount'],
-                        credit_amount=parsed['credit_amount'],
-                        balance=parsed['balance'],
-                        status=BankImportRowStatus.PENDING,
-                        raw_data=parsed['raw_data'],
-                    )
-                    self.db.add(import_row)
-                    processed += 1
-            except Exception as e:
-                # Skip rows that fail to parse
-                continue
+                batch.append({
+                    'import_id': bank_import.id,
+                    'row_number': parsed['row_number'],
+                    'transaction_date': parsed['transaction_date'],
+                    'value_date': parsed['value_date'],
+                    'description': parsed['description'],
+                    'reference_number': parsed['reference_number'],
+                    'debit_amount': parsed['debit_amount'],
+                    'credit_amount': parsed['credit_amount'],
+                    'balance': parsed['balance'],
+                    'status': BankImportRowStatus.PENDING,
+                    'raw_data': parsed['raw_data'],
+                    'fingerprint': fingerprint(
+                        parsed['transaction_date'],
+                        parsed['credit_amount'] - parsed['debit_amount'],
+                        parsed['reference_number'],
+                        parsed['balance'],
+                    ),
+                })
+                candidates += 1
+                if len(batch) >= batch_size:
+                    processed += insert_unique_rows(self.db, BankImportRow, batch)
+                    batch = []
+            
+            if batch:
+                processed += insert_unique_rows(self.db, BankImportRow, batch)
+        except (csv.Error, UnicodeDecodeError) as e:
+            self.db.rollback()
+            raise ValueError(f"Failed to parse CSV: {str(e)}")
         
+        bank_import.total_rows = total
         bank_import.processed_rows = processed
+        bank_import.duplicate_rows = candidates - processed
         bank_import.status = BankImportStatus.COMPLETED
         bank_import.completed_at = datetime.utcnow()
         
@@ -540,24 +687,15 @@ class BankImportService:
         return query.order_by(BankImportRow.row_number).all()
     
     def match_transactions(self, bank_import: BankImport) -> int:
-        """Try to match import rows with existing transactions."""
-        matched = 0
-        rows = self.get_import_rows(bank_import, BankImportRowStatus.PENDING)
-        
-        for row in rows:
-            # Try to find matching transaction by date and amount
-            # This is a simple matching - could be enhanced
-            if row.transaction_date:
-                existing = self.db.query(Transaction).filter(
-                    Transaction.company_id == bank_import.company_id,
-                    Transaction.transaction_date == row.transaction_date,
-                    Transaction.total_debit == (row.credit_amount or row.debit_amount)
-                ).first()
-                
-                if existing:
-                    row.transaction_id = existing.id
-                    row.status = BankImportRowStatus.MATCHED
-                    matched += 1
+        """
+        Try to match pending import rows with existing transactions.
+        
+        Rows match a transaction of the same date and amount (or carrying
+        the same cheque number / UTR); each transaction is matched once.
+        """
+        matched = BankMatchingEngine(self.db).match_import_rows(
+            bank_import.company_id, bank_import.id
+        )
         
         bank_import.matched_rows = matched
         self.db.commit()
@@ -676,6 +814,58 @@ class BankImportService:
         self.db.commit()
         return created, matched, ignored
     
+    def backfill_fingerprints(self, company_id: Optional[str] = None) -> int:
+        """
+        Fingerprint import rows stored before fingerprints existed.
+        
+        Rows are fingerprinted per import in row order, as on import; a row
+        whose fingerprint is already taken (a duplicate imported earlier) is
+        left without one. Returns the number of rows updated.
+        """
+        query = self.db.query(
+            BankImportRow.id,
+            BankImportRow.transaction_date,
+            BankImportRow.debit_amount,
+            BankImportRow.credit_amount,
+            BankImportRow.reference_number,
+            BankImportRow.balance,
+            BankImportRow.import_id,
+            BankImport.bank_account_id,
+        ).join(
+            BankImport, BankImportRow.import_id == BankImport.id
+        ).filter(
+            BankImportRow.fingerprint.is_(None)
+        )
+        if company_id:
+            query = query.filter(BankImport.company_id == company_id)
+        
+        taken = {
+            fingerprint for (fingerprint,) in self.db.query(BankImportRow.fingerprint).filter(
+                BankImportRow.fingerprint.isnot(None)
+            )
+        }
+        updates = []
+        import_id, fingerprint = None, None
+        for row in query.order_by(BankImport.import_date, BankImportRow.import_id, BankImportRow.row_number):
+            if row.import_id != import_id:
+                import_id = row.import_id
+                fingerprint = RowFingerprinter(row.bank_account_id or f"import:{row.import_id}")
+            value = fingerprint(
+                row.transaction_date,
+                (row.credit_amount or Decimal("0")) - (row.debit_amount or Decimal("0")),
+                row.reference_number,
+                row.balance,
+            )
+            if value in taken:
+                continue
+            taken.add(value)
+            updates.append({"id": row.id, "fingerprint": value})
+        
+        for offset in range(0, len(updates), settings.BANK_IMPORT_BATCH_SIZE):
+            self.db.bulk_update_mappings(BankImportRow, updates[offset:offset + settings.BANK_IMPORT_BATCH_SIZE])
+        self.db.commit()
+        return len(updates)
+    
     def delete_import(self, bank_import: BankImport) -> bool:
         """Delete a bank import and its rows."""
         self.db.delete(bank_import)
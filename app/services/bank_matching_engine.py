@@ -0,0 +1,399 @@
+"""
+Bank Matching Engine - pairs bank lines with book entries.
+
+Auto-matching used to compare every bank line with every book entry (and
+lazy-loaded each entry's transaction to read its date), which is O(n*m)
+and issues a query per book entry. The engine instead:
+
+1. Buckets both sides by amount in paise and sorts each bucket by date, so
+   a book entry only looks at bank lines of its amount within the date
+   window (a bisect per bucket) - O(n log n) overall.
+2. Runs a second pass over what is left on cheque numbers / UTR / RRN
+   tokens found in descriptions and references, for lines that cleared
+   outside the date window.
+
+Candidates are loaded as plain column rows (dates included) in one query
+per side and matches are written back with bulk updates and one commit.
+"""
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, List, Dict, Any, Iterable, FrozenSet, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database.models import (
+    Transaction, TransactionEntry, TransactionStatus, BankImportRow,
+    BankImportRowStatus,
+)
+from app.database.bank_statement_models import BankStatementEntry, BankStatementEntryStatus
+
+
+# Cheque numbers are 6 digits, NEFT/RTGS UTRs 16-22 characters, IMPS/UPI
+# RRNs 12 digits. Shorter or digit-poor tokens are too common to trust.
+_TOKEN_SPLIT = re.compile(r"[^A-Z0-9]+")
+MIN_REFERENCE_DIGITS = 6
+MAX_REFERENCE_LENGTH = 22
+
+
+def extract_reference_tokens(*texts: Optional[str]) -> FrozenSet[str]:
+    """Cheque / UTR / RRN-like tokens in free text, leading zeros removed."""
+    tokens = set()
+    for text in texts:
+        if not text:
+            continue
+        for token in _TOKEN_SPLIT.split(text.upper()):
+            if len(token) > MAX_REFERENCE_LENGTH:
+                continue
+            if sum(ch.isdigit() for ch in token) < MIN_REFERENCE_DIGITS:
+                continue
+            tokens.add(token.lstrip("0") if token.isdigit() else token)
+    return frozenset(tokens)
+
+
+def to_paise(amount: Any) -> int:
+    """Amount in paise, the bucket key."""
+    value = amount if isinstance(amount, Decimal) else Decimal(str(amount or 0))
+    return int((value * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+@dataclass
+class MatchItem:
+    """One side of a potential match."""
+    id: str
+    amount: Decimal
+    date: Optional[date]
+    references: FrozenSet[str] = field(default_factory=frozenset)
+
+
+@dataclass
+class MatchPair:
+    """A bank line paired with a book entry."""
+    bank_id: str
+    book_id: str
+    amount: Decimal
+    date_diff_days: Optional[int]
+    method: str  # "amount_date" or "reference"
+
+
+def match_items(
+    bank_items: Iterable[MatchItem],
+    book_items: Iterable[MatchItem],
+    tolerance_days: int = 3,
+    tolerance_amount: Decimal = Decimal("0.01"),
+    reference_days: Optional[int] = 60,
+) -> List[MatchPair]:
+    """
+    Pair bank lines with book entries one-to-one.
+
+    Pass 1: same amount (within ``tolerance_amount``) and dates within
+    ``tolerance_days``; book entries are taken in date order and each gets
+    the bank line with the closest date.
+    Pass 2: same amount and a shared reference token that is unique on both
+    sides, dates within ``reference_days`` (``None`` for any date).
+    """
+    bank_items = list(bank_items)
+    book_items = list(book_items)
+    tolerance_paise = to_paise(tolerance_amount)
+    pairs: List[MatchPair] = []
+    matched_bank = set()
+    matched_book = set()
+
+    # {paise: sorted [(date ordinal, position)]}
+    buckets: Dict[int, List[Tuple[int, int]]] = {}
+    bank_paise = [to_paise(item.amount) for item in bank_items]
+    for position, item in enumerate(bank_items):
+        if item.date is not None:
+            buckets.setdefault(bank_paise[position], []).append((item.date.toordinal(), position))
+    for bucket in buckets.values():
+        bucket.sort()
+
+    dated_book = sorted(
+        (item for item in book_items if item.date is not None),
+        key=lambda item: (item.date, item.id),
+    )
+    for book in dated_book:
+        paise = to_paise(book.amount)
+        day = book.date.toordinal()
+        best = None  # (date diff, bucket key, index in bucket)
+        for key in range(paise - tolerance_paise, paise + tolerance_paise + 1):
+            bucket = buckets.get(key)
+            if not bucket:
+                continue
+            index = bisect_left(bucket, (day - tolerance_days, -1))
+            while index < len(bucket) and bucket[index][0] <= day + tolerance_days:
+                diff = abs(bucket[index][0] - day)
+                if best is None or diff < best[0]:
+                    best = (diff, key, index)
+                index += 1
+        if best is None:
+            continue
+        diff, key, index = best
+        _, position = buckets[key].pop(index)
+        matched_bank.add(position)
+        matched_book.add(book.id)
+        pairs.append(MatchPair(
+            bank_id=bank_items[position].id,
+            book_id=book.id,
+            amount=book.amount,
+            date_diff_days=diff,
+            method="amount_date",
+        ))
+
+    # Pass 2: reference tokens, unique on each side
+    def unique_tokens(items, skip):
+        seen: Dict[str, Optional[int]] = {}
+        for position, item in enumerate(items):
+            if position in skip:
+                continue
+            for token in item.references:
+                seen[token] = None if token in seen else position
+        return {token: position for token, position in seen.items() if position is not None}
+
+    remaining_book = [item for item in book_items if item.id not in matched_book]
+    bank_by_token = unique_tokens(bank_items, matched_bank)
+    if not bank_by_token:
+        return pairs
+    book_by_token = unique_tokens(remaining_book, set())
+
+    for token, book_position in sorted(book_by_token.items()):
+        position = bank_by_token.get(token)
+        book = remaining_book[book_position]
+        if position is None or position in matched_bank or book.id in matched_book:
+            continue
+        bank = bank_items[position]
+        if abs(bank_paise[position] - to_paise(book.amount)) > tolerance_paise:
+            continue
+        diff = None
+        if bank.date is not None and book.date is not None:
+            diff = abs((bank.date - book.date).days)
+            if reference_days is not None and diff > reference_days:
+                continue
+        matched_bank.add(position)
+        matched_book.add(book.id)
+        pairs.append(MatchPair(
+            bank_id=bank.id,
+            book_id=book.id,
+            amount=book.amount,
+            date_diff_days=diff,
+            method="reference",
+        ))
+
+    return pairs
+
+
+@dataclass
+class StatementMatchResult:
+    """Matches of a statement run plus the candidate rows, for reporting."""
+    pairs: List[MatchPair]
+    bank_rows: List[Any]
+    book_rows: List[Any]
+
+    @property
+    def matched_bank_ids(self) -> set:
+        return {pair.bank_id for pair in self.pairs}
+
+    @property
+    def matched_book_ids(self) -> set:
+        return {pair.book_id for pair in self.pairs}
+
+
+class BankMatchingEngine:
+    """Loads candidates, matches them and writes matches back in bulk."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ==================== STATEMENT ENTRIES <-> BOOK ENTRIES ====================
+
+    def match_statement_entries(
+        self,
+        company_id: str,
+        bank_account_id: str,
+        ledger_account_id: str,
+        tolerance_days: int = 3,
+        tolerance_amount: Decimal = Decimal("0.01"),
+    ) -> StatementMatchResult:
+        """
+        Match pending ``BankStatementEntry`` lines of a bank account with
+        unreconciled posted entries of its ledger account and commit.
+        """
+        bank_rows = self.db.query(
+            BankStatementEntry.id,
+            BankStatementEntry.value_date,
+            BankStatementEntry.amount,
+            BankStatementEntry.description,
+            BankStatementEntry.bank_reference,
+        ).filter(
+            BankStatementEntry.company_id == company_id,
+            BankStatementEntry.bank_account_id == bank_account_id,
+            BankStatementEntry.status == BankStatementEntryStatus.PENDING,
+        ).order_by(BankStatementEntry.value_date, BankStatementEntry.id).all()
+
+        book_rows = self.db.query(
+            TransactionEntry.id,
+            TransactionEntry.transaction_id,
+            TransactionEntry.debit_amount,
+            TransactionEntry.credit_amount,
+            TransactionEntry.description,
+            TransactionEntry.bank_reference,
+            Transaction.transaction_date,
+            Transaction.description.label("transaction_description"),
+        ).join(
+            Transaction, TransactionEntry.transaction_id == Transaction.id
+        ).filter(
+            TransactionEntry.account_id == ledger_account_id,
+            Transaction.status == TransactionStatus.POSTED,
+            TransactionEntry.is_reconciled == False,
+        ).order_by(Transaction.transaction_date, TransactionEntry.id).all()
+
+        pairs = match_items(
+            [
+                MatchItem(
+                    id=row.id,
+                    amount=Decimal(str(row.amount)),
+                    date=_as_date(row.value_date),
+                    references=extract_reference_tokens(row.bank_reference, row.description),
+                )
+                for row in bank_rows
+            ],
+            [
+                MatchItem(
+                    id=row.id,
+                    # Debit to the bank ledger = money in, as on the statement
+                    amount=self.book_amount(row),
+                    date=_as_date(row.transaction_date),
+                    references=extract_reference_tokens(
+                        row.bank_reference, row.description, row.transaction_description
+                    ),
+                )
+                for row in book_rows
+            ],
+            tolerance_days=tolerance_days,
+            tolerance_amount=tolerance_amount,
+        )
+
+        if pairs:
+            now = datetime.utcnow()
+            bank_by_id = {row.id: row for row in bank_rows}
+            book_by_id = {row.id: row for row in book_rows}
+            self.db.bulk_update_mappings(BankStatementEntry, [
+                {
+                    "id": pair.bank_id,
+                    "status": BankStatementEntryStatus.MATCHED,
+                    "matched_entry_id": pair.book_id,
+                    "matched_at": now,
+                }
+                for pair in pairs
+            ])
+            self.db.bulk_update_mappings(TransactionEntry, [
+                {
+                    "id": pair.book_id,
+                    "bank_date": bank_by_id[pair.bank_id].value_date,
+                    "is_reconciled": True,
+                    "reconciliation_date": now,
+                    "bank_reference": (
+                        bank_by_id[pair.bank_id].bank_reference
+                        or book_by_id[pair.book_id].bank_reference
+                    ),
+                }
+                for pair in pairs
+            ])
+        self.db.commit()
+
+        return StatementMatchResult(pairs=pairs, bank_rows=bank_rows, book_rows=book_rows)
+
+    @staticmethod
+    def book_amount(row: Any) -> Decimal:
+        """Signed amount of a book entry from the bank's point of view."""
+        return Decimal(str(row.debit_amount or 0)) - Decimal(str(row.credit_amount or 0))
+
+    # ==================== IMPORT ROWS <-> TRANSACTIONS ====================
+
+    def match_import_rows(
+        self,
+        company_id: str,
+        import_id: str,
+        tolerance_days: int = 0,
+        tolerance_amount: Decimal = Decimal("0"),
+    ) -> int:
+        """
+        Match pending ``BankImportRow`` lines of an import with transactions
+        of the company by date and total, and flush the links. Transactions
+        already linked to an import row are not matched again.
+        """
+        rows = self.db.query(
+            BankImportRow.id,
+            BankImportRow.transaction_date,
+            BankImportRow.debit_amount,
+            BankImportRow.credit_amount,
+            BankImportRow.description,
+            BankImportRow.reference_number,
+        ).filter(
+            BankImportRow.import_id == import_id,
+            BankImportRow.status == BankImportRowStatus.PENDING,
+        ).all()
+
+        dates = [_as_date(row.transaction_date) for row in rows if row.transaction_date]
+        if not dates:
+            return 0
+        window_start = datetime.combine(min(dates) - timedelta(days=tolerance_days), datetime.min.time())
+        window_end = datetime.combine(max(dates) + timedelta(days=tolerance_days + 1), datetime.min.time())
+
+        linked = self.db.query(BankImportRow.transaction_id).filter(
+            BankImportRow.transaction_id.isnot(None)
+        )
+        transactions = self.db.query(
+            Transaction.id,
+            Transaction.transaction_date,
+            Transaction.total_debit,
+            Transaction.description,
+        ).filter(
+            Transaction.company_id == company_id,
+            Transaction.transaction_date >= window_start,
+            Transaction.transaction_date < window_end,
+            ~Transaction.id.in_(linked),
+        ).all()
+
+        pairs = match_items(
+            [
+                MatchItem(
+                    id=row.id,
+                    amount=Decimal(str(row.credit_amount or row.debit_amount or 0)),
+                    date=_as_date(row.transaction_date),
+                    references=extract_reference_tokens(row.reference_number, row.description),
+                )
+                for row in rows
+            ],
+            [
+                MatchItem(
+                    id=txn.id,
+                    amount=Decimal(str(txn.total_debit or 0)),
+                    date=_as_date(txn.transaction_date),
+                    references=extract_reference_tokens(txn.description),
+                )
+                for txn in transactions
+            ],
+            tolerance_days=tolerance_days,
+            tolerance_amount=tolerance_amount,
+            reference_days=tolerance_days,
+        )
+
+        if pairs:
+            self.db.bulk_update_mappings(BankImportRow, [
+                {
+                    "id": pair.bank_id,
+                    "transaction_id": pair.book_id,
+                    "status": BankImportRowStatus.MATCHED,
+                }
+                for pair in pairs
+            ])
+        return len(pairs)
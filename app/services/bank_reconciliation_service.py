@@ -23,6 +23,7 @@ from sqlalchemy import func, and_, or_, extract
 from app.database.models import (
     TransactionEntry, Transaction, BankAccount, Account, generate_uuid
 )
+from app.services.bank_matching_engine import BankMatchingEngine
 
 
 class BankReconciliationService:
@@ -307,13 +308,11 @@ class BankReconciliationService:
         Auto-match book entries with bank statement entries.
         
         Matching logic (in order of priority):
-        1. Exact amount + date within tolerance
-        2. Exact amount + partial description match
+        1. Exact amount + date within tolerance (closest date wins)
+        2. Exact amount + same cheque number / UTR in description or reference
         
         Returns detailed results including unmatched entries on both sides.
         """
-        from app.database.bank_statement_models import BankStatementEntry, BankStatementEntryStatus
-        
         account = self._get_bank_ledger_account(company_id, bank_account_id)
         if not account:
             return {
@@ -323,91 +322,28 @@ class BankReconciliationService:
                 "error": "Bank account not found"
             }
         
-        # Get unreconciled book entries
-        book_entries = self.db.query(TransactionEntry).join(Transaction).filter(
-            TransactionEntry.account_id == account.id,
-            Transaction.status == 'POSTED',
-            TransactionEntry.is_reconciled == False,
-        ).all()
-        
-        # Get pending bank entries
-        bank_entries = self.db.query(BankStatementEntry).filter(
-            BankStatementEntry.company_id == company_id,
-            BankStatementEntry.bank_account_id == bank_account_id,
-            BankStatementEntry.status == BankStatementEntryStatus.PENDING,
-        ).all()
-        
-        matched = 0
-        matched_bank_ids = set()
-        matched_book_ids = set()
-        match_details = []
-        
-        # First pass: Exact amount + date within tolerance
-        for book in book_entries:
-            if book.id in matched_book_ids:
-                continue
-                
-            book_amount = Decimal(str(book.debit_amount or 0)) - Decimal(str(book.credit_amount or 0))
-            book_date = book.transaction.transaction_date
-            
-            if not book_date:
-                continue
-            
-            if isinstance(book_date, datetime):
-                book_date = book_date.date()
-            
-            best_match = None
-            best_date_diff = None
-            
-            for bank in bank_entries:
-                if bank.id in matched_bank_ids:
-                    continue
-                
-                # Check amount match (must be exact or within tiny tolerance)
-                amount_diff = abs(book_amount - Decimal(str(bank.amount)))
-                if amount_diff > tolerance_amount:
-                    continue
-                
-                # Check date match
-                bank_date = bank.value_date
-                if bank_date:
-                    if isinstance(bank_date, datetime):
-                        bank_date = bank_date.date()
-                    
-                    date_diff = abs((book_date - bank_date).days)
-                    if date_diff > tolerance_days:
-                        continue
-                    
-                    # Keep best match (closest date)
-                    if best_match is None or date_diff < best_date_diff:
-                        best_match = bank
-                        best_date_diff = date_diff
-            
-            if best_match:
-                # Match found!
-                book.bank_date = best_match.value_date
-                book.is_reconciled = True
-                book.reconciliation_date = datetime.utcnow()
-                book.bank_reference = best_match.bank_reference
-                
-                best_match.status = BankStatementEntryStatus.MATCHED
-                best_match.matched_entry_id = book.id
-                best_match.matched_at = datetime.utcnow()
-                
-                matched_bank_ids.add(best_match.id)
-                matched_book_ids.add(book.id)
-                matched += 1
-                
-                match_details.append({
-                    "book_entry_id": book.id,
-                    "bank_entry_id": best_match.id,
-                    "amount": float(book_amount),
-                    "date_diff_days": best_date_diff,
-                })
+        result = BankMatchingEngine(self.db).match_statement_entries(
+            company_id,
+            bank_account_id,
+            account.id,
+            tolerance_days=tolerance_days,
+            tolerance_amount=tolerance_amount,
+        )
         
-        self.db.commit()
+        match_details = [
+            {
+                "book_entry_id": pair.book_id,
+                "bank_entry_id": pair.bank_id,
+                "amount": float(pair.amount),
+                "date_diff_days": pair.date_diff_days,
+                "match_type": pair.method,
+            }
+            for pair in result.pairs
+        ]
         
         # Build unmatched lists
+        matched_bank_ids = result.matched_bank_ids
+        matched_book_ids = result.matched_book_ids
         bank_unmatched = [
             {
                 "id": b.id,
@@ -416,22 +352,22 @@ class BankReconciliationService:
                 "description": b.description,
                 "bank_reference": b.bank_reference,
             }
-            for b in bank_entries if b.id not in matched_bank_ids
+            for b in result.bank_rows if b.id not in matched_bank_ids
         ]
         
         book_unmatched = [
             {
                 "id": b.id,
                 "transaction_id": b.transaction_id,
-                "date": b.transaction.transaction_date.isoformat() if b.transaction.transaction_date else None,
-                "amount": float(Decimal(str(b.debit_amount or 0)) - Decimal(str(b.credit_amount or 0))),
-                "description": b.description or b.transaction.narration or "",
+                "date": b.transaction_date.isoformat() if b.transaction_date else None,
+                "amount": float(BankMatchingEngine.book_amount(b)),
+                "description": b.description or b.transaction_description or "",
             }
-            for b in book_entries if b.id not in matched_book_ids
+            for b in result.book_rows if b.id not in matched_book_ids
         ]
         
         return {
-            "matched": matched,
+            "matched": len(result.pairs),
             "match_details": match_details,
             "bank_unmatched": bank_unmatched,
             "bank_unmatched_count": len(bank_unmatched),
@@ -22,9 +22,12 @@ from app.database.models import (
 from app.database.bank_statement_models import (
     BankStatementEntry, BankStatementEntryStatus
 )
+from app.config import settings
 from app.services.bank_import_service import (
-    HDFCParser, ICICIParser, SBIParser, AxisParser, GenericParser, CustomMappingParser
+    HDFCParser, ICICIParser, SBIParser, AxisParser, GenericParser, CustomMappingParser,
+    RowFingerprinter, StatementSource, insert_unique_rows, read_statement,
 )
+from app.services.bank_matching_engine import BankMatchingEngine
 
 
 class BankStatementImportService:
@@ -90,16 +93,20 @@ class BankStatementImportService:
         self,
         company_id: str,
         bank_account_id: str,
-        content: str,
+        content: StatementSource,
         file_name: str = "import",
         bank_name: Optional[str] = None,
         column_mapping: Optional[Dict[str, str]] = None,
         auto_match: bool = True,
+        batch_size: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Import bank statement to BankStatementEntry table.
         
         This is the main entry point - imports bank data and optionally auto-matches.
+        ``content`` is CSV text or an uploaded file; rows are parsed and
+        inserted in batches as it is read. Rows already imported for the
+        account (same fingerprint) are skipped.
         
         Returns:
             {
@@ -109,8 +116,8 @@ class BankStatementImportService:
                 "pending": int,
             }
         """
-        if content.startswith('\ufeff'):
-            content = content[1:]
+        batch_size = batch_size or settings.BANK_IMPORT_BATCH_SIZE
+        headers, _, rows = read_statement(content)
         
         # Select parser
         if column_mapping:
@@ -124,9 +131,6 @@ class BankStatementImportService:
             })
             detected_bank = bank_name or "Custom"
         else:
-            reader = csv.DictReader(io.StringIO(content))
-            headers = [h for h in (reader.fieldnames or []) if h is not None]
-            
             # Detect bank format
             parser = self.parsers[-1]  # Default to generic
             detected_bank = "Generic"
@@ -136,65 +140,52 @@ class BankStatementImportService:
                     detected_bank = p.bank_name
                     break
         
-        # Parse CSV
-        reader = csv.DictReader(io.StringIO(content))
-        rows = [{k: v for k, v in row.items() if k is not None} for row in reader]
-        
+        fingerprint = RowFingerprinter(bank_account_id)
+        candidates = 0
         imported = 0
-        duplicates = 0
+        batch: List[Dict[str, Any]] = []
         
-        for i, row in enumerate(rows, 1):
-            try:
-                parsed = parser.parse_row(row, i)
-                
-                if not parsed:
-                    continue
-                
-                # Skip rows with no amount
-                debit = parsed.get('debit_amount', Decimal('0')) or Decimal('0')
-                credit = parsed.get('credit_amount', Decimal('0')) or Decimal('0')
-                
-                if debit == 0 and credit == 0:
-                    continue
-                
-                # Calculate net amount (positive = money in, negative = money out)
-                amount = credit - debit
-                
-                value_date = parsed.get('value_date') or parsed.get('transaction_date')
-                if not value_date:
-                    continue
-                
-                # Check for duplicate
-                existing = self.db.query(BankStatementEntry).filter(
-                    BankStatementEntry.company_id == company_id,
-                    BankStatementEntry.bank_account_id == bank_account_id,
-                    BankStatementEntry.value_date == value_date,
-                    BankStatementEntry.amount == amount,
-                    BankStatementEntry.description == parsed.get('description', ''),
-                ).first()
-                
-                if existing:
-                    duplicates += 1
-                    continue
-                
-                # Create BankStatementEntry
-                entry = BankStatementEntry(
-                    id=generate_uuid(),
-                    company_id=company_id,
-                    bank_account_id=bank_account_id,
-                    value_date=value_date,
-                    transaction_date=parsed.get('transaction_date'),
-                    amount=amount,
-                    bank_reference=parsed.get('reference_number'),
-                    description=parsed.get('description', ''),
-                    balance=parsed.get('balance'),
-                    status=BankStatementEntryStatus.PENDING,
-                )
-                self.db.add(entry)
-                imported += 1
-                
-            except Exception as e:
+        for _, parsed in parser.iter_parsed(rows):
+            if not parsed:
+                continue
+            
+            # Skip rows with no amount
+            debit = parsed.get('debit_amount', Decimal('0')) or Decimal('0')
+            credit = parsed.get('credit_amount', Decimal('0')) or Decimal('0')
+            
+            if debit == 0 and credit == 0:
+                continue
+            
+            # Calculate net amount (positive = money in, negative = money out)
+            amount = credit - debit
+            
+            value_date = parsed.get('value_date') or parsed.get('transaction_date')
+            if not value_date:
                 continue
+            
+            batch.append({
+                'id': generate_uuid(),
+                'company_id': company_id,
+                'bank_account_id': bank_account_id,
+                'value_date': value_date,
+                'transaction_date': parsed.get('transaction_date'),
+                'amount': amount,
+                'bank_reference': parsed.get('reference_number'),
+                'description': parsed.get('description', ''),
+                'balance': parsed.get('balance'),
+                'status': BankStatementEntryStatus.PENDING,
+                'fingerprint': fingerprint(
+                    value_date, amount, parsed.get('reference_number'), parsed.get('balance')
+                ),
+            })
+            candidates += 1
+            if len(batch) >= batch_size:
+                imported += insert_unique_rows(self.db, BankStatementEntry, batch)
+                batch = []
+        
+        if batch:
+            imported += insert_unique_rows(self.db, BankStatementEntry, batch)
+        duplicates = candidates - imported
         
         self.db.commit()
         
@@ -229,83 +220,72 @@ class BankStatementImportService:
         """
         Auto-match bank statement entries with book entries.
         
-        Matching logic:
+        Matching logic (see BankMatchingEngine):
         1. Exact amount match
-        2. Date within tolerance
+        2. Date within tolerance, or the same cheque number / UTR
         3. One-to-one matching (each entry can only match once)
         """
         account = self._get_bank_ledger_account(company_id, bank_account_id)
         if not account:
             return {"matched": 0, "error": "Bank account not found"}
         
-        # Get pending bank statement entries
-        bank_entries = self.db.query(BankStatementEntry).filter(
-            BankStatementEntry.company_id == company_id,
-            BankStatementEntry.bank_account_id == bank_account_id,
-            BankStatementEntry.status == BankStatementEntryStatus.PENDING,
-        ).all()
+        result = BankMatchingEngine(self.db).match_statement_entries(
+            company_id,
+            bank_account_id,
+            account.id,
+            tolerance_days=tolerance_days,
+            tolerance_amount=tolerance_amount,
+        )
         
-        # Get unreconciled book entries for this account
-        book_entries = self.db.query(TransactionEntry).join(Transaction).filter(
-            TransactionEntry.account_id == account.id,
-            Transaction.status == TransactionStatus.POSTED,
-            TransactionEntry.is_reconciled == False,
-        ).all()
+        return {"matched": len(result.pairs)}
+    
+    def backfill_fingerprints(self, company_id: Optional[str] = None) -> int:
+        """
+        Fingerprint statement entries stored before fingerprints existed.
         
-        matched = 0
-        matched_book_ids = set()
+        Entries are fingerprinted per bank account in date order, as on
+        import; an entry whose fingerprint is already taken (a duplicate
+        imported earlier) is left without one. Returns the number updated.
+        """
+        query = self.db.query(
+            BankStatementEntry.id,
+            BankStatementEntry.bank_account_id,
+            BankStatementEntry.value_date,
+            BankStatementEntry.amount,
+            BankStatementEntry.bank_reference,
+            BankStatementEntry.balance,
+        ).filter(
+            BankStatementEntry.fingerprint.is_(None)
+        )
+        if company_id:
+            query = query.filter(BankStatementEntry.company_id == company_id)
         
-        for bank_entry in bank_entries:
-            if bank_entry.status != BankStatementEntryStatus.PENDING:
+        taken = {
+            fingerprint for (fingerprint,) in self.db.query(BankStatementEntry.fingerprint).filter(
+                BankStatementEntry.fingerprint.isnot(None)
+            )
+        }
+        updates = []
+        bank_account_id, fingerprint = None, None
+        for entry in query.order_by(
+            BankStatementEntry.bank_account_id,
+            BankStatementEntry.value_date,
+            BankStatementEntry.created_at,
+            BankStatementEntry.id,
+        ):
+            if entry.bank_account_id != bank_account_id:
+                bank_account_id = entry.bank_account_id
+                fingerprint = RowFingerprinter(bank_account_id)
+            value = fingerprint(entry.value_date, entry.amount, entry.bank_reference, entry.balance)
+            if value in taken:
                 continue
-            
-            bank_amount = Decimal(str(bank_entry.amount))
-            bank_date = bank_entry.value_date
-            if isinstance(bank_date, datetime):
-                bank_date = bank_date.date()
-            
-            for book_entry in book_entries:
-                if book_entry.id in matched_book_ids:
-                    continue
-                
-                # Calculate book entry amount (from bank's perspective)
-                # Debit to bank account = money in = positive
-                # Credit to bank account = money out = negative
-                book_debit = Decimal(str(book_entry.debit_amount or 0))
-                book_credit = Decimal(str(book_entry.credit_amount or 0))
-                book_amount = book_debit - book_credit
-                
-                # Check amount match
-                if abs(bank_amount - book_amount) > tolerance_amount:
-                    continue
-                
-                # Check date match
-                txn_date = book_entry.transaction.transaction_date
-                if txn_date:
-                    if isinstance(txn_date, datetime):
-                        txn_date = txn_date.date()
-                    
-                    date_diff = abs((bank_date - txn_date).days)
-                    if date_diff > tolerance_days:
-                        continue
-                
-                # Match found!
-                bank_entry.status = BankStatementEntryStatus.MATCHED
-                bank_entry.matched_entry_id = book_entry.id
-                bank_entry.matched_at = datetime.utcnow()
-                
-                book_entry.bank_date = bank_entry.value_date
-                book_entry.is_reconciled = True
-                book_entry.reconciliation_date = datetime.utcnow()
-                book_entry.bank_reference = bank_entry.bank_reference
-                
-                matched_book_ids.add(book_entry.id)
-                matched += 1
-                break
+            taken.add(value)
+            updates.append({"id": entry.id, "fingerprint": value})
         
+        for offset in range(0, len(updates), settings.BANK_IMPORT_BATCH_SIZE):
+            self.db.bulk_update_mappings(BankStatementEntry, updates[offset:offset + settings.BANK_IMPORT_BATCH_SIZE])
         self.db.commit()
-        
-        return {"matched": matched}
+        return len(updates)
     
     def get_statement_entries(
         self,
@@ -14,11 +14,14 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.database.models import (
-    BillAllocation, BillAllocationType, Invoice, PurchaseInvoice,
+    BillAllocation, BillAllocationType, Invoice, Purchase,
     Transaction, Customer, generate_uuid
 )
 
 
+AGING_BUCKETS = [0, 30, 60, 90, 180]  # 0-30, 31-60, 61-90, 91-180, 180+
+
+
 class BillAllocationService:
     """Service for bill-wise payment allocation."""
     
@@ -46,12 +49,11 @@ class BillAllocationService:
     ) -> BillAllocation:
         """Create a payment allocation against an invoice."""
         # Get invoice
+        invoice = self._get_invoice(invoice_id, invoice_type)
         if invoice_type == 'sales':
-            invoice = self.db.query(Invoice).filter(Invoice.id == invoice_id).first()
             invoice_number = invoice.invoice_number if invoice else None
         else:
-            invoice = self.db.query(PurchaseInvoice).filter(PurchaseInvoice.id == invoice_id).first()
-            invoice_number = invoice.invoice_number if invoice else None
+            invoice_number = invoice.purchase_number if invoice else None
         
         allocation = BillAllocation(
             id=generate_uuid(),
@@ -79,8 +81,17 @@ class BillAllocationService:
         
         return allocation
     
+    def _get_invoice(self, invoice_id: str, invoice_type: str):
+        """The sales invoice or (not deleted) purchase an allocation refers to."""
+        if invoice_type == 'sales':
+            return self.db.query(Invoice).filter(Invoice.id == invoice_id).first()
+        return self.db.query(Purchase).filter(
+            Purchase.id == invoice_id,
+            Purchase.deleted_at.is_(None),
+        ).first()
+    
     def _update_invoice_outstanding(self, invoice, invoice_type: str):
-        """Update the outstanding amount on an invoice."""
+        """Update the outstanding amount on an invoice (balance due on a purchase)."""
         total_allocated = self.get_total_allocated(
             invoice.company_id,
             invoice.id,
@@ -90,7 +101,8 @@ class BillAllocationService:
         total_amount = invoice.total_amount or Decimal('0')
         outstanding = total_amount - total_allocated
         
-        invoice.outstanding_amount = self._round(outstanding)
+        if invoice_type == 'sales':
+            invoice.outstanding_amount = self._round(outstanding)
         invoice.balance_due = self._round(outstanding)
     
     def delete_allocation(self, allocation_id: str) -> bool:
@@ -109,11 +121,7 @@ class BillAllocationService:
         self.db.delete(allocation)
         
         # Update invoice outstanding
-        if invoice_type == 'sales':
-            invoice = self.db.query(Invoice).filter(Invoice.id == invoice_id).first()
-        else:
-            invoice = self.db.query(PurchaseInvoice).filter(PurchaseInvoice.id == invoice_id).first()
-        
+        invoice = self._get_invoice(invoice_id, invoice_type)
         if invoice:
             self._update_invoice_outstanding(invoice, invoice_type)
         
@@ -195,25 +203,26 @@ class BillAllocationService:
                 for inv in invoices
             ]
         else:
-            query = self.db.query(PurchaseInvoice).filter(
-                PurchaseInvoice.company_id == company_id,
-                PurchaseInvoice.outstanding_amount > 0,
+            query = self.db.query(Purchase).filter(
+                Purchase.company_id == company_id,
+                Purchase.deleted_at.is_(None),
+                Purchase.balance_due > 0,
             )
             if party_id:
-                query = query.filter(PurchaseInvoice.vendor_id == party_id)
+                query = query.filter(Purchase.vendor_id == party_id)
             if as_of_date:
-                query = query.filter(PurchaseInvoice.invoice_date <= as_of_date)
+                query = query.filter(Purchase.invoice_date <= as_of_date)
             
-            invoices = query.order_by(PurchaseInvoice.invoice_date.asc()).all()
+            invoices = query.order_by(Purchase.invoice_date.asc()).all()
             
             return [
                 {
                     'id': inv.id,
-                    'invoice_number': inv.invoice_number,
+                    'invoice_number': inv.purchase_number,
                     'invoice_date': inv.invoice_date.isoformat() if inv.invoice_date else None,
                     'due_date': inv.due_date.isoformat() if inv.due_date else None,
                     'total_amount': float(inv.total_amount or 0),
-                    'outstanding_amount': float(inv.outstanding_amount or 0),
+                    'outstanding_amount': float(inv.balance_due or 0),
                     'vendor_id': inv.vendor_id,
                     'days_overdue': (datetime.utcnow() - inv.due_date).days if inv.due_date else 0,
                 }
@@ -240,16 +249,18 @@ class BillAllocationService:
                 Invoice.outstanding_amount > 0,
             ).count()
         else:
-            result = self.db.query(func.sum(PurchaseInvoice.outstanding_amount)).filter(
-                PurchaseInvoice.company_id == company_id,
-                PurchaseInvoice.vendor_id == party_id,
-                PurchaseInvoice.outstanding_amount > 0,
+            result = self.db.query(func.sum(Purchase.balance_due)).filter(
+                Purchase.company_id == company_id,
+                Purchase.vendor_id == party_id,
+                Purchase.deleted_at.is_(None),
+                Purchase.balance_due > 0,
             ).scalar()
             
-            invoice_count = self.db.query(PurchaseInvoice).filter(
-                PurchaseInvoice.company_id == company_id,
-                PurchaseInvoice.vendor_id == party_id,
-                PurchaseInvoice.outstanding_amount > 0,
+            invoice_count = self.db.query(Purchase).filter(
+                Purchase.company_id == company_id,
+                Purchase.vendor_id == party_id,
+                Purchase.deleted_at.is_(None),
+                Purchase.balance_due > 0,
             ).count()
         
         return {
@@ -268,57 +279,33 @@ class BillAllocationService:
         party_id: str = None,
         as_of_date: datetime = None,
     ) -> Dict:
-        """Get age-wise outstanding analysis."""
-        if not as_of_date:
-            as_of_date = datetime.utcnow()
+        """
+        Get age-wise outstanding analysis.
         
-        buckets = {
-            '0-30': Decimal('0'),
-            '31-60': Decimal('0'),
-            '61-90': Decimal('0'),
-            '91-180': Decimal('0'),
-            '180+': Decimal('0'),
-        }
-        
-        invoices = self.get_outstanding_invoices(
-            company_id, party_id, invoice_type, as_of_date
-        )
+        Bucketed in the database by AgingReportService; invoice-level rows
+        come from its paginated ``*_aging_details`` methods.
+        """
+        from app.services.aging_report_service import AgingReportService
         
-        details = []
+        if not as_of_date:
+            as_of_date = datetime.utcnow()
         
-        for inv in invoices:
-            due_date = datetime.fromisoformat(inv['due_date']) if inv['due_date'] else datetime.fromisoformat(inv['invoice_date'])
-            days_overdue = (as_of_date - due_date).days
-            outstanding = Decimal(str(inv['outstanding_amount']))
-            
-            if days_overdue <= 0:
-                bucket = '0-30'  # Not yet due
-            elif days_overdue <= 30:
-                bucket = '0-30'
-            elif days_overdue <= 60:
-                bucket = '31-60'
-            elif days_overdue <= 90:
-                bucket = '61-90'
-            elif days_overdue <= 180:
-                bucket = '91-180'
-            else:
-                bucket = '180+'
-            
-            buckets[bucket] += outstanding
-            
-            details.append({
-                **inv,
-                'days_overdue': days_overdue,
-                'bucket': bucket,
-            })
+        aging_service = AgingReportService(self.db)
+        if invoice_type == 'sales':
+            report = aging_service.get_receivables_aging(
+                company_id, as_of_date, party_id, AGING_BUCKETS
+            )
+        else:
+            report = aging_service.get_payables_aging(
+                company_id, as_of_date, party_id, AGING_BUCKETS
+            )
         
         return {
             'as_of_date': as_of_date.isoformat(),
             'invoice_type': invoice_type,
-            'summary': {k: float(v) for k, v in buckets.items()},
-            'total_outstanding': sum(float(v) for v in buckets.values()),
-            'invoice_count': len(invoices),
-            'details': details,
+            'summary': report['summary'],
+            'total_outstanding': report['total_outstanding'],
+            'invoice_count': report['invoice_count'],
         }
     
     # ==================== ADVANCE/ON-ACCOUNT ====================
@@ -374,8 +361,9 @@ class BillAllocationService:
             self._update_invoice_outstanding(inv, 'sales')
         
         # Purchase invoices
-        purchase_invoices = self.db.query(PurchaseInvoice).filter(
-            PurchaseInvoice.company_id == company_id
+        purchase_invoices = self.db.query(Purchase).filter(
+            Purchase.company_id == company_id,
+            Purchase.deleted_at.is_(None),
         ).all()
         
         for inv in purchase_invoices:
@@ -5,6 +5,7 @@ from decimal import Decimal
 import re
 from app.database.models import Company, BankAccount, User, Account, AccountType,Invoice
 from app.schemas.company import CompanyCreate, CompanyUpdate, BankAccountCreate, BankAccountUpdate
+from app.services.sequence_service import SequenceService
 
 
 
@@ -64,47 +65,6 @@ class CompanyService:
             return 0
         match = re.search(r"(\d+)$", str(invoice_number).strip())
         return int(match.group(1)) if match else 0
-    def get_next_invoice_number(self, company: Company, voucher_type: Optional[str] = None) -> str:
-        """Get the next invoice number for a company based on voucher type."""
-        from app.database.models import InvoiceVoucher
-    
-        # Determine prefix based on voucher type
-        base_prefix = company.invoice_prefix or "INV-"
-    
-        # Add voucher type suffix if it's a service invoice
-        if voucher_type and (voucher_type == InvoiceVoucher.SERVICE or voucher_type == "service"):
-            # Ensure we have SER- in the prefix
-            if "SER" not in base_prefix:
-                prefix = base_prefix.rstrip('-') + "SER-"
-            else:
-                prefix = base_prefix
-        else:
-            # For sales, use base prefix
-            prefix = base_prefix
-    
-        # Get the last invoice with this specific prefix pattern
-        last_invoice = self.db.query(Invoice).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_number.isnot(None),
-            Invoice.invoice_number.like(f"{prefix}%"),
-            Invoice.is_deleted == False,
-            Invoice.status.in_(["pending", "paid", "partially_paid", "draft"])
-        ).order_by(
-            Invoice.invoice_date.desc(),
-            Invoice.created_at.desc()
-        ).first()
-    
-        if last_invoice and last_invoice.invoice_number:
-            # Parse the last number and increment
-            import re
-            matches = re.search(r'\d+$', last_invoice.invoice_number)
-            if matches:
-                last_num = int(matches.group())
-                return f"{prefix}{last_num + 1:05d}"
-    
-        # No invoices yet with this prefix, start with 00001
-        return f"{prefix}00001"
-
     def create_company(self, user: User, data: CompanyCreate) -> Company:
         """Create a new company for a user."""
         company = Company(
@@ -364,13 +324,22 @@ class CompanyService:
             "linked_account_id": linked_account.id if linked_account else None,
         }
     
-    def get_next_invoice_number(self, company: Company, voucher_type: Optional[str] = None) -> str:
-        """Get the next invoice number for a company based on voucher type."""
+    def _invoice_sequence(self, company: Company, voucher_type: Optional[str]):
+        """Sequence key and legacy seed for the invoice number family of a voucher type."""
         from app.database.models import InvoiceVoucher
 
         voucher_enum = InvoiceVoucher.SERVICE if self._is_service_voucher(voucher_type) else InvoiceVoucher.SALES
-        prefix = self._build_invoice_prefix(company, voucher_type)
         base_prefix = (company.invoice_prefix or "INV").strip().rstrip("-")
+        sequence_key = f"invoice:{voucher_enum.value}:{base_prefix.upper()}"
+
+        def seed() -> int:
+            return self._get_max_invoice_number(company, voucher_enum, base_prefix)
+
+        return sequence_key, seed
+
+    def _get_max_invoice_number(self, company: Company, voucher_enum, base_prefix: str) -> int:
+        """Highest number already used in an invoice family (scanned once to seed the counter)."""
+        from app.database.models import InvoiceVoucher
 
         invoice_numbers = self.db.query(Invoice.invoice_number).filter(
             Invoice.company_id == company.id,
@@ -402,5 +371,25 @@ class CompanyService:
             if parsed > max_num:
                 max_num = parsed
 
-        return f"{prefix}{max_num + 1:05d}"
+        return max_num
+
+    def get_next_invoice_number(self, company: Company, voucher_type: Optional[str] = None) -> str:
+        """Allocate the next invoice number for a company based on voucher type.
+
+        The number is reserved until the caller's transaction ends, so call this
+        in the same transaction that inserts the invoice.
+        """
+        prefix = self._build_invoice_prefix(company, voucher_type)
+        sequence_key, seed = self._invoice_sequence(company, voucher_type)
+
+        number = SequenceService(self.db).next_value(company.id, sequence_key, seed=seed)
+        return f"{prefix}{number:05d}"
+
+    def peek_next_invoice_number(self, company: Company, voucher_type: Optional[str] = None) -> str:
+        """Preview the next invoice number without allocating it."""
+        prefix = self._build_invoice_prefix(company, voucher_type)
+        sequence_key, seed = self._invoice_sequence(company, voucher_type)
+
+        number = SequenceService(self.db).peek(company.id, sequence_key, seed=seed)
+        return f"{prefix}{number:05d}"
 
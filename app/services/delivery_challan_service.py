@@ -10,6 +10,8 @@ from app.database.models import (
     StockEntry, StockMovementType, Godown, Batch, User, Contact,
     generate_uuid
 )
+from app.services.stock_balance_service import apply_stock_delta
+from app.services.listing_service import keyset_page, listing_totals
 
 
 class DeliveryChallanService:
@@ -685,10 +687,7 @@ class DeliveryChallanService:
             entries.append(entry)
             
             # Update product stock
-            if product.current_stock is not None:
-                product.current_stock = product.current_stock + qty
-            else:
-                product.current_stock = qty
+            apply_stock_delta(self.db, product, qty)
             
             # Link stock entry to item
             item.stock_movement_id = entry.id
@@ -958,8 +957,7 @@ class DeliveryChallanService:
             self.db.add(reverse_entry)
             
             # Update product stock
-            if product.current_stock is not None:
-                product.current_stock = product.current_stock + reverse_qty
+            apply_stock_delta(self.db, product, reverse_qty)
         
         dc.stock_updated = False
     
@@ -975,8 +973,15 @@ class DeliveryChallanService:
         to_date: Optional[date] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
+        include_totals: bool = True,
     ) -> Dict[str, Any]:
-        """List delivery challans with filters including custom_status."""
+        """
+        List delivery challans with filters including custom_status, newest first.
+        
+        Keyset paginated when ``cursor`` is given (see listing_service);
+        ``total`` and ``total_pages`` are None unless ``include_totals``.
+        """
         query = self.db.query(DeliveryChallan).filter(
             DeliveryChallan.company_id == company_id
         )
@@ -996,18 +1001,24 @@ class DeliveryChallanService:
         if to_date:
             query = query.filter(DeliveryChallan.dc_date <= to_date)
         
-        total = query.count()
+        dcs, next_cursor = keyset_page(query, DeliveryChallan, page_size, cursor=cursor, page=page)
         
-        dcs = query.order_by(DeliveryChallan.dc_date.desc()).offset(
-            (page - 1) * page_size
-        ).limit(page_size).all()
+        total = None
+        if include_totals:
+            filters = {
+                "dc_type": dc_type, "status": status, "custom_status": custom_status,
+                "customer_id": customer_id, "invoice_id": invoice_id,
+                "from_date": from_date, "to_date": to_date,
+            }
+            total = listing_totals(query, DeliveryChallan, company_id, filters)["total"]
         
         return {
             "items": dcs,
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size,
+            "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+            "next_cursor": next_cursor,
         }
     
     def get_delivery_challan(
@@ -99,6 +99,7 @@ class ESIService:
         company_id: Optional[str] = None,
         employee: Optional[Employee] = None,
         was_covered_in_period: bool = False,
+        settings: Optional[PayrollSettings] = None,
     ) -> Tuple[bool, str]:
         """
         Check if ESI is applicable for given salary.
@@ -108,6 +109,7 @@ class ESIService:
             company_id: Company ID for custom settings
             employee: Employee model for checking flags
             was_covered_in_period: Whether employee was covered earlier in contribution period
+            settings: Preloaded company settings (looked up by company_id if not given)
         
         Returns:
             Tuple of (is_applicable, reason)
@@ -117,17 +119,15 @@ class ESIService:
             return False, "ESI disabled for employee"
         
         # Check company settings
-        if company_id:
+        if settings is None and company_id:
             settings = self.get_esi_settings(company_id)
-            if settings and not settings.esi_enabled:
-                return False, "ESI disabled for company"
+        if settings and not settings.esi_enabled:
+            return False, "ESI disabled for company"
         
         # Get ceiling
         ceiling = self.ESI_WAGE_CEILING
-        if company_id:
-            settings = self.get_esi_settings(company_id)
-            if settings and settings.esi_wage_ceiling:
-                ceiling = settings.esi_wage_ceiling
+        if settings and settings.esi_wage_ceiling:
+            ceiling = settings.esi_wage_ceiling
         
         # Once covered in a contribution period, remains covered
         # even if salary exceeds ceiling
@@ -147,6 +147,7 @@ class ESIService:
         employee: Optional[Employee] = None,
         was_covered_in_period: bool = False,
         check_applicability: bool = True,
+        settings: Optional[PayrollSettings] = None,
     ) -> ESICalculationResult:
         """
         Calculate ESI contributions.
@@ -157,10 +158,14 @@ class ESIService:
             employee: Employee model for checking flags
             was_covered_in_period: Whether covered earlier in this period
             check_applicability: Whether to check applicability
+            settings: Preloaded company settings (looked up by company_id if not given)
         
         Returns:
             ESICalculationResult with contribution details
         """
+        if settings is None and company_id:
+            settings = self.get_esi_settings(company_id)
+        
         # Check applicability
         if check_applicability:
             is_applicable, reason = self.check_esi_applicability(
@@ -168,6 +173,7 @@ class ESIService:
                 company_id=company_id,
                 employee=employee,
                 was_covered_in_period=was_covered_in_period,
+                settings=settings,
             )
             
             if not is_applicable:
@@ -184,13 +190,11 @@ class ESIService:
         employee_rate = self.EMPLOYEE_ESI_RATE
         employer_rate = self.EMPLOYER_ESI_RATE
         
-        if company_id:
-            settings = self.get_esi_settings(company_id)
-            if settings:
-                if settings.esi_employee_rate:
-                    employee_rate = settings.esi_employee_rate / Decimal("100")
-                if settings.esi_employer_rate:
-                    employer_rate = settings.esi_employer_rate / Decimal("100")
+        if settings:
+            if settings.esi_employee_rate:
+                employee_rate = settings.esi_employee_rate / Decimal("100")
+            if settings.esi_employer_rate:
+                employer_rate = settings.esi_employer_rate / Decimal("100")
         
         # Calculate contributions
         employee_esi = self._round_amount(gross_salary * employee_rate)
@@ -0,0 +1,115 @@
+"""Geo Index Service - nearby / nearest customer lookups.
+
+Customers carry a geohash of their location (``Customer.geohash``, kept in
+sync on insert and update) indexed together with ``company_id``. A radius
+query is answered with a few geohash range scans on that index (the cells
+covering the circle) followed by an exact haversine check on the small
+candidate set. "Nearest N" widens the radius until N customers are found.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.database.geohash import bounding_box, covering_cells, geohash_for, haversine_m, prefix_upper_bound
+from app.database.models import Customer
+
+
+class GeoIndexService:
+    """Service for spatial customer queries."""
+
+    INITIAL_SEARCH_RADIUS_M = 1000.0
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def customers_within(
+        self,
+        company_id: str,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[Customer, float]]:
+        """Active customers within ``radius_km``, nearest first, with distances in metres."""
+        radius_m = radius_km * 1000
+        results = [
+            (customer, distance_m)
+            for customer, distance_m in self._candidates(company_id, latitude, longitude, radius_m)
+            if distance_m <= radius_m
+        ]
+        results.sort(key=lambda item: item[1])
+        return results[:limit] if limit else results
+
+    def nearest_customers(
+        self,
+        company_id: str,
+        latitude: float,
+        longitude: float,
+        count: int,
+        max_radius_km: float = 500,
+    ) -> List[Tuple[Customer, float]]:
+        """The ``count`` active customers nearest to a point (within ``max_radius_km``)."""
+        radius_m = min(self.INITIAL_SEARCH_RADIUS_M, max_radius_km * 1000)
+        while True:
+            results = self.customers_within(company_id, latitude, longitude, radius_m / 1000)
+            # Everything within the radius is known, so once it holds `count`
+            # customers they are the nearest ones
+            if len(results) >= count or radius_m >= max_radius_km * 1000:
+                return results[:count]
+            radius_m = min(radius_m * 4, max_radius_km * 1000)
+
+    def _candidates(
+        self,
+        company_id: str,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+    ) -> List[Tuple[Customer, float]]:
+        cells = covering_cells(latitude, longitude, radius_m)
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_m)
+
+        # One (company_id, geohash) index range scan per cell: every geohash
+        # with that prefix. company_id is repeated in each branch so the
+        # planner can use the index for every range, not just the first.
+        query = self.db.query(Customer).filter(
+            or_(*[self._cell_range(company_id, cell) for cell in cells]),
+            Customer.is_active == True,
+            Customer.location_lat.between(min_lat, max_lat),
+            Customer.location_lng.between(min_lng, max_lng),
+        )
+
+        return [
+            (customer, haversine_m(latitude, longitude, customer.location_lat, customer.location_lng))
+            for customer in query.all()
+        ]
+
+    @staticmethod
+    def _cell_range(company_id: str, cell: str):
+        upper = prefix_upper_bound(cell)
+        conditions = [Customer.company_id == company_id, Customer.geohash >= cell]
+        if upper is not None:
+            conditions.append(Customer.geohash < upper)
+        return and_(*conditions)
+
+    def backfill_geohashes(self, company_id: Optional[str] = None, batch_size: int = 1000) -> int:
+        """Fill ``geohash`` for located customers that predate the column."""
+        query = self.db.query(Customer.id, Customer.location_lat, Customer.location_lng).filter(
+            Customer.location_lat.isnot(None),
+            Customer.location_lng.isnot(None),
+            Customer.geohash.is_(None),
+        )
+        if company_id:
+            query = query.filter(Customer.company_id == company_id)
+
+        updated = 0
+        while True:
+            rows = query.limit(batch_size).all()
+            if not rows:
+                return updated
+            self.db.bulk_update_mappings(Customer, [
+                {"id": row.id, "geohash": geohash_for(row.location_lat, row.location_lng)}
+                for row in rows
+            ])
+            self.db.commit()
+            updated += len(rows)
@@ -7,15 +7,19 @@ Features:
 - Identify discrepancies
 - Generate reconciliation reports
 """
+import re
+from bisect import bisect_left
+from collections import defaultdict
 from decimal import Decimal, ROUND_HALF_UP
 from dataclasses import dataclass
+from time import perf_counter
 from typing import Optional, List, Dict, Tuple
-from datetime import datetime, date
+from datetime import datetime, date, time
 from enum import Enum
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, and_, or_
 
-from app.database.models import Purchase
+from app.database.models import Purchase, Vendor
 
 
 class GSTR2MatchStatus(str, Enum):
@@ -57,6 +61,106 @@ class ReconciliationResult:
     notes: str
 
 
+def normalize_gstin(gstin: Optional[str]) -> str:
+    """Upper-case GSTIN without spaces or separators."""
+    return re.sub(r"[^0-9A-Z]", "", (gstin or "").upper())
+
+
+def normalize_invoice_number(number: Optional[str]) -> str:
+    """
+    Invoice number reduced to its significant part, so that e.g.
+    "INV/0042", "inv-42" and "42" compare equal: separators, a leading
+    alphabetic prefix and leading zeros are dropped.
+    """
+    normalized = re.sub(r"[^0-9A-Z]", "", (number or "").upper())
+    normalized = normalized.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ") or normalized
+    return normalized.lstrip("0") or normalized
+
+
+@dataclass
+class BookInvoice:
+    """A purchase invoice as seen by reconciliation."""
+    purchase: Purchase
+    gstin: str
+    invoice_number: str
+    invoice_date: Optional[date]
+    total_amount: Decimal
+    normalized_gstin: str
+    normalized_number: str
+    
+    @classmethod
+    def from_purchase(cls, purchase: Purchase, gstin: Optional[str]) -> "BookInvoice":
+        invoice_datetime = purchase.vendor_invoice_date or purchase.invoice_date
+        return cls(
+            purchase=purchase,
+            gstin=gstin or "",
+            invoice_number=purchase.vendor_invoice_number or "",
+            invoice_date=invoice_datetime.date() if invoice_datetime else None,
+            total_amount=purchase.total_amount or Decimal("0"),
+            normalized_gstin=normalize_gstin(gstin),
+            normalized_number=normalize_invoice_number(purchase.vendor_invoice_number),
+        )
+
+
+class PurchaseIndex:
+    """
+    In-memory indexes over book invoices, tried in order:
+    
+    1. exact supplier GSTIN + invoice number
+    2. normalized GSTIN + normalized invoice number
+    3. exact invoice number alone (GSTIN recorded differently)
+    4. same invoice value, dated between the 1st and 28th of the record's month
+    
+    Where several invoices share a key the earliest one wins.
+    """
+    
+    def __init__(self, books: List[BookInvoice]):
+        self.exact: Dict[Tuple[str, str], BookInvoice] = {}
+        self.normalized: Dict[Tuple[str, str], BookInvoice] = {}
+        self.by_number: Dict[str, BookInvoice] = {}
+        self.by_amount: Dict[Decimal, List[BookInvoice]] = defaultdict(list)
+        
+        for book in books:
+            if book.invoice_number:
+                self.exact.setdefault((book.gstin, book.invoice_number), book)
+                self.by_number.setdefault(book.invoice_number, book)
+            if book.normalized_number:
+                self.normalized.setdefault((book.normalized_gstin, book.normalized_number), book)
+            if book.invoice_date:
+                self.by_amount[book.total_amount].append(book)
+        
+        self._amount_dates: Dict[Decimal, List[date]] = {}
+        for amount, candidates in self.by_amount.items():
+            candidates.sort(key=lambda b: b.invoice_date)
+            self._amount_dates[amount] = [b.invoice_date for b in candidates]
+    
+    def match(self, record: GSTR2Record) -> Optional[BookInvoice]:
+        book = self.exact.get((record.supplier_gstin, record.invoice_number))
+        if book:
+            return book
+        
+        book = self.normalized.get((
+            normalize_gstin(record.supplier_gstin),
+            normalize_invoice_number(record.invoice_number),
+        ))
+        if book:
+            return book
+        
+        book = self.by_number.get(record.invoice_number)
+        if book:
+            return book
+        
+        if record.invoice_date:
+            from_date = record.invoice_date.replace(day=1)
+            to_date = record.invoice_date.replace(day=28)  # Safe for all months
+            dates = self._amount_dates.get(record.invoice_value)
+            if dates:
+                position = bisect_left(dates, from_date)
+                if position < len(dates) and dates[position] <= to_date:
+                    return self.by_amount[record.invoice_value][position]
+        return None
+
+
 class GSTReconciliationService:
     """Service for GSTR-2A/2B reconciliation."""
     
@@ -181,19 +285,17 @@ class GSTReconciliationService:
         """
         Reconcile a single GSTR-2B record with purchase invoices.
         """
-        # Search for matching purchase invoice
-        # First try exact match on GSTIN + Invoice Number
-        purchase_invoice = self.db.query(Purchase).filter(
-            Purchase.company_id == company_id,
-            Purchase.vendor_gstin == gstr_record.supplier_gstin,
-            Purchase.invoice_number == gstr_record.invoice_number,
-        ).first()
-        
-        if not purchase_invoice:
-            # Try fuzzy match (same invoice number, close date)
-            purchase_invoice = self._fuzzy_match(company_id, gstr_record)
-        
-        if not purchase_invoice:
+        index = PurchaseIndex(self._load_book_invoices(company_id, [gstr_record]))
+        return self._compare(gstr_record, index.match(gstr_record), tolerance)
+    
+    def _compare(
+        self,
+        gstr_record: GSTR2Record,
+        book: Optional["BookInvoice"],
+        tolerance: Decimal,
+    ) -> ReconciliationResult:
+        """Match status of a GSTR-2B record against the purchase found for it."""
+        if not book:
             return ReconciliationResult(
                 gstr_record=gstr_record,
                 purchase_invoice=None,
@@ -203,6 +305,8 @@ class GSTReconciliationService:
                 notes="Invoice not found in books. Verify vendor name and invoice number.",
             )
         
+        purchase_invoice = book.purchase
+        
         # Compare amounts
         gstr_total_tax = gstr_record.cgst + gstr_record.sgst + gstr_record.igst
         books_total_tax = (
@@ -216,9 +320,9 @@ class GSTReconciliationService:
         
         # Check for date mismatch
         date_match = True
-        if gstr_record.invoice_date and purchase_invoice.invoice_date:
+        if gstr_record.invoice_date and book.invoice_date:
             # Allow 1-day difference for timing issues
-            date_diff = abs((gstr_record.invoice_date - purchase_invoice.invoice_date).days)
+            date_diff = abs((gstr_record.invoice_date - book.invoice_date).days)
             date_match = date_diff <= 1
         
         # Determine match status
@@ -239,7 +343,7 @@ class GSTReconciliationService:
                 match_status=GSTR2MatchStatus.DATE_MISMATCH,
                 amount_difference=amount_diff,
                 tax_difference=tax_diff,
-                notes=f"Date mismatch: GSTR={gstr_record.invoice_date}, Books={purchase_invoice.invoice_date}",
+                notes=f"Date mismatch: GSTR={gstr_record.invoice_date}, Books={book.invoice_date}",
             )
         
         return ReconciliationResult(
@@ -251,44 +355,87 @@ class GSTReconciliationService:
             notes=f"Amount difference: Rs. {amount_diff}, Tax difference: Rs. {tax_diff}",
         )
     
-    def _fuzzy_match(
+    def _load_book_invoices(
         self,
         company_id: str,
-        gstr_record: GSTR2Record,
-    ) -> Optional[Purchase]:
-        """Attempt fuzzy matching for purchase invoice."""
-        # Try matching by invoice number alone (different GSTIN format)
-        invoice = self.db.query(Purchase).filter(
-            Purchase.company_id == company_id,
-            Purchase.invoice_number == gstr_record.invoice_number,
-        ).first()
+        gstr_records: List[GSTR2Record],
+    ) -> List["BookInvoice"]:
+        """
+        Load, in one query, every purchase any of the records could match:
+        purchases from the records' suppliers, purchases with one of their
+        invoice numbers, and purchases with one of their values dated in
+        their months.
+        """
+        gstins = {normalize_gstin(r.supplier_gstin) for r in gstr_records if r.supplier_gstin}
+        numbers = {r.invoice_number for r in gstr_records if r.invoice_number}
+        values = {r.invoice_value for r in gstr_records}
+        dated = [r.invoice_date for r in gstr_records if r.invoice_date]
         
-        if invoice:
-            return invoice
+        conditions = [
+            func.upper(Vendor.tax_number).in_(gstins),
+            Purchase.vendor_invoice_number.in_(numbers),
+        ]
+        if dated:
+            window_start = datetime.combine(min(dated).replace(day=1), time.min)
+            window_end = datetime.combine(max(dated).replace(day=28), time.max)
+            conditions.append(and_(
+                Purchase.total_amount.in_(values),
+                or_(
+                    Purchase.vendor_invoice_date.between(window_start, window_end),
+                    Purchase.invoice_date.between(window_start, window_end),
+                ),
+            ))
         
-        # Try matching by amount and approximate date
-        if gstr_record.invoice_date:
-            from_date = gstr_record.invoice_date.replace(day=1)
-            to_date = gstr_record.invoice_date.replace(day=28)  # Safe for all months
-            
-            invoice = self.db.query(Purchase).filter(
-                Purchase.company_id == company_id,
-                Purchase.total_amount == gstr_record.invoice_value,
-                Purchase.invoice_date >= from_date,
-                Purchase.invoice_date <= to_date,
-            ).first()
-        
-        return invoice
+        rows = self.db.query(Purchase, Vendor.tax_number).outerjoin(
+            Vendor, Purchase.vendor_id == Vendor.id
+        ).options(
+            load_only(
+                Purchase.id,
+                Purchase.vendor_invoice_number,
+                Purchase.invoice_date,
+                Purchase.vendor_invoice_date,
+                Purchase.total_amount,
+                Purchase.cgst_amount,
+                Purchase.sgst_amount,
+                Purchase.igst_amount,
+            )
+        ).filter(
+            Purchase.company_id == company_id,
+            or_(*conditions),
+        ).order_by(Purchase.invoice_date, Purchase.id).all()
+        
+        return [BookInvoice.from_purchase(purchase, gstin) for purchase, gstin in rows]
     
     def reconcile_period(
         self,
         company_id: str,
         gstr_records: List[GSTR2Record],
+        tolerance: Decimal = Decimal("1"),  # Allow Rs. 1 difference
     ) -> Dict:
         """
         Reconcile all GSTR-2B records for a period.
+        
+        Candidate purchases are loaded once and indexed in memory, then every
+        record is matched in a single pass. ``timings`` reports milliseconds
+        spent per phase.
         """
+        timings = {}
+        started = phase_started = perf_counter()
+        
+        def end_phase(name: str) -> None:
+            nonlocal phase_started
+            now = perf_counter()
+            timings[name] = round((now - phase_started) * 1000, 2)
+            phase_started = now
+        
+        books = self._load_book_invoices(company_id, gstr_records)
+        end_phase("load_purchases_ms")
+        
+        index = PurchaseIndex(books)
+        end_phase("build_index_ms")
+        
         results = []
+        matched_ids = set()
         summary = {
             "total_records": len(gstr_records),
             "matched": 0,
@@ -299,25 +446,23 @@ class GSTReconciliationService:
         }
         
         for record in gstr_records:
-            result = self.reconcile_record(company_id, record)
+            book = index.match(record)
+            result = self._compare(record, book, tolerance)
             results.append(result)
-            
-            summary[result.match_status.value.lower().replace(" ", "_")] = \
-                summary.get(result.match_status.value.lower().replace(" ", "_"), 0) + 1
+            if book:
+                matched_ids.add(book.purchase.id)
+            summary[result.match_status.value] = summary.get(result.match_status.value, 0) + 1
+        end_phase("match_ms")
         
-        # Find invoices in books but not in GSTR
-        gstr_invoice_numbers = {r.invoice_number for r in gstr_records}
-        gstr_gstins = {r.supplier_gstin for r in gstr_records}
-        
-        unmatched_in_books = self.db.query(Purchase).filter(
-            Purchase.company_id == company_id,
-            Purchase.vendor_gstin.in_(gstr_gstins),
-            ~Purchase.invoice_number.in_(gstr_invoice_numbers),
-        ).count()
-        
-        summary["not_in_gstr"] = unmatched_in_books
+        # Invoices of the same suppliers in books but not in GSTR
+        gstr_gstins = {normalize_gstin(r.supplier_gstin) for r in gstr_records}
+        summary["not_in_gstr"] = sum(
+            1 for book in books
+            if book.normalized_gstin in gstr_gstins and book.purchase.id not in matched_ids
+        )
+        end_phase("not_in_gstr_ms")
         
-        return {
+        response = {
             "summary": summary,
             "results": [
                 {
@@ -327,7 +472,7 @@ class GSTReconciliationService:
                     "invoice_date": r.gstr_record.invoice_date.isoformat() if r.gstr_record.invoice_date else None,
                     "gstr_value": float(r.gstr_record.invoice_value),
                     "gstr_tax": float(r.gstr_record.cgst + r.gstr_record.sgst + r.gstr_record.igst),
-                    "books_value": float(r.purchase_invoice.total_amount) if r.purchase_invoice else None,
+                    "books_value": float(r.purchase_invoice.total_amount or 0) if r.purchase_invoice else None,
                     "books_tax": float(
                         (r.purchase_invoice.cgst_amount or 0) +
                         (r.purchase_invoice.sgst_amount or 0) +
@@ -341,6 +486,11 @@ class GSTReconciliationService:
                 for r in results
             ],
         }
+        end_phase("serialize_ms")
+        
+        timings["total_ms"] = round((perf_counter() - started) * 1000, 2)
+        response["timings"] = timings
+        return response
     
     # ==================== ITC SUMMARY ====================
     
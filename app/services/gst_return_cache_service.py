@@ -0,0 +1,410 @@
+"""
+GST Return Cache - stored GSTR-1 / GSTR-3B / GST summary results.
+
+A return for a month is recomputed from every invoice of the month, yet the
+figures only change when a document dated inside the month is written. Results
+are therefore stored per company, return type and period in
+``gst_return_cache``:
+
+- periods locked with ``PeriodLockService.lock_gst_period`` (sales and
+  purchase vouchers locked for the whole period) are kept until invalidated;
+- open periods expire after ``GST_RETURN_CACHE_TTL`` seconds.
+
+Invalidation is automatic: a session ``after_flush`` hook (see
+``GSTReturnCache`` in models) deletes the entries whose period contains the
+date of any flushed invoice, purchase, sales return (credit note) or purchase
+return (debit note), or of their items, old and new date of an edited document
+alike, and again after commit so a reader that cached the old figures in
+between does not keep them. Locking or unlocking a period drops the entries it
+overlaps, so they are stored again as durable or expiring.
+
+Hit/miss/store/invalidation counters are process-wide, see ``cache_metrics``.
+"""
+import json
+import threading
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import PASSIVE_NO_INITIALIZE, get_history
+
+from app.config import settings
+from app.database.models import (
+    GSTReturnCache, PeriodLock, Invoice, InvoiceItem, Purchase, PurchaseItem,
+    SalesReturn, SalesReturnItem, PurchaseReturn, PurchaseReturnItem, generate_uuid,
+)
+
+
+RETURN_GSTR1 = "gstr1"
+RETURN_GSTR3B = "gstr3b"
+RETURN_GST_SUMMARY = "gst_summary"
+RETURN_DASHBOARD_GST_SUMMARY = "dashboard_gst_summary"
+RETURN_DASHBOARD_ITC_SUMMARY = "dashboard_itc_summary"
+
+# For results that depend on every earlier document (e.g. expiring ITC)
+EARLIEST = datetime(1900, 1, 1)
+
+# Voucher types a PeriodLock must cover for a period to count as locked
+GST_VOUCHER_TYPES = {"sales", "purchase"}
+
+# Documents whose date puts them in a return period
+DOCUMENT_DATES = {
+    Invoice: "invoice_date",
+    Purchase: "invoice_date",
+    SalesReturn: "return_date",
+    PurchaseReturn: "return_date",
+}
+# Item -> (document, foreign key to it)
+DOCUMENT_ITEMS = {
+    InvoiceItem: (Invoice, "invoice_id"),
+    PurchaseItem: (Purchase, "purchase_id"),
+    SalesReturnItem: (SalesReturn, "sales_return_id"),
+    PurchaseReturnItem: (PurchaseReturn, "purchase_return_id"),
+}
+
+# More distinct days than this in one flush invalidate the whole span instead
+MAX_INVALIDATION_DAYS = 31
+
+PENDING_KEY = "gst_return_cache_pending"
+
+ResponseModel = TypeVar("ResponseModel", bound=BaseModel)
+
+
+# ==================== METRICS ====================
+
+_metrics_lock = threading.Lock()
+_metrics = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _metrics_lock:
+        _metrics[name] += amount
+
+
+def cache_metrics() -> Dict[str, Any]:
+    """Process-wide counters since start (or ``reset_metrics``)."""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    lookups = metrics["hits"] + metrics["misses"]
+    metrics["hit_ratio"] = round(metrics["hits"] / lookups, 4) if lookups else 0.0
+    return metrics
+
+
+def reset_metrics() -> None:
+    with _metrics_lock:
+        for name in _metrics:
+            _metrics[name] = 0
+
+
+# ==================== PAYLOAD ====================
+
+def _encode(value: Any) -> Any:
+    # Tag Decimals so values inside plain dicts come back as Decimal, not str
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def dump_payload(result: BaseModel) -> str:
+    return json.dumps(result.model_dump(), default=_encode, separators=(",", ":"))
+
+
+def load_payload(model: Type[ResponseModel], payload: str) -> ResponseModel:
+    return model.model_validate(json.loads(payload, object_hook=_decode))
+
+
+# ==================== INVALIDATION (session events) ====================
+
+def _day(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return None
+
+
+def _value(obj: Any, attribute: str, deleted: bool) -> Any:
+    """Attribute value without loading a deleted row (it is gone by now)."""
+    if deleted:
+        return obj.__dict__.get(attribute)
+    return getattr(obj, attribute, None)
+
+
+def _document_days(obj: Any, attribute: str, deleted: bool) -> List[datetime]:
+    """Current and (for edits) previous day of a document's date."""
+    history = get_history(obj, attribute, passive=PASSIVE_NO_INITIALIZE)
+    values = list(history.added or ()) + list(history.deleted or ()) + list(history.unchanged or ())
+    if not values:
+        values = [_value(obj, attribute, deleted)]
+    return [day for day in (_day(value) for value in values) if day is not None]
+
+
+def _ranges_for(session: Session) -> List[Tuple[str, datetime, datetime]]:
+    """(company_id, from, to) ranges of the GST documents in the current flush."""
+    ranges: List[Tuple[str, datetime, datetime]] = []
+    parents: Dict[Any, Set[str]] = {}
+    seen: Set[Tuple[Any, str]] = set()
+    deleted_objects = set(map(id, session.deleted))
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        model = type(obj)
+        deleted = id(obj) in deleted_objects
+        if model in DOCUMENT_DATES:
+            company_id = _value(obj, "company_id", deleted)
+            if obj.id:
+                seen.add((model, obj.id))
+            days = _document_days(obj, DOCUMENT_DATES[model], deleted)
+            if not days:
+                # Date not loaded: drop everything of the company
+                ranges.append((company_id, EARLIEST, datetime.max))
+            for day in days:
+                ranges.append((company_id, day, day + timedelta(days=1)))
+        elif model in DOCUMENT_ITEMS:
+            parent, key = DOCUMENT_ITEMS[model]
+            parent_id = _value(obj, key, deleted)
+            if parent_id is None:
+                history = get_history(obj, key, passive=PASSIVE_NO_INITIALIZE)
+                parent_id = next(iter(history.deleted or ()), None)
+            if parent_id:
+                parents.setdefault(parent, set()).add(parent_id)
+        elif model is PeriodLock:
+            company_id = _value(obj, "company_id", deleted)
+            locked_from = _value(obj, "locked_from", deleted)
+            locked_to = _value(obj, "locked_to", deleted)
+            if locked_from and locked_to:
+                ranges.append((company_id, locked_from, locked_to + timedelta(microseconds=1)))
+            else:
+                ranges.append((company_id, EARLIEST, datetime.max))
+
+    # Items written without their document: look the documents' dates up
+    connection = session.connection()
+    for parent, ids in parents.items():
+        ids = [parent_id for parent_id in ids if (parent, parent_id) not in seen]
+        if not ids:
+            continue
+        table = parent.__table__
+        date_column = table.c[DOCUMENT_DATES[parent]]
+        for offset in range(0, len(ids), 500):
+            rows = connection.execute(
+                select(table.c.company_id, date_column).where(table.c.id.in_(ids[offset:offset + 500]))
+            )
+            for company_id, value in rows:
+                day = _day(value)
+                if day is not None:
+                    ranges.append((company_id, day, day + timedelta(days=1)))
+    return ranges
+
+
+def _merge(ranges: Iterable[Tuple[str, datetime, datetime]]) -> Dict[str, List[Tuple[datetime, datetime]]]:
+    """Distinct ranges per company; too many collapse to one covering span."""
+    by_company: Dict[str, Set[Tuple[datetime, datetime]]] = {}
+    for company_id, start, end in ranges:
+        if company_id:
+            by_company.setdefault(company_id, set()).add((start, end))
+    merged = {}
+    for company_id, spans in by_company.items():
+        if len(spans) > MAX_INVALIDATION_DAYS:
+            spans = {(min(s for s, _ in spans), max(e for _, e in spans))}
+        merged[company_id] = sorted(spans)
+    return merged
+
+
+def _delete_entries(connection, ranges: Dict[str, List[Tuple[datetime, datetime]]]) -> int:
+    table = GSTReturnCache.__table__
+    deleted = 0
+    for company_id, spans in ranges.items():
+        result = connection.execute(delete(table).where(
+            table.c.company_id == company_id,
+            or_(*[and_(table.c.covers_from < end, table.c.period_end > start) for start, end in spans]),
+        ))
+        deleted += max(result.rowcount or 0, 0)
+    if deleted:
+        _count("invalidations", deleted)
+    return deleted
+
+
+def invalidate_flushed(session: Session) -> None:
+    """``after_flush`` hook: delete cached results the flushed documents change."""
+    if not (session.new or session.dirty or session.deleted):
+        return
+    ranges = _ranges_for(session)
+    if not ranges:
+        return
+    merged = _merge(ranges)
+    _delete_entries(session.connection(), merged)
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for company_id, spans in merged.items():
+        pending.setdefault(company_id, set()).update(spans)
+
+
+def invalidate_committed(session: Session) -> None:
+    """``after_commit`` hook: repeat the deletes outside the writer's transaction."""
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    bind = session.get_bind()
+    if not isinstance(bind, Engine):
+        return  # bound to an outer connection/transaction; the flush-time delete stands
+    with bind.begin() as connection:
+        _delete_entries(connection, {company_id: sorted(spans) for company_id, spans in pending.items()})
+
+
+def discard_pending(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+# ==================== CACHE ====================
+
+class GSTReturnCacheService:
+    """Read-through cache of GST return results."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def is_period_locked(self, company_id: str, period_start: datetime, period_end: datetime) -> bool:
+        """True if active GST period locks cover [period_start, period_end) for sales and purchases."""
+        locks = self.db.query(PeriodLock.locked_from, PeriodLock.locked_to, PeriodLock.voucher_types).filter(
+            PeriodLock.company_id == company_id,
+            PeriodLock.is_active == True,
+            PeriodLock.locked_from < period_end,
+            PeriodLock.locked_to >= period_start,
+        ).order_by(PeriodLock.locked_from).all()
+
+        covered_until = period_start
+        for lock in locks:
+            if lock.voucher_types is not None and not GST_VOUCHER_TYPES <= set(lock.voucher_types):
+                continue
+            if lock.locked_from > covered_until:
+                break
+            covered_until = max(covered_until, lock.locked_to + timedelta(microseconds=1))
+            if covered_until >= period_end:
+                return True
+        return covered_until >= period_end
+
+    def get(
+        self,
+        company_id: str,
+        return_type: str,
+        period_start: datetime,
+        period_end: datetime,
+        model: Type[ResponseModel],
+    ) -> Optional[ResponseModel]:
+        """The cached result, or None (a miss) if absent or expired."""
+        entry = self.db.query(GSTReturnCache.id, GSTReturnCache.payload, GSTReturnCache.expires_at).filter(
+            GSTReturnCache.company_id == company_id,
+            GSTReturnCache.return_type == return_type,
+            GSTReturnCache.period_start == period_start,
+            GSTReturnCache.period_end == period_end,
+        ).first()
+        if entry is None or (entry.expires_at is not None and entry.expires_at <= datetime.utcnow()):
+            _count("misses")
+            return None
+        _count("hits")
+        return load_payload(model, entry.payload)
+
+    def store(
+        self,
+        company_id: str,
+        return_type: str,
+        period_start: datetime,
+        period_end: datetime,
+        result: BaseModel,
+        covers_from: Optional[datetime] = None,
+    ) -> None:
+        """Store (or replace) a result and commit. Locked periods do not expire."""
+        covers_from = covers_from or period_start
+        locked = self.is_period_locked(company_id, covers_from, period_end)
+        ttl = settings.GST_RETURN_CACHE_TTL
+        if not locked and ttl <= 0:
+            return
+
+        now = datetime.utcnow()
+        values = {
+            "covers_from": covers_from,
+            "payload": dump_payload(result),
+            "is_locked": locked,
+            "expires_at": None if locked else now + timedelta(seconds=ttl),
+            "created_at": now,
+        }
+        key = {
+            "company_id": company_id,
+            "return_type": return_type,
+            "period_start": period_start,
+            "period_end": period_end,
+        }
+        table = GSTReturnCache.__table__
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            statement = upsert(table).values(id=generate_uuid(), **key, **values)
+            self.db.execute(statement.on_conflict_do_update(index_elements=list(key), set_=values))
+        else:
+            # No ON CONFLICT - update, then insert if there was nothing to update
+            result_proxy = self.db.execute(
+                update(table).where(*[table.c[column] == value for column, value in key.items()]).values(**values)
+            )
+            if not result_proxy.rowcount:
+                self.db.execute(table.insert().values(id=generate_uuid(), **key, **values))
+        self.db.commit()
+        _count("stores")
+
+    def get_or_build(
+        self,
+        company_id: str,
+        return_type: str,
+        period_start: datetime,
+        period_end: datetime,
+        model: Type[ResponseModel],
+        build: Callable[[], ResponseModel],
+        covers_from: Optional[datetime] = None,
+    ) -> ResponseModel:
+        """Cached result, or ``build()`` it and store it."""
+        cached = self.get(company_id, return_type, period_start, period_end, model)
+        if cached is not None:
+            return cached
+        result = build()
+        self.store(company_id, return_type, period_start, period_end, result, covers_from)
+        return result
+
+    def invalidate(self, company_id: str, return_type: Optional[str] = None) -> int:
+        """Drop a company's cached results (of one return type); returns rows deleted."""
+        query = self.db.query(GSTReturnCache).filter(GSTReturnCache.company_id == company_id)
+        if return_type:
+            query = query.filter(GSTReturnCache.return_type == return_type)
+        deleted = query.delete(synchronize_session=False)
+        self.db.commit()
+        if deleted:
+            _count("invalidations", deleted)
+        return deleted
+
+    def get_stats(self, company_id: str) -> Dict[str, Any]:
+        """Process-wide metrics plus the company's stored entries."""
+        now = datetime.utcnow()
+        rows = self.db.query(
+            GSTReturnCache.is_locked,
+            func.count(GSTReturnCache.id),
+        ).filter(
+            GSTReturnCache.company_id == company_id,
+            or_(GSTReturnCache.expires_at.is_(None), GSTReturnCache.expires_at > now),
+        ).group_by(GSTReturnCache.is_locked).all()
+        counts = {bool(locked): count for locked, count in rows}
+        return {
+            **cache_metrics(),
+            "entries_locked": counts.get(True, 0),
+            "entries_open": counts.get(False, 0),
+        }
@@ -1,7 +1,15 @@
-"""GST Report service for GSTR-1 and GSTR-3B generation."""
+"""
+GST Report service for GSTR-1 and GSTR-3B generation.
+
+Returns are built from column projections, not ORM graphs: one query for
+the period's invoice headers (with the customer's GSTIN and name joined in)
+and one for their item lines, grouped by invoice. Every section - B2B,
+B2CL, B2CS, HSN, document summary and totals - is then filled in a single
+pass over the invoice rows, in the order the headers are read.
+"""
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
 from collections import defaultdict
@@ -17,33 +25,75 @@ from app.schemas.gst import (
 )
 
 
+# Invoice header columns a return needs; customer GSTIN/name come from the join
+INVOICE_COLUMNS = (
+    Invoice.id, Invoice.invoice_number, Invoice.invoice_date, Invoice.invoice_type,
+    Invoice.place_of_supply, Invoice.is_reverse_charge, Invoice.subtotal,
+    Invoice.cgst_amount, Invoice.sgst_amount, Invoice.igst_amount, Invoice.cess_amount,
+    Invoice.total_tax, Invoice.total_amount,
+    Customer.tax_number.label("customer_gstin"), Customer.name.label("customer_name"),
+)
+
+ITEM_COLUMNS = (
+    InvoiceItem.invoice_id, InvoiceItem.description, InvoiceItem.hsn_code, InvoiceItem.unit,
+    InvoiceItem.quantity, InvoiceItem.gst_rate, InvoiceItem.taxable_amount,
+    InvoiceItem.cgst_amount, InvoiceItem.sgst_amount, InvoiceItem.igst_amount,
+    InvoiceItem.cess_amount, InvoiceItem.total_amount,
+)
+
+INVOICE_BATCH_SIZE = 2000
+
+
+def period_bounds(month: int, year: int) -> Tuple[datetime, datetime]:
+    """[start, end) of a return period."""
+    start_date = datetime(year, month, 1)
+    if month == 12:
+        end_date = datetime(year + 1, 1, 1)
+    else:
+        end_date = datetime(year, month + 1, 1)
+    return start_date, end_date
+
+
+def _period_filters(company_id: str, month: int, year: int, posted_only: bool) -> list:
+    start_date, end_date = period_bounds(month, year)
+    filters = [
+        Invoice.company_id == company_id,
+        Invoice.invoice_date >= start_date,
+        Invoice.invoice_date < end_date,
+    ]
+    if posted_only:
+        filters += [Invoice.status != InvoiceStatus.CANCELLED, Invoice.status != InvoiceStatus.DRAFT]
+    return filters
+
+
+def period_invoice_rows(db: Session, company_id: str, month: int, year: int, posted_only: bool = True) -> Iterator[Any]:
+    """Stream the period's invoice header rows (``INVOICE_COLUMNS``)."""
+    return db.query(*INVOICE_COLUMNS).outerjoin(
+        Customer, Customer.id == Invoice.customer_id
+    ).filter(
+        *_period_filters(company_id, month, year, posted_only)
+    ).yield_per(INVOICE_BATCH_SIZE)
+
+
+def period_item_rows(db: Session, company_id: str, month: int, year: int, posted_only: bool = True) -> Dict[str, List[Any]]:
+    """Item rows (``ITEM_COLUMNS``) of the period's invoices, by invoice id."""
+    items: Dict[str, List[Any]] = defaultdict(list)
+    query = db.query(*ITEM_COLUMNS).join(
+        Invoice, Invoice.id == InvoiceItem.invoice_id
+    ).filter(
+        *_period_filters(company_id, month, year, posted_only)
+    )
+    for row in query.yield_per(INVOICE_BATCH_SIZE):
+        items[row.invoice_id].append(row)
+    return items
+
+
 class GSTService:
     """Service for GST report generation."""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def _get_period_invoices(
-        self,
-        company: Company,
-        month: int,
-        year: int
-    ) -> List[Invoice]:
-        """Get all invoices for a given period."""
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        
-        return self.db.query(Invoice).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= start_date,
-            Invoice.invoice_date < end_date,
-            Invoice.status != InvoiceStatus.CANCELLED,
-            Invoice.status != InvoiceStatus.DRAFT
-        ).all()
-    
     def generate_gstr1(
         self,
         company: Company,
@@ -51,7 +101,7 @@ class GSTService:
         year: int
     ) -> GSTR1Response:
         """Generate GSTR-1 report for a month."""
-        invoices = self._get_period_invoices(company, month, year)
+        items_by_invoice = period_item_rows(self.db, company.id, month, year)
         
         b2b_invoices = []
         b2cl_invoices = []
@@ -78,14 +128,18 @@ class GSTService:
         b2cl_total = Decimal("0")
         b2cs_total = Decimal("0")
         
-        for invoice in invoices:
-            customer = invoice.customer
+        invoice_count = 0
+        first_number = last_number = None
+        total_taxable = total_igst = total_cgst = total_sgst = total_cess = 0
+        
+        for invoice in period_invoice_rows(self.db, company.id, month, year):
+            items = items_by_invoice.get(invoice.id, ())
             
             # B2B Invoices (with GSTIN)
-            if invoice.invoice_type == InvoiceType.B2B or (customer and customer.gstin):
+            if invoice.invoice_type == InvoiceType.B2B or invoice.customer_gstin:
                 b2b_inv = B2BInvoice(
-                    customer_gstin=customer.gstin if customer else "",
-                    customer_name=customer.name if customer else "",
+                    customer_gstin=invoice.customer_gstin or "",
+                    customer_name=invoice.customer_name or "",
                     invoice_number=invoice.invoice_number,
                     invoice_date=invoice.invoice_date.date(),
                     invoice_value=invoice.total_amount,
@@ -117,7 +171,7 @@ class GSTService:
             # B2C Small (aggregate by state and rate)
             else:
                 pos = invoice.place_of_supply or company.state_code or ""
-                for item in invoice.items:
+                for item in items:
                     rate = item.gst_rate
                     key = f"{pos}_{rate}"
                     b2cs_summary[key]["taxable_value"] += item.taxable_amount
@@ -128,7 +182,7 @@ class GSTService:
                 b2cs_total += invoice.total_amount
             
             # HSN Summary
-            for item in invoice.items:
+            for item in items:
                 hsn = item.hsn_code or "00000000"
                 hsn_summary[hsn]["description"] = item.description[:50]
                 hsn_summary[hsn]["total_quantity"] += item.quantity
@@ -138,6 +192,18 @@ class GSTService:
                 hsn_summary[hsn]["cgst_amount"] += item.cgst_amount
                 hsn_summary[hsn]["sgst_amount"] += item.sgst_amount
                 hsn_summary[hsn]["cess_amount"] += item.cess_amount
+            
+            # Document summary and totals
+            invoice_count += 1
+            if first_number is None or invoice.invoice_number < first_number:
+                first_number = invoice.invoice_number
+            if last_number is None or invoice.invoice_number > last_number:
+                last_number = invoice.invoice_number
+            total_taxable += invoice.subtotal
+            total_igst += invoice.igst_amount
+            total_cgst += invoice.cgst_amount
+            total_sgst += invoice.sgst_amount
+            total_cess += invoice.cess_amount
         
         # Convert B2CS summary to list
         b2cs_list = []
@@ -171,23 +237,16 @@ class GSTService:
         
         # Document summary
         doc_summary = []
-        if invoices:
-            invoice_numbers = sorted([inv.invoice_number for inv in invoices])
+        if invoice_count:
             doc_summary.append(DocumentSummary(
                 document_type="Invoices",
-                from_serial=invoice_numbers[0],
-                to_serial=invoice_numbers[-1],
-                total_number=len(invoices),
+                from_serial=first_number,
+                to_serial=last_number,
+                total_number=invoice_count,
                 cancelled=0,
-                net_issued=len(invoices)
+                net_issued=invoice_count
             ))
         
-        # Calculate totals
-        total_taxable = sum(inv.subtotal for inv in invoices)
-        total_igst = sum(inv.igst_amount for inv in invoices)
-        total_cgst = sum(inv.cgst_amount for inv in invoices)
-        total_sgst = sum(inv.sgst_amount for inv in invoices)
-        total_cess = sum(inv.cess_amount for inv in invoices)
         total_tax = total_igst + total_cgst + total_sgst + total_cess
         
         return GSTR1Response(
@@ -216,7 +275,7 @@ class GSTService:
         year: int
     ) -> GSTR3BResponse:
         """Generate GSTR-3B report for a month."""
-        invoices = self._get_period_invoices(company, month, year)
+        invoices = period_invoice_rows(self.db, company.id, month, year)
         
         # Calculate outward supplies
         taxable_supplies = {
@@ -381,38 +440,34 @@ class GSTService:
         year: int
     ) -> GSTSummary:
         """Get GST summary for a period."""
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        
-        invoices = self._get_period_invoices(company, month, year)
+        start_date, end_date = period_bounds(month, year)
+        items_by_invoice = period_item_rows(self.db, company.id, month, year)
         
-        # Calculate totals
-        total_sales = sum(inv.total_amount for inv in invoices)
-        taxable_sales = sum(inv.subtotal for inv in invoices)
-        
-        total_cgst = sum(inv.cgst_amount for inv in invoices)
-        total_sgst = sum(inv.sgst_amount for inv in invoices)
-        total_igst = sum(inv.igst_amount for inv in invoices)
-        total_cess = sum(inv.cess_amount for inv in invoices)
-        total_tax = total_cgst + total_sgst + total_igst + total_cess
-        
-        # Count by type
-        b2b_count = len([inv for inv in invoices if inv.invoice_type == InvoiceType.B2B])
-        b2c_count = len(invoices) - b2b_count
+        total_sales = taxable_sales = 0
+        total_cgst = total_sgst = total_igst = total_cess = 0
+        invoice_count = b2b_count = 0
         
         # Group by rate
         rate_summary = defaultdict(lambda: {"taxable": Decimal("0"), "tax": Decimal("0")})
-        for invoice in invoices:
-            for item in invoice.items:
+        for invoice in period_invoice_rows(self.db, company.id, month, year):
+            total_sales += invoice.total_amount
+            taxable_sales += invoice.subtotal
+            total_cgst += invoice.cgst_amount
+            total_sgst += invoice.sgst_amount
+            total_igst += invoice.igst_amount
+            total_cess += invoice.cess_amount
+            invoice_count += 1
+            if invoice.invoice_type == InvoiceType.B2B:
+                b2b_count += 1
+            for item in items_by_invoice.get(invoice.id, ()):
                 rate = str(item.gst_rate)
                 rate_summary[rate]["taxable"] += item.taxable_amount
                 rate_summary[rate]["tax"] += (
                     item.cgst_amount + item.sgst_amount +
                     item.igst_amount + item.cess_amount
                 )
+        total_tax = total_cgst + total_sgst + total_igst + total_cess
+        b2c_count = invoice_count - b2b_count
         
         gst_by_rate = [
             {"rate": rate, "taxable": data["taxable"], "tax": data["tax"]}
@@ -432,7 +487,7 @@ class GSTService:
             total_igst=total_igst,
             total_cess=total_cess,
             total_tax=total_tax,
-            total_invoices=len(invoices),
+            total_invoices=invoice_count,
             b2b_invoices=b2b_count,
             b2c_invoices=b2c_count,
             gst_by_rate=gst_by_rate
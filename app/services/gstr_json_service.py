@@ -8,11 +8,10 @@ Features:
 """
 from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Dict, Optional
-from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from app.database.models import Invoice, InvoiceItem, PurchaseInvoice, Customer
+from app.database.models import Purchase
+from app.services.gst_service import period_bounds, period_invoice_rows, period_item_rows
 
 
 class GSTRJsonService:
@@ -32,140 +31,141 @@ class GSTRJsonService:
         return_period: str,  # "012024" for January 2024
         gstin: str,
     ) -> Dict:
-        """Generate GSTR-1 JSON file structure."""
+        """
+        Generate GSTR-1 JSON file structure.
+
+        Reads projected invoice and item rows (see ``gst_service``) and fills
+        every section in one pass over the invoices.
+        """
         # Parse period
         month = int(return_period[:2])
         year = int(return_period[2:])
         
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        
-        # Get invoices for the period
-        invoices = self.db.query(Invoice).filter(
-            Invoice.company_id == company_id,
-            Invoice.invoice_date >= start_date,
-            Invoice.invoice_date < end_date,
-        ).all()
-        
-        # Build JSON structure
-        gstr1 = {
-            "gstin": gstin,
-            "fp": return_period,
-            "version": "GST3.0.4",
-            "hash": "hash",
-            "b2b": self._build_b2b(invoices),
-            "b2cl": self._build_b2cl(invoices),
-            "b2cs": self._build_b2cs(invoices),
-            "cdnr": self._build_cdnr(invoices),
-            "exp": self._build_exports(invoices),
-            "hsn": self._build_hsn_summary(invoices),
-            "nil": self._build_nil_supplies(invoices),
-            "doc_issue": self._build_doc_issue(invoices),
-        }
+        items_by_invoice = period_item_rows(self.db, company_id, month, year, posted_only=False)
         
-        return gstr1
-    
-    def _build_b2b(self, invoices: List[Invoice]) -> List[Dict]:
-        """Build B2B (Business to Business) section."""
-        b2b_invoices = [inv for inv in invoices if inv.customer and inv.customer.gstin]
-        
-        # Group by customer GSTIN
-        by_gstin = {}
-        for inv in b2b_invoices:
-            gstin = inv.customer.gstin
-            if gstin not in by_gstin:
-                by_gstin[gstin] = []
-            by_gstin[gstin].append(inv)
+        b2b = {}            # customer GSTIN -> invoices
+        b2cl = {}           # place of supply -> invoices
+        b2cs = {}           # (place of supply, rate) -> totals
+        cdnr = {}           # customer GSTIN -> notes
+        exp_with_pay = []
+        exp_without_pay = []
+        has_exports = False
+        hsn_data = {}
+        nil_total = 0
+        invoice_count = 0
+        first_number = last_number = None
         
-        result = []
-        for gstin, inv_list in by_gstin.items():
-            customer_invoices = []
-            for inv in inv_list:
-                customer_invoices.append({
+        for inv in period_invoice_rows(self.db, company_id, month, year, posted_only=False):
+            items = items_by_invoice.get(inv.id, ())
+            invoice_date = inv.invoice_date.strftime("%d-%m-%Y")
+            
+            if inv.customer_gstin:
+                b2b.setdefault(inv.customer_gstin, []).append({
                     "inum": inv.invoice_number,
-                    "idt": inv.invoice_date.strftime("%d-%m-%Y"),
+                    "idt": invoice_date,
                     "val": self._round(inv.total_amount),
                     "pos": inv.place_of_supply or "27",
                     "rchrg": "Y" if inv.is_reverse_charge else "N",
                     "inv_typ": "R",
-                    "itms": self._build_invoice_items(inv),
+                    "itms": self._build_invoice_items(items),
                 })
+            elif inv.total_amount >= 250000:
+                if inv.place_of_supply:
+                    b2cl.setdefault(inv.place_of_supply, []).append({
+                        "inum": inv.invoice_number,
+                        "idt": invoice_date,
+                        "val": self._round(inv.total_amount),
+                        "itms": self._build_invoice_items(items),
+                    })
+            else:
+                self._add_b2cs(b2cs, inv, items)
             
-            result.append({
-                "ctin": gstin,
-                "inv": customer_invoices,
-            })
-        
-        return result
-    
-    def _build_b2cl(self, invoices: List[Invoice]) -> List[Dict]:
-        """Build B2C Large (>2.5L) section."""
-        b2cl_invoices = [
-            inv for inv in invoices 
-            if not (inv.customer and inv.customer.gstin)
-            and inv.total_amount >= 250000
-            and inv.place_of_supply
-        ]
-        
-        by_pos = {}
-        for inv in b2cl_invoices:
-            pos = inv.place_of_supply
-            if pos not in by_pos:
-                by_pos[pos] = []
-            by_pos[pos].append(inv)
-        
-        result = []
-        for pos, inv_list in by_pos.items():
-            inv_details = []
-            for inv in inv_list:
-                inv_details.append({
-                    "inum": inv.invoice_number,
-                    "idt": inv.invoice_date.strftime("%d-%m-%Y"),
+            if inv.invoice_type and 'note' in str(inv.invoice_type).lower() and inv.customer_gstin:
+                cdnr.setdefault(inv.customer_gstin, []).append({
+                    "ntty": "C",  # Credit note
+                    "nt_num": inv.invoice_number,
+                    "nt_dt": invoice_date,
                     "val": self._round(inv.total_amount),
-                    "itms": self._build_invoice_items(inv),
+                    "pos": inv.place_of_supply or "27",
+                    "rchrg": "N",
+                    "itms": self._build_invoice_items(items),
                 })
             
-            result.append({
-                "pos": pos,
-                "inv": inv_details,
-            })
+            if inv.invoice_type and inv.invoice_type.value in ['export', 'sez']:
+                has_exports = True
+                entry = {
+                    "inum": inv.invoice_number,
+                    "idt": invoice_date,
+                    "val": self._round(inv.total_amount),
+                    "sbnum": "",
+                    "sbdt": invoice_date,
+                    "itms": self._build_invoice_items(items),
+                }
+                if inv.igst_amount and inv.igst_amount > 0:
+                    exp_with_pay.append(entry)
+                else:
+                    exp_without_pay.append(entry)
+            
+            self._add_hsn(hsn_data, items)
+            
+            if inv.total_tax == 0:
+                nil_total += inv.total_amount or Decimal('0')
+            
+            invoice_count += 1
+            if first_number is None or inv.invoice_number < first_number:
+                first_number = inv.invoice_number
+            if last_number is None or inv.invoice_number > last_number:
+                last_number = inv.invoice_number
+        
+        exports = []
+        if has_exports:
+            exports = [
+                {"exp_typ": "WPAY", "inv": exp_with_pay} if exp_with_pay else None,
+                {"exp_typ": "WOPAY", "inv": exp_without_pay} if exp_without_pay else None,
+            ]
         
-        return result
+        # Build JSON structure
+        gstr1 = {
+            "gstin": gstin,
+            "fp": return_period,
+            "version": "GST3.0.4",
+            "hash": "hash",
+            "b2b": [{"ctin": ctin, "inv": inv_list} for ctin, inv_list in b2b.items()],
+            "b2cl": [{"pos": pos, "inv": inv_list} for pos, inv_list in b2cl.items()],
+            "b2cs": self._build_b2cs(b2cs),
+            "cdnr": [{"ctin": ctin, "nt": notes} for ctin, notes in cdnr.items()],
+            "exp": exports,
+            "hsn": self._build_hsn_summary(hsn_data),
+            "nil": self._build_nil_supplies(nil_total),
+            "doc_issue": self._build_doc_issue(invoice_count, first_number, last_number),
+        }
+        
+        return gstr1
+    
+    def _add_b2cs(self, summary: Dict, inv, items) -> None:
+        """Add a B2C Small (<2.5L) invoice to the summary by rate and place of supply."""
+        for item in items:
+            key = (inv.place_of_supply or "27", float(item.gst_rate))
+            if key not in summary:
+                summary[key] = {
+                    "pos": key[0],
+                    "rt": key[1],
+                    "sply_ty": "INTRA" if inv.place_of_supply == "27" else "INTER",
+                    "txval": Decimal('0'),
+                    "camt": Decimal('0'),
+                    "samt": Decimal('0'),
+                    "iamt": Decimal('0'),
+                    "csamt": Decimal('0'),
+                }
+            
+            summary[key]["txval"] += item.taxable_amount or Decimal('0')
+            summary[key]["camt"] += item.cgst_amount or Decimal('0')
+            summary[key]["samt"] += item.sgst_amount or Decimal('0')
+            summary[key]["iamt"] += item.igst_amount or Decimal('0')
+            summary[key]["csamt"] += item.cess_amount or Decimal('0')
     
-    def _build_b2cs(self, invoices: List[Invoice]) -> List[Dict]:
+    def _build_b2cs(self, summary: Dict) -> List[Dict]:
         """Build B2C Small (<2.5L) section - summary by rate."""
-        b2cs_invoices = [
-            inv for inv in invoices 
-            if not (inv.customer and inv.customer.gstin)
-            and inv.total_amount < 250000
-        ]
-        
-        # Group by GST rate and place of supply
-        summary = {}
-        for inv in b2cs_invoices:
-            for item in inv.items:
-                key = (inv.place_of_supply or "27", float(item.gst_rate))
-                if key not in summary:
-                    summary[key] = {
-                        "pos": key[0],
-                        "rt": key[1],
-                        "sply_ty": "INTRA" if inv.place_of_supply == "27" else "INTER",
-                        "txval": Decimal('0'),
-                        "camt": Decimal('0'),
-                        "samt": Decimal('0'),
-                        "iamt": Decimal('0'),
-                        "csamt": Decimal('0'),
-                    }
-                
-                summary[key]["txval"] += item.taxable_amount or Decimal('0')
-                summary[key]["camt"] += item.cgst_amount or Decimal('0')
-                summary[key]["samt"] += item.sgst_amount or Decimal('0')
-                summary[key]["iamt"] += item.igst_amount or Decimal('0')
-                summary[key]["csamt"] += item.cess_amount or Decimal('0')
-        
         result = []
         for data in summary.values():
             result.append({
@@ -181,103 +181,34 @@ class GSTRJsonService:
         
         return result
     
-    def _build_cdnr(self, invoices: List[Invoice]) -> List[Dict]:
-        """Build Credit/Debit Notes section."""
-        # Filter for credit/debit notes
-        cdn_invoices = [inv for inv in invoices if inv.invoice_type and 'note' in str(inv.invoice_type).lower()]
-        
-        # Group by customer GSTIN
-        by_gstin = {}
-        for inv in cdn_invoices:
-            if inv.customer and inv.customer.gstin:
-                gstin = inv.customer.gstin
-                if gstin not in by_gstin:
-                    by_gstin[gstin] = []
-                by_gstin[gstin].append(inv)
-        
-        result = []
-        for gstin, inv_list in by_gstin.items():
-            notes = []
-            for inv in inv_list:
-                notes.append({
-                    "ntty": "C",  # Credit note
-                    "nt_num": inv.invoice_number,
-                    "nt_dt": inv.invoice_date.strftime("%d-%m-%Y"),
-                    "val": self._round(inv.total_amount),
-                    "pos": inv.place_of_supply or "27",
-                    "rchrg": "N",
-                    "itms": self._build_invoice_items(inv),
-                })
-            
-            result.append({
-                "ctin": gstin,
-                "nt": notes,
-            })
-        
-        return result
-    
-    def _build_exports(self, invoices: List[Invoice]) -> List[Dict]:
-        """Build Exports section."""
-        export_invoices = [
-            inv for inv in invoices 
-            if inv.invoice_type and inv.invoice_type.value in ['export', 'sez']
-        ]
-        
-        if not export_invoices:
-            return []
-        
-        exp_with_pay = []
-        exp_without_pay = []
-        
-        for inv in export_invoices:
-            entry = {
-                "inum": inv.invoice_number,
-                "idt": inv.invoice_date.strftime("%d-%m-%Y"),
-                "val": self._round(inv.total_amount),
-                "sbnum": "",
-                "sbdt": inv.invoice_date.strftime("%d-%m-%Y"),
-                "itms": self._build_invoice_items(inv),
-            }
+    def _add_hsn(self, hsn_data: Dict, items) -> None:
+        """Add an invoice's items to the HSN summary."""
+        for item in items:
+            hsn = item.hsn_code or "0"
+            if hsn not in hsn_data:
+                hsn_data[hsn] = {
+                    "hsn_sc": hsn,
+                    "desc": "",
+                    "uqc": item.unit or "NOS",
+                    "qty": Decimal('0'),
+                    "val": Decimal('0'),
+                    "txval": Decimal('0'),
+                    "iamt": Decimal('0'),
+                    "camt": Decimal('0'),
+                    "samt": Decimal('0'),
+                    "csamt": Decimal('0'),
+                }
             
-            if inv.igst_amount and inv.igst_amount > 0:
-                exp_with_pay.append(entry)
-            else:
-                exp_without_pay.append(entry)
-        
-        return [
-            {"exp_typ": "WPAY", "inv": exp_with_pay} if exp_with_pay else None,
-            {"exp_typ": "WOPAY", "inv": exp_without_pay} if exp_without_pay else None,
-        ]
+            hsn_data[hsn]["qty"] += item.quantity or Decimal('0')
+            hsn_data[hsn]["val"] += item.total_amount or Decimal('0')
+            hsn_data[hsn]["txval"] += item.taxable_amount or Decimal('0')
+            hsn_data[hsn]["iamt"] += item.igst_amount or Decimal('0')
+            hsn_data[hsn]["camt"] += item.cgst_amount or Decimal('0')
+            hsn_data[hsn]["samt"] += item.sgst_amount or Decimal('0')
+            hsn_data[hsn]["csamt"] += item.cess_amount or Decimal('0')
     
-    def _build_hsn_summary(self, invoices: List[Invoice]) -> Dict:
+    def _build_hsn_summary(self, hsn_data: Dict) -> Dict:
         """Build HSN Summary section."""
-        hsn_data = {}
-        
-        for inv in invoices:
-            for item in inv.items:
-                hsn = item.hsn_code or "0"
-                if hsn not in hsn_data:
-                    hsn_data[hsn] = {
-                        "hsn_sc": hsn,
-                        "desc": "",
-                        "uqc": item.unit or "NOS",
-                        "qty": Decimal('0'),
-                        "val": Decimal('0'),
-                        "txval": Decimal('0'),
-                        "iamt": Decimal('0'),
-                        "camt": Decimal('0'),
-                        "samt": Decimal('0'),
-                        "csamt": Decimal('0'),
-                    }
-                
-                hsn_data[hsn]["qty"] += item.quantity or Decimal('0')
-                hsn_data[hsn]["val"] += item.total_amount or Decimal('0')
-                hsn_data[hsn]["txval"] += item.taxable_amount or Decimal('0')
-                hsn_data[hsn]["iamt"] += item.igst_amount or Decimal('0')
-                hsn_data[hsn]["camt"] += item.cgst_amount or Decimal('0')
-                hsn_data[hsn]["samt"] += item.sgst_amount or Decimal('0')
-                hsn_data[hsn]["csamt"] += item.cess_amount or Decimal('0')
-        
         data = []
         for entry in hsn_data.values():
             data.append({
@@ -295,12 +226,8 @@ class GSTRJsonService:
         
         return {"data": data}
     
-    def _build_nil_supplies(self, invoices: List[Invoice]) -> Dict:
+    def _build_nil_supplies(self, total) -> Dict:
         """Build Nil/Exempt supplies section."""
-        nil_invoices = [inv for inv in invoices if inv.total_tax == 0]
-        
-        total = sum(inv.total_amount or Decimal('0') for inv in nil_invoices)
-        
         return {
             "inv": [
                 {
@@ -312,13 +239,11 @@ class GSTRJsonService:
             ]
         }
     
-    def _build_doc_issue(self, invoices: List[Invoice]) -> Dict:
+    def _build_doc_issue(self, count: int, first_number: Optional[str], last_number: Optional[str]) -> Dict:
         """Build Document Issue Summary."""
-        if not invoices:
+        if not count:
             return {"doc_det": []}
         
-        invoice_numbers = [inv.invoice_number for inv in invoices]
-        
         return {
             "doc_det": [
                 {
@@ -327,23 +252,23 @@ class GSTRJsonService:
                     "docs": [
                         {
                             "num": 1,
-                            "from": min(invoice_numbers) if invoice_numbers else "",
-                            "to": max(invoice_numbers) if invoice_numbers else "",
-                            "totnum": len(invoices),
+                            "from": first_number,
+                            "to": last_number,
+                            "totnum": count,
                             "cancel": 0,
-                            "net_issue": len(invoices),
+                            "net_issue": count,
                         }
                     ]
                 }
             ]
         }
     
-    def _build_invoice_items(self, invoice: Invoice) -> List[Dict]:
+    def _build_invoice_items(self, items) -> List[Dict]:
         """Build items array for an invoice."""
-        items = []
-        for item in invoice.items:
-            items.append({
-                "num": len(items) + 1,
+        result = []
+        for item in items:
+            result.append({
+                "num": len(result) + 1,
                 "itm_det": {
                     "txval": self._round(item.taxable_amount),
                     "rt": float(item.gst_rate),
@@ -353,7 +278,7 @@ class GSTRJsonService:
                     "csamt": self._round(item.cess_amount),
                 }
             })
-        return items
+        return result
     
     def generate_gstr3b_json(
         self,
@@ -365,24 +290,19 @@ class GSTRJsonService:
         month = int(return_period[:2])
         year = int(return_period[2:])
         
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
+        start_date, end_date = period_bounds(month, year)
         
         # Get sales invoices
-        sales = self.db.query(Invoice).filter(
-            Invoice.company_id == company_id,
-            Invoice.invoice_date >= start_date,
-            Invoice.invoice_date < end_date,
-        ).all()
+        sales = list(period_invoice_rows(self.db, company_id, month, year, posted_only=False))
         
         # Get purchase invoices
-        purchases = self.db.query(PurchaseInvoice).filter(
-            PurchaseInvoice.company_id == company_id,
-            PurchaseInvoice.invoice_date >= start_date,
-            PurchaseInvoice.invoice_date < end_date,
+        purchases = self.db.query(
+            Purchase.subtotal, Purchase.igst_amount, Purchase.cgst_amount,
+            Purchase.sgst_amount, Purchase.itc_eligible,
+        ).filter(
+            Purchase.company_id == company_id,
+            Purchase.invoice_date >= start_date,
+            Purchase.invoice_date < end_date,
         ).all()
         
         # Calculate totals
@@ -18,6 +18,8 @@ from app.database.models import (
     BOMComponent, Invoice, InvoiceItem, PurchaseInvoice, PurchaseInvoiceItem,
     StockMovementType, InvoiceStatus, PurchaseInvoiceStatus
 )
+from app.services.stock_balance_service import StockBalanceService, apply_stock_delta, lock_products
+from app.services.stock_valuation_service import issued_cost
 
 # Avoid circular import - only for type hints
 if TYPE_CHECKING:
@@ -194,7 +196,7 @@ class InventoryEngine:
             entry_date=entry_date or datetime.utcnow(),
             movement_type=movement_type,
             quantity=quantity,
-            unit=product.primary_unit or product.unit,
+            unit=product.unit,
             rate=rate,
             value=self._round_amount(quantity * rate),
             reference_type=reference_type,
@@ -203,14 +205,8 @@ class InventoryEngine:
             notes=notes,
         )
         
-        # Update product stock
-        product.current_stock = (product.current_stock or Decimal("0")) + quantity
-        
-        # Update batch if applicable
-        if batch_id:
-            batch = self.db.query(Batch).filter(Batch.id == batch_id).first()
-            if batch:
-                batch.quantity = (batch.quantity or Decimal("0")) + quantity
+        # Update product and batch stock (atomic increments)
+        apply_stock_delta(self.db, product, quantity, batch_id=batch_id)
         
         self.db.add(entry)
         self.db.commit()
@@ -253,10 +249,6 @@ class InventoryEngine:
         if not product:
             raise ValueError("Product not found")
         
-        # Check stock if negative not allowed
-        if not allow_negative and (product.current_stock or Decimal("0")) < quantity:
-            raise ValueError(f"Insufficient stock. Available: {product.current_stock}, Requested: {quantity}")
-        
         if rate is None:
             rate = product.standard_cost or Decimal("0")
         
@@ -268,7 +260,7 @@ class InventoryEngine:
             entry_date=entry_date or datetime.utcnow(),
             movement_type=movement_type,
             quantity=-quantity,  # Negative for out
-            unit=product.primary_unit or product.unit,
+            unit=product.unit,
             rate=rate,
             value=self._round_amount(quantity * rate),
             reference_type=reference_type,
@@ -277,26 +269,21 @@ class InventoryEngine:
             notes=notes,
         )
         
-        # Update product stock
-        product.current_stock = (product.current_stock or Decimal("0")) - quantity
-        
-        # Update batch if applicable
-        if batch_id:
-            batch = self.db.query(Batch).filter(Batch.id == batch_id).first()
-            if batch:
-                batch.quantity = (batch.quantity or Decimal("0")) - quantity
+        # Update product and batch stock (atomic decrements); refused when
+        # negative stock is not allowed and the issue exceeds the stock
+        apply_stock_delta(self.db, product, -quantity, batch_id=batch_id, allow_negative=allow_negative)
         
         self.db.add(entry)
         self.db.commit()
         self.db.refresh(entry)
         
-        # Create COGS accounting entry if requested
+        # Create COGS accounting entry if requested, at the valuation cost per unit
         if create_accounting and self.voucher_engine:
             self.voucher_engine.create_stock_journal(
                 company=company,
                 product=product,
                 quantity=quantity,
-                rate=rate,
+                rate=issued_cost([entry]) / quantity if quantity else rate,
                 movement_type=movement_type,
                 godown_id=godown_id,
                 voucher_date=entry_date,
@@ -333,7 +320,7 @@ class InventoryEngine:
             entry_date=entry_date,
             movement_type=StockMovementType.TRANSFER_OUT,
             quantity=-quantity,
-            unit=product.primary_unit or product.unit,
+            unit=product.unit,
             rate=rate,
             value=self._round_amount(quantity * rate),
             from_godown_id=from_godown_id,
@@ -350,7 +337,7 @@ class InventoryEngine:
             entry_date=entry_date,
             movement_type=StockMovementType.TRANSFER_IN,
             quantity=quantity,
-            unit=product.primary_unit or product.unit,
+            unit=product.unit,
             rate=rate,
             value=self._round_amount(quantity * rate),
             from_godown_id=from_godown_id,
@@ -372,45 +359,7 @@ class InventoryEngine:
         company_id: str
     ) -> List[Dict[str, Any]]:
         """Get available stock for a product across all warehouses."""
-        entries = self.db.query(StockEntry).filter(
-            StockEntry.company_id == company_id,
-            StockEntry.product_id == product_id
-        ).all()
-        
-        # Aggregate by warehouse
-        warehouse_stock = {}
-        for entry in entries:
-            godown_id = entry.godown_id or "main"
-            if godown_id not in warehouse_stock:
-                warehouse_stock[godown_id] = Decimal("0")
-            warehouse_stock[godown_id] += entry.quantity
-        
-        result = []
-        
-        # Add main location
-        if "main" in warehouse_stock and warehouse_stock["main"] != 0:
-            result.append({
-                "godown_id": None,
-                "godown_name": "Main Location",
-                "quantity": warehouse_stock["main"]
-            })
-        
-        # Add godowns
-        godowns = self.db.query(Godown).filter(
-            Godown.company_id == company_id,
-            Godown.is_active == True
-        ).all()
-        
-        for godown in godowns:
-            qty = warehouse_stock.get(godown.id, Decimal("0"))
-            if qty != 0:
-                result.append({
-                    "godown_id": godown.id,
-                    "godown_name": godown.name,
-                    "quantity": qty
-                })
-        
-        return result
+        return StockBalanceService(self.db).get_available_stock_by_warehouse(product_id, company_id)
     
     def split_by_priority(
         self,
@@ -506,7 +455,9 @@ class InventoryEngine:
     ) -> List[StockEntry]:
         """Finalize stock reduction when invoice is PAID."""
         entries = []
-        cogs_total = Decimal("0")
+        
+        # Lock the invoice's products in id order so concurrent invoices cannot deadlock
+        lock_products(self.db, [item.product_id for item in invoice.items])
         
         for item in invoice.items:
             if item.stock_reduced or not item.warehouse_allocation:
@@ -523,8 +474,6 @@ class InventoryEngine:
                 if qty == 0:
                     continue
                 
-                cost_rate = product.standard_cost or Decimal("0")
-                
                 entry = StockEntry(
                     company_id=invoice.company_id,
                     product_id=item.product_id,
@@ -544,15 +493,15 @@ class InventoryEngine:
                 entries.append(entry)
                 
                 # Update product stock
-                product.current_stock = (product.current_stock or Decimal("0")) - qty
-                
-                # Calculate COGS
-                cogs_total += qty * cost_rate
+                apply_stock_delta(self.db, product, -qty)
             
             item.stock_reduced = True
         
         self.db.commit()
         
+        # COGS at the valuation cost of the issued stock (FIFO / LIFO / weighted average)
+        cogs_total = issued_cost(entries)
+        
         # Create COGS accounting entries
         if entries and create_cogs_entries and cogs_total > 0 and self.voucher_engine:
             try:
@@ -599,6 +548,9 @@ class InventoryEngine:
         """Restore stock when invoice is cancelled."""
         entries = []
         
+        # Lock the invoice's products in id order so concurrent invoices cannot deadlock
+        lock_products(self.db, [item.product_id for item in invoice.items])
+        
         for item in invoice.items:
             if not item.stock_reduced or not item.warehouse_allocation:
                 continue
@@ -619,7 +571,7 @@ class InventoryEngine:
                     product_id=item.product_id,
                     godown_id=godown_id,
                     entry_date=datetime.utcnow(),
-                    movement_type=StockMovementType.ADJUSTMENT,
+                    movement_type=StockMovementType.ADJUSTMENT_IN,
                     quantity=qty,
                     unit=item.unit,
                     rate=item.unit_price,
@@ -632,7 +584,7 @@ class InventoryEngine:
                 self.db.add(entry)
                 entries.append(entry)
                 
-                product.current_stock = (product.current_stock or Decimal("0")) + qty
+                apply_stock_delta(self.db, product, qty)
             
             item.stock_reduced = False
             item.stock_reserved = False
@@ -679,7 +631,7 @@ class InventoryEngine:
             entries.append(entry)
             
             # Update product stock
-            product.current_stock = (product.current_stock or Decimal("0")) + item.quantity
+            apply_stock_delta(self.db, product, item.quantity)
             
             item.stock_received = True
             item.godown_id = target_godown
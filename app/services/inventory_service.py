@@ -9,6 +9,8 @@ from app.database.models import (
     Company, StockGroup, Product, Godown, Batch, StockEntry,
     BillOfMaterial, BOMComponent, StockMovementType, Brand, Category
 )
+from app.services.stock_balance_service import StockBalanceService, apply_stock_delta
+from app.services.stock_valuation_service import StockValuationService
 
 
 class InventoryService:
@@ -234,7 +236,7 @@ class InventoryService:
             entry_date=entry_date or datetime.utcnow(),
             movement_type=movement_type,
             quantity=quantity,
-            unit=item.primary_unit or item.unit,
+            unit=item.unit,
             rate=rate,
             value=quantity * rate,
             reference_type=reference_type,
@@ -243,14 +245,8 @@ class InventoryService:
             notes=notes,
         )
         
-        # Update current stock
-        item.current_stock = (item.current_stock or Decimal("0")) + quantity
-        
-        # Update batch quantity if applicable
-        if batch_id:
-            batch = self.db.query(Batch).filter(Batch.id == batch_id).first()
-            if batch:
-                batch.quantity = (batch.quantity or Decimal("0")) + quantity
+        # Update current stock and batch quantity (atomic increments)
+        apply_stock_delta(self.db, item, quantity, batch_id=batch_id)
         
         self.db.add(entry)
         self.db.commit()
@@ -277,10 +273,6 @@ class InventoryService:
         if not item:
             raise ValueError("Product not found")
         
-        # Check stock availability
-        if item.current_stock < quantity:
-            raise ValueError(f"Insufficient stock. Available: {item.current_stock}, Requested: {quantity}")
-        
         # Use standard cost if rate not specified
         if rate is None:
             rate = item.standard_cost or Decimal("0")
@@ -293,7 +285,7 @@ class InventoryService:
             entry_date=entry_date or datetime.utcnow(),
             movement_type=movement_type,
             quantity=-quantity,  # Negative for out
-            unit=item.primary_unit or item.unit,
+            unit=item.unit,
             rate=rate,
             value=quantity * rate,
             reference_type=reference_type,
@@ -302,14 +294,9 @@ class InventoryService:
             notes=notes,
         )
         
-        # Update current stock
-        item.current_stock = (item.current_stock or Decimal("0")) - quantity
-        
-        # Update batch quantity if applicable
-        if batch_id:
-            batch = self.db.query(Batch).filter(Batch.id == batch_id).first()
-            if batch:
-                batch.quantity = (batch.quantity or Decimal("0")) - quantity
+        # Update current stock and batch quantity (atomic decrements);
+        # refused if the issue exceeds the available stock
+        apply_stock_delta(self.db, item, -quantity, batch_id=batch_id, allow_negative=False)
         
         self.db.add(entry)
         self.db.commit()
@@ -343,7 +330,7 @@ class InventoryService:
             entry_date=entry_date,
             movement_type=StockMovementType.TRANSFER_OUT,
             quantity=-quantity,
-            unit=item.primary_unit or item.unit,
+            unit=item.unit,
             rate=item.standard_cost or Decimal("0"),
             value=quantity * (item.standard_cost or Decimal("0")),
             from_godown_id=from_godown_id,
@@ -360,7 +347,7 @@ class InventoryService:
             entry_date=entry_date,
             movement_type=StockMovementType.TRANSFER_IN,
             quantity=quantity,
-            unit=item.primary_unit or item.unit,
+            unit=item.unit,
             rate=item.standard_cost or Decimal("0"),
             value=quantity * (item.standard_cost or Decimal("0")),
             from_godown_id=from_godown_id,
@@ -558,7 +545,7 @@ class InventoryService:
         ).all()
         
         total_items = len(items)
-        total_value = sum((i.current_stock or Decimal("0")) * (i.standard_cost or Decimal("0")) for i in items)
+        total_value = StockValuationService(self.db).get_closing_stock_value(company.id)
         low_stock_count = sum(1 for i in items if (i.current_stock or 0) <= (i.min_stock_level or 0))
         out_of_stock_count = sum(1 for i in items if (i.current_stock or 0) <= 0)
         
@@ -572,23 +559,33 @@ class InventoryService:
     def get_stock_valuation(
         self,
         company: Company,
-        as_of_date: Optional[datetime] = None,
+        as_of_date: Optional[date] = None,
     ) -> List[Dict[str, Any]]:
-        """Get stock valuation report."""
+        """
+        Get stock valuation report.
+        
+        Values come from the cost layers (FIFO / LIFO / weighted average per
+        item), as of the end of ``as_of_date`` or now.
+        """
+        if isinstance(as_of_date, datetime):
+            as_of_date = as_of_date.date()
         items = self.get_stock_items(company)
+        stock = StockValuationService(self.db).get_stock_valuation(company.id, as_of_date)
         
         valuation = []
         for item in items:
-            qty = item.current_stock or Decimal("0")
-            rate = item.standard_cost or Decimal("0")
+            position = stock.get(item.id)
+            qty = position["quantity"] if position else Decimal("0")
+            value = position["value"] if position else Decimal("0")
+            rate = value / qty if qty else Decimal("0")
             valuation.append({
                 "item_id": item.id,
                 "item_name": item.name,
-                "item_code": item.code,
+                "item_code": item.sku,
                 "quantity": float(qty),
-                "unit": item.primary_unit,
+                "unit": item.unit,
                 "rate": float(rate),
-                "value": float(qty * rate),
+                "value": float(value),
             })
         
         return valuation
@@ -602,11 +599,14 @@ class InventoryService:
         from_date: Optional[date] = None,
         to_date: Optional[date] = None,
         godown_id: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100,
     ) -> Dict[str, Any]:
         """
         Get stock ledger (item-wise transaction history with running balance).
         
-        Returns all stock movements for a product with running balance.
+        Returns one page of stock movements for a product with running balance;
+        opening and totals come from maintained stock snapshots.
         """
         product = self.db.query(Product).filter(
             Product.id == product_id,
@@ -616,89 +616,14 @@ class InventoryService:
         if not product:
             return {"error": "Product not found"}
         
-        # Build query for stock entries
-        query = self.db.query(StockEntry).filter(
-            StockEntry.product_id == product_id
+        return StockBalanceService(self.db).get_stock_ledger(
+            product,
+            from_date=from_date,
+            to_date=to_date,
+            godown_id=godown_id,
+            page=page,
+            page_size=page_size,
         )
-        
-        if from_date:
-            query = query.filter(StockEntry.entry_date >= from_date)
-        if to_date:
-            query = query.filter(StockEntry.entry_date <= to_date)
-        if godown_id:
-            query = query.filter(StockEntry.godown_id == godown_id)
-        
-        entries = query.order_by(StockEntry.entry_date.asc(), StockEntry.created_at.asc()).all()
-        
-        # Calculate opening balance (sum of all transactions before from_date)
-        opening_balance = Decimal("0")
-        if from_date:
-            opening_query = self.db.query(
-                func.sum(StockEntry.quantity)
-            ).filter(
-                StockEntry.product_id == product_id,
-                StockEntry.entry_date < from_date
-            )
-            if godown_id:
-                opening_query = opening_query.filter(StockEntry.godown_id == godown_id)
-            opening_balance = opening_query.scalar() or Decimal("0")
-        else:
-            opening_balance = product.opening_stock or Decimal("0")
-        
-        # Build ledger with running balance
-        ledger_entries = []
-        running_balance = opening_balance
-        total_in = Decimal("0")
-        total_out = Decimal("0")
-        
-        for entry in entries:
-            qty = entry.quantity or Decimal("0")
-            
-            # Determine if it's inward or outward
-            inward_types = [
-                StockMovementType.PURCHASE,
-                StockMovementType.TRANSFER_IN,
-                StockMovementType.ADJUSTMENT_IN,
-                StockMovementType.MANUFACTURING_IN,
-            ]
-            
-            if entry.movement_type in inward_types:
-                inward_qty = qty
-                outward_qty = Decimal("0")
-                running_balance += qty
-                total_in += qty
-            else:
-                inward_qty = Decimal("0")
-                outward_qty = abs(qty)
-                running_balance -= abs(qty)
-                total_out += abs(qty)
-            
-            ledger_entries.append({
-                "date": entry.entry_date.isoformat() if entry.entry_date else None,
-                "movement_type": entry.movement_type.value if entry.movement_type else None,
-                "reference_type": entry.reference_type,
-                "reference_number": entry.reference_number,
-                "godown": entry.godown.name if entry.godown else None,
-                "batch": entry.batch.batch_number if entry.batch else None,
-                "inward_qty": float(inward_qty),
-                "outward_qty": float(outward_qty),
-                "rate": float(entry.rate or 0),
-                "value": float(entry.value or 0),
-                "balance": float(running_balance),
-                "narration": entry.narration,
-            })
-        
-        return {
-            "product_id": product_id,
-            "product_name": product.name,
-            "product_code": product.sku,
-            "unit": product.primary_unit or product.unit,
-            "opening_balance": float(opening_balance),
-            "total_inward": float(total_in),
-            "total_outward": float(total_out),
-            "closing_balance": float(running_balance),
-            "entries": ledger_entries,
-        }
     
     def get_stock_by_brand(
         self,
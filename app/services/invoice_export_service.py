@@ -0,0 +1,301 @@
+"""
+Invoice Export Service - every invoice of a period as one ZIP of PDFs.
+
+Auditors ask for all sales invoices of a month or quarter; downloading them
+one ``/invoices/{id}/pdf`` call at a time meant thousands of requests. An
+export is a background job instead:
+
+1. ``create`` records the job with the number of invoices in the range and
+   ``start`` claims it (atomically, so two workers never build the same
+   file); ``submit_invoice_export`` hands it to a background thread;
+2. the job walks the range in chunks of ``INVOICE_EXPORT_CHUNK_SIZE``,
+   keyset-paginated on (invoice_date, id) with items and customers eager
+   loaded, snapshots each chunk and renders it through ``PDFRenderService``
+   (worker processes, and cached PDFs are reused);
+3. each PDF is written into a ZIP on disk as soon as it is rendered, and
+   the chunk's progress, per-invoice errors and a heartbeat are committed;
+   only one chunk is ever held in memory;
+4. the ZIP is moved into place when complete and served with ``FileResponse``,
+   which answers HTTP range requests so interrupted downloads resume.
+
+A job that dies stops updating the heartbeat. Once it is older than
+``INVOICE_EXPORT_STALE_AFTER_SECONDS`` it can be started again (or is picked
+up by ``resume_stale_invoice_exports`` at startup); the ZIP is rebuilt from
+the start, with already rendered PDFs served from the PDF cache.
+"""
+import os
+import re
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.models import (
+    Company, Invoice, InvoiceExportJob, InvoiceExportStatus, InvoiceStatus,
+)
+from app.services.pdf_render_service import COMPANY_RELATIONS, DOCUMENTS, PDFRenderService, snapshot
+
+
+_job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="invoice-export")
+
+# Drafts are not issued invoices and are left out of exports
+EXCLUDED_STATUSES = (InvoiceStatus.DRAFT,)
+
+
+def _archive_name(invoice_number: Optional[str], invoice_id: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", invoice_number or "").strip("_") or invoice_id
+    return f"Invoice_{name}.pdf"
+
+
+class InvoiceExportService:
+    """Service for bulk invoice PDF exports."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _stale_before(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=settings.INVOICE_EXPORT_STALE_AFTER_SECONDS)
+
+    def _invoices(self, company_id: str, from_date: date, to_date: date):
+        return self.db.query(Invoice).filter(
+            Invoice.company_id == company_id,
+            Invoice.invoice_date >= datetime.combine(from_date, time.min),
+            Invoice.invoice_date < datetime.combine(to_date + timedelta(days=1), time.min),
+            Invoice.status.notin_(EXCLUDED_STATUSES),
+        )
+
+    def create(
+        self,
+        company: Company,
+        from_date: date,
+        to_date: date,
+        requested_by: Optional[str] = None,
+    ) -> InvoiceExportJob:
+        """Record an export of the company's invoices dated from_date to to_date (inclusive)."""
+        if from_date > to_date:
+            raise ValueError("from_date must not be after to_date")
+
+        total = self._invoices(company.id, from_date, to_date).with_entities(
+            func.count(Invoice.id)
+        ).scalar()
+        job = InvoiceExportJob(
+            company_id=company.id,
+            requested_by=requested_by,
+            from_date=from_date,
+            to_date=to_date,
+            status=InvoiceExportStatus.PENDING,
+            total_invoices=total or 0,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def start(self, job_id: str) -> InvoiceExportJob:
+        """
+        Claim an export for building.
+
+        A pending or failed job starts; a processing job whose worker has
+        stopped (no heartbeat within ``INVOICE_EXPORT_STALE_AFTER_SECONDS``)
+        starts over.
+        """
+        job = self.db.query(InvoiceExportJob).filter(InvoiceExportJob.id == job_id).first()
+        if not job:
+            raise ValueError("Export not found")
+        if job.status == InvoiceExportStatus.COMPLETED:
+            raise ValueError("Export is already complete")
+
+        now = datetime.utcnow()
+        claimed = self.db.execute(
+            update(InvoiceExportJob)
+            .where(
+                InvoiceExportJob.id == job_id,
+                or_(
+                    InvoiceExportJob.status.in_([InvoiceExportStatus.PENDING, InvoiceExportStatus.FAILED]),
+                    and_(
+                        InvoiceExportJob.status == InvoiceExportStatus.PROCESSING,
+                        or_(
+                            InvoiceExportJob.heartbeat_at.is_(None),
+                            InvoiceExportJob.heartbeat_at < self._stale_before(),
+                        ),
+                    ),
+                ),
+            )
+            .values({
+                InvoiceExportJob.status: InvoiceExportStatus.PROCESSING,
+                InvoiceExportJob.processed_invoices: 0,
+                InvoiceExportJob.failed_invoices: 0,
+                InvoiceExportJob.errors: [],
+                InvoiceExportJob.error_message: None,
+                InvoiceExportJob.started_at: now,
+                InvoiceExportJob.heartbeat_at: now,
+            })
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if not claimed:
+            self.db.rollback()
+            raise ValueError("Export is already being built")
+
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def process(self, job_id: str) -> InvoiceExportJob:
+        """Build a claimed export's ZIP chunk by chunk."""
+        job = self.db.query(InvoiceExportJob).filter(InvoiceExportJob.id == job_id).first()
+        company = self.db.query(Company).filter(Company.id == job.company_id).first()
+
+        directory = Path(settings.INVOICE_EXPORT_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{job.id}.zip"
+        partial = directory / f"{job.id}.zip.part"
+
+        try:
+            company_snapshot = snapshot(company, COMPANY_RELATIONS)
+            _, relations = DOCUMENTS["invoice"]
+            renderer = PDFRenderService()
+            base = self._invoices(job.company_id, job.from_date, job.to_date).options(
+                selectinload(Invoice.items),
+                joinedload(Invoice.customer),
+            ).order_by(Invoice.invoice_date, Invoice.id)
+
+            names = set()
+            errors = []
+            last = None
+            size = max(settings.INVOICE_EXPORT_CHUNK_SIZE, 1)
+            with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                while True:
+                    query = base
+                    if last is not None:
+                        query = query.filter(or_(
+                            Invoice.invoice_date > last[0],
+                            and_(Invoice.invoice_date == last[0], Invoice.id > last[1]),
+                        ))
+                    invoices = query.limit(size).all()
+                    if not invoices:
+                        break
+                    last = (invoices[-1].invoice_date, invoices[-1].id)
+
+                    documents = [(snapshot(invoice, relations), snapshot(invoice.customer)) for invoice in invoices]
+                    results = renderer.render_snapshots("invoice", documents, company_snapshot)
+                    for (document, _), result in zip(documents, results):
+                        if isinstance(result, Exception):
+                            errors.append({
+                                "invoice_id": document.id,
+                                "invoice_number": document.invoice_number,
+                                "error": str(result),
+                            })
+                            continue
+                        name = _archive_name(document.invoice_number, document.id)
+                        if name in names:
+                            name = _archive_name(f"{document.invoice_number}_{document.id}", document.id)
+                        names.add(name)
+                        archive.writestr(name, result)
+
+                    job.processed_invoices = (job.processed_invoices or 0) + len(invoices)
+                    job.failed_invoices = len(errors)
+                    job.errors = list(errors)
+                    job.heartbeat_at = datetime.utcnow()
+                    self.db.commit()
+                    # Let the chunk's invoices be garbage collected
+                    self.db.expunge_all()
+                    self.db.add(job)
+
+            os.replace(partial, path)
+            job.file_path = str(path)
+            job.file_size = path.stat().st_size
+            job.status = InvoiceExportStatus.COMPLETED
+            job.completed_at = datetime.utcnow()
+            job.heartbeat_at = None
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            if partial.exists():
+                partial.unlink()
+            job.status = InvoiceExportStatus.FAILED
+            job.error_message = str(e)
+            job.heartbeat_at = None
+            self.db.commit()
+            raise
+
+        self.db.refresh(job)
+        return job
+
+    def delete(self, job: InvoiceExportJob) -> None:
+        """Remove an export and its file."""
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        self.db.delete(job)
+        self.db.commit()
+
+    @staticmethod
+    def get_progress(job: InvoiceExportJob) -> Dict[str, Any]:
+        """Progress of an export, for polling clients."""
+        total = job.total_invoices or 0
+        processed = job.processed_invoices or 0
+        return {
+            "export_id": job.id,
+            "status": job.status.value if job.status else None,
+            "from_date": job.from_date.isoformat() if job.from_date else None,
+            "to_date": job.to_date.isoformat() if job.to_date else None,
+            "total_invoices": total,
+            "processed_invoices": processed,
+            "failed_invoices": job.failed_invoices or 0,
+            "percent_complete": round(min(processed, total) * 100 / total, 1) if total else None,
+            "errors": job.errors or [],
+            "error_message": job.error_message,
+            "file_size": job.file_size,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "last_progress_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        }
+
+
+def run_invoice_export(job_id: str) -> None:
+    """Background job body: build a claimed export in its own session."""
+    db = SessionLocal()
+    try:
+        InvoiceExportService(db).process(job_id)
+    except Exception as e:
+        print(f"[EXPORT] Invoice export {job_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def submit_invoice_export(job_id: str) -> Future:
+    """Build a claimed export in the background."""
+    return _job_executor.submit(run_invoice_export, job_id)
+
+
+def resume_stale_invoice_exports() -> int:
+    """Restart exports whose job died (e.g. server restart). Returns how many."""
+    db = SessionLocal()
+    try:
+        service = InvoiceExportService(db)
+        stale_ids = [
+            job_id for (job_id,) in db.query(InvoiceExportJob.id).filter(
+                InvoiceExportJob.status == InvoiceExportStatus.PROCESSING,
+                or_(
+                    InvoiceExportJob.heartbeat_at.is_(None),
+                    InvoiceExportJob.heartbeat_at < service._stale_before(),
+                ),
+            ).all()
+        ]
+        resumed = 0
+        for job_id in stale_ids:
+            try:
+                service.start(job_id)
+            except ValueError:
+                continue  # claimed by another worker
+            submit_invoice_export(job_id)
+            resumed += 1
+        return resumed
+    finally:
+        db.close()
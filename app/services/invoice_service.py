@@ -11,6 +11,8 @@ from app.database.models import (
 )
 from app.schemas.invoice import InvoiceCreate,VoucherType, InvoiceUpdate, InvoiceItemCreate
 from app.services.company_service import CompanyService
+from app.services.sales_rollup_service import SalesRollupService
+from app.services.listing_service import keyset_page, listing_totals
 import qrcode
 import base64
 from io import BytesIO
@@ -527,21 +529,18 @@ class InvoiceService:
             Invoice.company_id == company.id
         ).first()
     
-    def get_invoices(
+    def _filtered_invoices(
         self,
         company: Company,
-        page: int = 1,
-        page_size: int = 20,
-        voucher_type: Optional[str] = None, 
+        voucher_type: Optional[str] = None,
         status: Optional[str] = None,
         customer_id: Optional[str] = None,
         from_date: Optional[date] = None,
         to_date: Optional[date] = None,
         search: Optional[str] = None
-    ) -> Tuple[List[Invoice], int, dict]:
-        """Get invoices with pagination and filters."""
+    ):
+        """Invoice query with the listing filters applied."""
         from sqlalchemy import or_
-        import re
         
         query = self.db.query(Invoice).filter(Invoice.company_id == company.id)
         
@@ -612,57 +611,75 @@ class InvoiceService:
                 )
             )
         
-        # Get total count
-        total = query.count()
-        
-        # Get summary
-        summary_query = self.db.query(
-            func.sum(Invoice.total_amount).label('total_amount'),
-            func.sum(Invoice.amount_paid).label('total_paid'),
-            func.sum(Invoice.balance_due).label('total_pending')
-        ).filter(Invoice.company_id == company.id)
-        
-        # Apply same filters to summary
-        if status:
-            summary_query = summary_query.filter(Invoice.status == status)
-        
-        # Customer filter for summary
-        if customer_id and isinstance(customer_id, str):
-            customer_id_str = customer_id.strip()
-            if customer_id_str:
-                uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
-                if uuid_pattern.match(customer_id_str):
-                    summary_query = summary_query.filter(Invoice.customer_id == customer_id_str)
-        
-        if from_date:
-            summary_query = summary_query.filter(Invoice.invoice_date >= from_date)
-        if to_date:
-            summary_query = summary_query.filter(Invoice.invoice_date <= to_date)
-        
-        if search and isinstance(search, str) and search.strip():
-            search_filter = f"%{search}%"
-            summary_query = summary_query.filter(
-                or_(
-                    Invoice.invoice_number.ilike(search_filter),
-                    Invoice.customer_name.ilike(search_filter),
-                    Invoice.reference_no.ilike(search_filter),
-                    Invoice.customer_gstin.ilike(search_filter)
-                )
-            )
-        
-        summary = summary_query.first()
-        
+        return query
+
+    def list_invoices(
+        self,
+        company: Company,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        page: Optional[int] = None,
+        include_totals: bool = True,
+        voucher_type: Optional[str] = None,
+        status: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        search: Optional[str] = None
+    ) -> dict:
+        """
+        One keyset page of invoices, newest first (see listing_service).
+        
+        Count and amount totals of the whole filtered listing are included
+        when ``include_totals`` is set (one cached aggregate query).
+        Raises ValueError for a malformed cursor.
+        """
+        filters = {
+            "voucher_type": voucher_type, "status": status, "customer_id": customer_id,
+            "from_date": from_date, "to_date": to_date, "search": search,
+        }
+        query = self._filtered_invoices(company, **filters)
+        invoices, next_cursor = keyset_page(query, Invoice, page_size, cursor=cursor, page=page)
+        
+        result = {"items": invoices, "next_cursor": next_cursor}
+        if include_totals:
+            result.update(listing_totals(query, Invoice, company.id, filters, sums={
+                "total_amount": Invoice.total_amount,
+                "total_paid": Invoice.amount_paid,
+                "total_pending": Invoice.balance_due,
+            }))
+        return result
+
+    def get_invoices(
+        self,
+        company: Company,
+        page: int = 1,
+        page_size: int = 20,
+        voucher_type: Optional[str] = None, 
+        status: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        search: Optional[str] = None
+    ) -> Tuple[List[Invoice], int, dict]:
+        """Get invoices with pagination and filters."""
+        result = self.list_invoices(
+            company,
+            page_size=page_size,
+            page=page,
+            voucher_type=voucher_type,
+            status=status,
+            customer_id=customer_id,
+            from_date=from_date,
+            to_date=to_date,
+            search=search,
+        )
         summary_dict = {
-            "total_amount": summary.total_amount or Decimal("0"),
-            "total_paid": summary.total_paid or Decimal("0"),
-            "total_pending": summary.total_pending or Decimal("0"),
+            "total_amount": result["total_amount"],
+            "total_paid": result["total_paid"],
+            "total_pending": result["total_pending"],
         }
-        
-        # Pagination
-        offset = (page - 1) * page_size
-        invoices = query.order_by(Invoice.created_at.desc(), Invoice.invoice_date.desc()).offset(offset).limit(page_size).all()
-        
-        return invoices, total, summary_dict
+        return result["items"], result["total"], summary_dict
 
 
 
@@ -684,58 +701,35 @@ class InvoiceService:
         if not to_date:
             to_date = today
         
-        # Today's sales
-        today_query = self.db.query(
-            func.count(Invoice.id).label('count'),
-            func.sum(Invoice.total_amount).label('total')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date == today
-        ).first()
-        
-        # Weekly sales (last 7 days)
+        rollups = SalesRollupService(self.db)
         week_ago = today - timedelta(days=7)
-        weekly_query = self.db.query(
-            func.count(Invoice.id).label('count'),
-            func.sum(Invoice.total_amount).label('total')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= week_ago,
-            Invoice.invoice_date <= today
-        ).first()
+        thirty_days_ago = today - timedelta(days=30)
         
-        # Monthly sales
-        monthly_query = self.db.query(
-            func.count(Invoice.id).label('count'),
-            func.sum(Invoice.total_amount).label('total')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= from_date,
-            Invoice.invoice_date <= to_date
-        ).first()
+        # Daily totals per status covering today, the last 7 days and the period
+        today_sales = weekly_sales = monthly_sales = Decimal("0")
+        sales_by_status = {}
+        for row in rollups.summarize(
+            company.id, min(week_ago, from_date), max(today, to_date), group_by=("sale_date", "status")
+        ):
+            if not row.invoice_count:
+                continue
+            day = row.sale_date
+            total = row.total_amount or Decimal("0")
+            if day == today:
+                today_sales += total
+            if week_ago <= day <= today:
+                weekly_sales += total
+            if from_date <= day <= to_date:
+                monthly_sales += total
+                sales_by_status[row.status] = sales_by_status.get(row.status, 0.0) + float(total)
         
         # Pending payments
-        pending_query = self.db.query(
-            func.sum(Invoice.balance_due).label('total_pending'),
-            func.count(Invoice.id).label('count')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIALLY_PAID])
-        ).first()
+        pending = rollups.totals(
+            company.id, statuses=[InvoiceStatus.PENDING, InvoiceStatus.PARTIALLY_PAID]
+        )
         
         # Top customers (last 30 days)
-        thirty_days_ago = today - timedelta(days=30)
-        top_customers = self.db.query(
-            Invoice.customer_name,
-            func.count(Invoice.id).label('invoice_count'),
-            func.sum(Invoice.total_amount).label('total_amount')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= thirty_days_ago,
-            Invoice.invoice_date <= today
-        ).group_by(Invoice.customer_name).order_by(
-            func.sum(Invoice.total_amount).desc()
-        ).limit(5).all()
+        top_customers = rollups.top_customers(company.id, thirty_days_ago, today, limit=5)
         
         # Recent invoices
         recent_invoices = self.db.query(Invoice).filter(
@@ -744,26 +738,11 @@ class InvoiceService:
             Invoice.created_at.desc()
         ).limit(5).all()
         
-        # Sales by status
-        sales_by_status = {}
-        status_query = self.db.query(
-            Invoice.status,
-            func.sum(Invoice.total_amount).label('total_amount'),
-            func.count(Invoice.id).label('count')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= from_date,
-            Invoice.invoice_date <= to_date
-        ).group_by(Invoice.status).all()
-        
-        for status, amount, count in status_query:
-            sales_by_status[status.value] = float(amount or 0)
-        
         return {
-            "today_sales": today_query.total or Decimal("0"),
-            "weekly_sales": weekly_query.total or Decimal("0"),
-            "monthly_sales": monthly_query.total or Decimal("0"),
-            "total_pending": pending_query.total_pending or Decimal("0"),
+            "today_sales": today_sales,
+            "weekly_sales": weekly_sales,
+            "monthly_sales": monthly_sales,
+            "total_pending": pending.balance_due or Decimal("0"),
             "top_customers": [
                 {
                     "customer_name": row.customer_name or "Walk-in Customer",
@@ -778,7 +757,8 @@ class InvoiceService:
     
     def get_total_invoices_count(self, company: Company) -> int:
         """Get total number of invoices for a company."""
-        return self.db.query(Invoice).filter(Invoice.company_id == company.id).count()
+        query = self.db.query(Invoice).filter(Invoice.company_id == company.id)
+        return listing_totals(query, Invoice, company.id, {})["total"]
 
     def update_invoice(self, invoice: Invoice, data: InvoiceUpdate, company: Company) -> Invoice:
         """Update an invoice."""
@@ -1092,63 +1072,35 @@ class InvoiceService:
         today = datetime.utcnow()
         first_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        # Total counts and amounts
-        total_invoices = self.db.query(Invoice).filter(
-            Invoice.company_id == company.id
-        ).count()
-        
-        # Revenue (paid invoices)
-        total_revenue = self.db.query(func.sum(Invoice.amount_paid)).filter(
-            Invoice.company_id == company.id
-        ).scalar() or Decimal("0")
+        # All-time and current-month totals per status, from the sales rollup
+        rollups = SalesRollupService(self.db)
+        all_time = rollups.summarize(company.id, group_by=("status",))
+        this_month = rollups.summarize(company.id, from_date=first_of_month.date(), group_by=("status",))
         
-        # Pending amount
-        total_pending = self.db.query(func.sum(Invoice.balance_due)).filter(
-            Invoice.company_id == company.id,
-            Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIALLY_PAID])
-        ).scalar() or Decimal("0")
-        
-        # Overdue
-        overdue_count = self.db.query(Invoice).filter(
-            Invoice.company_id == company.id,
-            Invoice.status == InvoiceStatus.OVERDUE
-        ).count()
+        def total(rows, column, statuses=None, exclude=None):
+            return sum(
+                (getattr(row, column) or 0 for row in rows
+                 if (statuses is None or row.status in statuses) and (exclude is None or row.status not in exclude)),
+                Decimal("0") if column != "invoice_count" else 0,
+            )
         
-        overdue_amount = self.db.query(func.sum(Invoice.balance_due)).filter(
-            Invoice.company_id == company.id,
-            Invoice.status == InvoiceStatus.OVERDUE
-        ).scalar() or Decimal("0")
+        pending = {InvoiceStatus.PENDING.value, InvoiceStatus.PARTIALLY_PAID.value}
+        overdue = {InvoiceStatus.OVERDUE.value}
+        billed = {InvoiceStatus.PAID.value, InvoiceStatus.PARTIALLY_PAID.value, InvoiceStatus.PENDING.value}
+        cancelled = {InvoiceStatus.CANCELLED.value}
         
-        # Current month
-        current_month_revenue = self.db.query(func.sum(Invoice.total_amount)).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= first_of_month,
-            Invoice.status.in_([InvoiceStatus.PAID, InvoiceStatus.PARTIALLY_PAID, InvoiceStatus.PENDING])
-        ).scalar() or Decimal("0")
-        
-        current_month_invoices = self.db.query(Invoice).filter(
-            Invoice.company_id == company.id,
-            Invoice.invoice_date >= first_of_month
-        ).count()
+        total_invoices = total(all_time, "invoice_count")
+        total_revenue = total(all_time, "amount_paid")  # Revenue (paid invoices)
+        total_pending = total(all_time, "balance_due", pending)
+        overdue_count = total(all_time, "invoice_count", overdue)
+        overdue_amount = total(all_time, "balance_due", overdue)
+        current_month_revenue = total(this_month, "total_amount", billed)
+        current_month_invoices = total(this_month, "invoice_count")
         
         # GST totals
-        gst_totals = self.db.query(
-            func.sum(Invoice.cgst_amount).label('cgst'),
-            func.sum(Invoice.sgst_amount).label('sgst'),
-            func.sum(Invoice.igst_amount).label('igst')
-        ).filter(
-            Invoice.company_id == company.id,
-            Invoice.status != InvoiceStatus.CANCELLED
-        ).first()
-        
-        # Handle case where gst_totals might be None
-        total_cgst = Decimal("0")
-        total_sgst = Decimal("0")
-        total_igst = Decimal("0")
-        if gst_totals:
-            total_cgst = gst_totals.cgst or Decimal("0")
-            total_sgst = gst_totals.sgst or Decimal("0")
-            total_igst = gst_totals.igst or Decimal("0")
+        total_cgst = total(all_time, "cgst_amount", exclude=cancelled)
+        total_sgst = total(all_time, "sgst_amount", exclude=cancelled)
+        total_igst = total(all_time, "igst_amount", exclude=cancelled)
         
         return {
             "total_invoices": total_invoices,
@@ -0,0 +1,221 @@
+"""Listing pagination - keyset pages and cached totals for document lists.
+
+Invoice, quotation, purchase, purchase-order and delivery-challan listings
+ran a COUNT, then a separately filtered SUM query, then an OFFSET/LIMIT page:
+three passes over the same ``ilike('%term%')`` filters, and deep pages read
+and threw away every earlier row. Now:
+
+- pages are keyset paginated on (created_at, id), newest first, served by a
+  (company_id, created_at, id) index. A page is ``(created_at, id) < cursor
+  ORDER BY created_at DESC, id DESC LIMIT n + 1``, as cheap on page 1000 as
+  on page 1; ``next_cursor`` is the opaque key of the page's last row.
+  ``page`` numbers still work (with OFFSET) for existing clients;
+- the count and sums are optional and come from one aggregate over the
+  filtered query, cached for ``LISTING_TOTALS_CACHE_TTL`` seconds per
+  company, document table and filter signature. Committing (or rolling
+  back) an ORM write of a document bumps that company and table's
+  generation, which is part of the key, so this process never serves totals
+  older than its own writes; other workers' writes show within the TTL.
+  Per-group totals (purchase orders by currency) come from the same
+  aggregate grouped by that column, so the overall count and sums are added
+  up from the groups instead of a second pass.
+"""
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query, Session
+
+from app.config import settings
+
+
+PENDING_KEY = "listing_totals_pending"
+
+
+# ==================== CURSORS ====================
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Opaque cursor for the row a page ended with."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(
+    query: Query,
+    model: Any,
+    page_size: int,
+    cursor: Optional[str] = None,
+    page: Optional[int] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of ``query``, newest first, and the cursor of the next page.
+
+    Rows after ``cursor`` when given; otherwise page ``page`` by offset
+    (1 = first page, which needs no offset).
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id),
+        ))
+    elif page and page > 1:
+        query = query.offset((page - 1) * page_size)
+
+    rows = query.limit(page_size + 1).all()
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    if last.created_at is None:
+        return rows, None
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+# ==================== TOTALS ====================
+
+class TotalsCache:
+    """Thread-safe LRU cache of listing aggregates with per-entry expiry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, table: str, company_id: str) -> int:
+        return self._generations.get((table, company_id), 0)
+
+    def bump(self, table: str, company_id: str) -> None:
+        with self._lock:
+            key = (table, company_id)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry[1])
+
+    def set(self, key: Hashable, totals: Dict[str, Any]) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, dict(totals))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+totals_cache = TotalsCache(
+    maxsize=settings.LISTING_TOTALS_CACHE_SIZE,
+    ttl=settings.LISTING_TOTALS_CACHE_TTL,
+)
+
+
+def _signature(filters: Mapping[str, Any]) -> str:
+    return json.dumps({name: value for name, value in filters.items() if value not in (None, "")},
+                      sort_keys=True, default=str)
+
+
+def listing_totals(
+    query: Query,
+    model: Any,
+    company_id: str,
+    filters: Mapping[str, Any],
+    sums: Optional[Mapping[str, Any]] = None,
+    group_by: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    ``{"total": count, <name>: sum, ...}`` of a filtered listing query.
+
+    ``filters`` are the listing's filter arguments (they key the cache and
+    must fully determine the query); ``sums`` maps result names to columns.
+    With ``group_by`` the result also has ``"groups"``: the same totals per
+    value of that column, as a list of ``(value, totals)`` pairs.
+    """
+    sums = sums or {}
+    table = model.__tablename__
+    key = (
+        table, company_id, totals_cache.generation(table, company_id), _signature(filters), tuple(sums),
+        None if group_by is None else group_by.key,
+    )
+    cached = totals_cache.get(key)
+    if cached is not None:
+        return cached
+
+    aggregates = [
+        func.count(model.id),
+        *[func.coalesce(func.sum(column), 0) for column in sums.values()],
+    ]
+    query = query.order_by(None)
+    if group_by is None:
+        totals = _totals_row(query.with_entities(*aggregates).one(), sums)
+    else:
+        rows = query.with_entities(group_by, *aggregates).group_by(group_by).all()
+        groups = [(row[0], _totals_row(row[1:], sums)) for row in rows]
+        totals = {"total": sum(group["total"] for _, group in groups)}
+        for name in sums:
+            totals[name] = sum((group[name] for _, group in groups), Decimal("0"))
+        totals["groups"] = groups
+    totals_cache.set(key, totals)
+    return totals
+
+
+def _totals_row(row: Any, sums: Mapping[str, Any]) -> Dict[str, Any]:
+    totals = {"total": row[0] or 0}
+    for name, value in zip(sums, row[1:]):
+        totals[name] = Decimal(str(value or 0))
+    return totals
+
+
+# ==================== INVALIDATION (session events) ====================
+
+LISTED_TABLES = ("invoices", "quotations", "purchases", "purchase_orders", "delivery_challans")
+
+
+def collect_pending(session: Session) -> None:
+    """``before_flush`` hook: remember the companies whose listed documents change."""
+    pending: Optional[Set[Tuple[str, str]]] = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(type(obj), "__tablename__", None)
+        if table not in LISTED_TABLES:
+            continue
+        company_id = getattr(obj, "company_id", None)
+        if company_id:
+            if pending is None:
+                pending = session.info.setdefault(PENDING_KEY, set())
+            pending.add((table, company_id))
+
+
+def bump_pending(session: Session) -> None:
+    """``after_commit`` / ``after_rollback`` hook: retire totals cached before the write ended."""
+    for table, company_id in session.info.pop(PENDING_KEY, ()):
+        totals_cache.bump(table, company_id)
@@ -572,6 +572,18 @@ class LoanService:
         
         return pending_emis
     
+    def get_pending_emis_by_employee(
+        self,
+        company_id: str,
+        payroll_month: int,
+        payroll_year: int,
+    ) -> Dict[str, List[Dict]]:
+        """Pending EMIs for a payroll run, grouped by employee_id."""
+        by_employee: Dict[str, List[Dict]] = {}
+        for emi in self.get_pending_emis_for_payroll(company_id, payroll_month, payroll_year):
+            by_employee.setdefault(emi["employee_id"], []).append(emi)
+        return by_employee
+    
     def get_loan_statement(self, loan_id: str) -> Dict:
         """Generate loan statement with all details and repayment history."""
         loan = self.db.query(EmployeeLoan).filter(EmployeeLoan.id == loan_id).first()
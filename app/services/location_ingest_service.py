@@ -0,0 +1,336 @@
+"""Location Ingest Service - high-volume GPS fix ingestion for field engineers.
+
+Engineers post a fix every 5-10 seconds, and the mobile app also uploads
+buffered fixes in batches after being offline. Per batch this service:
+
+- drops duplicate fixes (same device and timestamp), within the batch and
+  against fixes already stored,
+- updates ``EngineerTrackingStatus`` once, with the latest fix, in a single
+  ``UPDATE ... RETURNING current_trip_id``,
+- attributes each fix to the trip whose start/end window contains its
+  ``recorded_at`` (one query for the batch's time span), so an offline batch
+  from an earlier trip is not written into the current one; fixes outside
+  every trip get no trip. Only the newest fix, if it moved the live
+  position, falls back to the status row's current trip,
+- inserts all ``LocationLog`` rows with one multi-row INSERT.
+
+After the commit the latest fix is published to the company's live tracking
+topic (``tracking_hub``), unless a newer live position was already stored
+(a late offline batch must not move the map back).
+
+Device bindings and the existence of a tracking status row rarely change, so
+they are remembered in process (``tracking_lookup_cache``) instead of being
+re-queried on every ping.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import case, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.database.tracking_models import (
+    EngineerTrackingStatus, FraudFlagReason, LocationLog, SalesEngineerDevice,
+    TrackingStatus, Trip, TripStatus, generate_uuid,
+)
+from app.services.tracking_hub import company_topic, tracking_hub
+
+
+class LookupCache:
+    """Small thread-safe LRU set with a TTL, for "known to exist" lookups."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_where(self, predicate) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+
+class TrackingLookupCache:
+    """In-process cache of device bindings and tracking status rows."""
+
+    def __init__(self):
+        self.devices = LookupCache()
+        self.statuses = LookupCache()
+
+    def invalidate_engineer(self, company_id: str, engineer_id: str) -> None:
+        """Forget an engineer's device bindings (call after re-binding)."""
+        self.devices.discard_where(lambda key: key[:2] == (company_id, engineer_id))
+
+
+tracking_lookup_cache = TrackingLookupCache()
+
+
+class LocationIngestService:
+    """Service for storing GPS fixes of field engineers."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.cache = tracking_lookup_cache
+
+    def ingest(
+        self,
+        company_id: str,
+        engineer_id: str,
+        fixes: List[Dict[str, Any]],
+        skip_existing: bool = True,
+    ) -> Dict[str, Any]:
+        """Store a batch of fixes and move the live position to the latest one.
+
+        Each fix is a dict with the ``LocationLog`` fields (``latitude``,
+        ``longitude``, ``device_id``, ``recorded_at``, ...). With
+        ``skip_existing`` fixes already stored for the same device and
+        timestamp are ignored, so a retried upload is harmless.
+        """
+        unique: Dict[tuple, Dict[str, Any]] = {}
+        for fix in fixes:
+            unique.setdefault((fix["device_id"], fix["recorded_at"]), fix)
+
+        if skip_existing and unique:
+            for key in self._get_stored_keys(engineer_id, list(unique.values())):
+                unique.pop(key, None)
+
+        new_fixes = sorted(unique.values(), key=lambda fix: fix["recorded_at"])
+        result = {
+            "received": len(fixes),
+            "stored": len(new_fixes),
+            "duplicates": len(fixes) - len(new_fixes),
+            "latest_fix": None,
+            "trip_id": None,
+        }
+        if not new_fixes:
+            return result
+
+        for device_id in {fix["device_id"] for fix in new_fixes}:
+            self._ensure_device_binding(company_id, engineer_id, device_id)
+
+        latest = new_fixes[-1]
+        has_mock = any(fix.get("is_mock_location") for fix in new_fixes)
+        current_trip_id, moved = self._update_tracking_status(company_id, engineer_id, latest, has_mock)
+
+        trip_ids = self._resolve_trips(company_id, engineer_id, new_fixes)
+        if trip_ids[-1] is None and moved:
+            trip_ids[-1] = current_trip_id
+        trip_id = trip_ids[-1]
+
+        self.db.execute(insert(LocationLog), [
+            {
+                "id": generate_uuid(),
+                "company_id": company_id,
+                "engineer_id": engineer_id,
+                "trip_id": fix_trip_id,
+                "latitude": fix["latitude"],
+                "longitude": fix["longitude"],
+                "accuracy": fix.get("accuracy"),
+                "altitude": fix.get("altitude"),
+                "speed": fix.get("speed"),
+                "heading": fix.get("heading"),
+                "device_id": fix["device_id"],
+                "is_mock_location": bool(fix.get("is_mock_location")),
+                "is_background": bool(fix.get("is_background")),
+                "recorded_at": fix["recorded_at"],
+            }
+            for fix, fix_trip_id in zip(new_fixes, trip_ids)
+        ])
+
+        mock_trip_ids = {
+            fix_trip_id for fix, fix_trip_id in zip(new_fixes, trip_ids)
+            if fix_trip_id and fix.get("is_mock_location")
+        }
+        if mock_trip_ids:
+            # Flag the trips the fake GPS fixes were recorded in
+            self.db.query(Trip).filter(Trip.id.in_(mock_trip_ids)).update({
+                Trip.has_fraud_flag: True,
+                Trip.fraud_reason: FraudFlagReason.FAKE_GPS_DETECTED,
+                Trip.fraud_score: 100,
+            }, synchronize_session=False)
+
+        self.db.commit()
+
+        if moved:
+            self._publish(company_id, engineer_id, trip_id, latest)
+
+        result["latest_fix"] = latest
+        result["trip_id"] = trip_id
+        return result
+
+    def _publish(self, company_id: str, engineer_id: str, trip_id: Optional[str], latest: Dict[str, Any]) -> None:
+        """Send the new live position to the company's map subscribers."""
+        tracking_hub.publish_threadsafe(company_topic(company_id), {
+            "type": "location_update",
+            "engineer_id": engineer_id,
+            "trip_id": trip_id,
+            "latitude": latest["latitude"],
+            "longitude": latest["longitude"],
+            "accuracy": latest.get("accuracy"),
+            "speed": latest.get("speed"),
+            "heading": latest.get("heading"),
+            "is_mock_location": bool(latest.get("is_mock_location")),
+            "recorded_at": latest["recorded_at"].isoformat(),
+        })
+
+    def _resolve_trips(
+        self,
+        company_id: str,
+        engineer_id: str,
+        fixes: List[Dict[str, Any]],
+    ) -> List[Optional[str]]:
+        """Trip id for each fix (sorted by time): the trip it was recorded in, or None."""
+        first, last = fixes[0]["recorded_at"], fixes[-1]["recorded_at"]
+        trips = self.db.query(Trip.id, Trip.start_time, Trip.end_time).filter(
+            Trip.company_id == company_id,
+            Trip.engineer_id == engineer_id,
+            Trip.status != TripStatus.CANCELLED.value,
+            Trip.start_time <= last,
+            or_(Trip.end_time.is_(None), Trip.end_time >= first),
+        ).order_by(Trip.start_time.desc()).all()
+
+        trip_ids: List[Optional[str]] = []
+        for fix in fixes:
+            recorded_at = fix["recorded_at"]
+            trip_ids.append(next(
+                (
+                    trip.id for trip in trips
+                    if trip.start_time <= recorded_at and (trip.end_time is None or recorded_at <= trip.end_time)
+                ),
+                None,
+            ))
+        return trip_ids
+
+    def _get_stored_keys(self, engineer_id: str, fixes: List[Dict[str, Any]]) -> set:
+        """(device_id, recorded_at) pairs of ``fixes`` that are already stored."""
+        timestamps = [fix["recorded_at"] for fix in fixes]
+        rows = self.db.query(LocationLog.device_id, LocationLog.recorded_at).filter(
+            LocationLog.engineer_id == engineer_id,
+            LocationLog.device_id.in_({fix["device_id"] for fix in fixes}),
+            LocationLog.recorded_at >= min(timestamps),
+            LocationLog.recorded_at <= max(timestamps),
+        ).all()
+        return {(device_id, recorded_at) for device_id, recorded_at in rows}
+
+    def _ensure_device_binding(self, company_id: str, engineer_id: str, device_id: str) -> None:
+        """Auto-bind an unknown device (web clients), as single updates always did."""
+        key = (company_id, engineer_id, device_id)
+        if key in self.cache.devices:
+            return
+
+        exists = self.db.query(SalesEngineerDevice.id).filter(
+            SalesEngineerDevice.company_id == company_id,
+            SalesEngineerDevice.engineer_id == engineer_id,
+            SalesEngineerDevice.device_id == device_id,
+            SalesEngineerDevice.is_active == True
+        ).first()
+
+        if not exists:
+            self.db.add(SalesEngineerDevice(
+                company_id=company_id,
+                engineer_id=engineer_id,
+                device_id=device_id,
+                device_model="web",
+                device_os="web",
+                device_version="browser",
+                background_tracking_enabled=True,
+                is_active=True
+            ))
+        self.cache.devices.add(key)
+
+    def _update_tracking_status(
+        self,
+        company_id: str,
+        engineer_id: str,
+        latest: Dict[str, Any],
+        has_mock: bool,
+    ) -> Tuple[Optional[str], bool]:
+        """Move the live position to ``latest``.
+
+        Buffered uploads can arrive after newer live pings, so the position
+        only moves if ``latest`` is newer than the stored one. Returns the
+        current trip id and whether the position moved.
+        """
+        key = (company_id, engineer_id)
+        recorded_at: datetime = latest["recorded_at"]
+        is_newer = or_(
+            EngineerTrackingStatus.last_location_update.is_(None),
+            EngineerTrackingStatus.last_location_update <= recorded_at,
+        )
+        values = {
+            EngineerTrackingStatus.current_lat: case((is_newer, latest["latitude"]), else_=EngineerTrackingStatus.current_lat),
+            EngineerTrackingStatus.current_lng: case((is_newer, latest["longitude"]), else_=EngineerTrackingStatus.current_lng),
+            EngineerTrackingStatus.device_id: case((is_newer, latest["device_id"]), else_=EngineerTrackingStatus.device_id),
+            EngineerTrackingStatus.last_location_update: case((is_newer, recorded_at), else_=EngineerTrackingStatus.last_location_update),
+            EngineerTrackingStatus.is_online: True,
+        }
+        if has_mock:
+            # Flag for fake GPS
+            values[EngineerTrackingStatus.has_fraud_flag] = True
+
+        if key in self.cache.statuses:
+            row = self.db.execute(
+                update(EngineerTrackingStatus)
+                .where(
+                    EngineerTrackingStatus.company_id == company_id,
+                    EngineerTrackingStatus.engineer_id == engineer_id,
+                )
+                .values(values)
+                .returning(
+                    EngineerTrackingStatus.current_trip_id,
+                    EngineerTrackingStatus.last_location_update,
+                )
+                .execution_options(synchronize_session=False)
+            ).first()
+            if row is not None:
+                return row.current_trip_id, row.last_location_update == recorded_at
+
+        tracking_status = self.db.query(EngineerTrackingStatus).filter(
+            EngineerTrackingStatus.company_id == company_id,
+            EngineerTrackingStatus.engineer_id == engineer_id
+        ).first()
+
+        if not tracking_status:
+            tracking_status = EngineerTrackingStatus(
+                company_id=company_id,
+                engineer_id=engineer_id,
+                status=TrackingStatus.IDLE,
+                current_trip_id=None,
+                gps_enabled=True
+            )
+            self.db.add(tracking_status)
+
+        moved = tracking_status.last_location_update is None or tracking_status.last_location_update <= recorded_at
+        if moved:
+            tracking_status.current_lat = latest["latitude"]
+            tracking_status.current_lng = latest["longitude"]
+            tracking_status.device_id = latest["device_id"]
+            tracking_status.last_location_update = recorded_at
+        tracking_status.is_online = True
+        if has_mock:
+            tracking_status.has_fraud_flag = True
+
+        self.db.flush()
+        self.cache.statuses.add(key)
+        return tracking_status.current_trip_id, moved
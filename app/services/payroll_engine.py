@@ -0,0 +1,327 @@
+"""
+Payroll Engine - salary computation for a whole payroll run.
+
+Computing salaries one employee at a time costs several queries per
+employee (salary structure, PF/ESI settings, PT slabs, tax declaration) and
+re-reads every active loan of the company for each of them. The engine
+instead loads everything a run needs in a few set queries into a
+``PayrollContext`` and computes each breakdown in memory, using the
+statutory calculations of the PF, ESI, PT and TDS services.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from dataclasses import dataclass, field, replace
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.database.payroll_models import (
+    Employee, SalaryComponent, EmployeeSalaryStructure, EmployeeTaxDeclaration,
+    PayrollSettings, SalaryComponentType,
+)
+from app.services.pf_service import PFService
+from app.services.esi_service import ESIService
+from app.services.pt_service import PTService
+from app.services.salary_tds_service import SalaryTDSService
+from app.services.loan_service import LoanService
+
+
+@dataclass
+class SalaryBreakdown:
+    """Complete salary breakdown for an employee."""
+    employee_id: str
+    employee_name: str
+    earnings: Dict[str, Decimal]
+    deductions: Dict[str, Decimal]
+    employer_contributions: Dict[str, Decimal]
+    gross_salary: Decimal
+    total_deductions: Decimal
+    net_pay: Decimal
+    ctc_monthly: Decimal
+
+
+@dataclass
+class PayrollContext:
+    """Everything needed to compute salaries of a company for one month."""
+    company_id: str
+    month: int
+    year: int
+    financial_year: str
+    settings: Optional[PayrollSettings]
+    # {state_code: slabs} - custom slabs only, defaults apply to other states
+    pt_slabs: Dict[str, List[Tuple[Decimal, Decimal, Optional[Decimal]]]]
+    # {employee_id: [(component_code, component_type, amount), ...]}
+    structures: Dict[str, List[Tuple[str, SalaryComponentType, Decimal]]]
+    declarations: Dict[str, EmployeeTaxDeclaration]
+    # {employee_id: [pending EMI dicts]}
+    loan_emis: Dict[str, List[Dict]] = field(default_factory=dict)
+
+    def for_employees(self, employee_ids: Iterable[str]) -> "PayrollContext":
+        """The part of the context a subset of employees needs."""
+        ids = set(employee_ids)
+        return replace(
+            self,
+            structures={k: v for k, v in self.structures.items() if k in ids},
+            declarations={k: v for k, v in self.declarations.items() if k in ids},
+            loan_emis={k: v for k, v in self.loan_emis.items() if k in ids},
+        )
+
+
+# Employee columns the computation reads. Querying just these gives light,
+# picklable rows that can be shipped to worker processes.
+EMPLOYEE_COLUMNS = (
+    Employee.id,
+    Employee.company_id,
+    Employee.employee_code,
+    Employee.first_name,
+    Employee.last_name,
+    Employee.full_name,
+    Employee.pf_applicable,
+    Employee.esi_applicable,
+    Employee.pt_applicable,
+    Employee.work_state,
+    Employee.current_state,
+    Employee.tax_regime,
+)
+
+
+def current_financial_year(today: Optional[date] = None) -> str:
+    """Financial year (e.g. "2024-2025") TDS is projected for."""
+    today = today or date.today()
+    if today.month >= 4:
+        return f"{today.year}-{today.year + 1}"
+    return f"{today.year - 1}-{today.year}"
+
+
+class PayrollEngine:
+    """Batch salary computation for payroll runs."""
+
+    def __init__(self, db: Optional[Session]):
+        self.db = db
+        self.pf_service = PFService(db)
+        self.esi_service = ESIService(db)
+        self.pt_service = PTService(db)
+        self.tds_service = SalaryTDSService(db)
+        self.loan_service = LoanService(db)
+
+    def _round_amount(self, amount: Decimal) -> Decimal:
+        """Round to 2 decimal places."""
+        return amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    # ==================== PRELOADING ====================
+
+    def load_context(
+        self,
+        company_id: str,
+        month: int,
+        year: int,
+        employee_ids: Optional[List[str]] = None,
+    ) -> PayrollContext:
+        """
+        Load settings, PT slabs, salary structures, tax declarations and due
+        EMIs for a payroll month.
+
+        Without ``employee_ids`` structures and declarations are loaded for
+        the whole company.
+        """
+        financial_year = current_financial_year()
+
+        settings = self.db.query(PayrollSettings).filter(
+            PayrollSettings.company_id == company_id
+        ).first()
+
+        structure_query = self.db.query(
+            EmployeeSalaryStructure.employee_id,
+            EmployeeSalaryStructure.amount,
+            SalaryComponent.code,
+            SalaryComponent.component_type,
+        ).join(
+            SalaryComponent, EmployeeSalaryStructure.component_id == SalaryComponent.id
+        ).filter(
+            SalaryComponent.company_id == company_id,
+            EmployeeSalaryStructure.is_active == True,
+        )
+        declaration_query = self.db.query(EmployeeTaxDeclaration).join(
+            Employee, EmployeeTaxDeclaration.employee_id == Employee.id
+        ).filter(
+            Employee.company_id == company_id,
+            EmployeeTaxDeclaration.financial_year == financial_year,
+        )
+        if employee_ids is not None:
+            structure_query = structure_query.filter(EmployeeSalaryStructure.employee_id.in_(employee_ids))
+            declaration_query = declaration_query.filter(EmployeeTaxDeclaration.employee_id.in_(employee_ids))
+
+        structures: Dict[str, List[Tuple[str, SalaryComponentType, Decimal]]] = {}
+        for row in structure_query.all():
+            structures.setdefault(row.employee_id, []).append(
+                (row.code, row.component_type, row.amount or Decimal("0"))
+            )
+
+        declarations: Dict[str, EmployeeTaxDeclaration] = {}
+        for declaration in declaration_query.all():
+            declarations.setdefault(declaration.employee_id, declaration)
+
+        # Detach, so commits during a run do not expire them (and they can be
+        # pickled to worker processes)
+        for instance in [settings, *declarations.values()]:
+            if instance is not None:
+                self.db.expunge(instance)
+
+        return PayrollContext(
+            company_id=company_id,
+            month=month,
+            year=year,
+            financial_year=financial_year,
+            settings=settings,
+            pt_slabs=self.pt_service.get_company_pt_slabs(company_id),
+            structures=structures,
+            declarations=declarations,
+            loan_emis=self.loan_service.get_pending_emis_by_employee(company_id, month, year),
+        )
+
+    # ==================== COMPUTATION ====================
+
+    def calculate(
+        self,
+        employee: Employee,
+        context: PayrollContext,
+        working_days: int = 30,
+        days_worked: int = 30,
+        lop_days: int = 0,
+    ) -> SalaryBreakdown:
+        """
+        Calculate complete salary for an employee from a preloaded context.
+
+        ``employee`` may be an ``Employee`` or a row of ``EMPLOYEE_COLUMNS``.
+        Runs no queries.
+        """
+        earnings = {}
+        basic_amount = Decimal("0")
+        hra_amount = Decimal("0")
+        gross_salary = Decimal("0")
+
+        # Calculate earnings
+        for code, component_type, amount in context.structures.get(employee.id, []):
+            if component_type != SalaryComponentType.EARNING:
+                continue
+
+            # Apply LOP
+            if lop_days > 0 and working_days > 0:
+                per_day = amount / working_days
+                amount = self._round_amount(amount - (per_day * lop_days))
+
+            earnings[code] = amount
+            gross_salary += amount
+
+            if code == "BASIC":
+                basic_amount = amount
+            elif code == "HRA":
+                hra_amount = amount
+
+        deductions = {}
+        employer_contributions = {}
+
+        # Calculate PF
+        if employee.pf_applicable:
+            pf_result = self.pf_service.calculate_pf(
+                basic_salary=basic_amount,
+                settings=context.settings,
+            )
+            if pf_result:
+                deductions["PF_EMP"] = pf_result.employee_pf
+                employer_contributions["PF_ER"] = pf_result.employer_total
+                employer_contributions["PF_ADMIN"] = pf_result.pf_admin_charges
+                employer_contributions["EDLI"] = pf_result.edli
+
+        # Calculate ESI
+        if employee.esi_applicable:
+            esi_result = self.esi_service.calculate_esi(
+                gross_salary=gross_salary,
+                employee=employee,
+                settings=context.settings,
+            )
+            if esi_result.is_applicable:
+                deductions["ESI_EMP"] = esi_result.employee_esi
+                employer_contributions["ESI_ER"] = esi_result.employer_esi
+
+        # Calculate PT
+        if employee.pt_applicable:
+            pt_result = self.pt_service.calculate_pt_for_employee(
+                employee=employee,
+                gross_salary=gross_salary,
+                month=context.month,
+                company_slabs=context.pt_slabs,
+            )
+            if pt_result.is_applicable:
+                deductions["PT"] = pt_result.pt_amount
+
+        # Calculate TDS on the projected annual salary
+        tds_result = self.tds_service.calculate_annual_tds(
+            employee=employee,
+            annual_gross_salary=gross_salary * 12,
+            annual_basic=basic_amount * 12,
+            annual_hra=hra_amount * 12,
+            financial_year=context.financial_year,
+            declaration=context.declarations.get(employee.id),
+            load_declaration=False,
+        )
+        deductions["TDS"] = tds_result.monthly_tds
+
+        # Loan EMIs
+        loan_deductions = Decimal("0")
+        for loan in context.loan_emis.get(employee.id, []):
+            loan_deductions += Decimal(str(loan["emi_amount"]))
+
+        if loan_deductions > 0:
+            deductions["LOAN"] = loan_deductions
+
+        total_deductions = sum(deductions.values())
+        net_pay = gross_salary - total_deductions
+
+        # Calculate CTC
+        ctc_monthly = gross_salary + sum(employer_contributions.values())
+
+        return SalaryBreakdown(
+            employee_id=employee.id,
+            employee_name=employee.full_name or f"{employee.first_name} {employee.last_name}",
+            earnings=earnings,
+            deductions=deductions,
+            employer_contributions=employer_contributions,
+            gross_salary=gross_salary,
+            total_deductions=total_deductions,
+            net_pay=net_pay,
+            ctc_monthly=ctc_monthly,
+        )
+
+    @staticmethod
+    def entry_values(
+        payroll_run_id: str,
+        breakdown: SalaryBreakdown,
+        working_days: int,
+    ) -> Dict[str, Any]:
+        """``PayrollEntry`` column values for a computed breakdown."""
+        employer_total = sum(breakdown.employer_contributions.values(), Decimal("0"))
+        return {
+            "payroll_run_id": payroll_run_id,
+            "employee_id": breakdown.employee_id,
+            "total_working_days": working_days,
+            "days_worked": working_days,
+            # JSON columns - store amounts as numbers
+            "earnings": {k: float(v) for k, v in breakdown.earnings.items()},
+            "total_earnings": breakdown.gross_salary,
+            "deductions": {k: float(v) for k, v in breakdown.deductions.items()},
+            "total_deductions": breakdown.total_deductions,
+            "employer_contributions": {k: float(v) for k, v in breakdown.employer_contributions.items()},
+            "total_employer_contributions": employer_total,
+            "basic_for_pf": breakdown.earnings.get("BASIC", Decimal("0")),
+            "gross_for_esi": breakdown.gross_salary,
+            "pf_employee": breakdown.deductions.get("PF_EMP", Decimal("0")),
+            "pf_employer": breakdown.employer_contributions.get("PF_ER", Decimal("0")),
+            "esi_employee": breakdown.deductions.get("ESI_EMP", Decimal("0")),
+            "esi_employer": breakdown.employer_contributions.get("ESI_ER", Decimal("0")),
+            "professional_tax": breakdown.deductions.get("PT", Decimal("0")),
+            "tds": breakdown.deductions.get("TDS", Decimal("0")),
+            "total_loan_deductions": breakdown.deductions.get("LOAN", Decimal("0")),
+            "gross_salary": breakdown.gross_salary,
+            "net_pay": breakdown.net_pay,
+        }
@@ -0,0 +1,439 @@
+"""
+Payroll Job Service - background, chunked and resumable payroll processing.
+
+Processing a large company in one request and one transaction times out
+and leaves the run stuck in ``PROCESSING``. Instead:
+
+1. ``start`` claims the run (atomically, so two workers never process the
+   same run) and the job is handed to a background thread
+   (``submit_payroll_job``);
+2. the job loads a ``PayrollContext`` once, splits the employees without an
+   entry into chunks and computes them on a process pool - the PF/ESI/PT/TDS
+   math is pure CPU over Decimal;
+3. each chunk's entries are upserted on (payroll_run_id, employee_id) and
+   committed together with the run's progress and per-employee errors;
+4. run totals are aggregated from the entries at the end.
+
+The heartbeat is refreshed every few seconds while a chunk computes (after
+each employee in-thread, while waiting on the pool otherwise), so a slow
+chunk is never mistaken for a dead job. A job that dies stops updating it. Once it is older than
+``PAYROLL_STALE_AFTER_SECONDS`` the run can be started again (or is picked
+up by ``resume_stale_payroll_runs`` at startup) and continues with the
+employees that have no entry yet.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.payroll_models import (
+    Employee, EmployeeStatus, PayrollEntry, PayrollRun, PayrollRunStatus,
+)
+from app.services.payroll_engine import EMPLOYEE_COLUMNS, PayrollContext, PayrollEngine
+
+
+# PayrollEntry columns replaced when a chunk is re-processed
+ENTRY_UPDATE_COLUMNS = [
+    "total_working_days", "days_worked", "earnings", "total_earnings",
+    "deductions", "total_deductions", "employer_contributions",
+    "total_employer_contributions", "basic_for_pf", "gross_for_esi",
+    "pf_employee", "pf_employer", "esi_employee", "esi_employer",
+    "professional_tax", "tds", "total_loan_deductions", "gross_salary", "net_pay",
+]
+
+_job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="payroll-job")
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared worker processes for payroll computation (None = compute in-thread)."""
+    global _process_pool
+    if settings.PAYROLL_WORKER_PROCESSES <= 1:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: never fork a process that holds DB connections and threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.PAYROLL_WORKER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker died) so the next job starts a new one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+_worker_engine: Optional[PayrollEngine] = None
+
+
+def compute_chunk(
+    payroll_run_id: str,
+    employees: List[Any],
+    context: PayrollContext,
+    working_days: int,
+    on_employee: Optional[Callable[[], None]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """
+    Compute entry values for a chunk of employees (runs in a worker process).
+
+    Returns (entries, errors); an employee whose computation fails is
+    reported in errors instead of failing the chunk. ``on_employee`` is
+    called after each employee (in-thread only; it is not picklable).
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = PayrollEngine(None)
+
+    entries, errors = [], []
+    for employee in employees:
+        try:
+            breakdown = _worker_engine.calculate(employee, context, working_days=working_days)
+        except Exception as e:
+            errors.append({
+                "employee_id": employee.id,
+                "employee_code": employee.employee_code,
+                "error": str(e),
+            })
+        else:
+            entries.append(PayrollEngine.entry_values(payroll_run_id, breakdown, working_days))
+        if on_employee is not None:
+            on_employee()
+    return entries, errors
+
+
+class PayrollJobService:
+    """Service for running payroll processing as a background job."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.engine = PayrollEngine(db)
+        self._last_heartbeat = 0.0
+
+    def _stale_before(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=settings.PAYROLL_STALE_AFTER_SECONDS)
+
+    @staticmethod
+    def _heartbeat_interval() -> float:
+        return max(settings.PAYROLL_STALE_AFTER_SECONDS / 5, 1)
+
+    def _heartbeat(self, payroll_run_id: str) -> None:
+        """Mark the job alive mid-chunk, at most once per heartbeat interval."""
+        now = time.monotonic()
+        if now - self._last_heartbeat < self._heartbeat_interval():
+            return
+        self._last_heartbeat = now
+        self.db.execute(
+            update(PayrollRun)
+            .where(PayrollRun.id == payroll_run_id)
+            .values({PayrollRun.processing_heartbeat_at: datetime.utcnow()})
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def start(
+        self,
+        payroll_run_id: str,
+        working_days: int = 30,
+    ) -> PayrollRun:
+        """
+        Claim a payroll run for processing.
+
+        A ``DRAFT`` run starts afresh. A ``PROCESSING`` run whose job has
+        stopped (no heartbeat within ``PAYROLL_STALE_AFTER_SECONDS``) resumes
+        with its original working days.
+        """
+        payroll_run = self.db.query(PayrollRun).filter(
+            PayrollRun.id == payroll_run_id
+        ).first()
+
+        if not payroll_run:
+            raise ValueError("Payroll run not found")
+
+        if payroll_run.status not in [PayrollRunStatus.DRAFT, PayrollRunStatus.PROCESSING]:
+            raise ValueError(f"Cannot process payroll. Status: {payroll_run.status}")
+
+        now = datetime.utcnow()
+        is_fresh = payroll_run.status == PayrollRunStatus.DRAFT
+        values = {
+            PayrollRun.status: PayrollRunStatus.PROCESSING,
+            PayrollRun.processing_heartbeat_at: now,
+            PayrollRun.processing_errors: [],
+            PayrollRun.failed_employees: 0,
+        }
+        if is_fresh or payroll_run.working_days is None:
+            values[PayrollRun.working_days] = working_days
+        if is_fresh:
+            values[PayrollRun.processing_started_at] = now
+            values[PayrollRun.processed_employees] = 0
+
+        # Claim atomically: only one job may process a run
+        claimed = self.db.execute(
+            update(PayrollRun)
+            .where(
+                PayrollRun.id == payroll_run_id,
+                or_(
+                    PayrollRun.status == PayrollRunStatus.DRAFT,
+                    and_(
+                        PayrollRun.status == PayrollRunStatus.PROCESSING,
+                        or_(
+                            PayrollRun.processing_heartbeat_at.is_(None),
+                            PayrollRun.processing_heartbeat_at < self._stale_before(),
+                        ),
+                    ),
+                ),
+            )
+            .values(values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if not claimed:
+            self.db.rollback()
+            raise ValueError("Payroll is already being processed")
+
+        if is_fresh:
+            # Clear entries of an earlier, cancelled attempt
+            self.db.query(PayrollEntry).filter(
+                PayrollEntry.payroll_run_id == payroll_run_id
+            ).delete(synchronize_session=False)
+
+        self.db.commit()
+        self.db.refresh(payroll_run)
+        return payroll_run
+
+    def process(self, payroll_run_id: str) -> PayrollRun:
+        """Process a claimed run chunk by chunk, then total it."""
+        payroll_run = self.db.query(PayrollRun).filter(
+            PayrollRun.id == payroll_run_id
+        ).first()
+        working_days = payroll_run.working_days or 30
+
+        try:
+            # Employees without an entry yet - all of them, or the rest after a crash
+            done = self.db.query(PayrollEntry.id).filter(
+                PayrollEntry.payroll_run_id == payroll_run_id,
+                PayrollEntry.employee_id == Employee.id,
+            ).exists()
+            employees = self.db.query(*EMPLOYEE_COLUMNS).filter(
+                Employee.company_id == payroll_run.company_id,
+                Employee.status == EmployeeStatus.ACTIVE,
+                ~done,
+            ).order_by(Employee.id).all()
+
+            context = self.engine.load_context(
+                payroll_run.company_id,
+                payroll_run.pay_period_month,
+                payroll_run.pay_period_year,
+            )
+
+            size = max(settings.PAYROLL_CHUNK_SIZE, 1)
+            chunks = [employees[i:i + size] for i in range(0, len(employees), size)]
+            errors: List[Dict[str, str]] = []
+            for entries, chunk_errors in self._compute_chunks(payroll_run_id, chunks, context, working_days):
+                errors.extend(chunk_errors)
+                self._save_chunk(payroll_run, entries, errors)
+
+            self._finish(payroll_run)
+        except Exception:
+            self.db.rollback()
+            # Resumable right away instead of after the stale timeout
+            payroll_run.processing_heartbeat_at = None
+            self.db.commit()
+            raise
+
+        self.db.refresh(payroll_run)
+        return payroll_run
+
+    def _compute_chunks(
+        self,
+        payroll_run_id: str,
+        chunks: List[List[Any]],
+        context: PayrollContext,
+        working_days: int,
+    ):
+        """Yield (entries, errors) per chunk, in order, keeping the heartbeat fresh."""
+        pool = get_process_pool()
+        if pool is None:
+            for chunk in chunks:
+                yield compute_chunk(
+                    payroll_run_id, chunk, context, working_days,
+                    on_employee=lambda: self._heartbeat(payroll_run_id),
+                )
+            return
+
+        # Keep a few chunks in flight; results are saved in submission order
+        pending: "deque[Future]" = deque()
+        max_pending = settings.PAYROLL_WORKER_PROCESSES * 2
+        try:
+            for chunk in chunks:
+                chunk_context = context.for_employees(employee.id for employee in chunk)
+                pending.append(pool.submit(compute_chunk, payroll_run_id, chunk, chunk_context, working_days))
+                if len(pending) >= max_pending:
+                    yield self._result(payroll_run_id, pending.popleft())
+            while pending:
+                yield self._result(payroll_run_id, pending.popleft())
+        except BrokenProcessPool:
+            discard_process_pool(pool)
+            raise
+
+    def _result(self, payroll_run_id: str, future: Future) -> Any:
+        """Wait for a pool chunk, refreshing the heartbeat while it computes."""
+        while not wait([future], timeout=self._heartbeat_interval()).done:
+            self._heartbeat(payroll_run_id)
+        return future.result()
+
+    def _save_chunk(
+        self,
+        payroll_run: PayrollRun,
+        entries: List[Dict[str, Any]],
+        errors: List[Dict[str, str]],
+    ) -> None:
+        """Upsert a chunk's entries and commit them with the run's progress."""
+        if entries:
+            self._upsert_entries(entries)
+        payroll_run.processed_employees = (payroll_run.processed_employees or 0) + len(entries)
+        payroll_run.failed_employees = len(errors)
+        payroll_run.processing_errors = list(errors)
+        payroll_run.processing_heartbeat_at = datetime.utcnow()
+        self.db.commit()
+        self._last_heartbeat = time.monotonic()
+
+    def _upsert_entries(self, entries: List[Dict[str, Any]]) -> None:
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            # No ON CONFLICT - replace the chunk's entries
+            self.db.query(PayrollEntry).filter(
+                PayrollEntry.payroll_run_id == entries[0]["payroll_run_id"],
+                PayrollEntry.employee_id.in_([entry["employee_id"] for entry in entries]),
+            ).delete(synchronize_session=False)
+            self.db.execute(insert(PayrollEntry.__table__), entries)
+            return
+
+        statement = upsert(PayrollEntry.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["payroll_run_id", "employee_id"],
+            set_={
+                **{column: statement.excluded[column] for column in ENTRY_UPDATE_COLUMNS},
+                "updated_at": datetime.utcnow(),
+            },
+        )
+        self.db.execute(statement, entries)
+
+    def _finish(self, payroll_run: PayrollRun) -> None:
+        """Total the run from its entries and mark it processed."""
+        totals = self.db.query(
+            func.count(PayrollEntry.id),
+            func.sum(PayrollEntry.gross_salary),
+            func.sum(PayrollEntry.total_deductions),
+            func.sum(PayrollEntry.net_pay),
+            func.sum(PayrollEntry.total_employer_contributions),
+            func.sum(PayrollEntry.pf_employee),
+            func.sum(PayrollEntry.pf_employer),
+            func.sum(PayrollEntry.esi_employee),
+            func.sum(PayrollEntry.esi_employer),
+            func.sum(PayrollEntry.professional_tax),
+            func.sum(PayrollEntry.tds),
+        ).filter(
+            PayrollEntry.payroll_run_id == payroll_run.id
+        ).one()
+        count, *sums = totals
+        sums = [Decimal(str(value or 0)) for value in sums]
+
+        payroll_run.processed_employees = count
+        (
+            payroll_run.total_gross,
+            payroll_run.total_deductions,
+            payroll_run.total_net_pay,
+            payroll_run.total_employer_contributions,
+            payroll_run.total_pf_employee,
+            payroll_run.total_pf_employer,
+            payroll_run.total_esi_employee,
+            payroll_run.total_esi_employer,
+            payroll_run.total_pt,
+            payroll_run.total_tds,
+        ) = sums
+        payroll_run.status = PayrollRunStatus.PROCESSED
+        payroll_run.processed_at = datetime.utcnow()
+        payroll_run.processing_heartbeat_at = None
+        self.db.commit()
+
+    @staticmethod
+    def get_progress(payroll_run: PayrollRun) -> Dict[str, Any]:
+        """Progress of a run's processing, for polling clients."""
+        total = payroll_run.total_employees or 0
+        processed = payroll_run.processed_employees or 0
+        return {
+            "payroll_run_id": payroll_run.id,
+            "status": payroll_run.status.value if payroll_run.status else None,
+            "total_employees": total,
+            "processed_employees": processed,
+            "failed_employees": payroll_run.failed_employees or 0,
+            "percent_complete": round(processed * 100 / total, 1) if total else None,
+            "errors": payroll_run.processing_errors or [],
+            "started_at": payroll_run.processing_started_at.isoformat() if payroll_run.processing_started_at else None,
+            "last_progress_at": payroll_run.processing_heartbeat_at.isoformat() if payroll_run.processing_heartbeat_at else None,
+            "processed_at": payroll_run.processed_at.isoformat() if payroll_run.processed_at else None,
+        }
+
+
+def run_payroll_job(payroll_run_id: str) -> None:
+    """Background job body: process a claimed run in its own session."""
+    db = SessionLocal()
+    try:
+        PayrollJobService(db).process(payroll_run_id)
+    except Exception as e:
+        print(f"[PAYROLL] Processing run {payroll_run_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def submit_payroll_job(payroll_run_id: str) -> Future:
+    """Process a claimed run in the background."""
+    return _job_executor.submit(run_payroll_job, payroll_run_id)
+
+
+def resume_stale_payroll_runs() -> int:
+    """Restart runs whose job died (e.g. server restart). Returns how many."""
+    db = SessionLocal()
+    try:
+        service = PayrollJobService(db)
+        stale_ids = [
+            run_id for (run_id,) in db.query(PayrollRun.id).filter(
+                PayrollRun.status == PayrollRunStatus.PROCESSING,
+                or_(
+                    PayrollRun.processing_heartbeat_at.is_(None),
+                    PayrollRun.processing_heartbeat_at < service._stale_before(),
+                ),
+            ).all()
+        ]
+        resumed = 0
+        for run_id in stale_ids:
+            try:
+                service.start(run_id)
+            except ValueError:
+                continue  # claimed by another worker
+            submit_payroll_job(run_id)
+            resumed += 1
+        return resumed
+    finally:
+        db.close()
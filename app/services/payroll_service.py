@@ -10,7 +10,6 @@ This service brings together:
 - Salary structure processing
 """
 from decimal import Decimal, ROUND_HALF_UP
-from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime
 from sqlalchemy.orm import Session
@@ -28,20 +27,8 @@ from app.services.esi_service import ESIService
 from app.services.pt_service import PTService
 from app.services.salary_tds_service import SalaryTDSService
 from app.services.loan_service import LoanService
-
-
-@dataclass
-class SalaryBreakdown:
-    """Complete salary breakdown for an employee."""
-    employee_id: str
-    employee_name: str
-    earnings: Dict[str, Decimal]
-    deductions: Dict[str, Decimal]
-    employer_contributions: Dict[str, Decimal]
-    gross_salary: Decimal
-    total_deductions: Decimal
-    net_pay: Decimal
-    ctc_monthly: Decimal
+from app.services.payroll_engine import PayrollEngine, SalaryBreakdown
+from app.services.payroll_job_service import PayrollJobService
 
 
 class PayrollService:
@@ -75,6 +62,7 @@ class PayrollService:
         self.pt_service = PTService(db)
         self.tds_service = SalaryTDSService(db)
         self.loan_service = LoanService(db)
+        self.engine = PayrollEngine(db)
     
     def _round_amount(self, amount: Decimal) -> Decimal:
         """Round to 2 decimal places."""
@@ -418,119 +406,13 @@ class PayrollService:
         """
         Calculate complete salary for an employee for a month.
         """
-        # Get salary structure
-        structure = self.db.query(EmployeeSalaryStructure).filter(
-            EmployeeSalaryStructure.employee_id == employee.id,
-            EmployeeSalaryStructure.is_active == True,
-        ).all()
-        
-        earnings = {}
-        basic_amount = Decimal("0")
-        hra_amount = Decimal("0")
-        gross_salary = Decimal("0")
-        
-        # Calculate earnings
-        for s in structure:
-            component = s.component
-            if component.component_type != SalaryComponentType.EARNING:
-                continue
-            
-            amount = s.amount or Decimal("0")
-            
-            # Apply LOP
-            if lop_days > 0 and working_days > 0:
-                per_day = amount / working_days
-                amount = self._round_amount(amount - (per_day * lop_days))
-            
-            earnings[component.code] = amount
-            gross_salary += amount
-            
-            if component.code == "BASIC":
-                basic_amount = amount
-            elif component.code == "HRA":
-                hra_amount = amount
-        
-        deductions = {}
-        employer_contributions = {}
-        
-        # Calculate PF
-        if employee.pf_applicable:
-            pf_result = self.pf_service.calculate_pf(
-                basic_salary=basic_amount,
-                company_id=employee.company_id,
-            )
-            if pf_result:
-                deductions["PF_EMP"] = pf_result.employee_pf
-                employer_contributions["PF_ER"] = pf_result.employer_total
-                employer_contributions["PF_ADMIN"] = pf_result.pf_admin_charges
-                employer_contributions["EDLI"] = pf_result.edli
-        
-        # Calculate ESI
-        if employee.esi_applicable:
-            esi_result = self.esi_service.calculate_esi(
-                gross_salary=gross_salary,
-                company_id=employee.company_id,
-                employee=employee,
-            )
-            if esi_result.is_applicable:
-                deductions["ESI_EMP"] = esi_result.employee_esi
-                employer_contributions["ESI_ER"] = esi_result.employer_esi
-        
-        # Calculate PT
-        if employee.pt_applicable:
-            pt_result = self.pt_service.calculate_pt_for_employee(
-                employee=employee,
-                gross_salary=gross_salary,
-                month=month,
-            )
-            if pt_result.is_applicable:
-                deductions["PT"] = pt_result.pt_amount
-        
-        # Calculate TDS
-        # Project annual salary
-        annual_gross = gross_salary * 12
-        annual_basic = basic_amount * 12
-        annual_hra = hra_amount * 12
-        
-        tds_result = self.tds_service.calculate_annual_tds(
-            employee=employee,
-            annual_gross_salary=annual_gross,
-            annual_basic=annual_basic,
-            annual_hra=annual_hra,
-        )
-        deductions["TDS"] = tds_result.monthly_tds
-        
-        # Get loan EMIs
-        pending_loans = self.loan_service.get_pending_emis_for_payroll(
-            company_id=employee.company_id,
-            payroll_month=month,
-            payroll_year=year,
-        )
-        
-        loan_deductions = Decimal("0")
-        for loan in pending_loans:
-            if loan["employee_id"] == employee.id:
-                loan_deductions += Decimal(str(loan["emi_amount"]))
-        
-        if loan_deductions > 0:
-            deductions["LOAN"] = loan_deductions
-        
-        total_deductions = sum(deductions.values())
-        net_pay = gross_salary - total_deductions
-        
-        # Calculate CTC
-        ctc_monthly = gross_salary + sum(employer_contributions.values())
-        
-        return SalaryBreakdown(
-            employee_id=employee.id,
-            employee_name=employee.full_name or f"{employee.first_name} {employee.last_name}",
-            earnings=earnings,
-            deductions=deductions,
-            employer_contributions=employer_contributions,
-            gross_salary=gross_salary,
-            total_deductions=total_deductions,
-            net_pay=net_pay,
-            ctc_monthly=ctc_monthly,
+        context = self.engine.load_context(employee.company_id, month, year, [employee.id])
+        return self.engine.calculate(
+            employee,
+            context,
+            working_days=working_days,
+            days_worked=days_worked,
+            lop_days=lop_days,
         )
     
     def process_payroll(
@@ -538,119 +420,16 @@ class PayrollService:
         payroll_run_id: str,
         working_days: int = 30,
     ) -> PayrollRun:
-        """Process payroll for all employees."""
-        payroll_run = self.db.query(PayrollRun).filter(
-            PayrollRun.id == payroll_run_id
-        ).first()
-        
-        if not payroll_run:
-            raise ValueError("Payroll run not found")
-        
-        if payroll_run.status not in [PayrollRunStatus.DRAFT, PayrollRunStatus.PROCESSING]:
-            raise ValueError(f"Cannot process payroll. Status: {payroll_run.status}")
-        
-        payroll_run.status = PayrollRunStatus.PROCESSING
-        self.db.commit()
-        
-        # Get all active employees
-        employees = self.db.query(Employee).filter(
-            Employee.company_id == payroll_run.company_id,
-            Employee.status == EmployeeStatus.ACTIVE,
-        ).all()
-        
-        # Clear existing entries
-        self.db.query(PayrollEntry).filter(
-            PayrollEntry.payroll_run_id == payroll_run_id
-        ).delete()
-        
-        totals = {
-            "gross": Decimal("0"),
-            "deductions": Decimal("0"),
-            "net_pay": Decimal("0"),
-            "employer_contributions": Decimal("0"),
-            "pf_employee": Decimal("0"),
-            "pf_employer": Decimal("0"),
-            "esi_employee": Decimal("0"),
-            "esi_employer": Decimal("0"),
-            "pt": Decimal("0"),
-            "tds": Decimal("0"),
-        }
-        
-        processed = 0
-        
-        for employee in employees:
-            try:
-                # Calculate salary
-                breakdown = self.calculate_employee_salary(
-                    employee=employee,
-                    month=payroll_run.pay_period_month,
-                    year=payroll_run.pay_period_year,
-                    working_days=working_days,
-                )
-                
-                # Create payroll entry
-                entry = PayrollEntry(
-                    payroll_run_id=payroll_run_id,
-                    employee_id=employee.id,
-                    total_working_days=working_days,
-                    days_worked=working_days,
-                    earnings=dict(breakdown.earnings),
-                    total_earnings=breakdown.gross_salary,
-                    deductions=dict(breakdown.deductions),
-                    total_deductions=breakdown.total_deductions,
-                    employer_contributions=dict(breakdown.employer_contributions),
-                    total_employer_contributions=sum(breakdown.employer_contributions.values()),
-                    basic_for_pf=breakdown.earnings.get("BASIC", Decimal("0")),
-                    gross_for_esi=breakdown.gross_salary,
-                    pf_employee=breakdown.deductions.get("PF_EMP", Decimal("0")),
-                    pf_employer=breakdown.employer_contributions.get("PF_ER", Decimal("0")),
-                    esi_employee=breakdown.deductions.get("ESI_EMP", Decimal("0")),
-                    esi_employer=breakdown.employer_contributions.get("ESI_ER", Decimal("0")),
-                    professional_tax=breakdown.deductions.get("PT", Decimal("0")),
-                    tds=breakdown.deductions.get("TDS", Decimal("0")),
-                    total_loan_deductions=breakdown.deductions.get("LOAN", Decimal("0")),
-                    gross_salary=breakdown.gross_salary,
-                    net_pay=breakdown.net_pay,
-                )
-                
-                self.db.add(entry)
-                
-                # Update totals
-                totals["gross"] += breakdown.gross_salary
-                totals["deductions"] += breakdown.total_deductions
-                totals["net_pay"] += breakdown.net_pay
-                totals["employer_contributions"] += sum(breakdown.employer_contributions.values())
-                totals["pf_employee"] += breakdown.deductions.get("PF_EMP", Decimal("0"))
-                totals["pf_employer"] += breakdown.employer_contributions.get("PF_ER", Decimal("0"))
-                totals["esi_employee"] += breakdown.deductions.get("ESI_EMP", Decimal("0"))
-                totals["esi_employer"] += breakdown.employer_contributions.get("ESI_ER", Decimal("0"))
-                totals["pt"] += breakdown.deductions.get("PT", Decimal("0"))
-                totals["tds"] += breakdown.deductions.get("TDS", Decimal("0"))
-                
-                processed += 1
-                
-            except Exception as e:
-                print(f"Error processing employee {employee.id}: {e}")
-        
-        # Update payroll run totals
-        payroll_run.processed_employees = processed
-        payroll_run.total_gross = totals["gross"]
-        payroll_run.total_deductions = totals["deductions"]
-        payroll_run.total_net_pay = totals["net_pay"]
-        payroll_run.total_employer_contributions = totals["employer_contributions"]
-        payroll_run.total_pf_employee = totals["pf_employee"]
-        payroll_run.total_pf_employer = totals["pf_employer"]
-        payroll_run.total_esi_employee = totals["esi_employee"]
-        payroll_run.total_esi_employer = totals["esi_employer"]
-        payroll_run.total_pt = totals["pt"]
-        payroll_run.total_tds = totals["tds"]
-        payroll_run.status = PayrollRunStatus.PROCESSED
-        payroll_run.processed_at = datetime.utcnow()
-        
-        self.db.commit()
-        self.db.refresh(payroll_run)
+        """
+        Process payroll for all employees, in this thread.
         
-        return payroll_run
+        Large runs should go through PayrollJobService.start and
+        submit_payroll_job instead, which run the same chunked processing
+        in the background.
+        """
+        job_service = PayrollJobService(self.db)
+        job_service.start(payroll_run_id, working_days)
+        return job_service.process(payroll_run_id)
     
     def finalize_payroll(
         self,
@@ -687,24 +466,23 @@ class PayrollService:
             PayrollEntry.total_loan_deductions > 0,
         ).all()
         
+        pending_loans = self.loan_service.get_pending_emis_by_employee(
+            company_id=payroll_run.company_id,
+            payroll_month=payroll_run.pay_period_month,
+            payroll_year=payroll_run.pay_period_year,
+        )
+        
         for entry in entries:
             # Record loan repayments
-            pending_loans = self.loan_service.get_pending_emis_for_payroll(
-                company_id=payroll_run.company_id,
-                payroll_month=payroll_run.pay_period_month,
-                payroll_year=payroll_run.pay_period_year,
-            )
-            
-            for loan in pending_loans:
-                if loan["employee_id"] == entry.employee_id:
-                    try:
-                        self.loan_service.record_repayment(
-                            loan_id=loan["loan_id"],
-                            amount=Decimal(str(loan["emi_amount"])),
-                            payroll_entry_id=entry.id,
-                        )
-                    except Exception as e:
-                        print(f"Error recording loan repayment: {e}")
+            for loan in pending_loans.get(entry.employee_id, []):
+                try:
+                    self.loan_service.record_repayment(
+                        loan_id=loan["loan_id"],
+                        amount=Decimal(str(loan["emi_amount"])),
+                        payroll_entry_id=entry.id,
+                    )
+                except Exception as e:
+                    print(f"Error recording loan repayment: {e}")
         
         payroll_run.status = PayrollRunStatus.FINALIZED
         payroll_run.finalized_by = user_id
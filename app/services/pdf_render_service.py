@@ -0,0 +1,343 @@
+"""PDF render service - cached document rendering on worker processes.
+
+``PDFService`` builds ReportLab documents synchronously; an invoice takes
+tens to hundreds of milliseconds of pure-Python CPU, so a few concurrent
+downloads held the GIL for every other request in the worker. This service
+puts a content-addressed disk cache in front of it and moves cache misses
+to a process pool:
+
+- the document, its company and party are copied into plain
+  ``SimpleNamespace`` snapshots (columns, read-only properties and the
+  relationships the templates read), which can be pickled to a worker and
+  hashed;
+- the cache key is a SHA-256 of the document kind, the snapshot and the
+  template version (a digest of pdf_service.py and the ReportLab version).
+  Editing the document, its items, customer or company changes the key, so
+  stale PDFs are never served and nothing has to be invalidated explicitly;
+- rendered PDFs are files named by key under ``PDF_CACHE_DIR``. A hit
+  refreshes the file's mtime; when the directory grows past
+  ``PDF_CACHE_MAX_BYTES`` the least recently used files are removed;
+- misses are rendered on ``PDF_WORKER_PROCESSES`` spawned processes (0 or 1
+  renders in the calling thread). Concurrent requests for the same key in
+  this process share one render.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple, Union
+
+import reportlab
+from sqlalchemy import inspect
+
+from app.config import settings
+from app.services import pdf_service
+from app.services.pdf_service import PDFService
+
+
+# Relationship spec: a dict snapshots the related object(s) with their own
+# relationships; a tuple copies only the named attributes.
+RelationSpec = Mapping[str, Union["RelationSpec", Tuple[str, ...]]]
+
+ITEM_RELATIONS: RelationSpec = {"items": {"product": ("name",)}}
+COMPANY_RELATIONS: RelationSpec = {"bank_accounts": {}}
+
+# kind -> (PDFService method, relationships of the document)
+DOCUMENTS: Dict[str, Tuple[str, RelationSpec]] = {
+    "invoice": ("generate_invoice_pdf", ITEM_RELATIONS),
+    "proforma": ("generate_proforma_pdf", {
+        **ITEM_RELATIONS,
+        "sales_person": ("full_name", "first_name", "last_name", "name"),
+        "contact": ("name", "email", "phone"),
+        "bank_account": {},
+    }),
+    "purchase": ("generate_purchase_pdf", ITEM_RELATIONS),
+    "sales_return": ("generate_sales_return_pdf", ITEM_RELATIONS),
+    "purchase_return": ("generate_purchase_return_pdf", ITEM_RELATIONS),
+}
+
+
+def _template_version() -> str:
+    digest = hashlib.sha256(Path(pdf_service.__file__).read_bytes())
+    digest.update(reportlab.Version.encode())
+    return digest.hexdigest()[:16]
+
+
+TEMPLATE_VERSION = _template_version()
+
+
+# ==================== SNAPSHOTS ====================
+
+def snapshot(obj: Any, relations: Union[RelationSpec, Tuple[str, ...]] = None) -> Any:
+    """Picklable copy of an ORM object (or list of them) for rendering."""
+    if obj is None:
+        return None
+    if isinstance(obj, (list, tuple, set)):
+        return [snapshot(member, relations) for member in obj]
+    if isinstance(relations, tuple):
+        return SimpleNamespace(**{name: getattr(obj, name, None) for name in relations})
+
+    values = {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+    for cls in type(obj).__mro__:
+        for name, member in vars(cls).items():
+            if isinstance(member, property) and name not in values:
+                try:
+                    values[name] = getattr(obj, name)
+                except Exception:
+                    continue
+    for name, nested in (relations or {}).items():
+        values[name] = snapshot(getattr(obj, name, None), nested)
+    return SimpleNamespace(**values)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, SimpleNamespace):
+        return {name: _plain(member) for name, member in vars(value).items()}
+    if isinstance(value, list):
+        return [_plain(member) for member in value]
+    return value
+
+
+def document_key(kind: str, document: Any, company: Any, party: Any) -> str:
+    """Cache key of a snapshotted document."""
+    payload = json.dumps(
+        [TEMPLATE_VERSION, kind, _plain(document), _plain(company), _plain(party)],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ==================== RENDERING (worker side) ====================
+
+_renderer: Optional[PDFService] = None
+
+
+def render_document(kind: str, document: Any, company: Any, party: Any) -> bytes:
+    """Render snapshots with PDFService; runs in a worker process."""
+    global _renderer
+    if _renderer is None:
+        _renderer = PDFService()
+    method, _ = DOCUMENTS[kind]
+    return getattr(_renderer, method)(document, company, party).getvalue()
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared worker processes for PDF rendering (None = render in-thread)."""
+    global _process_pool
+    if settings.PDF_WORKER_PROCESSES <= 1:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: never fork a process that holds DB connections and threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_WORKER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker died) so the next render starts a new one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ==================== DISK CACHE ====================
+
+class PDFDiskCache:
+    """Rendered PDFs on local disk, evicted least recently used first."""
+
+    # Eviction trims to this fraction of the limit so it does not run on every write
+    LOW_WATER = 0.9
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, self._path(key))
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        entries = []
+        for path in self.directory.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict(self) -> None:
+        # Rescan: other processes share the directory
+        entries, size = self._scan()
+        target = self.max_bytes * self.LOW_WATER
+        for _, file_size, path in sorted(entries, key=lambda entry: entry[0]):
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        self._size = size
+
+
+_cache: Optional[PDFDiskCache] = None
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def get_cache() -> PDFDiskCache:
+    global _cache
+    if _cache is None:
+        _cache = PDFDiskCache(settings.PDF_CACHE_DIR, settings.PDF_CACHE_MAX_BYTES)
+    return _cache
+
+
+# ==================== SERVICE ====================
+
+class PDFRenderService:
+    """Cached, off-GIL rendering of the documents ``PDFService`` produces."""
+
+    def render(self, kind: str, document: Any, company: Any, party: Any = None) -> bytes:
+        """
+        PDF bytes for an ORM document of ``kind`` (see ``DOCUMENTS``).
+
+        Reads the relationships the template needs from the session, then
+        serves the cached file or renders it.
+        """
+        if kind not in DOCUMENTS:
+            raise ValueError(f"Unknown document kind '{kind}'. Kinds: {', '.join(DOCUMENTS)}")
+        _, relations = DOCUMENTS[kind]
+        document = snapshot(document, relations)
+        company = snapshot(company, COMPANY_RELATIONS)
+        party = snapshot(party)
+        return self.render_snapshot(kind, document, company, party)
+
+    def render_snapshot(self, kind: str, document: Any, company: Any, party: Any = None) -> bytes:
+        """PDF bytes for already snapshotted data."""
+        key = document_key(kind, document, company, party)
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+        with _inflight_lock:
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._render(kind, document, company, party)
+            cache.put(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+    def render_snapshots(
+        self,
+        kind: str,
+        documents: Iterable[Tuple[Any, Any]],
+        company: Any,
+    ) -> Iterator[Union[bytes, Exception]]:
+        """
+        PDF bytes for many snapshotted (document, party) pairs, in order.
+
+        Cache misses are rendered on the pool with a few documents in flight;
+        a document whose render fails yields its exception instead of
+        stopping the batch.
+        """
+        cache = get_cache()
+        pool = get_process_pool()
+        max_pending = max(settings.PDF_WORKER_PROCESSES, 1) * 2
+        pending: "deque[Tuple[str, Union[bytes, Exception, Future]]]" = deque()
+
+        def collect(key: str, result: Union[bytes, Exception, Future]) -> Union[bytes, Exception]:
+            if not isinstance(result, Future):
+                return result
+            try:
+                data = result.result()
+            except BrokenProcessPool:
+                discard_process_pool(pool)
+                raise
+            except Exception as exc:
+                return exc
+            cache.put(key, data)
+            return data
+
+        for document, party in documents:
+            key = document_key(kind, document, company, party)
+            result = cache.get(key)
+            if result is None:
+                if pool is not None:
+                    result = pool.submit(render_document, kind, document, company, party)
+                else:
+                    try:
+                        result = render_document(kind, document, company, party)
+                        cache.put(key, result)
+                    except Exception as exc:
+                        result = exc
+            pending.append((key, result))
+            if len(pending) >= max_pending:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+
+    @staticmethod
+    def _render(kind: str, document: Any, company: Any, party: Any) -> bytes:
+        pool = get_process_pool()
+        if pool is None:
+            return render_document(kind, document, company, party)
+        try:
+            return pool.submit(render_document, kind, document, company, party).result()
+        except BrokenProcessPool:
+            discard_process_pool(pool)
+            raise
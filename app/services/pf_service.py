@@ -94,6 +94,7 @@ class PFService:
         is_international_worker: bool = False,
         apply_ceiling: bool = True,
         voluntary_pf_rate: Optional[Decimal] = None,  # For VPF (Voluntary PF)
+        settings: Optional[PayrollSettings] = None,
     ) -> PFCalculationResult:
         """
         Calculate PF contributions for an employee.
@@ -105,13 +106,13 @@ class PFService:
             is_international_worker: Whether employee is an international worker
             apply_ceiling: Whether to apply Rs.15,000 ceiling
             voluntary_pf_rate: Additional voluntary PF rate (e.g., 0.05 for 5% extra)
+            settings: Preloaded company settings (looked up by company_id if not given)
         
         Returns:
             PFCalculationResult with all contribution details
         """
         # Get company settings if available
-        settings = None
-        if company_id:
+        if settings is None and company_id:
             settings = self.get_pf_settings(company_id)
         
         # Calculate PF wage (Basic + DA)
@@ -269,6 +269,29 @@ class PTService:
         # Return default slabs
         return DEFAULT_PT_SLABS.get(state_code, [])
     
+    def get_company_pt_slabs(
+        self,
+        company_id: str,
+    ) -> Dict[str, List[Tuple[Decimal, Decimal, Optional[Decimal]]]]:
+        """
+        Get custom PT slabs of a company for all states in one query.
+        
+        Returns {state_code: slabs}; states without custom slabs are absent.
+        """
+        custom_slabs = self.db.query(ProfessionalTaxSlab).filter(
+            ProfessionalTaxSlab.company_id == company_id,
+            ProfessionalTaxSlab.is_active == True,
+        ).order_by(ProfessionalTaxSlab.state_code, ProfessionalTaxSlab.from_amount).all()
+        
+        slabs_by_state: Dict[str, List[Tuple[Decimal, Decimal, Optional[Decimal]]]] = {}
+        for slab in custom_slabs:
+            slabs_by_state.setdefault(slab.state_code, []).append((
+                slab.to_amount or Decimal("inf"),
+                slab.tax_amount,
+                slab.february_tax_amount if slab.is_february_special else None
+            ))
+        return slabs_by_state
+    
     def calculate_pt(
         self,
         gross_salary: Decimal,
@@ -276,6 +299,7 @@ class PTService:
         company_id: Optional[str] = None,
         month: int = 1,
         employee: Optional[Employee] = None,
+        slabs: Optional[List[Tuple[Decimal, Decimal, Optional[Decimal]]]] = None,
     ) -> PTCalculationResult:
         """
         Calculate Professional Tax for an employee.
@@ -286,6 +310,7 @@ class PTService:
             company_id: Company ID for custom slabs
             month: Month number (1-12), needed for February special rates
             employee: Employee model for checking flags
+            slabs: Preloaded slabs for the state (looked up if not given)
         
         Returns:
             PTCalculationResult with tax details
@@ -316,7 +341,8 @@ class PTService:
             )
         
         # Get slabs
-        slabs = self.get_pt_slabs_for_state(company_id, state_code) if company_id else DEFAULT_PT_SLABS.get(state_code, [])
+        if slabs is None:
+            slabs = self.get_pt_slabs_for_state(company_id, state_code) if company_id else DEFAULT_PT_SLABS.get(state_code, [])
         
         if not slabs:
             return PTCalculationResult(
@@ -358,6 +384,7 @@ class PTService:
         employee: Employee,
         gross_salary: Decimal,
         month: int,
+        company_slabs: Optional[Dict[str, List[Tuple[Decimal, Decimal, Optional[Decimal]]]]] = None,
     ) -> PTCalculationResult:
         """
         Calculate PT for an employee based on their work location.
@@ -366,6 +393,7 @@ class PTService:
             employee: Employee model instance
             gross_salary: Monthly gross salary
             month: Month number (1-12)
+            company_slabs: Preloaded custom slabs from get_company_pt_slabs
         
         Returns:
             PTCalculationResult
@@ -383,12 +411,18 @@ class PTService:
                 is_february_rate=False,
             )
         
+        slabs = None
+        if company_slabs is not None:
+            state_code = state_code.upper()
+            slabs = company_slabs.get(state_code) or DEFAULT_PT_SLABS.get(state_code, [])
+        
         return self.calculate_pt(
             gross_salary=gross_salary,
             state_code=state_code,
             company_id=employee.company_id,
             month=month,
             employee=employee,
+            slabs=slabs,
         )
     
     def _get_employee_pt_state(self, employee: Employee) -> Optional[str]:
@@ -14,6 +14,8 @@ from app.database.models import (
     AccountType, TransactionStatus, ReferenceType,generate_uuid
 )
 from app.services.company_service import CompanyService
+from app.services.balance_snapshot_service import BalanceSnapshotService
+from app.services.listing_service import keyset_page, listing_totals
 
 class PurchaseService:
     """Service for handling all purchase operations."""
@@ -703,6 +705,8 @@ class PurchaseService:
             )
             self.db.add(credit_entry)
             
+            BalanceSnapshotService(self.db).apply_transaction(transaction)
+            
             payment.transaction_id = transaction.id
             
             return transaction
@@ -759,7 +763,7 @@ class PurchaseService:
             Purchase.deleted_at.is_(None)
         ).first()
     
-    def get_purchases(
+    def list_purchases(
         self,
         company_id: str,
         purchase_type: Optional[str] = None,
@@ -768,9 +772,16 @@ class PurchaseService:
         from_date: Optional[datetime] = None,
         to_date: Optional[datetime] = None,
         page: int = 1,
-        page_size: int = 20
-    ) -> Tuple[List[Purchase], int]:
-        """Get purchases with filters."""
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        include_totals: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        One page of purchases with filters, newest first.
+        
+        Keyset paginated when ``cursor`` is given (see listing_service);
+        ``total`` is None unless ``include_totals``.
+        """
         query = self.db.query(Purchase).filter(
             Purchase.company_id == company_id,
             Purchase.deleted_at.is_(None)
@@ -787,15 +798,34 @@ class PurchaseService:
         if to_date:
             query = query.filter(Purchase.created_at <= to_date)
         
-        total = query.count()
+        purchases, next_cursor = keyset_page(query, Purchase, page_size, cursor=cursor, page=page)
         
-        offset = (page - 1) * page_size
-        purchases = query.order_by(Purchase.created_at.desc()) \
-                       .offset(offset) \
-                       .limit(page_size) \
-                       .all()
+        total = None
+        if include_totals:
+            filters = {
+                "purchase_type": purchase_type, "vendor_id": vendor_id, "status": status,
+                "from_date": from_date, "to_date": to_date,
+            }
+            total = listing_totals(query, Purchase, company_id, filters)["total"]
         
-        return purchases, total
+        return {"items": purchases, "total": total, "next_cursor": next_cursor}
+    
+    def get_purchases(
+        self,
+        company_id: str,
+        purchase_type: Optional[str] = None,
+        vendor_id: Optional[str] = None,
+        status: Optional[str] = None,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Tuple[List[Purchase], int]:
+        """Get purchases with filters."""
+        result = self.list_purchases(
+            company_id, purchase_type, vendor_id, status, from_date, to_date, page, page_size
+        )
+        return result["items"], result["total"]
     
     def update_purchase(
         self,
@@ -16,6 +16,7 @@ from app.database.models import (
     INDIAN_STATE_CODES, generate_uuid, SubItem
 )
 from app.database.payroll_models import Employee
+from app.services.listing_service import keyset_page, listing_totals
 
 
 class QuotationService:
@@ -1126,8 +1127,15 @@ class QuotationService:
         search: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
+        include_totals: bool = True,
     ) -> Dict[str, Any]:
-        """List quotations with filters."""
+        """
+        List quotations with filters, newest first.
+        
+        Keyset paginated when ``cursor`` is given (see listing_service);
+        ``total`` and ``total_pages`` are None unless ``include_totals``.
+        """
         query = self.db.query(Quotation).filter(Quotation.company_id == company_id)
         
         if status:
@@ -1150,18 +1158,23 @@ class QuotationService:
                 )
             )
         
-        total = query.count()
+        quotations, next_cursor = keyset_page(query, Quotation, page_size, cursor=cursor, page=page)
         
-        quotations = query.order_by(Quotation.quotation_date.desc()).offset(
-            (page - 1) * page_size
-        ).limit(page_size).all()
+        total = None
+        if include_totals:
+            filters = {
+                "status": status, "customer_id": customer_id, "from_date": from_date,
+                "to_date": to_date, "search": search,
+            }
+            total = listing_totals(query, Quotation, company_id, filters)["total"]
         
         return {
             "items": quotations,
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size,
+            "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+            "next_cursor": next_cursor,
         }
     
     def get_quotation(self, company_id: str, quotation_id: str) -> Optional[Quotation]:
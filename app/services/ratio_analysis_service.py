@@ -17,6 +17,7 @@ from app.database.models import (
     Account, AccountType, Transaction, TransactionEntry, TransactionStatus,
     Invoice, Purchase
 )
+from app.services.balance_snapshot_service import BalanceSnapshotService
 
 
 class RatioAnalysisService:
@@ -49,21 +50,12 @@ class RatioAnalysisService:
         
         account_ids = [a.id for a in accounts]
         
-        # Calculate balance from transaction entries
-        query = self.db.query(
-            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
-            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
-        ).join(Transaction).filter(
-            TransactionEntry.account_id.in_(account_ids),
-            Transaction.status == TransactionStatus.POSTED,
+        # Calculate balance from the daily snapshots plus entries after them
+        totals = BalanceSnapshotService(self.db).get_account_totals(
+            company_id, account_ids, as_of_date
         )
-        
-        if as_of_date:
-            query = query.filter(Transaction.transaction_date <= as_of_date)
-        
-        result = query.first()
-        total_debit = Decimal(str(result.total_debit or 0))
-        total_credit = Decimal(str(result.total_credit or 0))
+        total_debit = sum((debit for debit, _ in totals.values()), Decimal('0'))
+        total_credit = sum((credit for _, credit in totals.values()), Decimal('0'))
         
         # Assets and Expenses have debit-normal balances
         # Liabilities, Equity, Revenue have credit-normal balances
@@ -1,13 +1,23 @@
 """Report service for financial reports."""
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, case
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app.database.models import (
     Account, Transaction, TransactionEntry, Company,
     AccountType, TransactionStatus
 )
+from app.services.balance_snapshot_service import BalanceSnapshotService
+
+# Receivables aging buckets (key, label), by calendar days past due
+AGING_BUCKETS = [
+    ("current", "Current"),
+    ("1_30", "1-30 Days"),
+    ("31_60", "31-60 Days"),
+    ("61_90", "61-90 Days"),
+    ("over_90", "90+ Days"),
+]
 
 
 class ReportService:
@@ -16,6 +26,36 @@ class ReportService:
     def __init__(self, db: Session):
         self.db = db
     
+    @staticmethod
+    def _closing_balance(
+        account_type: AccountType,
+        total_debit: Decimal,
+        total_credit: Decimal
+    ) -> Decimal:
+        """Signed balance of an account from its cumulative debit/credit totals."""
+        # Assets and Expenses: Debits increase, Credits decrease
+        # Liabilities, Equity, Revenue: Credits increase, Debits decrease
+        if account_type in [AccountType.ASSET, AccountType.EXPENSE]:
+            return total_debit - total_credit
+        else:
+            return total_credit - total_debit
+    
+    @staticmethod
+    def _period_amount(
+        account_type: AccountType,
+        total_debit: Decimal,
+        total_credit: Decimal
+    ) -> Decimal:
+        """Signed period activity of an account from its debit/credit totals."""
+        # For Revenue: Credit is positive (income)
+        # For Expenses: Debit is positive (expense)
+        if account_type == AccountType.REVENUE:
+            return total_credit - total_debit
+        elif account_type == AccountType.EXPENSE:
+            return total_debit - total_credit
+        else:
+            return total_debit - total_credit
+    
     def _get_account_balance_at_date(
         self,
         account: Account,
@@ -23,25 +63,14 @@ class ReportService:
     ) -> Decimal:
         """Calculate account balance as of a specific date from transaction entries.
         Opening balances are now stored as transactions, so they're included in the query.
+        Reads the nearest daily balance snapshot and adds only the entries after it.
         """
-        result = self.db.query(
-            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
-            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
-        ).join(Transaction).filter(
-            TransactionEntry.account_id == account.id,
-            Transaction.status == TransactionStatus.POSTED,
-            Transaction.transaction_date <= as_of_date
-        ).first()
+        totals = BalanceSnapshotService(self.db).get_account_totals(
+            account.company_id, [account.id], as_of_date
+        )
+        total_debit, total_credit = totals.get(account.id, (Decimal("0"), Decimal("0")))
         
-        total_debit = Decimal(str(result.total_debit or 0))
-        total_credit = Decimal(str(result.total_credit or 0))
-        
-        # Assets and Expenses: Debits increase, Credits decrease
-        # Liabilities, Equity, Revenue: Credits increase, Debits decrease
-        if account.account_type in [AccountType.ASSET, AccountType.EXPENSE]:
-            return total_debit - total_credit
-        else:
-            return total_credit - total_debit
+        return self._closing_balance(account.account_type, total_debit, total_credit)
     
     def _get_account_balance_for_period(
         self,
@@ -63,14 +92,64 @@ class ReportService:
         total_debit = result.total_debit or Decimal("0")
         total_credit = result.total_credit or Decimal("0")
         
-        # For Revenue: Credit is positive (income)
-        # For Expenses: Debit is positive (expense)
-        if account.account_type == AccountType.REVENUE:
-            return total_credit - total_debit
-        elif account.account_type == AccountType.EXPENSE:
-            return total_debit - total_credit
-        else:
-            return total_debit - total_credit
+        return self._period_amount(account.account_type, total_debit, total_credit)
+    
+    def _get_account_totals(
+        self,
+        company: Company,
+        to_date: datetime,
+        from_date: Optional[datetime] = None
+    ) -> Dict[str, Tuple[Decimal, Decimal]]:
+        """Debit/credit totals of every account in one grouped aggregate.
+        
+        Returns a map of account_id -> (total_debit, total_credit) over posted
+        transactions dated up to ``to_date`` (and from ``from_date`` when given).
+        Accounts without entries are absent from the map. Cumulative totals
+        come from the daily balance snapshots.
+        """
+        if from_date is None:
+            return BalanceSnapshotService(self.db).get_account_totals(company.id, as_of_date=to_date)
+        
+        query = self.db.query(
+            TransactionEntry.account_id,
+            func.coalesce(func.sum(TransactionEntry.debit_amount), 0).label('total_debit'),
+            func.coalesce(func.sum(TransactionEntry.credit_amount), 0).label('total_credit')
+        ).join(Transaction).filter(
+            Transaction.company_id == company.id,
+            Transaction.status == TransactionStatus.POSTED,
+            Transaction.transaction_date >= from_date,
+            Transaction.transaction_date <= to_date
+        )
+        
+        return {
+            row.account_id: (
+                Decimal(str(row.total_debit or 0)),
+                Decimal(str(row.total_credit or 0)),
+            )
+            for row in query.group_by(TransactionEntry.account_id)
+        }
+    
+    def _get_company_accounts(self, company: Company) -> List[Account]:
+        """All accounts of a company ordered by code, loaded once per report."""
+        return self.db.query(Account).filter(
+            Account.company_id == company.id
+        ).order_by(Account.code).all()
+    
+    def _get_balances_at_date(
+        self,
+        company: Company,
+        as_of_date: datetime
+    ) -> Tuple[List[Account], Dict[str, Decimal]]:
+        """Accounts and their signed balances as of a date (two queries in total)."""
+        accounts = self._get_company_accounts(company)
+        totals = self._get_account_totals(company, as_of_date)
+        zero = (Decimal("0"), Decimal("0"))
+        
+        balances = {
+            account.id: self._closing_balance(account.account_type, *totals.get(account.id, zero))
+            for account in accounts
+        }
+        return accounts, balances
     
     def get_trial_balance(
         self,
@@ -81,17 +160,17 @@ class ReportService:
         if as_of_date is None:
             as_of_date = datetime.utcnow()
         
-        accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.is_active == True
-        ).order_by(Account.code).all()
+        accounts, balances = self._get_balances_at_date(company, as_of_date)
         
         entries = []
         total_debit = Decimal("0")
         total_credit = Decimal("0")
         
         for account in accounts:
-            balance = self._get_account_balance_at_date(account, as_of_date)
+            if not account.is_active:
+                continue
+            
+            balance = balances[account.id]
             
             if balance == 0:
                 continue
@@ -132,44 +211,35 @@ class ReportService:
         to_date: datetime
     ) -> Dict[str, Any]:
         """Generate Profit & Loss statement."""
-        # Get revenue accounts
-        revenue_accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.REVENUE,
-            Account.is_active == True
-        ).order_by(Account.code).all()
-        
-        # Get expense accounts
-        expense_accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.EXPENSE,
-            Account.is_active == True
-        ).order_by(Account.code).all()
+        accounts = self._get_company_accounts(company)
+        totals = self._get_account_totals(company, to_date, from_date=from_date)
+        zero = (Decimal("0"), Decimal("0"))
         
         revenue_entries = []
         total_revenue = Decimal("0")
-        
-        for account in revenue_accounts:
-            amount = self._get_account_balance_for_period(account, from_date, to_date)
-            if amount != 0:
-                revenue_entries.append({
-                    "account_id": account.id,
-                    "account_name": account.name,
-                    "amount": amount,
-                })
-                total_revenue += amount
-        
         expense_entries = []
         total_expenses = Decimal("0")
         
-        for account in expense_accounts:
-            amount = self._get_account_balance_for_period(account, from_date, to_date)
-            if amount != 0:
-                expense_entries.append({
-                    "account_id": account.id,
-                    "account_name": account.name,
-                    "amount": amount,
-                })
+        for account in accounts:
+            if not account.is_active:
+                continue
+            if account.account_type not in [AccountType.REVENUE, AccountType.EXPENSE]:
+                continue
+            
+            amount = self._period_amount(account.account_type, *totals.get(account.id, zero))
+            if amount == 0:
+                continue
+            
+            entry = {
+                "account_id": account.id,
+                "account_name": account.name,
+                "amount": amount,
+            }
+            if account.account_type == AccountType.REVENUE:
+                revenue_entries.append(entry)
+                total_revenue += amount
+            else:
+                expense_entries.append(entry)
                 total_expenses += amount
         
         gross_profit = total_revenue
@@ -201,85 +271,45 @@ class ReportService:
         if as_of_date is None:
             as_of_date = datetime.utcnow()
         
-        # Get all accounts
-        asset_accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.ASSET,
-            Account.is_active == True
-        ).order_by(Account.code).all()
-        
-        liability_accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.LIABILITY,
-            Account.is_active == True
-        ).order_by(Account.code).all()
-        
-        equity_accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.EQUITY,
-            Account.is_active == True
-        ).order_by(Account.code).all()
+        accounts, balances = self._get_balances_at_date(company, as_of_date)
         
         # Calculate retained earnings (net income)
-        # This is the cumulative profit/loss from inception
+        # This is the cumulative profit/loss from inception, including inactive accounts
         revenue_total = Decimal("0")
         expense_total = Decimal("0")
         
-        for account in self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.REVENUE
-        ).all():
-            revenue_total += self._get_account_balance_at_date(account, as_of_date)
+        section_types = [AccountType.ASSET, AccountType.LIABILITY, AccountType.EQUITY]
+        section_entries = {account_type: [] for account_type in section_types}
+        section_totals = {account_type: Decimal("0") for account_type in section_types}
         
-        for account in self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.account_type == AccountType.EXPENSE
-        ).all():
-            expense_total += self._get_account_balance_at_date(account, as_of_date)
+        for account in accounts:
+            balance = balances[account.id]
+            
+            if account.account_type == AccountType.REVENUE:
+                revenue_total += balance
+                continue
+            if account.account_type == AccountType.EXPENSE:
+                expense_total += balance
+                continue
+            
+            if not account.is_active or balance == 0:
+                continue
+            
+            section_entries[account.account_type].append({
+                "account_id": account.id,
+                "account_name": account.name,
+                "amount": balance,
+            })
+            section_totals[account.account_type] += balance
         
         retained_earnings = revenue_total - expense_total
         
-        # Assets
-        asset_entries = []
-        total_assets = Decimal("0")
-        
-        for account in asset_accounts:
-            balance = self._get_account_balance_at_date(account, as_of_date)
-            if balance != 0:
-                asset_entries.append({
-                    "account_id": account.id,
-                    "account_name": account.name,
-                    "amount": balance,
-                })
-                total_assets += balance
-        
-        # Liabilities
-        liability_entries = []
-        total_liabilities = Decimal("0")
-        
-        for account in liability_accounts:
-            balance = self._get_account_balance_at_date(account, as_of_date)
-            if balance != 0:
-                liability_entries.append({
-                    "account_id": account.id,
-                    "account_name": account.name,
-                    "amount": balance,
-                })
-                total_liabilities += balance
-        
-        # Equity
-        equity_entries = []
-        total_equity = Decimal("0")
-        
-        for account in equity_accounts:
-            balance = self._get_account_balance_at_date(account, as_of_date)
-            if balance != 0:
-                equity_entries.append({
-                    "account_id": account.id,
-                    "account_name": account.name,
-                    "amount": balance,
-                })
-                total_equity += balance
+        asset_entries = section_entries[AccountType.ASSET]
+        liability_entries = section_entries[AccountType.LIABILITY]
+        equity_entries = section_entries[AccountType.EQUITY]
+        total_assets = section_totals[AccountType.ASSET]
+        total_liabilities = section_totals[AccountType.LIABILITY]
+        total_equity = section_totals[AccountType.EQUITY]
         
         # Add retained earnings to equity
         if retained_earnings != 0:
@@ -504,13 +534,13 @@ class ReportService:
             "accounts_payable": Decimal("0"),
         }
         
-        accounts = self.db.query(Account).filter(
-            Account.company_id == company.id,
-            Account.is_active == True
-        ).all()
+        accounts, balances = self._get_balances_at_date(company, as_of_date)
         
         for account in accounts:
-            balance = self._get_account_balance_at_date(account, as_of_date)
+            if not account.is_active:
+                continue
+            
+            balance = balances[account.id]
             
             if account.account_type == AccountType.ASSET:
                 summary["total_assets"] += balance
@@ -629,76 +659,106 @@ class ReportService:
         self,
         company: Company,
         report_type: str = "receivables",  # or "payables"
-        as_of_date: Optional[datetime] = None
+        as_of_date: Optional[datetime] = None,
+        bucket: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100,
     ) -> Dict[str, Any]:
-        """Get aging analysis of receivables or payables."""
-        from app.database.models import Invoice, InvoiceStatus
+        """
+        Get aging analysis of receivables or payables.
+        
+        Bucket amounts and counts are summed by the database from a CASE over
+        the due date (calendar days, so the time of day never shifts an
+        invoice between buckets). Passing ``bucket`` adds one page of that
+        bucket's invoices.
+        """
+        from app.database.models import Invoice, InvoiceStatus, Customer
         
         if as_of_date is None:
             as_of_date = datetime.utcnow()
         
-        if report_type == "receivables":
-            invoices = self.db.query(Invoice).filter(
-                Invoice.company_id == company.id,
-                Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIALLY_PAID, InvoiceStatus.OVERDUE]),
-                Invoice.invoice_date <= as_of_date
-            ).all()
-        else:
-            # For payables, would query purchase invoices
-            invoices = []
-        
-        # Age buckets
         aging = {
-            "current": {"label": "Current", "amount": Decimal("0"), "invoices": []},
-            "1_30": {"label": "1-30 Days", "amount": Decimal("0"), "invoices": []},
-            "31_60": {"label": "31-60 Days", "amount": Decimal("0"), "invoices": []},
-            "61_90": {"label": "61-90 Days", "amount": Decimal("0"), "invoices": []},
-            "over_90": {"label": "90+ Days", "amount": Decimal("0"), "invoices": []},
+            key: {"label": label, "amount": Decimal("0"), "count": 0}
+            for key, label in AGING_BUCKETS
         }
-        
-        total = Decimal("0")
-        
-        for inv in invoices:
-            outstanding = inv.balance_due or (inv.total_amount - (inv.amount_paid or Decimal("0")))
-            
-            if inv.due_date:
-                days_overdue = (as_of_date.date() - inv.due_date.date()).days
-            else:
-                days_overdue = 0
-            
-            inv_data = {
-                "invoice_id": inv.id,
-                "invoice_number": inv.invoice_number,
-                "customer_name": inv.customer.name if inv.customer else "Unknown",
-                "due_date": inv.due_date,
-                "amount": outstanding,
-                "days_overdue": days_overdue,
-            }
-            
-            if days_overdue <= 0:
-                aging["current"]["amount"] += outstanding
-                aging["current"]["invoices"].append(inv_data)
-            elif days_overdue <= 30:
-                aging["1_30"]["amount"] += outstanding
-                aging["1_30"]["invoices"].append(inv_data)
-            elif days_overdue <= 60:
-                aging["31_60"]["amount"] += outstanding
-                aging["31_60"]["invoices"].append(inv_data)
-            elif days_overdue <= 90:
-                aging["61_90"]["amount"] += outstanding
-                aging["61_90"]["invoices"].append(inv_data)
-            else:
-                aging["over_90"]["amount"] += outstanding
-                aging["over_90"]["invoices"].append(inv_data)
-            
-            total += outstanding
-        
-        return {
+        result = {
             "as_of_date": as_of_date,
             "report_type": report_type,
             "aging": aging,
-            "total": total,
+            "total": Decimal("0"),
         }
+        if bucket is not None and bucket not in aging:
+            raise ValueError(f"Unknown bucket '{bucket}'")
+        
+        if report_type != "receivables":
+            # For payables, would query purchase invoices
+            if bucket is not None:
+                result["invoices"] = []
+                result["has_more"] = False
+            return result
+        
+        as_of_day = datetime.combine(as_of_date.date(), datetime.min.time())
+        keys = [key for key, _ in AGING_BUCKETS]
+        bucket_expr = case(
+            (Invoice.due_date.is_(None), keys[0]),
+            (Invoice.due_date >= as_of_day, keys[0]),
+            (Invoice.due_date >= as_of_day - timedelta(days=30), keys[1]),
+            (Invoice.due_date >= as_of_day - timedelta(days=60), keys[2]),
+            (Invoice.due_date >= as_of_day - timedelta(days=90), keys[3]),
+            else_=keys[4],
+        )
+        outstanding_expr = case(
+            (func.coalesce(Invoice.balance_due, 0) == 0,
+             Invoice.total_amount - func.coalesce(Invoice.amount_paid, 0)),
+            else_=Invoice.balance_due,
+        )
+        filters = (
+            Invoice.company_id == company.id,
+            Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIALLY_PAID, InvoiceStatus.OVERDUE]),
+            Invoice.invoice_date <= as_of_date,
+        )
+        
+        rows = self.db.query(
+            bucket_expr.label("bucket"),
+            func.sum(outstanding_expr).label("amount"),
+            func.count(Invoice.id).label("count"),
+        ).filter(*filters).group_by(bucket_expr).all()
+        
+        for row in rows:
+            amount = Decimal(str(row.amount or 0))
+            aging[row.bucket]["amount"] = amount
+            aging[row.bucket]["count"] = row.count
+            result["total"] += amount
+        
+        if bucket is not None:
+            invoice_rows = self.db.query(
+                Invoice.id,
+                Invoice.invoice_number,
+                Invoice.due_date,
+                Customer.name.label("customer_name"),
+                outstanding_expr.label("amount"),
+            ).outerjoin(
+                Customer, Customer.id == Invoice.customer_id
+            ).filter(
+                *filters, bucket_expr == bucket
+            ).order_by(
+                Invoice.due_date, Invoice.id
+            ).offset((page - 1) * page_size).limit(page_size + 1).all()
+            
+            result["has_more"] = len(invoice_rows) > page_size
+            result["invoices"] = [
+                {
+                    "invoice_id": row.id,
+                    "invoice_number": row.invoice_number,
+                    "customer_name": row.customer_name or "Unknown",
+                    "due_date": row.due_date,
+                    "amount": row.amount,
+                    "days_overdue": (as_of_date.date() - row.due_date.date()).days if row.due_date else 0,
+                }
+                for row in invoice_rows[:page_size]
+            ]
+        
+        return result
     
     def get_party_statement(
         self,
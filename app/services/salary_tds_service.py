@@ -328,6 +328,8 @@ class SalaryTDSService:
         other_income: Decimal = Decimal("0"),
         previous_employer_income: Decimal = Decimal("0"),
         previous_employer_tds: Decimal = Decimal("0"),
+        declaration: Optional[EmployeeTaxDeclaration] = None,
+        load_declaration: bool = True,
     ) -> TDSCalculationResult:
         """
         Calculate annual TDS for an employee.
@@ -341,6 +343,8 @@ class SalaryTDSService:
             other_income: Other income declared by employee
             previous_employer_income: Income from previous employer
             previous_employer_tds: TDS already deducted by previous employer
+            declaration: Preloaded tax declaration for the financial year
+            load_declaration: Look the declaration up (False when preloaded, even if None)
         
         Returns:
             TDSCalculationResult with complete tax calculation
@@ -354,7 +358,8 @@ class SalaryTDSService:
                 financial_year = f"{today.year - 1}-{today.year}"
         
         # Get tax declaration
-        declaration = self.get_tax_declaration(employee.id, financial_year)
+        if load_declaration:
+            declaration = self.get_tax_declaration(employee.id, financial_year)
         
         # Determine tax regime
         tax_regime = TaxRegime.NEW  # Default
@@ -15,6 +15,7 @@ from app.database.models import (
     Customer, Product, Brand, Category
 )
 from app.database.payroll_models import Employee
+from app.services.sales_rollup_service import SalesRollupService
 
 ACTIVE_INVOICE_STATUSES = ["pending", "paid", "partially_paid", "completed"]
 
@@ -160,49 +161,43 @@ class SalesDashboardService:
         if not to_date:
             to_date = datetime.utcnow().date()
         
-        # Get all sales persons with tickets
-        sales_persons = self.db.query(Employee).join(
+        # One pass over the tickets of every sales person who has any;
+        # the period figures are conditional sums
+        in_period = and_(SalesTicket.created_date >= from_date, SalesTicket.created_date <= to_date)
+        won = and_(in_period, SalesTicket.status == SalesTicketStatus.WON)
+        rows = self.db.query(
+            Employee.id,
+            Employee.first_name,
+            Employee.last_name,
+            func.sum(case((in_period, 1), else_=0)).label("total_tickets"),
+            func.sum(case((won, 1), else_=0)).label("won"),
+            func.sum(case((and_(in_period, SalesTicket.status == SalesTicketStatus.LOST), 1), else_=0)).label("lost"),
+            func.sum(case((won, SalesTicket.actual_value), else_=None)).label("won_value"),
+            func.sum(case(
+                (and_(in_period, SalesTicket.status == SalesTicketStatus.OPEN), SalesTicket.expected_value),
+                else_=None,
+            )).label("pipeline_value"),
+        ).join(
             SalesTicket, SalesTicket.sales_person_id == Employee.id
         ).filter(
             SalesTicket.company_id == company_id
-        ).distinct().all()
+        ).group_by(Employee.id, Employee.first_name, Employee.last_name).all()
         
         results = []
-        for person in sales_persons:
-            base_filter = and_(
-                SalesTicket.company_id == company_id,
-                SalesTicket.sales_person_id == person.id,
-                SalesTicket.created_date >= from_date,
-                SalesTicket.created_date <= to_date
-            )
-            
-            total_tickets = self.db.query(func.count(SalesTicket.id)).filter(base_filter).scalar() or 0
-            
-            won_tickets = self.db.query(func.count(SalesTicket.id)).filter(
-                and_(base_filter, SalesTicket.status == SalesTicketStatus.WON)
-            ).scalar() or 0
-            
-            lost_tickets = self.db.query(func.count(SalesTicket.id)).filter(
-                and_(base_filter, SalesTicket.status == SalesTicketStatus.LOST)
-            ).scalar() or 0
-            
-            won_value = self.db.query(func.sum(SalesTicket.actual_value)).filter(
-                and_(base_filter, SalesTicket.status == SalesTicketStatus.WON)
-            ).scalar() or Decimal("0")
-            
-            pipeline_value = self.db.query(func.sum(SalesTicket.expected_value)).filter(
-                and_(base_filter, SalesTicket.status == SalesTicketStatus.OPEN)
-            ).scalar() or Decimal("0")
+        for row in rows:
+            total_tickets = row.total_tickets or 0
+            won_tickets = row.won or 0
+            lost_tickets = row.lost or 0
             
             results.append({
-                "sales_person_id": person.id,
-                "sales_person_name": f"{person.first_name} {person.last_name}",
+                "sales_person_id": row.id,
+                "sales_person_name": f"{row.first_name} {row.last_name}",
                 "total_tickets": total_tickets,
                 "won": won_tickets,
                 "lost": lost_tickets,
                 "open": total_tickets - won_tickets - lost_tickets,
-                "won_value": float(won_value),
-                "pipeline_value": float(pipeline_value),
+                "won_value": float(row.won_value or Decimal("0")),
+                "pipeline_value": float(row.pipeline_value or Decimal("0")),
                 "win_rate": round((won_tickets / (won_tickets + lost_tickets) * 100) if (won_tickets + lost_tickets) > 0 else 0, 1),
             })
         
@@ -276,6 +271,16 @@ class SalesDashboardService:
         results = []
         today = datetime.utcnow().date()
         
+        # Invoice counts per day over the whole range, from the daily sales rollup
+        first_month = today - timedelta(days=(months - 1) * 30)
+        invoices_by_month: Dict[str, int] = {}
+        for row in SalesRollupService(self.db).summarize(
+            company_id, date(first_month.year, first_month.month, 1), today + timedelta(days=31),
+            group_by=("sale_date",),
+        ):
+            month = row.sale_date.strftime("%Y-%m")
+            invoices_by_month[month] = invoices_by_month.get(month, 0) + row.invoice_count
+        
         for i in range(months - 1, -1, -1):
             # Calculate month start and end
             month_date = today - timedelta(days=i * 30)
@@ -301,13 +306,7 @@ class SalesDashboardService:
                 )
             ).scalar() or 0
             
-            invoices = self.db.query(func.count(Invoice.id)).filter(
-                and_(
-                    Invoice.company_id == company_id,
-                    func.date(Invoice.invoice_date) >= month_start,
-                    func.date(Invoice.invoice_date) <= month_end
-                )
-            ).scalar() or 0
+            invoices = invoices_by_month.get(month_start.strftime("%Y-%m"), 0)
             
             won_value = self.db.query(func.sum(SalesTicket.actual_value)).filter(
                 and_(
@@ -510,26 +509,18 @@ class SalesDashboardService:
 
     # ==================== SALES REPORTS ====================
 
-    def get_sales_by_brand(
+    def _product_group_sales(
         self,
         company_id: str,
-        from_date: Optional[date] = None,
-        to_date: Optional[date] = None,
-    ) -> List[Dict[str, Any]]:
-        """
-        Get sales report grouped by brand.
-        
-        Returns for each brand: invoice count, total quantity, total amount.
-        """
-        if not from_date:
-            from_date = datetime.utcnow().date() - timedelta(days=365)
-        if not to_date:
-            to_date = datetime.utcnow().date()
-        
-        # Query: Invoice -> InvoiceItem -> Product -> Brand
-        results = self.db.query(
-            Brand.id.label("brand_id"),
-            Brand.name.label("brand_name"),
+        from_date: date,
+        to_date: date,
+        group_model,
+        product_key,
+    ) -> List[Any]:
+        """Invoice count, quantity and amounts of active invoice items per brand or category."""
+        return self.db.query(
+            group_model.id.label("group_id"),
+            group_model.name.label("group_name"),
             func.count(func.distinct(Invoice.id)).label("invoice_count"),
             func.sum(InvoiceItem.quantity).label("total_quantity"),
             func.sum(InvoiceItem.total_amount).label("total_amount"),
@@ -539,7 +530,7 @@ class SalesDashboardService:
         ).join(
             Product, InvoiceItem.product_id == Product.id, isouter=True
         ).join(
-            Brand, Product.brand_id == Brand.id, isouter=True
+            group_model, product_key == group_model.id, isouter=True
         ).filter(
             and_(
                 Invoice.company_id == company_id,
@@ -547,32 +538,47 @@ class SalesDashboardService:
                 Invoice.invoice_date <= to_date,
                 Invoice.status.in_(ACTIVE_INVOICE_STATUSES)
             )
-        ).group_by(Brand.id, Brand.name).all()
+        ).group_by(group_model.id, group_model.name).all()
+    
+    @staticmethod
+    def _with_percentages(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add each entry's share of the total amount and sort by amount descending."""
+        total_sales = float(sum(Decimal(str(item["total_amount"])) for item in data))
+        for item in data:
+            item["percentage"] = round((item["total_amount"] / total_sales * 100) if total_sales > 0 else 0, 2)
+        data.sort(key=lambda x: x["total_amount"], reverse=True)
+        return data
+    
+    def get_sales_by_brand(
+        self,
+        company_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get sales report grouped by brand.
         
-        brand_data = []
-        total_sales = Decimal("0")
+        Returns for each brand: invoice count, total quantity, total amount.
+        """
+        if not from_date:
+            from_date = datetime.utcnow().date() - timedelta(days=365)
+        if not to_date:
+            to_date = datetime.utcnow().date()
         
-        for row in results:
-            total_amount = row.total_amount or Decimal("0")
-            total_sales += total_amount
-            
-            brand_data.append({
-                "brand_id": row.brand_id,
-                "brand_name": row.brand_name or "No Brand / Unassigned",
+        # Query: Invoice -> InvoiceItem -> Product -> Brand
+        results = self._product_group_sales(company_id, from_date, to_date, Brand, Product.brand_id)
+        
+        return self._with_percentages([
+            {
+                "brand_id": row.group_id,
+                "brand_name": row.group_name or "No Brand / Unassigned",
                 "invoice_count": row.invoice_count or 0,
                 "total_quantity": float(row.total_quantity or 0),
-                "total_amount": float(total_amount),
+                "total_amount": float(row.total_amount or 0),
                 "taxable_amount": float(row.taxable_amount or 0),
-            })
-        
-        # Calculate percentage
-        for item in brand_data:
-            item["percentage"] = round((item["total_amount"] / float(total_sales) * 100) if total_sales > 0 else 0, 2)
-        
-        # Sort by total amount descending
-        brand_data.sort(key=lambda x: x["total_amount"], reverse=True)
-        
-        return brand_data
+            }
+            for row in results
+        ])
     
     def get_sales_by_state(
         self,
@@ -597,7 +603,7 @@ class SalesDashboardService:
             func.count(func.distinct(Invoice.id)).label("invoice_count"),
             func.count(func.distinct(Customer.id)).label("customer_count"),
             func.sum(Invoice.total_amount).label("total_amount"),
-            func.sum(Invoice.taxable_amount).label("taxable_amount"),
+            func.sum(Invoice.subtotal).label("taxable_amount"),
             func.sum(Invoice.cgst_amount + Invoice.sgst_amount).label("sgst_cgst"),
             func.sum(Invoice.igst_amount).label("igst"),
         ).select_from(Invoice).join(
@@ -612,12 +618,7 @@ class SalesDashboardService:
         ).group_by(Customer.billing_state, Customer.billing_state_code).all()
         
         state_data = []
-        total_sales = Decimal("0")
-        
         for row in results:
-            total_amount = row.total_amount or Decimal("0")
-            total_sales += total_amount
-            
             # Determine if intra-state or inter-state based on GST
             is_intrastate = (row.sgst_cgst or 0) > 0
             
@@ -626,21 +627,14 @@ class SalesDashboardService:
                 "state_code": row.state_code or "",
                 "invoice_count": row.invoice_count or 0,
                 "customer_count": row.customer_count or 0,
-                "total_amount": float(total_amount),
+                "total_amount": float(row.total_amount or 0),
                 "taxable_amount": float(row.taxable_amount or 0),
                 "sgst_cgst": float(row.sgst_cgst or 0),
                 "igst": float(row.igst or 0),
                 "supply_type": "Intra-State" if is_intrastate else "Inter-State",
             })
         
-        # Calculate percentage
-        for item in state_data:
-            item["percentage"] = round((item["total_amount"] / float(total_sales) * 100) if total_sales > 0 else 0, 2)
-        
-        # Sort by total amount descending
-        state_data.sort(key=lambda x: x["total_amount"], reverse=True)
-        
-        return state_data
+        return self._with_percentages(state_data)
     
     def get_sales_by_category(
         self,
@@ -659,50 +653,18 @@ class SalesDashboardService:
             to_date = datetime.utcnow().date()
         
         # Query: Invoice -> InvoiceItem -> Product -> Category
-        results = self.db.query(
-            Category.id.label("category_id"),
-            Category.name.label("category_name"),
-            func.count(func.distinct(Invoice.id)).label("invoice_count"),
-            func.sum(InvoiceItem.quantity).label("total_quantity"),
-            func.sum(InvoiceItem.total_amount).label("total_amount"),
-        ).select_from(Invoice).join(
-            InvoiceItem, Invoice.id == InvoiceItem.invoice_id
-        ).join(
-            Product, InvoiceItem.product_id == Product.id, isouter=True
-        ).join(
-            Category, Product.category_id == Category.id, isouter=True
-        ).filter(
-            and_(
-                Invoice.company_id == company_id,
-                Invoice.invoice_date >= from_date,
-                Invoice.invoice_date <= to_date,
-                Invoice.status.in_(ACTIVE_INVOICE_STATUSES)
-            )
-        ).group_by(Category.id, Category.name).all()
-        
-        category_data = []
-        total_sales = Decimal("0")
+        results = self._product_group_sales(company_id, from_date, to_date, Category, Product.category_id)
         
-        for row in results:
-            total_amount = row.total_amount or Decimal("0")
-            total_sales += total_amount
-            
-            category_data.append({
-                "category_id": row.category_id,
-                "category_name": row.category_name or "Uncategorized",
+        return self._with_percentages([
+            {
+                "category_id": row.group_id,
+                "category_name": row.group_name or "Uncategorized",
                 "invoice_count": row.invoice_count or 0,
                 "total_quantity": float(row.total_quantity or 0),
-                "total_amount": float(total_amount),
-            })
-        
-        # Calculate percentage
-        for item in category_data:
-            item["percentage"] = round((item["total_amount"] / float(total_sales) * 100) if total_sales > 0 else 0, 2)
-        
-        # Sort by total amount descending
-        category_data.sort(key=lambda x: x["total_amount"], reverse=True)
-        
-        return category_data
+                "total_amount": float(row.total_amount or 0),
+            }
+            for row in results
+        ])
     
     def get_engineer_performance(
         self,
@@ -730,75 +692,89 @@ class SalesDashboardService:
             to_date = datetime.utcnow().date()
         
         # Get all sales employees
-        from app.database.payroll_models import Employee
         emp_query = self.db.query(Employee).filter(Employee.company_id == company_id)
         if employee_id:
             emp_query = emp_query.filter(Employee.id == employee_id)
         
         employees = emp_query.all()
-        performance_data = []
+        if not employees:
+            return []
+        
+        def per_person(query, person_column):
+            if employee_id:
+                query = query.filter(person_column == employee_id)
+            return {row[0]: row for row in query.group_by(person_column).all()}
+        
+        # Enquiries count per sales person
+        enquiries = per_person(self.db.query(
+            Enquiry.sales_person_id,
+            func.count(Enquiry.id).label("count"),
+        ).filter(
+            Enquiry.company_id == company_id,
+            Enquiry.enquiry_date >= from_date,
+            Enquiry.enquiry_date <= to_date,
+        ), Enquiry.sales_person_id)
+        
+        # Quotations count and value per sales person
+        quotations = per_person(self.db.query(
+            Quotation.sales_person_id,
+            func.count(Quotation.id).label("count"),
+            # Engineer dashboard should use no-tax values.
+            func.sum(Quotation.subtotal).label("value"),
+        ).filter(
+            Quotation.company_id == company_id,
+            Quotation.quotation_date >= from_date,
+            Quotation.quotation_date <= to_date,
+        ), Quotation.sales_person_id)
+        
+        # Invoices (conversions) count and value per sales person
+        invoices = per_person(self.db.query(
+            Invoice.sales_person_id,
+            func.count(Invoice.id).label("count"),
+            # Engineer dashboard should use no-tax values.
+            func.sum(Invoice.subtotal).label("value"),
+        ).filter(
+            Invoice.company_id == company_id,
+            Invoice.invoice_date >= from_date,
+            Invoice.invoice_date <= to_date,
+            Invoice.status.in_(ACTIVE_INVOICE_STATUSES),
+        ), Invoice.sales_person_id)
+        
+        # Current month's targets
+        targets_query = self.db.query(SalesTarget).filter(
+            SalesTarget.company_id == company_id,
+            SalesTarget.target_year == datetime.utcnow().year,
+            SalesTarget.target_month == datetime.utcnow().month,
+        )
+        if employee_id:
+            targets_query = targets_query.filter(SalesTarget.employee_id == employee_id)
+        targets = {}
+        for target in targets_query.all():
+            targets.setdefault(target.employee_id, target)
         
+        performance_data = []
         for employee in employees:
-            # Enquiries count
-            enquiries = self.db.query(func.count(Enquiry.id)).filter(
-                Enquiry.company_id == company_id,
-                Enquiry.sales_person_id == employee.id,
-                Enquiry.enquiry_date >= from_date,
-                Enquiry.enquiry_date <= to_date,
-            ).scalar() or 0
-            
-            # Quotations count and value
-            quotations = self.db.query(
-                func.count(Quotation.id).label("count"),
-                # Engineer dashboard should use no-tax values.
-                func.sum(Quotation.subtotal).label("value")
-            ).filter(
-                Quotation.company_id == company_id,
-                Quotation.sales_person_id == employee.id,
-                Quotation.quotation_date >= from_date,
-                Quotation.quotation_date <= to_date,
-            ).first()
-            
-            quotation_count = quotations.count or 0
-            quotation_value = float(quotations.value or 0)
-            
-            # Invoices (conversions) count and value
-            invoices = self.db.query(
-                func.count(Invoice.id).label("count"),
-                # Engineer dashboard should use no-tax values.
-                func.sum(Invoice.subtotal).label("value")
-            ).filter(
-                Invoice.company_id == company_id,
-                Invoice.sales_person_id == employee.id,
-                Invoice.invoice_date >= from_date,
-                Invoice.invoice_date <= to_date,
-                Invoice.status.in_(ACTIVE_INVOICE_STATUSES)
-            ).first()
+            enquiry_row = enquiries.get(employee.id)
+            quotation_row = quotations.get(employee.id)
+            invoice_row = invoices.get(employee.id)
             
-            invoice_count = invoices.count or 0
-            invoice_value = float(invoices.value or 0)
+            enquiry_count = enquiry_row.count if enquiry_row else 0
+            quotation_count = quotation_row.count if quotation_row else 0
+            quotation_value = float(quotation_row.value or 0) if quotation_row else 0.0
+            invoice_count = invoice_row.count if invoice_row else 0
+            invoice_value = float(invoice_row.value or 0) if invoice_row else 0.0
             
             # Conversion rate
             conversion_rate = (invoice_count / quotation_count * 100) if quotation_count > 0 else 0
             
-            # Get current month's target
-            current_year = datetime.utcnow().year
-            current_month = datetime.utcnow().month
-            
-            target = self.db.query(SalesTarget).filter(
-                SalesTarget.company_id == company_id,
-                SalesTarget.employee_id == employee.id,
-                SalesTarget.target_year == current_year,
-                SalesTarget.target_month == current_month,
-            ).first()
-            
+            target = targets.get(employee.id)
             target_amount = float(target.target_amount) if target else 0
             achievement_percent = (invoice_value / target_amount * 100) if target_amount > 0 else 0
             
             performance_data.append({
                 "employee_id": employee.id,
                 "employee_name": f"{employee.first_name} {employee.last_name}",
-                "enquiries": enquiries,
+                "enquiries": enquiry_count,
                 "quotations": quotation_count,
                 "quotation_value": quotation_value,
                 "invoices": invoice_count,
@@ -0,0 +1,261 @@
+"""Sales rollup service - daily sales totals for dashboards.
+
+Dashboard endpoints used to sum the whole ``invoices`` table on every page
+load (``get_dashboard_data`` alone ran seven queries over it). The
+``sales_daily_rollups`` table holds one row per company, day, voucher type,
+status, salesperson and customer with the invoice count and summed
+subtotal, discount, tax components, total, paid and balance due. The
+customer is keyed by id and by the name printed on the invoice, so top
+customers are reported by invoice name as before: walk-in sales keep their
+names and renaming a customer does not rewrite past invoices.
+
+Rows are maintained from Invoice mapper events on the flushing connection
+(see app/database/models.py), so they commit or roll back together with the
+invoice, whichever service writes it:
+
+- insert adds the invoice's totals to its key;
+- update (edits, status changes, payments) takes the totals stored in the
+  database out of the old key and adds the new ones;
+- delete takes the stored totals out.
+
+Bulk SQL that bypasses the ORM is not seen; ``python rebuild_sales_rollups.py``
+regenerates the table from the invoices.
+"""
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.database.models import Invoice, SalesDailyRollup, generate_uuid
+from app.services.stock_balance_service import upsert_increments
+
+
+# Invoice amount columns summed into the rollup columns of the same name
+MEASURES = (
+    "subtotal", "discount_amount", "cgst_amount", "sgst_amount", "igst_amount",
+    "cess_amount", "total_tax", "total_amount", "amount_paid", "balance_due",
+)
+KEY_ATTRIBUTES = (
+    "company_id", "invoice_date", "voucher_type", "status", "sales_person_id", "customer_id", "customer_name",
+)
+
+GROUP_COLUMNS = ("sale_date", "voucher_type", "status", "sales_person_key", "customer_key", "customer_name")
+
+
+def _value(member: Any) -> str:
+    """Enum value (or plain string) as stored in the rollup keys."""
+    if member is None:
+        return ""
+    return getattr(member, "value", member)
+
+
+def _to_date(value: Union[datetime, date, str]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+# ==================== MAINTENANCE (mapper events) ====================
+
+def _apply(connection, values: Mapping[str, Any], sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) one invoice's totals."""
+    if values["company_id"] is None or values["invoice_date"] is None:
+        return
+    table = SalesDailyRollup.__table__
+    key = {
+        "company_id": values["company_id"],
+        "sale_date": _to_date(values["invoice_date"]),
+        "voucher_type": _value(values["voucher_type"]),
+        "status": _value(values["status"]),
+        "sales_person_key": values["sales_person_id"] or "",
+        "customer_key": values["customer_id"] or "",
+        "customer_name": values["customer_name"] or "",
+    }
+    increments = {"invoice_count": sign}
+    for column in MEASURES:
+        increments[column] = Decimal(str(values[column] or 0)) * sign
+    upsert_increments(connection, table, key, increments, increments)
+
+
+def _stored_invoice(connection, invoice_id: str) -> Optional[Dict[str, Any]]:
+    """The invoice's key and amounts as currently stored in the database."""
+    invoices = Invoice.__table__
+    row = connection.execute(
+        select(*[invoices.c[name] for name in KEY_ATTRIBUTES + MEASURES]).where(invoices.c.id == invoice_id)
+    ).first()
+    return dict(row._mapping) if row is not None else None
+
+
+def apply_invoice(connection, invoice: Invoice) -> None:
+    """Add a newly inserted invoice to the rollup."""
+    _apply(connection, {name: getattr(invoice, name) for name in KEY_ATTRIBUTES + MEASURES}, 1)
+
+
+def reapply_invoice(connection, invoice: Invoice) -> None:
+    """Move an invoice about to be updated from its stored totals to its new ones."""
+    state = inspect(invoice)
+    names = KEY_ATTRIBUTES + MEASURES
+    if not any(state.attrs[name].history.has_changes() for name in names):
+        return
+    stored = _stored_invoice(connection, invoice.id)
+    if stored is None:
+        return
+    # Attributes not loaded in the session keep their stored value
+    current = {name: state.dict.get(name, stored[name]) for name in names}
+    _apply(connection, stored, -1)
+    _apply(connection, current, 1)
+
+
+def release_invoice(connection, invoice_id: str) -> None:
+    """Remove an invoice about to be deleted from the rollup."""
+    stored = _stored_invoice(connection, invoice_id)
+    if stored is not None:
+        _apply(connection, stored, -1)
+
+
+# ==================== READS ====================
+
+class SalesRollupService:
+    """Dashboard totals from the daily sales rollup."""
+
+    REBUILD_BATCH_SIZE = 5000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def summarize(
+        self,
+        company_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        statuses: Optional[Iterable[Any]] = None,
+        exclude_statuses: Optional[Iterable[Any]] = None,
+        group_by: Iterable[str] = (),
+    ) -> List[Any]:
+        """
+        Invoice count and summed amounts, optionally per rollup key column.
+
+        Dates are inclusive whole days. Each row has the ``group_by`` columns,
+        ``invoice_count`` and every column of ``MEASURES``.
+        """
+        if any(name not in GROUP_COLUMNS for name in group_by):
+            raise ValueError(f"Rollups group by {', '.join(GROUP_COLUMNS)}")
+        groups = [getattr(SalesDailyRollup, name) for name in group_by]
+        query = self.db.query(
+            *groups,
+            func.coalesce(func.sum(SalesDailyRollup.invoice_count), 0).label("invoice_count"),
+            *[
+                func.coalesce(func.sum(getattr(SalesDailyRollup, column)), 0).label(column)
+                for column in MEASURES
+            ],
+        )
+        query = self._filter(query, company_id, from_date, to_date, statuses, exclude_statuses)
+        if groups:
+            query = query.group_by(*groups)
+        return query.all()
+
+    def totals(self, company_id: str, **filters) -> Any:
+        """Single row of ``summarize`` without grouping."""
+        return self.summarize(company_id, **filters)[0]
+
+    def top_customers(
+        self,
+        company_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        limit: int = 5,
+    ) -> List[Any]:
+        """Customer names on invoices with the highest invoiced total ("" = no name)."""
+        total = func.sum(SalesDailyRollup.total_amount)
+        query = self.db.query(
+            SalesDailyRollup.customer_name,
+            func.sum(SalesDailyRollup.invoice_count).label("invoice_count"),
+            total.label("total_amount"),
+        )
+        query = self._filter(query, company_id, from_date, to_date)
+        return query.group_by(
+            SalesDailyRollup.customer_name
+        ).having(
+            func.sum(SalesDailyRollup.invoice_count) > 0
+        ).order_by(total.desc()).limit(limit).all()
+
+    @staticmethod
+    def _filter(query, company_id, from_date=None, to_date=None, statuses=None, exclude_statuses=None):
+        query = query.filter(SalesDailyRollup.company_id == company_id)
+        if from_date:
+            query = query.filter(SalesDailyRollup.sale_date >= _to_date(from_date))
+        if to_date:
+            query = query.filter(SalesDailyRollup.sale_date <= _to_date(to_date))
+        if statuses is not None:
+            query = query.filter(SalesDailyRollup.status.in_([_value(s) for s in statuses]))
+        if exclude_statuses is not None:
+            query = query.filter(SalesDailyRollup.status.notin_([_value(s) for s in exclude_statuses]))
+        return query
+
+    # ==================== REBUILD ====================
+
+    def rebuild(self, company_id: Optional[str] = None) -> int:
+        """
+        Regenerate the rollup from the invoices.
+
+        Needed once for invoices created before the table existed, or after
+        invoices were changed outside the ORM. Returns the number of rows
+        written.
+        """
+        query = self.db.query(SalesDailyRollup)
+        if company_id:
+            query = query.filter(SalesDailyRollup.company_id == company_id)
+        query.delete(synchronize_session=False)
+
+        day = func.date(Invoice.invoice_date).label("day")
+        sales_person_key = func.coalesce(Invoice.sales_person_id, "").label("sales_person_key")
+        customer_key = func.coalesce(Invoice.customer_id, "").label("customer_key")
+        customer_name = func.coalesce(Invoice.customer_name, "").label("customer_name")
+        query = self.db.query(
+            Invoice.company_id,
+            day,
+            Invoice.voucher_type,
+            Invoice.status,
+            sales_person_key,
+            customer_key,
+            customer_name,
+            func.count(Invoice.id).label("invoice_count"),
+            *[func.coalesce(func.sum(getattr(Invoice, column)), 0).label(column) for column in MEASURES],
+        ).filter(Invoice.invoice_date.isnot(None))
+        if company_id:
+            query = query.filter(Invoice.company_id == company_id)
+        query = query.group_by(
+            Invoice.company_id, day, Invoice.voucher_type, Invoice.status, sales_person_key, customer_key,
+            customer_name,
+        )
+
+        now = datetime.utcnow()
+        rows: List[Dict[str, Any]] = []
+        written = 0
+        for row in query.yield_per(self.REBUILD_BATCH_SIZE):
+            rows.append({
+                "id": generate_uuid(),
+                "company_id": row.company_id,
+                "sale_date": _to_date(row.day),
+                "voucher_type": _value(row.voucher_type),
+                "status": _value(row.status),
+                "sales_person_key": row.sales_person_key,
+                "customer_key": row.customer_key,
+                "customer_name": row.customer_name,
+                "invoice_count": row.invoice_count,
+                **{column: Decimal(str(getattr(row, column))) for column in MEASURES},
+                "updated_at": now,
+            })
+            if len(rows) >= self.REBUILD_BATCH_SIZE:
+                self.db.bulk_insert_mappings(SalesDailyRollup, rows)
+                written += len(rows)
+                rows.clear()
+        if rows:
+            self.db.bulk_insert_mappings(SalesDailyRollup, rows)
+            written += len(rows)
+        self.db.commit()
+        return written
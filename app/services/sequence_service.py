@@ -0,0 +1,125 @@
+"""Sequence service - concurrency-safe document numbering.
+
+Counters live in the document_sequences table, one row per company, sequence
+key and (optionally) financial year. Values are allocated with an atomic
+``UPDATE ... SET current_value = current_value + n``, which row-locks the
+counter until the caller's transaction ends. Allocation is therefore O(1),
+never hands out the same value twice, and is gap-free: if the document insert
+rolls back, so does the increment.
+"""
+from datetime import date, datetime
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database.models import DocumentSequence
+
+
+def get_financial_year(as_of: Optional[date] = None) -> str:
+    """Indian financial year (April-March) for a date, e.g. '2024-2025'."""
+    if as_of is None:
+        as_of = date.today()
+    if isinstance(as_of, datetime):
+        as_of = as_of.date()
+
+    if as_of.month >= 4:
+        return f"{as_of.year}-{as_of.year + 1}"
+    return f"{as_of.year - 1}-{as_of.year}"
+
+
+class SequenceService:
+    """Allocates sequential numbers from persistent per-company counters."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def next_value(
+        self,
+        company_id: str,
+        sequence_key: str,
+        financial_year: str = "",
+        seed: Optional[Callable[[], int]] = None,
+    ) -> int:
+        """Allocate the next value of a sequence.
+
+        ``seed`` is called once, when the counter row does not exist yet, and
+        must return the last value already used (e.g. parsed from existing
+        documents) so numbering continues where the legacy data left off.
+        """
+        return self.allocate_block(company_id, sequence_key, 1, financial_year, seed)
+
+    def allocate_block(
+        self,
+        company_id: str,
+        sequence_key: str,
+        count: int,
+        financial_year: str = "",
+        seed: Optional[Callable[[], int]] = None,
+    ) -> int:
+        """Reserve ``count`` consecutive values and return the first one.
+
+        Used by bulk imports to number many documents with one counter update.
+        Values of a block that end up unused are not returned to the sequence.
+        """
+        if count < 1:
+            raise ValueError("Block size must be at least 1")
+
+        if not self._increment(company_id, sequence_key, financial_year, count):
+            self._create_counter(company_id, sequence_key, financial_year, seed)
+            self._increment(company_id, sequence_key, financial_year, count)
+
+        current_value = self.db.query(DocumentSequence.current_value).filter(
+            DocumentSequence.company_id == company_id,
+            DocumentSequence.sequence_key == sequence_key,
+            DocumentSequence.financial_year == financial_year,
+        ).scalar()
+        return current_value - count + 1
+
+    def peek(
+        self,
+        company_id: str,
+        sequence_key: str,
+        financial_year: str = "",
+        seed: Optional[Callable[[], int]] = None,
+    ) -> int:
+        """Preview the next value without allocating it."""
+        current_value = self.db.query(DocumentSequence.current_value).filter(
+            DocumentSequence.company_id == company_id,
+            DocumentSequence.sequence_key == sequence_key,
+            DocumentSequence.financial_year == financial_year,
+        ).scalar()
+
+        if current_value is None:
+            current_value = seed() if seed else 0
+        return current_value + 1
+
+    def _increment(self, company_id: str, sequence_key: str, financial_year: str, count: int) -> bool:
+        updated = self.db.query(DocumentSequence).filter(
+            DocumentSequence.company_id == company_id,
+            DocumentSequence.sequence_key == sequence_key,
+            DocumentSequence.financial_year == financial_year,
+        ).update({
+            DocumentSequence.current_value: DocumentSequence.current_value + count,
+            DocumentSequence.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        return updated > 0
+
+    def _create_counter(
+        self,
+        company_id: str,
+        sequence_key: str,
+        financial_year: str,
+        seed: Optional[Callable[[], int]],
+    ) -> None:
+        try:
+            with self.db.begin_nested():
+                self.db.add(DocumentSequence(
+                    company_id=company_id,
+                    sequence_key=sequence_key,
+                    financial_year=financial_year,
+                    current_value=seed() if seed else 0,
+                ))
+        except IntegrityError:
+            # Another request created the counter first - use theirs
+            pass
@@ -11,6 +11,7 @@ from app.database.models import (
     Company, Invoice, InvoiceItem, Product, StockEntry, Godown,
     StockMovementType, InvoiceStatus
 )
+from app.services.stock_balance_service import StockBalanceService, apply_stock_delta, lock_products
 
 
 class StockAllocationService:
@@ -41,48 +42,7 @@ class StockAllocationService:
         Get available stock for a product across all warehouses.
         Returns: [{"godown_id": str|None, "godown_name": str, "quantity": Decimal}, ...]
         """
-        # Query all stock entries for this product
-        entries = self.db.query(StockEntry).filter(
-            StockEntry.company_id == company_id,
-            StockEntry.product_id == product_id
-        ).all()
-        
-        # Aggregate by warehouse
-        warehouse_stock = {}
-        
-        for entry in entries:
-            godown_id = entry.godown_id or "main"
-            if godown_id not in warehouse_stock:
-                warehouse_stock[godown_id] = Decimal("0")
-            warehouse_stock[godown_id] += entry.quantity
-        
-        # Format results
-        result = []
-        
-        # Add main location
-        if "main" in warehouse_stock and warehouse_stock["main"] != 0:
-            result.append({
-                "godown_id": None,
-                "godown_name": "Main Location",
-                "quantity": warehouse_stock["main"]
-            })
-        
-        # Add godowns
-        godowns = self.db.query(Godown).filter(
-            Godown.company_id == company_id,
-            Godown.is_active == True
-        ).all()
-        
-        for godown in godowns:
-            qty = warehouse_stock.get(godown.id, Decimal("0"))
-            if qty != 0:
-                result.append({
-                    "godown_id": godown.id,
-                    "godown_name": godown.name,
-                    "quantity": qty
-                })
-        
-        return result
+        return StockBalanceService(self.db).get_available_stock_by_warehouse(product_id, company_id)
     
     def split_by_priority(
         self, 
@@ -217,6 +177,9 @@ class StockAllocationService:
         """
         entries = []
         
+        # Lock the invoice's products in id order so concurrent invoices cannot deadlock
+        lock_products(self.db, [item.product_id for item in invoice.items])
+        
         for item in invoice.items:
             # Skip if already reduced or no allocation
             if item.stock_reduced or not item.warehouse_allocation:
@@ -253,7 +216,7 @@ class StockAllocationService:
                 entries.append(entry)
                 
                 # Update product current_stock
-                product.current_stock = (product.current_stock or Decimal("0")) - qty
+                apply_stock_delta(self.db, product, -qty)
             
             # Mark item as reduced
             item.stock_reduced = True
@@ -278,16 +241,11 @@ class StockAllocationService:
         Also reverses COGS accounting entries.
         Returns list of created stock entries.
         """
-        # First, reverse COGS entries before modifying stock_reduced flags
-        try:
-            from app.services.accounting_service import AccountingService
-            accounting_service = AccountingService(self.db)
-            accounting_service.reverse_stock_reduction_entries(invoice, reason)
-        except Exception as e:
-            print(f"Warning: Failed to reverse COGS entries for invoice {invoice.invoice_number}: {e}")
-        
         entries = []
         
+        # Lock the invoice's products in id order so concurrent invoices cannot deadlock
+        lock_products(self.db, [item.product_id for item in invoice.items])
+        
         for item in invoice.items:
             # Only restore if stock was actually reduced
             if not item.stock_reduced or not item.warehouse_allocation:
@@ -324,13 +282,23 @@ class StockAllocationService:
                 entries.append(entry)
                 
                 # Update product current_stock
-                product.current_stock = (product.current_stock or Decimal("0")) + qty
+                apply_stock_delta(self.db, product, qty)
             
             # Mark as no longer reduced
             item.stock_reduced = False
             item.stock_reserved = False
         
         self.db.commit()
+        
+        # Reverse COGS at the cost the stock came back at
+        if entries:
+            try:
+                from app.services.accounting_service import AccountingService
+                accounting_service = AccountingService(self.db)
+                accounting_service.reverse_stock_reduction_entries(invoice, reason, stock_entries=entries)
+            except Exception as e:
+                print(f"Warning: Failed to reverse COGS entries for invoice {invoice.invoice_number}: {e}")
+        
         return entries
     
     def get_allocation_summary(self, invoice: Invoice) -> Dict[str, Any]:
@@ -0,0 +1,682 @@
+"""Stock balance service - maintained stock balances and a paged stock ledger.
+
+Stock used to be derived from the whole StockEntry history on every read: the
+ledger loaded every entry of a product (and each entry's godown and batch)
+to build running balances, and allocation summed every entry per godown.
+Two tables now carry that state:
+
+- ``stock_balances`` - current quantity per product, godown and batch;
+- ``stock_balance_snapshots`` - cumulative inward / outward / closing
+  quantity through the end of every month with movements.
+
+Both are updated from StockEntry mapper events on the flushing connection
+(see app/database/models.py), so they commit or roll back together with the
+movement, whichever service records it. Reads take the balance rows, or the
+latest snapshot before a date plus the entries after it - at most about a
+month of movements, however many years the product has.
+
+``Product.current_stock`` and ``Batch.quantity`` are changed through
+``apply_stock_delta``: a server-side ``SET current_stock = current_stock +
+:delta`` rather than read-add-write in Python, which lost updates when
+invoices for the same item were finalized in parallel.
+"""
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, case, func, inspect, not_, or_, select, true, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.database.models import (
+    Batch, Godown, Product, StockBalance, StockBalanceSnapshot, StockEntry,
+    generate_uuid,
+)
+from app.services.stock_valuation_service import release_stock_entry, value_stock_entry
+
+
+Totals = Tuple[Decimal, Decimal]  # (inward, outward)
+
+ZERO = Decimal("0")
+
+
+def period_of(value: Union[datetime, date]) -> date:
+    """First day of the month a movement falls in."""
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def next_period(period: date) -> date:
+    if period.month == 12:
+        return date(period.year + 1, 1, 1)
+    return date(period.year, period.month + 1, 1)
+
+
+def _start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _to_date(value: Union[datetime, date, str]) -> date:
+    """Normalize a snapshot period or a SQL ``date()`` result to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _decimal(value: Any) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def _entry_key():
+    """"godown:batch" of a stock entry, matching the balance table keys."""
+    return func.coalesce(StockEntry.godown_id, "") + ":" + func.coalesce(StockEntry.batch_id, "")
+
+
+# ==================== MAINTENANCE (mapper events) ====================
+
+def upsert_increments(connection, table, key: Dict[str, Any], values: Dict[str, Any], increments: Dict[str, Decimal]) -> None:
+    """Insert a row or add ``increments`` to the existing one, atomically."""
+    now = datetime.utcnow()
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        statement = upsert(table).values(id=generate_uuid(), updated_at=now, **key, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                **{column: table.c[column] + amount for column, amount in increments.items()},
+                "updated_at": now,
+            },
+        )
+        connection.execute(statement)
+        return
+
+    # No ON CONFLICT - update, then insert if there was nothing to update
+    result = connection.execute(
+        update(table).where(*[table.c[column] == value for column, value in key.items()]).values(
+            updated_at=now,
+            **{column: table.c[column] + amount for column, amount in increments.items()},
+        )
+    )
+    if not result.rowcount:
+        connection.execute(table.insert().values(id=generate_uuid(), updated_at=now, **key, **values))
+
+
+def _cumulative_through(
+    connection, product_id: str, godown_key: str, batch_key: str, period: date,
+) -> Tuple[Decimal, Decimal, Decimal]:
+    """Inward/outward quantity and cost value of one key through the end of ``period``."""
+    snapshots = StockBalanceSnapshot.__table__
+    entries = StockEntry.__table__
+    previous = connection.execute(
+        select(
+            snapshots.c.period_start, snapshots.c.total_inward, snapshots.c.total_outward,
+            snapshots.c.closing_value,
+        ).where(
+            snapshots.c.product_id == product_id,
+            snapshots.c.godown_key == godown_key,
+            snapshots.c.batch_key == batch_key,
+            snapshots.c.period_start < period,
+        ).order_by(snapshots.c.period_start.desc()).limit(1)
+    ).first()
+
+    query = select(
+        func.coalesce(func.sum(case((entries.c.quantity > 0, entries.c.quantity), else_=0)), 0),
+        func.coalesce(func.sum(case((entries.c.quantity < 0, -entries.c.quantity), else_=0)), 0),
+        func.coalesce(func.sum(entries.c.cost_value), 0),
+    ).where(
+        entries.c.product_id == product_id,
+        func.coalesce(entries.c.godown_id, "") == godown_key,
+        func.coalesce(entries.c.batch_id, "") == batch_key,
+        entries.c.entry_date < _start_of_day(next_period(period)),
+    )
+    inward = outward = value = ZERO
+    if previous:
+        inward, outward = _decimal(previous.total_inward), _decimal(previous.total_outward)
+        value = _decimal(previous.closing_value)
+        query = query.where(
+            entries.c.entry_date >= _start_of_day(next_period(_to_date(previous.period_start)))
+        )
+
+    added_in, added_out, added_value = connection.execute(query).first()
+    return inward + _decimal(added_in), outward + _decimal(added_out), value + _decimal(added_value)
+
+
+def apply_stock_movement(
+    connection,
+    company_id: str,
+    product_id: str,
+    godown_id: Optional[str],
+    batch_id: Optional[str],
+    entry_date: Optional[datetime],
+    quantity: Any,
+    reverse: bool = False,
+    value: Any = None,
+) -> None:
+    """
+    Fold a stock movement (positive in, negative out) and its cost ``value``
+    into the balance of its product/godown/batch and into the snapshots of
+    its month and later ones; ``reverse`` takes a deleted or edited movement
+    back out.
+
+    Runs on the connection of the flush that wrote the entry, so the update
+    is part of the same transaction.
+    """
+    quantity = _decimal(quantity)
+    if quantity == 0 or not product_id:
+        return
+    sign = -1 if reverse else 1
+    value = sign * _decimal(value)
+
+    key = {"product_id": product_id, "godown_key": godown_id or "", "batch_key": batch_id or ""}
+    upsert_increments(
+        connection, StockBalance.__table__, key,
+        {"company_id": company_id, "quantity": sign * quantity, "value": value},
+        {"quantity": sign * quantity, "value": value},
+    )
+
+    # A reversed outward movement lowers total outward, not raises inward
+    inward = quantity if quantity > 0 else ZERO
+    outward = -quantity if quantity < 0 else ZERO
+    increments = {
+        "total_inward": sign * inward,
+        "total_outward": sign * outward,
+        "closing_quantity": sign * quantity,
+        "closing_value": value,
+    }
+    snapshots = StockBalanceSnapshot.__table__
+    key_filter = [snapshots.c[column] == value for column, value in key.items()]
+    period = period_of(entry_date or datetime.utcnow())
+    now = datetime.utcnow()
+
+    # Later months' cumulative totals include this movement too
+    connection.execute(
+        update(snapshots).where(*key_filter, snapshots.c.period_start > period).values(
+            updated_at=now,
+            **{column: snapshots.c[column] + amount for column, amount in increments.items()},
+        )
+    )
+    result = connection.execute(
+        update(snapshots).where(*key_filter, snapshots.c.period_start == period).values(
+            updated_at=now,
+            **{column: snapshots.c[column] + amount for column, amount in increments.items()},
+        )
+    )
+    if result.rowcount:
+        return
+
+    # First movement of the month - the entry itself is already (or no longer) stored
+    total_in, total_out, total_value = _cumulative_through(
+        connection, product_id, key["godown_key"], key["batch_key"], period
+    )
+    upsert_increments(
+        connection, snapshots, {**key, "period_start": period},
+        {
+            "company_id": company_id,
+            "total_inward": total_in,
+            "total_outward": total_out,
+            "closing_quantity": total_in - total_out,
+            "closing_value": total_value,
+        },
+        # A concurrent writer created the month first - its totals lack this movement
+        increments,
+    )
+
+
+def reapply_stock_movement(connection, entry: StockEntry) -> None:
+    """Move an updated entry's quantity and cost from its old key/date to the new one."""
+    state = inspect(entry)
+    attributes = ("company_id", "product_id", "godown_id", "batch_id", "entry_date", "quantity")
+    history = {name: state.attrs[name].history for name in attributes}
+    costing = ("movement_type", "rate")
+    if not any(item.has_changes() for item in history.values()) and \
+            not any(state.attrs[name].history.has_changes() for name in costing):
+        return
+
+    def previous(name):
+        deleted = history[name].deleted
+        return deleted[0] if deleted else getattr(entry, name)
+
+    # The stored cost is untouched by the UPDATE that was just flushed
+    entries = StockEntry.__table__
+    old_value = connection.execute(select(entries.c.cost_value).where(entries.c.id == entry.id)).scalar()
+    release_stock_entry(
+        connection, entry.id, previous("company_id"), previous("product_id"), previous("godown_id"),
+        previous("entry_date"), previous("quantity"), old_value,
+    )
+    apply_stock_movement(
+        connection, previous("company_id"), previous("product_id"), previous("godown_id"),
+        previous("batch_id"), previous("entry_date"), previous("quantity"), reverse=True, value=old_value,
+    )
+
+    new_value = value_stock_entry(connection, entry, persist=True)
+    apply_stock_movement(
+        connection, entry.company_id, entry.product_id, entry.godown_id,
+        entry.batch_id, entry.entry_date, entry.quantity, value=new_value,
+    )
+
+
+# ==================== CURRENT STOCK ====================
+
+def _increment(db: Session, table, row_id: str, column: str, delta: Decimal, guard: bool = False) -> Optional[Decimal]:
+    """
+    ``UPDATE table SET column = column + :delta`` for one row; returns the new
+    value, or None if no row matched (or ``guard`` would take it below zero).
+    """
+    target = table.c[column]
+    statement = update(table).where(table.c.id == row_id).values({column: func.coalesce(target, 0) + delta})
+    if guard:
+        statement = statement.where(func.coalesce(target, 0) + delta >= 0)
+
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(statement.returning(target)).first()
+        return None if row is None else _decimal(row[0])
+    if not db.execute(statement).rowcount:
+        return None
+    return _decimal(db.execute(select(target).where(table.c.id == row_id)).scalar())
+
+
+def lock_products(db: Session, product_ids) -> None:
+    """
+    Row-lock products (SELECT ... FOR UPDATE) in id order, so documents
+    touching several products cannot deadlock each other. A no-op on
+    databases without row locks.
+    """
+    product_ids = sorted({product_id for product_id in product_ids if product_id})
+    if product_ids:
+        db.query(Product.id).filter(Product.id.in_(product_ids)).order_by(Product.id).with_for_update().all()
+
+
+def apply_stock_delta(
+    db: Session,
+    product: Product,
+    delta: Any,
+    batch_id: Optional[str] = None,
+    allow_negative: bool = True,
+) -> Decimal:
+    """
+    Add ``delta`` to a product's current stock (and its batch's quantity) as
+    a server-side increment, so concurrent movements of the same item cannot
+    overwrite each other the way read-add-write in Python did.
+
+    With ``allow_negative=False`` an issue locks the product row and is
+    refused (ValueError) when it would take stock below zero; the guard is
+    part of the UPDATE, so it also holds on databases without row locks.
+    Returns the new current stock, which is also set on ``product``.
+    """
+    delta = _decimal(delta)
+    guard = not allow_negative and delta < 0
+    if guard:
+        lock_products(db, [product.id])
+
+    current = _increment(db, Product.__table__, product.id, "current_stock", delta, guard=guard)
+    if current is None:
+        available = db.query(Product.current_stock).filter(Product.id == product.id).scalar()
+        raise ValueError(f"Insufficient stock. Available: {available}, Requested: {-delta}")
+    set_committed_value(product, "current_stock", current)
+
+    if batch_id:
+        quantity = _increment(db, Batch.__table__, batch_id, "quantity", delta)
+        batch = db.identity_map.get(identity_key(Batch, batch_id))
+        if batch is not None and quantity is not None:
+            set_committed_value(batch, "quantity", quantity)
+
+    return current
+
+
+# ==================== READS ====================
+
+class StockBalanceService:
+    """Reads maintained stock balances; rebuilds them from the entries."""
+
+    REBUILD_BATCH_SIZE = 5000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_quantities_by_godown(self, company_id: str, product_id: str) -> Dict[Optional[str], Decimal]:
+        """Current quantity of a product per godown (None = no godown), all batches."""
+        rows = self.db.query(
+            StockBalance.godown_key,
+            func.sum(StockBalance.quantity).label("quantity"),
+        ).filter(
+            StockBalance.company_id == company_id,
+            StockBalance.product_id == product_id,
+        ).group_by(StockBalance.godown_key).all()
+        return {row.godown_key or None: _decimal(row.quantity) for row in rows}
+
+    def get_available_stock_by_warehouse(self, product_id: str, company_id: str) -> List[Dict[str, Any]]:
+        """
+        Available stock of a product per warehouse.
+        Returns: [{"godown_id": str|None, "godown_name": str, "quantity": Decimal}, ...]
+        """
+        stock = self.get_quantities_by_godown(company_id, product_id)
+        result = []
+
+        # Main location (entries without a godown)
+        if stock.get(None, ZERO) != 0:
+            result.append({
+                "godown_id": None,
+                "godown_name": "Main Location",
+                "quantity": stock[None],
+            })
+
+        godown_ids = [godown_id for godown_id, quantity in stock.items() if godown_id and quantity != 0]
+        if godown_ids:
+            godowns = self.db.query(Godown.id, Godown.name).filter(
+                Godown.company_id == company_id,
+                Godown.is_active == True,
+                Godown.id.in_(godown_ids),
+            ).all()
+            for godown in godowns:
+                result.append({
+                    "godown_id": godown.id,
+                    "godown_name": godown.name,
+                    "quantity": stock[godown.id],
+                })
+
+        return result
+
+    def get_movement_totals(
+        self,
+        product_id: str,
+        before: Optional[datetime] = None,
+        godown_id: Optional[str] = None,
+    ) -> Totals:
+        """
+        Inward/outward quantity of a product dated before ``before`` (or ever).
+
+        Reads the latest snapshot of each godown/batch from an earlier month
+        and adds only the entries after it, in two queries. Keys without
+        snapshots fall back to their full entry history.
+        """
+        latest = self.db.query(
+            StockBalanceSnapshot.godown_key,
+            StockBalanceSnapshot.batch_key,
+            func.max(StockBalanceSnapshot.period_start).label("period_start"),
+        ).filter(StockBalanceSnapshot.product_id == product_id)
+        if godown_id is not None:
+            latest = latest.filter(StockBalanceSnapshot.godown_key == godown_id)
+        if before is not None:
+            latest = latest.filter(StockBalanceSnapshot.period_start < period_of(before))
+        latest = latest.group_by(StockBalanceSnapshot.godown_key, StockBalanceSnapshot.batch_key).subquery()
+
+        snapshots = self.db.query(
+            StockBalanceSnapshot.godown_key,
+            StockBalanceSnapshot.batch_key,
+            StockBalanceSnapshot.period_start,
+            StockBalanceSnapshot.total_inward,
+            StockBalanceSnapshot.total_outward,
+        ).join(
+            latest,
+            and_(
+                StockBalanceSnapshot.godown_key == latest.c.godown_key,
+                StockBalanceSnapshot.batch_key == latest.c.batch_key,
+                StockBalanceSnapshot.period_start == latest.c.period_start,
+            )
+        ).filter(StockBalanceSnapshot.product_id == product_id).all()
+
+        inward = sum((_decimal(row.total_inward) for row in snapshots), ZERO)
+        outward = sum((_decimal(row.total_outward) for row in snapshots), ZERO)
+
+        # Group snapshotted keys by the first day not covered by their snapshot
+        keys_by_start: Dict[date, List[str]] = defaultdict(list)
+        for row in snapshots:
+            keys_by_start[next_period(_to_date(row.period_start))].append(f"{row.godown_key}:{row.batch_key}")
+
+        entry_key = _entry_key()
+        windows = [
+            and_(entry_key.in_(keys), StockEntry.entry_date >= _start_of_day(start))
+            for start, keys in keys_by_start.items()
+        ]
+        snapshotted = [key for keys in keys_by_start.values() for key in keys]
+        windows.append(not_(entry_key.in_(snapshotted)) if snapshotted else true())
+
+        query = self.db.query(
+            func.coalesce(func.sum(case((StockEntry.quantity > 0, StockEntry.quantity), else_=0)), 0),
+            func.coalesce(func.sum(case((StockEntry.quantity < 0, -StockEntry.quantity), else_=0)), 0),
+        ).filter(
+            StockEntry.product_id == product_id,
+            or_(*windows),
+        )
+        if godown_id is not None:
+            query = query.filter(func.coalesce(StockEntry.godown_id, "") == godown_id)
+        if before is not None:
+            query = query.filter(StockEntry.entry_date < before)
+
+        added_in, added_out = query.first()
+        return inward + _decimal(added_in), outward + _decimal(added_out)
+
+    def get_stock_ledger(
+        self,
+        product: Product,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        godown_id: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        One page of a product's stock ledger with running balances.
+
+        Opening, inward, outward and closing cover the whole date range and
+        come from snapshots; only the page's entries are loaded (godown and
+        batch names joined in), and the balance carried into the page is
+        the snapshot balance at its first entry.
+        """
+        start = _start_of_day(from_date) if from_date else None
+        end = _start_of_day(to_date + timedelta(days=1)) if to_date else None
+
+        # As the ledger always has: the item's opening stock opens an undated
+        # ledger, a dated one opens with the movements before from_date only
+        base = ZERO if start else _decimal(product.opening_stock)
+        before_in, before_out = self.get_movement_totals(product.id, start, godown_id) if start else (ZERO, ZERO)
+        end_in, end_out = self.get_movement_totals(product.id, end, godown_id)
+        opening_balance = base + before_in - before_out
+        total_in = end_in - before_in
+        total_out = end_out - before_out
+
+        filters = [StockEntry.product_id == product.id]
+        if godown_id is not None:
+            filters.append(StockEntry.godown_id == godown_id)
+        if start:
+            filters.append(StockEntry.entry_date >= start)
+        if end:
+            filters.append(StockEntry.entry_date < end)
+
+        rows = self.db.query(
+            StockEntry.id,
+            StockEntry.entry_date,
+            StockEntry.created_at,
+            StockEntry.movement_type,
+            StockEntry.quantity,
+            StockEntry.rate,
+            StockEntry.value,
+            StockEntry.reference_type,
+            StockEntry.reference_number,
+            StockEntry.notes,
+            Godown.name.label("godown_name"),
+            Batch.batch_number,
+        ).outerjoin(
+            Godown, StockEntry.godown_id == Godown.id
+        ).outerjoin(
+            Batch, StockEntry.batch_id == Batch.id
+        ).filter(*filters).order_by(
+            StockEntry.entry_date.asc(), StockEntry.created_at.asc(), StockEntry.id.asc()
+        ).offset((page - 1) * page_size).limit(page_size + 1).all()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        running_balance = opening_balance
+        if page > 1 and rows:
+            running_balance = self._balance_before(product.id, rows[0], base, godown_id)
+
+        ledger_entries = []
+        for entry in rows:
+            qty = _decimal(entry.quantity)
+            # Positive quantities are inward, negative outward
+            inward_qty = qty if qty > 0 else ZERO
+            outward_qty = -qty if qty < 0 else ZERO
+            running_balance += qty
+
+            ledger_entries.append({
+                "date": entry.entry_date.isoformat() if entry.entry_date else None,
+                "movement_type": entry.movement_type.value if entry.movement_type else None,
+                "reference_type": entry.reference_type,
+                "reference_number": entry.reference_number,
+                "godown": entry.godown_name,
+                "batch": entry.batch_number,
+                "inward_qty": float(inward_qty),
+                "outward_qty": float(outward_qty),
+                "rate": float(entry.rate or 0),
+                "value": float(entry.value or 0),
+                "balance": float(running_balance),
+                "narration": entry.notes,
+            })
+
+        return {
+            "product_id": product.id,
+            "product_name": product.name,
+            "product_code": product.sku,
+            "unit": product.unit,
+            "opening_balance": float(opening_balance),
+            "total_inward": float(total_in),
+            "total_outward": float(total_out),
+            "closing_balance": float(opening_balance + total_in - total_out),
+            "entries": ledger_entries,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more,
+        }
+
+    def _balance_before(self, product_id: str, first: Any, base: Decimal, godown_id: Optional[str]) -> Decimal:
+        """Stock just before a ledger row: totals up to its timestamp plus earlier rows sharing it."""
+        inward, outward = self.get_movement_totals(product_id, first.entry_date, godown_id)
+
+        same_time = self.db.query(func.coalesce(func.sum(StockEntry.quantity), 0)).filter(
+            StockEntry.product_id == product_id,
+            StockEntry.entry_date == first.entry_date,
+            or_(
+                StockEntry.created_at < first.created_at,
+                and_(StockEntry.created_at == first.created_at, StockEntry.id < first.id),
+            ),
+        )
+        if godown_id is not None:
+            same_time = same_time.filter(StockEntry.godown_id == godown_id)
+
+        return base + inward - outward + _decimal(same_time.scalar())
+
+    def rebuild(self, company_id: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Recompute balances and monthly snapshots from the stock entries.
+
+        Needed once for entries recorded before the tables existed, or after
+        entries were changed outside the ORM. Streams per-day totals ordered
+        by key and rolls them up into months, so memory stays flat.
+        Returns the number of (balances, snapshots) written.
+        """
+        for model in (StockBalance, StockBalanceSnapshot):
+            query = self.db.query(model)
+            if company_id:
+                query = query.filter(model.company_id == company_id)
+            query.delete(synchronize_session=False)
+
+        godown_key = func.coalesce(StockEntry.godown_id, "").label("godown_key")
+        batch_key = func.coalesce(StockEntry.batch_id, "").label("batch_key")
+        day = func.date(StockEntry.entry_date).label("day")
+        query = self.db.query(
+            StockEntry.company_id,
+            StockEntry.product_id,
+            godown_key,
+            batch_key,
+            day,
+            func.sum(case((StockEntry.quantity > 0, StockEntry.quantity), else_=0)).label("inward"),
+            func.sum(case((StockEntry.quantity < 0, -StockEntry.quantity), else_=0)).label("outward"),
+            func.sum(StockEntry.cost_value).label("value"),
+        ).filter(StockEntry.entry_date.isnot(None))
+        if company_id:
+            query = query.filter(StockEntry.company_id == company_id)
+        query = query.group_by(
+            StockEntry.company_id, StockEntry.product_id, godown_key, batch_key, day
+        ).order_by(StockEntry.product_id, godown_key, batch_key, day)
+
+        now = datetime.utcnow()
+        balances: List[Dict[str, Any]] = []
+        snapshots: List[Dict[str, Any]] = []
+        counts = [0, 0]
+
+        def flush(force: bool = False):
+            for model, rows, index in ((StockBalance, balances, 0), (StockBalanceSnapshot, snapshots, 1)):
+                if rows and (force or len(rows) >= self.REBUILD_BATCH_SIZE):
+                    self.db.bulk_insert_mappings(model, rows)
+                    counts[index] += len(rows)
+                    rows.clear()
+
+        current_key = None
+        current = None  # running state of the key being rolled up
+        for row in query.yield_per(self.REBUILD_BATCH_SIZE):
+            key = (row.product_id, row.godown_key, row.batch_key)
+            period = period_of(_to_date(row.day))
+            if key != current_key:
+                if current:
+                    self._close_key(current, balances, snapshots, now)
+                current_key = key
+                current = {
+                    "company_id": row.company_id, "key": key, "period": period,
+                    "inward": ZERO, "outward": ZERO, "value": ZERO,
+                }
+            elif period != current["period"]:
+                self._close_period(current, snapshots, now)
+                current["period"] = period
+            current["inward"] += _decimal(row.inward)
+            current["outward"] += _decimal(row.outward)
+            current["value"] += _decimal(row.value)
+            flush()
+
+        if current:
+            self._close_key(current, balances, snapshots, now)
+        flush(force=True)
+        self.db.commit()
+        return counts[0], counts[1]
+
+    @staticmethod
+    def _close_period(current: Dict[str, Any], snapshots: List[Dict[str, Any]], now: datetime) -> None:
+        product_id, godown_key, batch_key = current["key"]
+        snapshots.append({
+            "id": generate_uuid(),
+            "company_id": current["company_id"],
+            "product_id": product_id,
+            "godown_key": godown_key,
+            "batch_key": batch_key,
+            "period_start": current["period"],
+            "total_inward": current["inward"],
+            "total_outward": current["outward"],
+            "closing_quantity": current["inward"] - current["outward"],
+            "closing_value": current["value"],
+            "updated_at": now,
+        })
+
+    @classmethod
+    def _close_key(cls, current: Dict[str, Any], balances: List[Dict[str, Any]],
+                   snapshots: List[Dict[str, Any]], now: datetime) -> None:
+        cls._close_period(current, snapshots, now)
+        product_id, godown_key, batch_key = current["key"]
+        balances.append({
+            "id": generate_uuid(),
+            "company_id": current["company_id"],
+            "product_id": product_id,
+            "godown_key": godown_key,
+            "batch_key": batch_key,
+            "quantity": current["inward"] - current["outward"],
+            "value": current["value"],
+            "updated_at": now,
+        })
@@ -607,11 +607,13 @@ class StockJournalService:
         from_date: Optional[date] = None,
         to_date: Optional[date] = None,
         godown_id: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100,
     ) -> Dict[str, Any]:
         """
         Get detailed stock ledger for a product (Tally-style).
         
-        Shows all stock movements with running balance.
+        Shows one page of stock movements with running balance.
         """
         # Delegate to inventory service for the actual ledger
         company = self.db.query(Company).filter(Company.id == company_id).first()
@@ -624,6 +626,8 @@ class StockJournalService:
             from_date=from_date,
             to_date=to_date,
             godown_id=godown_id,
+            page=page,
+            page_size=page_size,
         )
     
     def get_godown_stock_summary(
@@ -0,0 +1,570 @@
+"""Stock valuation service - cost layers, COGS and closing stock value.
+
+Stock was valued, and COGS posted, at the item's standard cost; real FIFO or
+average cost would have needed a replay of every StockEntry. Each movement
+is now costed when it is recorded (StockEntry ``before_insert``, see
+app/database/models.py) against the cost state of its product and godown:
+
+- inward movements add a cost layer at their rate; transfers in, returns and
+  count gains bring stock back at the current average cost;
+- outward movements consume layers oldest-first (FIFO), newest-first (LIFO)
+  or at the moving weighted average, per ``Company.default_valuation_method``.
+  What each issue took from each layer is recorded, and deleting or editing
+  the issue puts exactly that back.
+
+The cost is kept on ``StockEntry.cost_value`` and, through the stock balance
+listeners, in ``stock_balances.value`` and the monthly snapshots' closing
+value. COGS is the issued entries' cost, and the stock value at any date is
+the latest snapshot before its month plus that month's entries.
+
+The item's opening stock (not a StockEntry) is the oldest layer of the main
+location, at its standard cost. Movements are costed in the order they are
+recorded; ``rebuild`` replays the history in date order when backdated or
+edited movements need exact figures.
+"""
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.database.models import (
+    Company, Product, StockBalance, StockBalanceSnapshot, StockCostLayer, StockCostLayerConsumption,
+    StockEntry, StockMovementType, generate_uuid,
+)
+
+
+METHOD_FIFO = "fifo"
+METHOD_LIFO = "lifo"
+METHOD_AVERAGE = "weighted_avg"
+
+# Inward movements that bring stock back rather than buy it: valued at the
+# current average cost, not at their document rate (a sale price on returns)
+AVERAGE_COST_INWARDS = {StockMovementType.TRANSFER_IN, StockMovementType.ADJUSTMENT_IN}
+
+# Opening stock sorts before every recorded receipt
+OPENING_LAYER_DATE = datetime(1900, 1, 1)
+
+ZERO = Decimal("0")
+
+
+def _decimal(value: Any) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def _money(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _unit(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+
+
+def valuation_method(value: Optional[str]) -> str:
+    """Normalize ``Company.default_valuation_method``; anything else is weighted average."""
+    value = (value or "").lower()
+    return value if value in (METHOD_FIFO, METHOD_LIFO) else METHOD_AVERAGE
+
+
+def consume_layers(layers: List[Dict[str, Any]], quantity: Decimal, method: str) -> Tuple[Decimal, Decimal, Optional[Decimal]]:
+    """
+    Take ``quantity`` out of open layers (in date order), oldest first or
+    newest first for LIFO. Lowers each layer's ``remaining_quantity``.
+    Returns (cost taken, quantity short, unit cost of the last layer used).
+    """
+    cost = ZERO
+    needed = quantity
+    last_cost = None
+    for layer in (reversed(layers) if method == METHOD_LIFO else layers):
+        if needed <= 0:
+            break
+        take = min(layer["remaining_quantity"], needed)
+        if take <= 0:
+            continue
+        layer["remaining_quantity"] -= take
+        cost += take * layer["unit_cost"]
+        needed -= take
+        last_cost = layer["unit_cost"]
+    return cost, needed, last_cost
+
+
+def inward_unit_cost(movement_type, rate: Decimal, average: Optional[Decimal], base_cost: Decimal) -> Decimal:
+    """Unit cost of a receipt: its rate, or the average cost for stock coming back."""
+    if movement_type in AVERAGE_COST_INWARDS or rate <= 0:
+        if average is not None:
+            return average
+        return rate if rate > 0 else base_cost
+    return rate
+
+
+def issue_cost(
+    method: str,
+    quantity: Decimal,
+    layers: List[Dict[str, Any]],
+    average: Optional[Decimal],
+    base_cost: Decimal,
+) -> Decimal:
+    """
+    Cost of issuing ``quantity``. Layers are consumed under every method so
+    they stay in step with the stock; under weighted average the issue is
+    costed at the average instead. Stock issued beyond the layers (negative
+    stock) is costed at the last layer's, the average or the standard cost.
+    """
+    layer_cost, short, last_cost = consume_layers(
+        layers, quantity, METHOD_FIFO if method == METHOD_AVERAGE else method
+    )
+    fallback = average if average is not None else base_cost
+    if method == METHOD_AVERAGE:
+        return quantity * fallback
+    return layer_cost + short * (last_cost if last_cost is not None else fallback)
+
+
+# ==================== MOVEMENT COSTING (mapper events) ====================
+
+def _product_costs(connection, product_id: str) -> Tuple[Decimal, Decimal]:
+    """
+    (opening stock, standard unit cost) of an item, row-locking the product
+    (as ``lock_products`` does) so concurrent movements of the item read and
+    consume its layers one after another.
+    """
+    row = connection.execute(
+        select(Product.opening_stock, Product.standard_cost, Product.purchase_price)
+        .where(Product.id == product_id)
+        .with_for_update()
+    ).first()
+    if row is None:
+        return ZERO, ZERO
+    return _decimal(row.opening_stock), _decimal(row.standard_cost or row.purchase_price)
+
+
+def _average_cost(connection, product_id: str, godown_key: str, opening: Decimal, base_cost: Decimal) -> Optional[Decimal]:
+    """Moving average cost of an item in a godown; None without stock on hand."""
+    balances = StockBalance.__table__
+    quantity, value = connection.execute(
+        select(func.sum(balances.c.quantity), func.sum(balances.c.value)).where(
+            balances.c.product_id == product_id,
+            balances.c.godown_key == godown_key,
+        )
+    ).first()
+    quantity, value = _decimal(quantity), _decimal(value)
+    if godown_key == "":
+        quantity += opening
+        value += opening * base_cost
+    return value / quantity if quantity > 0 else None
+
+
+def _add_layer(connection, company_id: str, product_id: str, godown_key: str, entry_id: Optional[str],
+               layer_date: datetime, unit_cost: Decimal, quantity: Decimal) -> None:
+    connection.execute(StockCostLayer.__table__.insert().values(
+        id=generate_uuid(),
+        company_id=company_id,
+        product_id=product_id,
+        godown_key=godown_key,
+        entry_id=entry_id,
+        layer_date=layer_date,
+        unit_cost=_unit(unit_cost),
+        quantity=quantity,
+        remaining_quantity=quantity,
+        created_at=datetime.utcnow(),
+    ))
+
+
+def _layer_takes(layers: List[Dict[str, Any]], before: Dict[str, Decimal], quantity: Decimal) -> List[Tuple[Optional[str], Decimal]]:
+    """
+    (layer id, quantity) an issue of ``quantity`` took from ``layers``, and
+    (None, quantity) for the part issued beyond them.
+    """
+    takes = [
+        (layer["id"], before[layer["id"]] - layer["remaining_quantity"])
+        for layer in layers if layer["remaining_quantity"] != before[layer["id"]]
+    ]
+    short = quantity - sum((taken for _, taken in takes), ZERO)
+    if short > 0:
+        takes.append((None, short))
+    return takes
+
+
+def _seed_opening_layer(connection, company_id: str, product_id: str, opening: Decimal, base_cost: Decimal) -> None:
+    """Add the item's opening stock as its first main-location layer, once."""
+    layers = StockCostLayer.__table__
+    seeded = connection.execute(
+        select(layers.c.id).where(layers.c.product_id == product_id, layers.c.entry_id.is_(None)).limit(1)
+    ).first()
+    if not seeded:
+        _add_layer(connection, company_id, product_id, "", None, OPENING_LAYER_DATE, base_cost, opening)
+
+
+def cost_movement(
+    connection,
+    entry_id: str,
+    company_id: str,
+    product_id: str,
+    godown_id: Optional[str],
+    movement_type,
+    quantity: Any,
+    rate: Any,
+    entry_date: Optional[datetime],
+) -> Decimal:
+    """
+    Cost one movement against its item's layers and return its cost value,
+    positive for receipts and negative for issues. The product row is locked
+    first, so two issues of an item never consume the same layer quantity.
+    """
+    quantity = _decimal(quantity)
+    if quantity == 0 or not product_id:
+        return ZERO
+
+    godown_key = godown_id or ""
+    opening, base_cost = _product_costs(connection, product_id)
+    average = _average_cost(connection, product_id, godown_key, opening, base_cost)
+
+    if quantity > 0:
+        unit_cost = inward_unit_cost(movement_type, _decimal(rate), average, base_cost)
+        _add_layer(
+            connection, company_id, product_id, godown_key, entry_id,
+            entry_date or datetime.utcnow(), unit_cost, quantity,
+        )
+        return _money(quantity * unit_cost)
+
+    method = valuation_method(connection.execute(
+        select(Company.default_valuation_method).where(Company.id == company_id)
+    ).scalar())
+    if godown_key == "" and opening > 0:
+        _seed_opening_layer(connection, company_id, product_id, opening, base_cost)
+
+    table = StockCostLayer.__table__
+    layers = [
+        {"id": row.id, "remaining_quantity": _decimal(row.remaining_quantity), "unit_cost": _decimal(row.unit_cost)}
+        for row in connection.execute(
+            select(table.c.id, table.c.remaining_quantity, table.c.unit_cost).where(
+                table.c.product_id == product_id,
+                table.c.godown_key == godown_key,
+                table.c.remaining_quantity > 0,
+            ).order_by(table.c.layer_date, table.c.created_at, table.c.id)
+        )
+    ]
+    before = {layer["id"]: layer["remaining_quantity"] for layer in layers}
+    cost = issue_cost(method, -quantity, layers, average, base_cost)
+
+    takes = _layer_takes(layers, before, -quantity)
+    taken_from_layers = [{"layer_id": layer_id, "taken": taken} for layer_id, taken in takes if layer_id is not None]
+    if taken_from_layers:
+        connection.execute(
+            update(table).where(table.c.id == bindparam("layer_id")).values(
+                remaining_quantity=table.c.remaining_quantity - bindparam("taken")
+            ),
+            taken_from_layers,
+        )
+    connection.execute(StockCostLayerConsumption.__table__.insert(), [
+        {"id": generate_uuid(), "company_id": company_id, "entry_id": entry_id, "layer_id": layer_id, "quantity": taken}
+        for layer_id, taken in takes
+    ])
+    return -_money(cost)
+
+
+def value_stock_entry(connection, entry: StockEntry, persist: bool = False) -> Decimal:
+    """
+    Set ``entry.cost_value`` from the cost layers. Called before the entry is
+    inserted; with ``persist`` (an edited, already stored entry) the cost is
+    written with its own UPDATE.
+    """
+    if entry.id is None:
+        entry.id = generate_uuid()
+    cost = cost_movement(
+        connection, entry.id, entry.company_id, entry.product_id, entry.godown_id,
+        entry.movement_type, entry.quantity, entry.rate, entry.entry_date,
+    )
+    if persist:
+        entries = StockEntry.__table__
+        connection.execute(update(entries).where(entries.c.id == entry.id).values(cost_value=cost))
+        set_committed_value(entry, "cost_value", cost)
+    else:
+        entry.cost_value = cost
+    return cost
+
+
+def release_stock_entry(
+    connection,
+    entry_id: str,
+    company_id: str,
+    product_id: str,
+    godown_id: Optional[str],
+    entry_date: Optional[datetime],
+    quantity: Any,
+    cost_value: Any,
+) -> None:
+    """
+    Undo a deleted or edited movement in the cost layers: a receipt's layer
+    goes (whatever is left of it), an issue's quantities go back into the
+    layers it took them from. An issue costed before consumption was
+    recorded comes back as one layer at the cost it was issued at.
+    """
+    quantity = _decimal(quantity)
+    layers = StockCostLayer.__table__
+    consumptions = StockCostLayerConsumption.__table__
+    if quantity > 0:
+        receipt_layers = select(layers.c.id).where(layers.c.entry_id == entry_id)
+        connection.execute(consumptions.delete().where(consumptions.c.layer_id.in_(receipt_layers)))
+        connection.execute(layers.delete().where(layers.c.entry_id == entry_id))
+        return
+    if quantity == 0 or not product_id:
+        return
+
+    takes = connection.execute(
+        select(consumptions.c.layer_id, consumptions.c.quantity).where(consumptions.c.entry_id == entry_id)
+    ).all()
+    if takes:
+        restored = [
+            {"layer_id": layer_id, "taken": _decimal(taken)}
+            for layer_id, taken in takes if layer_id is not None
+        ]
+        if restored:
+            connection.execute(
+                update(layers).where(layers.c.id == bindparam("layer_id")).values(
+                    remaining_quantity=layers.c.remaining_quantity + bindparam("taken")
+                ),
+                restored,
+            )
+        connection.execute(consumptions.delete().where(consumptions.c.entry_id == entry_id))
+    else:
+        _add_layer(
+            connection, company_id, product_id, godown_id or "", entry_id,
+            entry_date or datetime.utcnow(), abs(_decimal(cost_value)) / -quantity, -quantity,
+        )
+
+
+def issued_cost(entries: Iterable[StockEntry]) -> Decimal:
+    """Total valuation cost of issue entries - the COGS of a sale."""
+    return sum((-_decimal(entry.cost_value) for entry in entries if _decimal(entry.quantity) < 0), ZERO)
+
+
+# ==================== VALUATION ====================
+
+class StockValuationService:
+    """Stock value reports from maintained balances, and the valuation rebuild."""
+
+    REBUILD_BATCH_SIZE = 5000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_stock_valuation(
+        self,
+        company_id: str,
+        as_of: Optional[date] = None,
+        godown_id: Optional[str] = None,
+    ) -> Dict[str, Dict[str, Decimal]]:
+        """
+        Quantity and value per item at the end of ``as_of`` (or now):
+        {product_id: {"quantity": Decimal, "value": Decimal}}.
+
+        Every month with movements has a snapshot, so the latest snapshot of
+        each product/godown/batch before ``as_of``'s month plus the entries
+        of that month up to ``as_of`` give the stock then - two grouped
+        queries, however long the history. Opening stock of items (main
+        location) is included when no godown is given.
+        """
+        result: Dict[str, Dict[str, Decimal]] = defaultdict(lambda: {"quantity": ZERO, "value": ZERO})
+
+        if as_of is None:
+            query = self.db.query(
+                StockBalance.product_id,
+                func.sum(StockBalance.quantity).label("quantity"),
+                func.sum(StockBalance.value).label("value"),
+            ).filter(StockBalance.company_id == company_id)
+            if godown_id is not None:
+                query = query.filter(StockBalance.godown_key == godown_id)
+            for row in query.group_by(StockBalance.product_id):
+                result[row.product_id]["quantity"] += _decimal(row.quantity)
+                result[row.product_id]["value"] += _decimal(row.value)
+        else:
+            end = datetime.combine(as_of + timedelta(days=1), time.min)
+            period = (end - timedelta(microseconds=1)).date().replace(day=1)
+
+            latest = self.db.query(
+                StockBalanceSnapshot.product_id,
+                StockBalanceSnapshot.godown_key,
+                StockBalanceSnapshot.batch_key,
+                func.max(StockBalanceSnapshot.period_start).label("period_start"),
+            ).filter(
+                StockBalanceSnapshot.company_id == company_id,
+                StockBalanceSnapshot.period_start < period,
+            )
+            if godown_id is not None:
+                latest = latest.filter(StockBalanceSnapshot.godown_key == godown_id)
+            latest = latest.group_by(
+                StockBalanceSnapshot.product_id, StockBalanceSnapshot.godown_key, StockBalanceSnapshot.batch_key
+            ).subquery()
+
+            snapshots = self.db.query(
+                StockBalanceSnapshot.product_id,
+                func.sum(StockBalanceSnapshot.closing_quantity).label("quantity"),
+                func.sum(StockBalanceSnapshot.closing_value).label("value"),
+            ).join(
+                latest,
+                and_(
+                    StockBalanceSnapshot.product_id == latest.c.product_id,
+                    StockBalanceSnapshot.godown_key == latest.c.godown_key,
+                    StockBalanceSnapshot.batch_key == latest.c.batch_key,
+                    StockBalanceSnapshot.period_start == latest.c.period_start,
+                )
+            ).group_by(StockBalanceSnapshot.product_id)
+
+            month = self.db.query(
+                StockEntry.product_id,
+                func.sum(StockEntry.quantity).label("quantity"),
+                func.sum(StockEntry.cost_value).label("value"),
+            ).filter(
+                StockEntry.company_id == company_id,
+                StockEntry.entry_date >= datetime.combine(period, time.min),
+                StockEntry.entry_date < end,
+            )
+            if godown_id is not None:
+                month = month.filter(StockEntry.godown_id == godown_id)
+
+            for row in list(snapshots) + list(month.group_by(StockEntry.product_id)):
+                result[row.product_id]["quantity"] += _decimal(row.quantity)
+                result[row.product_id]["value"] += _decimal(row.value)
+
+        if godown_id is None:
+            openings = self.db.query(
+                Product.id, Product.opening_stock, Product.standard_cost, Product.purchase_price,
+            ).filter(
+                Product.company_id == company_id,
+                Product.is_service == False,
+                Product.opening_stock > 0,
+            )
+            for row in openings:
+                opening = _decimal(row.opening_stock)
+                result[row.id]["quantity"] += opening
+                result[row.id]["value"] += _money(opening * _decimal(row.standard_cost or row.purchase_price))
+
+        return dict(result)
+
+    def get_closing_stock_value(self, company_id: str, as_of: Optional[date] = None) -> Decimal:
+        """Total stock value of a company at the end of ``as_of`` (or now)."""
+        valuation = self.get_stock_valuation(company_id, as_of)
+        return sum((item["value"] for item in valuation.values()), ZERO)
+
+    def rebuild(self, company_id: Optional[str] = None) -> int:
+        """
+        Re-cost every stock entry by replaying the history in date order, then
+        rebuild cost layers, balances and snapshots. Needed once for entries
+        recorded before valuation existed, or after backdated movements.
+        Returns the number of entries costed.
+        """
+        from app.services.stock_balance_service import StockBalanceService
+
+        consumptions_query = self.db.query(StockCostLayerConsumption)
+        layers_query = self.db.query(StockCostLayer)
+        if company_id:
+            consumptions_query = consumptions_query.filter(StockCostLayerConsumption.company_id == company_id)
+            layers_query = layers_query.filter(StockCostLayer.company_id == company_id)
+        consumptions_query.delete(synchronize_session=False)
+        layers_query.delete(synchronize_session=False)
+
+        companies = self.db.query(Company.id, Company.default_valuation_method)
+        products = self.db.query(
+            Product.id, Product.company_id, Product.opening_stock, Product.standard_cost, Product.purchase_price,
+        ).filter(Product.is_service == False)
+        entries = self.db.query(
+            StockEntry.id, StockEntry.company_id, StockEntry.product_id, StockEntry.godown_id,
+            StockEntry.movement_type, StockEntry.quantity, StockEntry.rate, StockEntry.entry_date,
+        )
+        if company_id:
+            companies = companies.filter(Company.id == company_id)
+            products = products.filter(Product.company_id == company_id)
+            entries = entries.filter(StockEntry.company_id == company_id)
+
+        methods = {row.id: valuation_method(row.default_valuation_method) for row in companies}
+        costs = {
+            row.id: (row.company_id, _decimal(row.opening_stock), _decimal(row.standard_cost or row.purchase_price))
+            for row in products
+        }
+
+        # Cost state per (product, godown): quantity, value and layers
+        states: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        def state_for(product_id: str, product_company: str, godown_key: str) -> Dict[str, Any]:
+            key = (product_id, godown_key)
+            if key not in states:
+                state = {"company_id": product_company, "quantity": ZERO, "value": ZERO, "layers": []}
+                _, opening, base_cost = costs.get(product_id, (None, ZERO, ZERO))
+                if godown_key == "" and opening > 0:
+                    state["quantity"], state["value"] = opening, opening * base_cost
+                    state["layers"].append({
+                        "id": generate_uuid(), "entry_id": None, "layer_date": OPENING_LAYER_DATE, "unit_cost": _unit(base_cost),
+                        "quantity": opening, "remaining_quantity": opening,
+                    })
+                states[key] = state
+            return states[key]
+
+        table = StockEntry.__table__
+        statement = update(table).where(table.c.id == bindparam("entry_id")).values(cost_value=bindparam("cost"))
+        pending: List[Dict[str, Any]] = []
+        consumed: List[Dict[str, Any]] = []
+        costed = 0
+
+        ordered = entries.order_by(StockEntry.entry_date, StockEntry.created_at, StockEntry.id)
+        for row in ordered.yield_per(self.REBUILD_BATCH_SIZE):
+            quantity = _decimal(row.quantity)
+            _, _, base_cost = costs.get(row.product_id, (None, ZERO, ZERO))
+            state = state_for(row.product_id, row.company_id, row.godown_id or "")
+            average = state["value"] / state["quantity"] if state["quantity"] > 0 else None
+
+            if quantity > 0:
+                unit_cost = _unit(inward_unit_cost(row.movement_type, _decimal(row.rate), average, base_cost))
+                state["layers"].append({
+                    "id": generate_uuid(), "entry_id": row.id, "layer_date": row.entry_date, "unit_cost": unit_cost,
+                    "quantity": quantity, "remaining_quantity": quantity,
+                })
+                cost = _money(quantity * unit_cost)
+            elif quantity < 0:
+                open_layers = [layer for layer in state["layers"] if layer["remaining_quantity"] > 0]
+                before = {layer["id"]: layer["remaining_quantity"] for layer in open_layers}
+                method = methods.get(row.company_id, METHOD_AVERAGE)
+                cost = -_money(issue_cost(method, -quantity, open_layers, average, base_cost))
+                consumed.extend(
+                    {"id": generate_uuid(), "company_id": row.company_id, "entry_id": row.id,
+                     "layer_id": layer_id, "quantity": taken}
+                    for layer_id, taken in _layer_takes(open_layers, before, -quantity)
+                )
+            else:
+                cost = ZERO
+
+            state["quantity"] += quantity
+            state["value"] += cost
+            pending.append({"entry_id": row.id, "cost": cost})
+            costed += 1
+            if len(pending) >= self.REBUILD_BATCH_SIZE:
+                self.db.execute(statement, pending)
+                pending.clear()
+
+        if pending:
+            self.db.execute(statement, pending)
+
+        # Keep every layer: issues' consumption refers to exhausted ones too,
+        # and opening layers must not be seeded again
+        layer_rows = [
+            {
+                "id": generate_uuid(),
+                "company_id": state["company_id"],
+                "product_id": product_id,
+                "godown_key": godown_key,
+                "created_at": datetime.utcnow(),
+                **layer,
+            }
+            for (product_id, godown_key), state in states.items()
+            for layer in state["layers"]
+        ]
+        for offset in range(0, len(layer_rows), self.REBUILD_BATCH_SIZE):
+            self.db.bulk_insert_mappings(StockCostLayer, layer_rows[offset:offset + self.REBUILD_BATCH_SIZE])
+        for offset in range(0, len(consumed), self.REBUILD_BATCH_SIZE):
+            self.db.bulk_insert_mappings(StockCostLayerConsumption, consumed[offset:offset + self.REBUILD_BATCH_SIZE])
+
+        # Balances and snapshots carry the new cost values; this commits
+        StockBalanceService(self.db).rebuild(company_id)
+        return costed
@@ -18,6 +18,7 @@ from app.database.models import (
     Product, StockEntry, StockMovementType, Transaction, TransactionEntry,
     Account, AccountType, generate_uuid
 )
+from app.services.stock_balance_service import apply_stock_delta
 
 
 class StockVerificationService:
@@ -285,7 +286,7 @@ class StockVerificationService:
                 # Update product stock
                 product = self.db.query(Product).filter(Product.id == item.product_id).first()
                 if product:
-                    product.current_stock = (product.current_stock or Decimal('0')) + item.variance_quantity
+                    apply_stock_delta(self.db, product, item.variance_quantity)
         
         adjustment.status = StockAdjustmentStatus.POSTED
         
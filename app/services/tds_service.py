@@ -9,6 +9,7 @@ from app.database.models import (
     TDSSection, TDSEntry, Company, Customer, Purchase,
     Account, Transaction, TransactionEntry, AccountType, TransactionStatus, ReferenceType
 )
+from app.services.balance_snapshot_service import BalanceSnapshotService
 
 
 # Default TDS Sections as per Income Tax Act
@@ -437,7 +438,8 @@ class TDSService:
         )
         self.db.add(entry2)
         
-        # Balances are calculated from transaction entries, not stored
+        # Balances are calculated from transaction entries; keep daily snapshots in step
+        BalanceSnapshotService(self.db).apply_transaction(transaction)
         return transaction
     
     # ==================== REPORTS ====================
@@ -0,0 +1,255 @@
+"""Tracking Hub - in-process pub/sub for live tracking WebSockets.
+
+Live position updates are published to a per-company topic and fanned out
+to that company's subscribers only. Every subscriber has its own bounded
+send queue drained by its own task, so a slow WebSocket never delays the
+others:
+
+- ``SlowConsumerPolicy.COALESCE`` (default) keeps only the latest pending
+  message per key (per engineer), which is all a live map needs;
+- ``SlowConsumerPolicy.DROP_OLDEST`` keeps messages in order and drops the
+  oldest pending one when the queue is full.
+
+Messages travel through a pluggable ``HubBackend``. ``InMemoryBackend``
+delivers within the current process (single worker, tests);
+``PostgresNotifyBackend`` relays through PostgreSQL LISTEN/NOTIFY so several
+uvicorn workers share topics without any extra infrastructure. A NOTIFY
+payload must be under 8000 bytes, so every backend rejects messages over
+``MAX_MESSAGE_BYTES`` (``MessageTooLarge``).
+"""
+import abc
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from enum import Enum
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+DeliverCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# Serialized message limit, leaving room for the topic in a NOTIFY payload
+MAX_MESSAGE_BYTES = 7000
+
+
+class MessageTooLarge(ValueError):
+    """A published message exceeds ``MAX_MESSAGE_BYTES``."""
+
+
+class SlowConsumerPolicy(str, Enum):
+    COALESCE = "coalesce"
+    DROP_OLDEST = "drop_oldest"
+
+
+class Subscriber:
+    """One WebSocket (or any async sender) subscribed to a topic."""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        maxsize: int,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+    ):
+        self.send = send
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._sequence = count()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def put(self, message: str, key: Optional[Hashable] = None) -> None:
+        """Queue a message without waiting (never blocks the publisher)."""
+        if self.policy == SlowConsumerPolicy.COALESCE and key is not None:
+            slot = ("key", key)
+            if slot in self._pending:
+                self.dropped += 1
+            self._pending[slot] = message
+            self._pending.move_to_end(slot)
+        else:
+            self._pending[("seq", next(self._sequence))] = message
+
+        while len(self._pending) > self.maxsize:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+        self._ready.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            while self._pending:
+                _, message = self._pending.popitem(last=False)
+                try:
+                    await self.send(message)
+                except Exception:
+                    # Socket is gone; the endpoint unsubscribes on disconnect
+                    self._pending.clear()
+                    break
+            self._ready.clear()
+
+
+class HubBackend(abc.ABC):
+    """Transport between publishers and the hubs of all workers."""
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        self.deliver = deliver
+
+    async def stop(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        """Deliver ``message`` to the subscribers of ``topic`` in every worker."""
+
+
+class InMemoryBackend(HubBackend):
+    """Delivers to subscribers of this process only."""
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        await self.deliver(topic, message)
+
+
+class PostgresNotifyBackend(HubBackend):
+    """Shares topics between workers through PostgreSQL LISTEN/NOTIFY."""
+
+    channel = "tracking_hub"
+
+    def __init__(self, database_url: str):
+        self.database_url = database_url
+        self._listener = None
+        self._publisher = None
+        self._lock = asyncio.Lock()
+        # Deliveries in flight; the loop keeps only weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        import asyncpg
+        from sqlalchemy.engine import make_url
+
+        await super().start(deliver)
+        dsn = make_url(self.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener = await asyncpg.connect(dsn)
+        self._publisher = await asyncpg.connect(dsn)
+        await self._listener.add_listener(self.channel, self._on_notify)
+
+    async def stop(self) -> None:
+        for connection in (self._listener, self._publisher):
+            if connection is not None:
+                await connection.close()
+        self._listener = self._publisher = None
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        payload = json.dumps({"topic": topic, "message": message}, default=str)
+        async with self._lock:
+            await self._publisher.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        data = json.loads(payload)
+        task = asyncio.create_task(self.deliver(data["topic"], data["message"]))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class TrackingHub:
+    """Per-company topics of live tracking subscribers."""
+
+    def __init__(self, backend: Optional[HubBackend] = None, queue_size: int = 100):
+        self.backend = backend or InMemoryBackend()
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+        for subscribers in self._topics.values():
+            for subscriber in subscribers:
+                await subscriber.close()
+        self._topics.clear()
+        self._loop = None
+
+    async def subscribe(
+        self,
+        topic: str,
+        send: Callable[[str], Awaitable[None]],
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+    ) -> Subscriber:
+        subscriber = Subscriber(send, self.queue_size, policy)
+        subscriber.start()
+        self._topics.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    async def unsubscribe(self, topic: str, subscriber: Subscriber) -> None:
+        subscribers = self._topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._topics[topic]
+        await subscriber.close()
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        size = len(json.dumps(message, default=str).encode("utf-8"))
+        if size > MAX_MESSAGE_BYTES:
+            raise MessageTooLarge(f"Message of {size} bytes exceeds {MAX_MESSAGE_BYTES} bytes")
+        if self._loop is None:
+            await self.start()
+        await self.backend.publish(topic, message)
+
+    def publish_threadsafe(self, topic: str, message: Dict[str, Any]) -> None:
+        """Publish from sync code running on a worker thread (e.g. endpoints)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self.publish(topic, message), loop)
+        future.add_done_callback(self._log_publish_error)
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    async def _deliver(self, topic: str, message: Dict[str, Any]) -> None:
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return
+        text = json.dumps(message, default=str)
+        key = message.get("engineer_id")
+        for subscriber in list(subscribers):
+            subscriber.put(text, key)
+
+    @staticmethod
+    def _log_publish_error(future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Tracking hub publish failed: %s", future.exception())
+
+
+def company_topic(company_id: str) -> str:
+    return f"company:{company_id}"
+
+
+def create_backend() -> HubBackend:
+    if settings.TRACKING_HUB_BACKEND == "postgres":
+        return PostgresNotifyBackend(settings.DATABASE_URL)
+    return InMemoryBackend()
+
+
+tracking_hub = TrackingHub(create_backend(), settings.TRACKING_HUB_QUEUE_SIZE)
@@ -0,0 +1,254 @@
+"""Trip Route Service - GPS route building for trips.
+
+A full-day trip at 5-second intervals has more than 10k fixes. Instead of
+loading them as ORM objects and walking them in Python, the route is built
+from the needed columns only, with NumPy:
+
+1. jitter filter - fixes with a poor ``accuracy`` are dropped, as are single
+   spikes whose implied speed to both neighbours exceeds ``max_speed_kmh``;
+2. distance - haversine over all consecutive kept fixes in one vectorized pass;
+3. simplification - Douglas-Peucker at ``tolerance_m`` and/or Visvalingam-
+   Whyatt down to ``max_points``, for the polyline returned to the map.
+
+Once a trip is completed its GPS distance and default polyline are stored on
+the ``Trip`` (``gps_distance_km``, ``route_polyline``) and served from there.
+"""
+import heapq
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.database.tracking_models import LocationLog, Trip, TripStatus
+
+
+EARTH_RADIUS_M = 6371000.0
+
+DEFAULT_TOLERANCE_M = 5.0
+DEFAULT_MAX_ACCURACY_M = 100.0
+DEFAULT_MAX_SPEED_KMH = 200.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distances in metres between arrays of points."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def project_m(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Equirectangular projection to metres around the route's mean latitude.
+
+    Accurate to well under a metre over the extent of a single trip, which
+    is all simplification needs.
+    """
+    lat0 = np.radians(lat.mean())
+    x = np.radians(lng) * EARTH_RADIUS_M * np.cos(lat0)
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return np.column_stack((x, y))
+
+
+def filter_jitter(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    seconds: np.ndarray,
+    accuracy: np.ndarray,
+    max_accuracy_m: Optional[float],
+    max_speed_kmh: Optional[float],
+) -> np.ndarray:
+    """Boolean mask of the fixes to keep."""
+    keep = np.ones(len(lat), dtype=bool)
+    if max_accuracy_m is not None:
+        # Missing accuracy (NaN) is kept
+        keep &= ~(accuracy > max_accuracy_m)
+
+    if max_speed_kmh is None or keep.sum() < 3:
+        return keep
+
+    index = np.flatnonzero(keep)
+    distance = haversine_m(lat[index[:-1]], lng[index[:-1]], lat[index[1:]], lng[index[1:]])
+    elapsed = np.maximum(np.diff(seconds[index]), 1.0)
+    too_fast = distance / elapsed * 3.6 > max_speed_kmh
+
+    # A spike is a fix reached too fast and left too fast
+    spike = np.zeros(len(index), dtype=bool)
+    spike[1:-1] = too_fast[:-1] & too_fast[1:]
+    keep[index[spike]] = False
+    return keep
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Indexes of the points kept by Douglas-Peucker at ``tolerance``."""
+    count = len(points)
+    if count < 3 or tolerance <= 0:
+        return np.arange(count)
+
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+
+def visvalingam(points: np.ndarray, max_points: int) -> np.ndarray:
+    """Indexes of the ``max_points`` points kept by Visvalingam-Whyatt."""
+    count = len(points)
+    if count <= max_points or count < 3:
+        return np.arange(count)
+
+    def area(a: int, b: int, c: int) -> float:
+        (ax, ay), (bx, by), (cx, cy) = points[a], points[b], points[c]
+        return abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+
+    prev = list(range(-1, count - 1))
+    next_ = list(range(1, count + 1))
+    # Initial triangle areas in one vectorized pass
+    a, b, c = points[:-2], points[1:-1], points[2:]
+    areas = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])) / 2
+    current = [0.0] + areas.tolist() + [0.0]
+    heap = [(current[i], i) for i in range(1, count - 1)]
+    heapq.heapify(heap)
+
+    removed = np.zeros(count, dtype=bool)
+    remaining = count
+    while remaining > max_points and heap:
+        value, i = heapq.heappop(heap)
+        if removed[i] or value != current[i]:
+            continue
+        removed[i] = True
+        remaining -= 1
+        p, n = prev[i], next_[i]
+        next_[p], prev[n] = n, p
+        for j in (p, n):
+            if 0 < j < count - 1:
+                # Never let a neighbour's area drop below the removed one
+                current[j] = max(area(prev[j], j, next_[j]), value)
+                heapq.heappush(heap, (current[j], j))
+    return np.flatnonzero(~removed)
+
+
+class TripRouteService:
+    """Service for building (and caching) trip GPS routes."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_route(
+        self,
+        trip: Trip,
+        tolerance_m: Optional[float] = None,
+        max_points: Optional[int] = None,
+        max_accuracy_m: Optional[float] = DEFAULT_MAX_ACCURACY_M,
+        max_speed_kmh: Optional[float] = DEFAULT_MAX_SPEED_KMH,
+    ) -> Dict[str, Any]:
+        """Route of a trip: filtered GPS distance and simplified polyline."""
+        is_default = (
+            tolerance_m is None
+            and max_points is None
+            and max_accuracy_m == DEFAULT_MAX_ACCURACY_M
+            and max_speed_kmh == DEFAULT_MAX_SPEED_KMH
+        )
+        is_completed = trip.status == TripStatus.COMPLETED.value
+        if is_completed and is_default and trip.route_polyline is not None and trip.gps_distance_km is not None:
+            return {
+                "trip_id": trip.id,
+                "gps_distance_km": float(trip.gps_distance_km),
+                "route_points": trip.route_polyline,
+                "total_points": len(trip.route_polyline),
+                "raw_points": trip.route_raw_points,
+            }
+
+        route = self.build_route(
+            trip.id,
+            DEFAULT_TOLERANCE_M if tolerance_m is None else tolerance_m,
+            max_points,
+            max_accuracy_m,
+            max_speed_kmh,
+        )
+
+        if is_completed and is_default:
+            trip.gps_distance_km = Decimal(str(round(route["gps_distance_km"], 2)))
+            trip.route_polyline = route["route_points"]
+            trip.route_raw_points = route["raw_points"]
+            self.db.commit()
+        return route
+
+    def build_route(
+        self,
+        trip_id: str,
+        tolerance_m: float,
+        max_points: Optional[int],
+        max_accuracy_m: Optional[float],
+        max_speed_kmh: Optional[float],
+    ) -> Dict[str, Any]:
+        rows = self.db.query(
+            LocationLog.latitude,
+            LocationLog.longitude,
+            LocationLog.recorded_at,
+            LocationLog.speed,
+            LocationLog.accuracy,
+        ).filter(
+            LocationLog.trip_id == trip_id
+        ).order_by(LocationLog.recorded_at).all()
+
+        result = {
+            "trip_id": trip_id,
+            "gps_distance_km": 0.0,
+            "route_points": [],
+            "total_points": 0,
+            "raw_points": len(rows),
+        }
+        if not rows:
+            return result
+
+        lat = np.fromiter((row.latitude for row in rows), dtype=float, count=len(rows))
+        lng = np.fromiter((row.longitude for row in rows), dtype=float, count=len(rows))
+        accuracy = np.array([row.accuracy for row in rows], dtype=float)  # None -> NaN
+        epoch = rows[0].recorded_at
+        seconds = np.fromiter(((row.recorded_at - epoch).total_seconds() for row in rows), dtype=float, count=len(rows))
+
+        index = np.flatnonzero(filter_jitter(lat, lng, seconds, accuracy, max_accuracy_m, max_speed_kmh))
+        lat, lng = lat[index], lng[index]
+
+        if len(index) > 1:
+            result["gps_distance_km"] = float(haversine_m(lat[:-1], lng[:-1], lat[1:], lng[1:]).sum() / 1000)
+
+        if len(index) > 2 and (tolerance_m or max_points):
+            points = project_m(lat, lng)
+            kept = douglas_peucker(points, tolerance_m) if tolerance_m else np.arange(len(index))
+            if max_points and len(kept) > max_points:
+                kept = kept[visvalingam(points[kept], max_points)]
+            index = index[kept]
+
+        result["route_points"] = [self._point(rows[i]) for i in index.tolist()]
+        result["total_points"] = len(result["route_points"])
+        return result
+
+    @staticmethod
+    def _point(row) -> Dict[str, Any]:
+        recorded_at: datetime = row.recorded_at
+        return {
+            "lat": row.latitude,
+            "lng": row.longitude,
+            "timestamp": recorded_at.isoformat() if recorded_at else None,
+            "speed": row.speed,
+            "accuracy": row.accuracy,
+        }
@@ -26,6 +26,8 @@ from app.database.models import (
     PurchaseOrder, SalesOrder,
     INDIAN_STATE_CODES
 )
+from app.services.balance_snapshot_service import BalanceSnapshotService
+from app.services.sequence_service import SequenceService
 
 
 @dataclass
@@ -147,14 +149,14 @@ class VoucherEngine:
         for code, name, acc_type in account_definitions:
             self.get_or_create_account(company, code, name, acc_type)
     
-    def _update_account_balances(self, entries: List[VoucherLine]) -> None:
-        """No-op - account balances are calculated from transaction entries, not stored."""
-        # Balances are now calculated dynamically from TransactionEntry records
-        # Use AccountingService.get_account_balance() to get account balance
-        pass
+    def _update_account_balances(self, transaction: Transaction) -> None:
+        """Fold a posted voucher into the daily account balance snapshots."""
+        # Balances are calculated from TransactionEntry records; the snapshots
+        # only bound how much history an as-of-date balance has to sum
+        BalanceSnapshotService(self.db).apply_transaction(transaction)
     
     def _generate_voucher_number(self, company: Company, voucher_type: VoucherType) -> str:
-        """Generate sequential voucher number."""
+        """Generate sequential voucher number from the company's voucher-type counter."""
         prefix_map = {
             VoucherType.SALES: "SAL",
             VoucherType.PURCHASE: "PUR",
@@ -168,12 +170,17 @@ class VoucherEngine:
         }
         prefix = prefix_map.get(voucher_type, "TXN")
         
-        count = self.db.query(Transaction).filter(
-            Transaction.company_id == company.id,
-            Transaction.voucher_type == voucher_type
-        ).count()
+        def seed() -> int:
+            # Legacy numbering counted existing vouchers of the type
+            return self.db.query(Transaction).filter(
+                Transaction.company_id == company.id,
+                Transaction.voucher_type == voucher_type
+            ).count()
         
-        return f"{prefix}-{count + 1:06d}"
+        number = SequenceService(self.db).next_value(
+            company.id, f"voucher:{voucher_type.value}", seed=seed
+        )
+        return f"{prefix}-{number:06d}"
     
     # ==================== CORE VOUCHER CREATION ====================
     
@@ -247,8 +254,8 @@ class VoucherEngine:
             self.db.add(txn_entry)
             created_entries.append(txn_entry)
         
-        # Update account balances
-        self._update_account_balances(entries)
+        # Update account balance snapshots
+        self._update_account_balances(transaction)
         
         return VoucherResult(
             success=True,
@@ -839,7 +846,7 @@ class VoucherEngine:
             "Cost of Goods Sold", AccountType.EXPENSE
         )
         
-        if movement_type in [StockMovementType.PURCHASE, StockMovementType.ADJUSTMENT]:
+        if movement_type in [StockMovementType.PURCHASE, StockMovementType.ADJUSTMENT_IN]:
             if quantity > 0:
                 # Stock increase
                 entries.append(VoucherLine(
@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.database.models import generate_uuid
+from app.services.sequence_service import SequenceService
 
 
 class ResetFrequency(str, Enum):
@@ -56,7 +57,8 @@ class VoucherNumberSeries:
 class VoucherNumberingService:
     """Service for generating and managing voucher numbers."""
     
-    # In-memory storage for series (would be in DB in production)
+    # In-memory storage for series settings; counters are persisted in
+    # document_sequences through SequenceService
     _series_cache: Dict[str, Dict[str, VoucherNumberSeries]] = {}
     
     def __init__(self, db: Session):
@@ -133,12 +135,30 @@ class VoucherNumberingService:
         key = f"{voucher_type}_{series_name}"
         return self._series_cache[company_id].get(key)
     
-    def _check_and_reset_series(self, series: VoucherNumberSeries) -> bool:
-        """Check if series needs to be reset and reset if necessary."""
+    def _sequence_key(self, series: VoucherNumberSeries) -> str:
+        """Key of the persistent counter backing a series."""
+        return f"series:{series.voucher_type}:{series.series_name}"
+    
+    def _counter_year(self, series: VoucherNumberSeries) -> str:
+        """Financial year the counter is scoped to ('' when it never resets)."""
+        if series.reset_frequency == ResetFrequency.NEVER:
+            return ""
+        return series.financial_year or ""
+    
+    def _check_and_reset_series(
+        self,
+        series: VoucherNumberSeries,
+        transaction_date: Optional[date] = None,
+    ) -> bool:
+        """Check if series needs to be reset and reset if necessary.
+        
+        Counters are kept per financial year, so a reset only moves the series
+        to the new year's counter (which starts from starting_number).
+        """
         if series.reset_frequency == ResetFrequency.NEVER:
             return False
         
-        current_fy = self._get_current_financial_year()
+        current_fy = self._get_current_financial_year(transaction_date)
         
         if series.reset_frequency == ResetFrequency.YEARLY:
             if series.financial_year != current_fy:
@@ -190,10 +210,15 @@ class VoucherNumberingService:
             )
         
         # Check if reset needed
-        self._check_and_reset_series(series)
-        
-        # Increment counter
-        series.current_number += 1
+        self._check_and_reset_series(series, transaction_date)
+        
+        # Increment the persistent counter (row-locked, safe across workers)
+        series.current_number = SequenceService(self.db).next_value(
+            company_id,
+            self._sequence_key(series),
+            self._counter_year(series),
+            seed=lambda: series.starting_number - 1,
+        )
         
         # Build the number
         parts = []
@@ -229,7 +254,12 @@ class VoucherNumberingService:
             return "No series configured"
         
         # Simulate next number
-        next_num = series.current_number + 1
+        next_num = SequenceService(self.db).peek(
+            company_id,
+            self._sequence_key(series),
+            self._counter_year(series),
+            seed=lambda: series.starting_number - 1,
+        )
         parts = []
         
         if series.prefix:
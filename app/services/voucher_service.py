@@ -10,6 +10,7 @@ from app.database.models import (
     VoucherType, EntryType, ReferenceType, TransactionStatus, PaymentMode
 )
 from app.services.accounting_service import AccountingService
+from app.services.balance_snapshot_service import BalanceSnapshotService
 
 
 # Category to Account mapping for auto-categorization
@@ -373,7 +374,7 @@ class VoucherService:
             )
             self.db.add(entry)
         
-        self.db.flush()
+        BalanceSnapshotService(self.db).apply_transaction(transaction)
         return transaction
     
     def _get_or_create_category_account(
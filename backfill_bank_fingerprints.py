@@ -0,0 +1,31 @@
+"""Fill fingerprints of bank statement entries and import rows stored before
+the column existed, so new imports skip them as duplicates.
+
+Run once after applying migrations/add_bank_row_fingerprints.sql. Safe to
+run multiple times.
+
+Usage:
+    python backfill_bank_fingerprints.py                  # every company
+    python backfill_bank_fingerprints.py <company_id>     # one company
+"""
+import sys
+
+from app.database.connection import SessionLocal
+from app.services.bank_import_service import BankImportService
+from app.services.bank_statement_import_service import BankStatementImportService
+
+
+def backfill_bank_fingerprints(company_id: str = None):
+    db = SessionLocal()
+    try:
+        entries = BankStatementImportService(db).backfill_fingerprints(company_id)
+        rows = BankImportService(db).backfill_fingerprints(company_id)
+        return entries, rows
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    entries, rows = backfill_bank_fingerprints(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Statement entry fingerprints filled: {entries}")
+    print(f"Import row fingerprints filled: {rows}")
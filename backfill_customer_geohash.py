@@ -0,0 +1,27 @@
+"""Fill customers.geohash for customers geocoded before the column existed.
+
+New and updated customers get their geohash automatically; run this once
+after applying migrations/add_customer_geohash_column.sql. Safe to run
+multiple times.
+
+Usage:
+    python backfill_customer_geohash.py                  # every company
+    python backfill_customer_geohash.py <company_id>     # one company
+"""
+import sys
+
+from app.database.connection import SessionLocal
+from app.services.geo_index_service import GeoIndexService
+
+
+def backfill_customer_geohash(company_id: str = None) -> int:
+    db = SessionLocal()
+    try:
+        return GeoIndexService(db).backfill_geohashes(company_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    updated = backfill_customer_geohash(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Customer geohashes filled: {updated}")
@@ -0,0 +1,126 @@
+"""Benchmark authentication overhead per request in get_current_user.
+
+Compares, for Supabase user tokens:
+
+- ``remote, no cache``  - every request verifies the token with Supabase
+  (simulated with ``--supabase-latency-ms``) and looks the user up
+- ``local JWT, no cache`` - signature verified with SUPABASE_JWT_SECRET,
+  user still looked up
+- ``cached``             - token found in the verified-token cache
+
+and reports mean time and DB queries per request.
+
+Usage:
+    python benchmarks/auth_benchmark.py
+    python benchmarks/auth_benchmark.py --requests 5000 --supabase-latency-ms 80
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jose import jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import dependencies
+from app.auth.supabase_client import auth_helper
+from app.auth.token_cache import token_cache
+from app.config import settings
+from app.database.connection import Base
+from app.database.models import User
+
+
+JWT_SECRET = "benchmark-jwt-secret"
+
+
+def make_token(supabase_id: str, email: str) -> str:
+    return jwt.encode(
+        {
+            "sub": supabase_id,
+            "email": email,
+            "aud": "authenticated",
+            "exp": int(time.time()) + 3600,
+            "user_metadata": {"full_name": "Auth Benchmark"},
+        },
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+async def measure(label: str, token: str, session_factory, counter: dict, requests: int, clear_cache: bool):
+    counter["queries"] = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        if clear_cache:
+            token_cache.clear()
+        db = session_factory()
+        try:
+            await dependencies.get_current_user(token, db)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {label:<22} {elapsed / requests * 1e6:10.1f} us/request"
+        f"  {counter['queries'] / requests:5.2f} queries/request"
+    )
+
+
+async def run(args):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    session_factory = sessionmaker(bind=engine)
+    counter = {"queries": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["queries"] += 1
+
+    supabase_id = str(uuid.uuid4())
+    email = "auth-benchmark@example.com"
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": str(uuid.uuid4()),
+            "email": email,
+            "full_name": "Auth Benchmark",
+            "supabase_id": supabase_id,
+        }])
+    token = make_token(supabase_id, email)
+
+    latency = args.supabase_latency_ms / 1000
+
+    def simulated_get_user(access_token):
+        time.sleep(latency)
+        return {"id": supabase_id, "email": email, "user_metadata": {}}
+
+    # Route the Supabase path through a simulated remote verifier
+    settings.SUPABASE_URL = settings.SUPABASE_URL or "https://benchmark.supabase.invalid"
+    auth_helper.get_user_sync = simulated_get_user
+
+    remote_requests = max(1, min(args.requests, int(2 / latency) if latency else args.requests))
+    print(f"Supabase latency {args.supabase_latency_ms} ms")
+    settings.SUPABASE_JWT_SECRET = None
+    await measure("remote, no cache", token, session_factory, counter, remote_requests, clear_cache=True)
+
+    settings.SUPABASE_JWT_SECRET = JWT_SECRET
+    await measure("local JWT, no cache", token, session_factory, counter, args.requests, clear_cache=True)
+
+    token_cache.clear()
+    await measure("cached", token, session_factory, counter, args.requests, clear_cache=False)
+    print(f"  cache hits {token_cache.hits}, misses {token_cache.misses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--supabase-latency-ms", type=float, default=60.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Benchmark bank statement import as statements grow.
+
+Generates an HDFC-format statement CSV and times, with peak Python memory:
+
+- previous: the whole file decoded to a string, split into a list of rows,
+  a duplicate-check query and an ORM object per row (how
+  ``BankStatementImportService.import_statement`` used to work);
+- streaming: ``import_statement`` reading the file object, batched inserts
+  with fingerprint de-duplication;
+- re-import: the same file again, plus an overlapping statement (second
+  half of it and a month of new rows) - duplicates must be skipped.
+
+Usage:
+    python benchmarks/bank_import_benchmark.py
+    python benchmarks/bank_import_benchmark.py --sizes 10000 100000 --previous-limit 20000
+    python benchmarks/bank_import_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.models import User, Company, BankAccount
+from app.database.bank_statement_models import BankStatementEntry, BankStatementEntryStatus
+from app.services.bank_import_service import HDFCParser
+from app.services.bank_statement_import_service import BankStatementImportService
+
+
+HEADERS = ["Date", "Narration", "Chq./Ref.No.", "Value Dt", "Withdrawal Amt.", "Deposit Amt.", "Closing Balance"]
+
+
+def make_statement(rows: int, rng: random.Random, start: date = date(2022, 4, 1), opening: Decimal = Decimal("100000")):
+    """HDFC-style CSV bytes with ``rows`` lines, about 30 a day."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(HEADERS)
+    balance = opening
+    for n in range(rows):
+        day = start + timedelta(days=n // 30)
+        amount = Decimal(rng.randrange(100, 5000000)) / 100
+        deposit = rng.random() < 0.5
+        balance += amount if deposit else -amount
+        writer.writerow([
+            day.strftime("%d/%m/%y"),
+            f"{'NEFT CR' if deposit else 'UPI DR'}-{rng.randrange(10 ** 12):012d}-PARTY {n % 500}",
+            f"{rng.randrange(10 ** 12):012d}",
+            day.strftime("%d/%m/%y"),
+            "" if deposit else f"{amount:.2f}",
+            f"{amount:.2f}" if deposit else "",
+            f"{balance:.2f}",
+        ])
+    return out.getvalue().encode("utf-8")
+
+
+def previous_import(db, company_id: str, bank_account_id: str, content: bytes) -> int:
+    """The previous implementation: everything in memory, a query per row."""
+    text = content.decode("utf-8")
+    parser = HDFCParser()
+    rows = [{k: v for k, v in row.items() if k is not None} for row in csv.DictReader(io.StringIO(text))]
+    imported = 0
+    for i, row in enumerate(rows, 1):
+        parsed = parser.parse_row(row, i)
+        amount = parsed["credit_amount"] - parsed["debit_amount"]
+        existing = db.query(BankStatementEntry).filter(
+            BankStatementEntry.company_id == company_id,
+            BankStatementEntry.bank_account_id == bank_account_id,
+            BankStatementEntry.value_date == parsed["value_date"],
+            BankStatementEntry.amount == amount,
+            BankStatementEntry.description == parsed["description"],
+        ).first()
+        if existing:
+            continue
+        db.add(BankStatementEntry(
+            company_id=company_id,
+            bank_account_id=bank_account_id,
+            value_date=parsed["value_date"],
+            transaction_date=parsed["transaction_date"],
+            amount=amount,
+            bank_reference=parsed["reference_number"],
+            description=parsed["description"],
+            balance=parsed["balance"],
+            status=BankStatementEntryStatus.PENDING,
+        ))
+        imported += 1
+    db.commit()
+    return imported
+
+
+def seed_account(engine) -> tuple:
+    user_id, company_id, bank_account_id = (str(uuid.uuid4()) for _ in range(3))
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Bank Import Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Bank Import Benchmark Co",
+        }])
+        conn.execute(BankAccount.__table__.insert(), [{
+            "id": bank_account_id,
+            "company_id": company_id,
+            "bank_name": "HDFC Bank",
+            "account_name": "Current Account",
+            "account_number": "50100012345678",
+            "ifsc_code": "HDFC0000001",
+        }])
+    return company_id, bank_account_id
+
+
+def measure(label: str, size: int, queries: list, func):
+    queries.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{size:>8} {label:<12} {elapsed:>9.2f}s {len(queries):>8} {peak / 2 ** 20:>9.1f} MB  {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("bank_import"), help=DATABASE_URL_HELP)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000, 100000])
+    parser.add_argument("--previous-limit", type=int, default=20000,
+                        help="skip the previous implementation above this many rows")
+    args = parser.parse_args()
+
+    rng = random.Random(14)
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[model.__table__ for model in (User, Company, BankAccount, BankStatementEntry)],
+        checkfirst=True,
+    )
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.append(1))
+    Session = sessionmaker(bind=engine)
+
+    print(f"{'rows':>8} {'path':<12} {'time':>10} {'queries':>8} {'peak mem':>12}  result")
+    for size in args.sizes:
+        content = make_statement(size, rng)
+
+        if size <= args.previous_limit:
+            company_id, bank_account_id = seed_account(engine)
+            db = Session()
+            measure("previous", size, queries,
+                    lambda: f"imported {previous_import(db, company_id, bank_account_id, content)}")
+            db.close()
+
+        company_id, bank_account_id = seed_account(engine)
+        db = Session()
+        service = BankStatementImportService(db)
+
+        def run(source):
+            result = service.import_statement(company_id, bank_account_id, source, auto_match=False)
+            return f"imported {result['imported']}, duplicates {result['duplicates_skipped']}"
+
+        measure("streaming", size, queries, lambda: run(io.BytesIO(content)))
+        measure("re-import", size, queries, lambda: run(io.BytesIO(content)))
+
+        # Second half of the statement followed by a month of new rows
+        lines = content.splitlines(keepends=True)
+        balance = Decimal(lines[-1].decode().rsplit(",", 1)[1])
+        last_day = date(2022, 4, 1) + timedelta(days=(size - 1) // 30)
+        extra = make_statement(900, rng, start=last_day + timedelta(days=1), opening=balance)
+        overlap = lines[0] + b"".join(lines[1 + size // 2:]) + b"".join(extra.splitlines(keepends=True)[1:])
+        measure("overlap", size, queries, lambda: run(io.BytesIO(overlap)))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
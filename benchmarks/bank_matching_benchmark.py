@@ -0,0 +1,227 @@
+"""Benchmark bank statement auto-matching as statements grow.
+
+Seeds a bank account with posted book entries and a statement where most
+lines clear within a few days of the book date, some clear late but carry
+the cheque number / UTR of the book entry, and the rest have no book
+counterpart. Then times:
+
+- previous: the nested loop over bank lines x book entries, reading each
+  entry's transaction date through the lazy relationship;
+- engine: ``BankReconciliationService.auto_match`` (sort-merge on amount
+  and date, then reference tokens, bulk updates).
+
+Usage:
+    python benchmarks/bank_matching_benchmark.py
+    python benchmarks/bank_matching_benchmark.py --sizes 1000 5000 20000 --previous-limit 2000
+    python benchmarks/bank_matching_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.models import (
+    User, Company, BankAccount, Account, AccountType, Transaction, TransactionEntry,
+    TransactionStatus, BankImport, BankImportRow,
+)
+from app.database.bank_statement_models import BankStatementEntry, BankStatementEntryStatus
+from app.services.bank_reconciliation_service import BankReconciliationService
+
+
+START = datetime(2025, 4, 1)
+
+
+def seed(engine, size: int, rng: random.Random):
+    """Seed ``size`` book entries and statement lines; return ids."""
+    user_id = str(uuid.uuid4())
+    company_id = str(uuid.uuid4())
+    bank_account_id = str(uuid.uuid4())
+    ledger_id = str(uuid.uuid4())
+    contra_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Bank Matching Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Bank Matching Benchmark Co",
+        }])
+        conn.execute(BankAccount.__table__.insert(), [{
+            "id": bank_account_id,
+            "company_id": company_id,
+            "bank_name": "HDFC Bank",
+            "account_name": "Current Account",
+            "account_number": "50100012345678",
+            "ifsc_code": "HDFC0000001",
+        }])
+        conn.execute(Account.__table__.insert(), [
+            {
+                "id": ledger_id,
+                "company_id": company_id,
+                "code": "1010",
+                "name": "HDFC Bank",
+                "account_type": AccountType.ASSET,
+                "bank_account_id": bank_account_id,
+            },
+            {
+                "id": contra_id,
+                "company_id": company_id,
+                "code": "4000",
+                "name": "Sales",
+                "account_type": AccountType.REVENUE,
+                "bank_account_id": None,
+            },
+        ])
+
+    transactions, entries, statement = [], [], []
+    for n in range(size):
+        txn_id = str(uuid.uuid4())
+        booked_at = START + timedelta(days=rng.randrange(365))
+        amount = Decimal(rng.randrange(100, 200000)) / 100
+        receipt = rng.random() < 0.5
+        cheque = f"{rng.randrange(10 ** 6):06d}"
+        transactions.append({
+            "id": txn_id,
+            "company_id": company_id,
+            "transaction_number": f"TXN-{n:06d}",
+            "transaction_date": booked_at,
+            "description": f"Payment chq {cheque}",
+            "status": TransactionStatus.POSTED,
+            "total_debit": amount,
+            "total_credit": amount,
+        })
+        entries.append({
+            "id": str(uuid.uuid4()),
+            "transaction_id": txn_id,
+            "account_id": ledger_id,
+            "debit_amount": amount if receipt else Decimal("0"),
+            "credit_amount": Decimal("0") if receipt else amount,
+            "is_reconciled": False,
+        })
+
+        kind = rng.random()
+        if kind < 0.85:
+            cleared_at = booked_at + timedelta(days=rng.randrange(4))
+        elif kind < 0.95:
+            cleared_at = booked_at + timedelta(days=rng.randrange(10, 40))  # late cheque
+        else:
+            continue  # not in the statement
+        statement.append({
+            "id": str(uuid.uuid4()),
+            "company_id": company_id,
+            "bank_account_id": bank_account_id,
+            "value_date": cleared_at,
+            "amount": amount if receipt else -amount,
+            "bank_reference": cheque,
+            "description": f"CHQ DEP {cheque}" if receipt else f"CHQ PAID {cheque}",
+            "status": BankStatementEntryStatus.PENDING,
+        })
+
+    with engine.begin() as conn:
+        for offset in range(0, size, 5000):
+            conn.execute(Transaction.__table__.insert(), transactions[offset:offset + 5000])
+            conn.execute(TransactionEntry.__table__.insert(), entries[offset:offset + 5000])
+        for offset in range(0, len(statement), 5000):
+            conn.execute(BankStatementEntry.__table__.insert(), statement[offset:offset + 5000])
+    return company_id, bank_account_id, ledger_id
+
+
+def previous_auto_match(db, company_id: str, bank_account_id: str, ledger_id: str,
+                        tolerance_days: int = 3, tolerance_amount: Decimal = Decimal("0.01")) -> int:
+    """The previous implementation: every bank line against every book entry."""
+    book_entries = db.query(TransactionEntry).join(Transaction).filter(
+        TransactionEntry.account_id == ledger_id,
+        Transaction.status == TransactionStatus.POSTED,
+        TransactionEntry.is_reconciled == False,
+    ).all()
+    bank_entries = db.query(BankStatementEntry).filter(
+        BankStatementEntry.company_id == company_id,
+        BankStatementEntry.bank_account_id == bank_account_id,
+        BankStatementEntry.status == BankStatementEntryStatus.PENDING,
+    ).all()
+    matched_bank_ids = set()
+    matched = 0
+    for book in book_entries:
+        book_amount = Decimal(str(book.debit_amount or 0)) - Decimal(str(book.credit_amount or 0))
+        book_date = book.transaction.transaction_date.date()
+        best, best_diff = None, None
+        for bank in bank_entries:
+            if bank.id in matched_bank_ids:
+                continue
+            if abs(book_amount - Decimal(str(bank.amount))) > tolerance_amount:
+                continue
+            diff = abs((book_date - bank.value_date.date()).days)
+            if diff <= tolerance_days and (best is None or diff < best_diff):
+                best, best_diff = bank, diff
+        if best is not None:
+            matched_bank_ids.add(best.id)
+            matched += 1
+    db.rollback()  # measure matching only; leave the rows pending
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("bank_matching"), help=DATABASE_URL_HELP)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 10000])
+    parser.add_argument("--previous-limit", type=int, default=2000,
+                        help="skip the previous nested loop above this many entries")
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[model.__table__ for model in (
+            User, Company, BankAccount, Account, Transaction, TransactionEntry,
+            BankImport, BankImportRow, BankStatementEntry,
+        )],
+        checkfirst=True,
+    )
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.append(1))
+    Session = sessionmaker(bind=engine)
+
+    print(f"{'entries':>8} {'path':<10} {'time':>10} {'queries':>8} {'matched':>8}")
+    for size in args.sizes:
+        company_id, bank_account_id, ledger_id = seed(engine, size, rng)
+
+        if size <= args.previous_limit:
+            db = Session()
+            queries.clear()
+            started = time.perf_counter()
+            matched = previous_auto_match(db, company_id, bank_account_id, ledger_id)
+            elapsed = time.perf_counter() - started
+            print(f"{size:>8} {'previous':<10} {elapsed:>9.2f}s {len(queries):>8} {matched:>8}")
+            db.close()
+
+        db = Session()
+        queries.clear()
+        started = time.perf_counter()
+        result = BankReconciliationService(db).auto_match(company_id, bank_account_id)
+        elapsed = time.perf_counter() - started
+        by_reference = sum(1 for detail in result["match_details"] if detail["match_type"] == "reference")
+        print(f"{size:>8} {'engine':<10} {elapsed:>9.2f}s {len(queries):>8} {result['matched']:>8}"
+              f"  ({by_reference} on reference, {result['bank_unmatched_count']} bank /"
+              f" {result['book_unmatched_count']} book unmatched)")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Load test for blocking work in async endpoints.
+
+Measures the latency of a cheap endpoint while other requests do blocking
+work, which is what users felt when sync DB/PDF calls ran inside
+``async def`` handlers and stalled the event loop.
+
+Synthetic mode (default) builds a small in-process app and compares:
+
+- ``async-blocking``  - ``async def`` handler calling blocking code (before)
+- ``offloaded``       - plain ``def`` handler on the bounded DB pool (after)
+- ``cpu-policy``      - handler under ``@execution_policy(ExecutionPolicy.CPU)``
+
+Server mode (``--base-url``) sends the same mixed traffic to a running instance.
+
+Usage:
+    python benchmarks/concurrency_load_test.py
+    python benchmarks/concurrency_load_test.py --blocking-ms 50 --concurrency 40
+    python benchmarks/concurrency_load_test.py --base-url http://localhost:8000 \\
+        --token <JWT> --fast-path /health \\
+        --slow-path /api/companies/<id>/invoices/<id>/pdf
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.execution import ExecutionPolicy, configure_worker_pools, execution_policy
+
+
+PROBE_INTERVAL = 0.01
+
+
+def build_synthetic_app(blocking_ms: int) -> FastAPI:
+    app = FastAPI()
+    delay = blocking_ms / 1000
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    @app.get("/async-blocking")
+    async def async_blocking():
+        time.sleep(delay)
+        return {"ok": True}
+
+    @app.get("/offloaded")
+    def offloaded():
+        time.sleep(delay)
+        return {"ok": True}
+
+    @app.get("/cpu-policy")
+    @execution_policy(ExecutionPolicy.CPU)
+    def cpu_policy():
+        time.sleep(delay)
+        return {"ok": True}
+
+    return app
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    fast_path: str,
+    slow_path: str,
+    concurrency: int,
+    duration: float,
+):
+    """Keep ``concurrency`` slow requests in flight and probe ``fast_path``."""
+    fast_latencies: List[float] = []
+    slow_latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def slow_worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await client.get(slow_path)
+            slow_latencies.append(time.perf_counter() - started)
+
+    async def fast_probe(scheduled: float):
+        await client.get(fast_path)
+        fast_latencies.append(time.perf_counter() - scheduled)
+
+    async def fast_prober():
+        # Open-loop probes: latency is measured from the scheduled send time,
+        # so time spent waiting for a stalled event loop is counted too.
+        probes = []
+        scheduled = time.perf_counter()
+        while scheduled < deadline:
+            scheduled += PROBE_INTERVAL
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            probes.append(asyncio.create_task(fast_probe(scheduled)))
+        await asyncio.gather(*probes)
+
+    await asyncio.gather(fast_prober(), *(slow_worker() for _ in range(concurrency)))
+    return fast_latencies, slow_latencies
+
+
+def report(label: str, fast: List[float], slow: List[float], duration: float):
+    if not fast:
+        print(f"  {label:<16} no fast-path samples")
+        return
+    print(
+        f"  {label:<16} fast p50 {statistics.median(fast) * 1000:8.1f} ms"
+        f"  p99 {percentile(fast, 99) * 1000:8.1f} ms"
+        f"  | slow p99 {percentile(slow, 99) * 1000 if slow else 0:8.1f} ms"
+        f"  {len(slow) / duration:7.1f} req/s"
+    )
+
+
+async def run_synthetic(args):
+    app = build_synthetic_app(args.blocking_ms)
+    configure_worker_pools()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        print(
+            f"{args.concurrency} concurrent slow requests ({args.blocking_ms} ms blocking each), "
+            f"{args.duration:.0f}s per scenario"
+        )
+        for label in ("async-blocking", "offloaded", "cpu-policy"):
+            fast, slow = await run_scenario(client, "/fast", f"/{label}", args.concurrency, args.duration)
+            report(label, fast, slow, args.duration)
+
+
+async def run_server(args, token: Optional[str]):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=None) as client:
+        print(f"{args.concurrency} concurrent requests to {args.slow_path}, probing {args.fast_path}")
+        fast, slow = await run_scenario(client, args.fast_path, args.slow_path, args.concurrency, args.duration)
+        report("server", fast, slow, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Run against a live server instead of the synthetic app")
+    parser.add_argument("--token", default=os.environ.get("LOAD_TEST_TOKEN"))
+    parser.add_argument("--fast-path", default="/health")
+    parser.add_argument("--slow-path", default="/api/dashboard")
+    parser.add_argument("--blocking-ms", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.base_url:
+        asyncio.run(run_server(args, args.token))
+    else:
+        asyncio.run(run_synthetic(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark nearby / nearest customer queries on the geohash index.
+
+Seeds geocoded customers (default 100,000: 70% in one dense city, the rest
+spread across India) and compares the previous bounding-box query with a
+Python haversine pass over every candidate against ``GeoIndexService``.
+
+Usage:
+    python benchmarks/geo_index_benchmark.py
+    python benchmarks/geo_index_benchmark.py --customers 20000 --queries 50
+    python benchmarks/geo_index_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.geohash import geohash_for, haversine_m
+from app.database.models import User, Company, Customer
+from app.services.geo_index_service import GeoIndexService
+
+
+CITY_CENTER = (12.9716, 77.5946)  # Bengaluru
+INDIA_BOX = ((8.0, 30.0), (70.0, 88.0))
+
+
+def seed_customers(engine, count: int, rng: random.Random, chunk_size: int = 10000) -> str:
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[User.__table__, Company.__table__, Customer.__table__],
+        checkfirst=True,
+    )
+    user_id = str(uuid.uuid4())
+    company_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Geo Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Geo Benchmark Co",
+        }])
+
+    for offset in range(0, count, chunk_size):
+        rows = []
+        for n in range(offset, min(offset + chunk_size, count)):
+            if rng.random() < 0.7:
+                lat = CITY_CENTER[0] + rng.gauss(0, 0.12)
+                lng = CITY_CENTER[1] + rng.gauss(0, 0.12)
+            else:
+                lat = rng.uniform(*INDIA_BOX[0])
+                lng = rng.uniform(*INDIA_BOX[1])
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "name": f"Customer {n}",
+                "contact": "9999999999",
+                "location_lat": lat,
+                "location_lng": lng,
+                "geohash": geohash_for(lat, lng),
+                "is_active": True,
+            })
+        with engine.begin() as conn:
+            conn.execute(Customer.__table__.insert(), rows)
+    return company_id
+
+
+def bounding_box_nearby(db, company_id: str, latitude: float, longitude: float, radius_km: float):
+    """The previous implementation: bounding box, then haversine on every candidate."""
+    lat_delta = radius_km / 111.0
+    lng_delta = radius_km / (111.0 * max(math.cos(math.radians(latitude)), 0.01))
+    candidates = db.query(Customer).filter(
+        Customer.company_id == company_id,
+        Customer.is_active == True,
+        Customer.location_lat.isnot(None),
+        Customer.location_lng.isnot(None),
+        Customer.location_lat.between(latitude - lat_delta, latitude + lat_delta),
+        Customer.location_lng.between(longitude - lng_delta, longitude + lng_delta),
+    ).all()
+    results = []
+    for customer in candidates:
+        distance_m = haversine_m(latitude, longitude, customer.location_lat, customer.location_lng)
+        if distance_m <= radius_km * 1000:
+            results.append((customer, distance_m))
+    results.sort(key=lambda item: item[1])
+    return results
+
+
+def timed(label: str, fn, points):
+    started = time.perf_counter()
+    sizes = [len(fn(lat, lng)) for lat, lng in points]
+    elapsed = (time.perf_counter() - started) / len(points)
+    print(f"  {label:<34} {elapsed * 1000:8.2f} ms/query  (avg {sum(sizes) / len(sizes):.0f} results)")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("geo"), help=DATABASE_URL_HELP)
+    parser.add_argument("--customers", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    engine = create_engine(args.database_url)
+    print(f"Seeding {args.customers} customers ...")
+    company_id = seed_customers(engine, args.customers, rng)
+
+    db = sessionmaker(bind=engine)()
+    service = GeoIndexService(db)
+    points = [
+        (CITY_CENTER[0] + rng.gauss(0, 0.08), CITY_CENTER[1] + rng.gauss(0, 0.08))
+        for _ in range(args.queries)
+    ]
+
+    for radius_km in (1, 5):
+        print(f"Customers within {radius_km} km (dense city)")
+        old = timed("bounding box + Python haversine", lambda lat, lng: bounding_box_nearby(db, company_id, lat, lng, radius_km), points)
+        new = timed("geohash cell ranges", lambda lat, lng: service.customers_within(company_id, lat, lng, radius_km), points)
+        assert old == new, "result counts differ"
+
+    print("Nearest 10 customers")
+    timed("geohash, widening radius", lambda lat, lng: service.nearest_customers(company_id, lat, lng, 10), points)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Benchmark GSTR-2B reconciliation against purchase invoices.
+
+Seeds vendors and purchases, builds a GSTR-2B with a mix of exact matches,
+reformatted invoice numbers, amount and date differences and invoices
+missing from the books, then compares the previous per-record queries
+against ``GSTReconciliationService.reconcile_period``.
+
+Usage:
+    python benchmarks/gst_reconciliation_benchmark.py
+    python benchmarks/gst_reconciliation_benchmark.py --records 20000
+    python benchmarks/gst_reconciliation_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.models import User, Company, Vendor, Purchase, PurchaseType
+from app.services.gst_reconciliation_service import (
+    GSTR2Record, GSTReconciliationService,
+)
+
+
+PERIOD_START = date(2025, 4, 1)
+
+
+def make_gstin(n: int) -> str:
+    return f"29ABCDE{n:04d}F1Z5"
+
+
+def seed(engine, records: int, vendors: int, rng: random.Random, chunk_size: int = 5000):
+    """Seed purchases and return (company_id, GSTR-2B records)."""
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[User.__table__, Company.__table__, Vendor.__table__, Purchase.__table__],
+        checkfirst=True,
+    )
+    user_id = str(uuid.uuid4())
+    company_id = str(uuid.uuid4())
+    vendor_ids = [str(uuid.uuid4()) for _ in range(vendors)]
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "GST Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "GST Benchmark Co",
+        }])
+        conn.execute(Vendor.__table__.insert(), [
+            {
+                "id": vendor_id,
+                "company_id": company_id,
+                "name": f"Vendor {n}",
+                "contact": "9999999999",
+                "tax_number": make_gstin(n),
+            }
+            for n, vendor_id in enumerate(vendor_ids)
+        ])
+
+    purchases = []
+    gstr_records = []
+    for n in range(records):
+        vendor = rng.randrange(vendors)
+        invoice_date = PERIOD_START + timedelta(days=rng.randrange(28))
+        taxable = Decimal(rng.randrange(1000, 500000)) / 100
+        tax = (taxable * Decimal("0.09")).quantize(Decimal("0.01"))
+        total = taxable + tax + tax
+        number = f"INV/{n:06d}"
+
+        kind = rng.random()
+        book_number, book_date, book_total = number, invoice_date, total
+        if kind < 0.10:
+            book_number = f"inv-{n}"  # reformatted number
+        elif kind < 0.15:
+            book_total = total + 50  # amount mismatch
+        elif kind < 0.20:
+            book_date = invoice_date + timedelta(days=5)  # date mismatch
+
+        gstr_records.append(GSTR2Record(
+            supplier_gstin=make_gstin(vendor),
+            supplier_name=f"Vendor {vendor}",
+            invoice_number=number,
+            invoice_date=invoice_date,
+            invoice_value=total,
+            place_of_supply="29",
+            reverse_charge=False,
+            invoice_type="R",
+            taxable_value=taxable,
+            igst=Decimal("0"),
+            cgst=tax,
+            sgst=tax,
+            cess=Decimal("0"),
+        ))
+        if kind >= 0.95:
+            continue  # not in books
+
+        booked_at = datetime.combine(book_date, datetime.min.time())
+        purchases.append({
+            "id": str(uuid.uuid4()),
+            "company_id": company_id,
+            "vendor_id": vendor_ids[vendor],
+            "purchase_type": PurchaseType.PURCHASE,
+            "purchase_number": f"PUR-{company_id[:8]}-{n:06d}",
+            "vendor_invoice_number": book_number,
+            "invoice_date": booked_at,
+            "vendor_invoice_date": booked_at,
+            "total_amount": book_total,
+            "cgst_amount": tax,
+            "sgst_amount": tax,
+            "igst_amount": Decimal("0"),
+        })
+
+    for offset in range(0, len(purchases), chunk_size):
+        with engine.begin() as conn:
+            conn.execute(Purchase.__table__.insert(), purchases[offset:offset + chunk_size])
+    return company_id, gstr_records
+
+
+def previous_reconcile(db, company_id: str, gstr_records):
+    """The previous implementation: up to three queries per record."""
+    statuses = []
+    for record in gstr_records:
+        purchase = db.query(Purchase).join(Vendor, Purchase.vendor_id == Vendor.id).filter(
+            Purchase.company_id == company_id,
+            Vendor.tax_number == record.supplier_gstin,
+            Purchase.vendor_invoice_number == record.invoice_number,
+        ).first()
+        if not purchase:
+            purchase = db.query(Purchase).filter(
+                Purchase.company_id == company_id,
+                Purchase.vendor_invoice_number == record.invoice_number,
+            ).first()
+        if not purchase:
+            purchase = db.query(Purchase).filter(
+                Purchase.company_id == company_id,
+                Purchase.total_amount == record.invoice_value,
+                Purchase.invoice_date >= record.invoice_date.replace(day=1),
+                Purchase.invoice_date <= record.invoice_date.replace(day=28),
+            ).first()
+        statuses.append(purchase is not None)
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("gst_reconciliation"), help=DATABASE_URL_HELP)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--vendors", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    engine = create_engine(args.database_url)
+    print(f"Seeding {args.records} GSTR-2B records ...")
+    company_id, gstr_records = seed(engine, args.records, args.vendors, rng)
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.append(1))
+    db = sessionmaker(bind=engine)()
+
+    queries.clear()
+    started = time.perf_counter()
+    found = previous_reconcile(db, company_id, gstr_records)
+    elapsed = time.perf_counter() - started
+    print(f"  {'previous, per-record queries':<32} {elapsed * 1000:10.1f} ms  {len(queries):6d} queries  "
+          f"({sum(found)} found)")
+    db.expunge_all()
+
+    queries.clear()
+    started = time.perf_counter()
+    result = GSTReconciliationService(db).reconcile_period(company_id, gstr_records)
+    elapsed = time.perf_counter() - started
+    print(f"  {'indexed hash join':<32} {elapsed * 1000:10.1f} ms  {len(queries):6d} queries")
+    print(f"  summary: {result['summary']}")
+    print(f"  timings: {result['timings']}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
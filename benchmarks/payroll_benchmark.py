@@ -0,0 +1,203 @@
+"""Benchmark payroll processing as the number of employees grows.
+
+Seeds a company with active employees (BASIC / HRA / SPECIAL structures,
+PF/ESI/PT flags, tax declarations and loans for some of them) and times:
+
+- per-employee: ``calculate_employee_salary`` for every employee, which
+  loads structure, settings, slabs, declaration and all company loans
+  again for each one (how runs used to be computed);
+- batch: ``process_payroll``, which preloads the run once and inserts all
+  entries in one statement.
+
+Usage:
+    python benchmarks/payroll_benchmark.py
+    python benchmarks/payroll_benchmark.py --sizes 500 2000 5000 --per-employee-limit 1000
+    python benchmarks/payroll_benchmark.py --workers 4   # compute chunks on 4 processes
+    python benchmarks/payroll_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database.connection import Base
+from app.database.models import User, Company
+from app.database.payroll_models import (
+    Employee, SalaryComponent, EmployeeSalaryStructure, EmployeeTaxDeclaration,
+    EmployeeLoan, PayrollSettings, PayrollRun, PayrollEntry, ProfessionalTaxSlab,
+    PayrollRunStatus, EmployeeStatus, SalaryComponentType, LoanStatus, TaxRegime,
+)
+from app.services.payroll_engine import current_financial_year
+from app.services.payroll_service import PayrollService
+
+
+MONTH, YEAR = 4, 2025
+STATES = ["KA", "MH", "TN", "DL", "WB"]
+
+
+def seed_company(engine, employees: int, rng: random.Random, chunk_size: int = 5000) -> str:
+    user_id = str(uuid.uuid4())
+    company_id = str(uuid.uuid4())
+    components = {
+        code: str(uuid.uuid4()) for code in ("BASIC", "HRA", "SPECIAL")
+    }
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Payroll Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Payroll Benchmark Co",
+        }])
+        conn.execute(PayrollSettings.__table__.insert(), [{
+            "id": str(uuid.uuid4()),
+            "company_id": company_id,
+        }])
+        conn.execute(SalaryComponent.__table__.insert(), [
+            {
+                "id": component_id,
+                "company_id": company_id,
+                "name": code.title(),
+                "code": code,
+                "component_type": SalaryComponentType.EARNING,
+            }
+            for code, component_id in components.items()
+        ])
+
+    financial_year = current_financial_year()
+    for offset in range(0, employees, chunk_size):
+        employee_rows, structure_rows, declaration_rows, loan_rows = [], [], [], []
+        for n in range(offset, min(offset + chunk_size, employees)):
+            employee_id = str(uuid.uuid4())
+            basic = Decimal(rng.randrange(8000, 120000))
+            employee_rows.append({
+                "id": employee_id,
+                "company_id": company_id,
+                "employee_code": f"EMP{n:05d}",
+                "first_name": f"Employee{n}",
+                "last_name": "Bench",
+                "full_name": f"Employee{n} Bench",
+                "date_of_joining": date(2020, 1, 1),
+                "status": EmployeeStatus.ACTIVE,
+                "work_state": rng.choice(STATES),
+                "pf_applicable": True,
+                "esi_applicable": True,
+                "pt_applicable": True,
+            })
+            for code, amount in (("BASIC", basic), ("HRA", basic * Decimal("0.4")), ("SPECIAL", basic * Decimal("0.2"))):
+                structure_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "employee_id": employee_id,
+                    "component_id": components[code],
+                    "amount": amount,
+                    "effective_from": date(2020, 1, 1),
+                    "is_active": True,
+                })
+            if rng.random() < 0.3:
+                declaration_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "employee_id": employee_id,
+                    "financial_year": financial_year,
+                    "tax_regime": TaxRegime.OLD,
+                })
+            if rng.random() < 0.1:
+                loan_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "company_id": company_id,
+                    "employee_id": employee_id,
+                    "loan_number": f"LN{n:05d}",
+                    "principal_amount": Decimal("60000"),
+                    "tenure_months": 12,
+                    "emi_amount": Decimal("5000"),
+                    "outstanding_balance": Decimal("60000"),
+                    "next_emi_date": date(YEAR, MONTH, 1),
+                    "status": LoanStatus.ACTIVE,
+                })
+        with engine.begin() as conn:
+            conn.execute(Employee.__table__.insert(), employee_rows)
+            conn.execute(EmployeeSalaryStructure.__table__.insert(), structure_rows)
+            if declaration_rows:
+                conn.execute(EmployeeTaxDeclaration.__table__.insert(), declaration_rows)
+            if loan_rows:
+                conn.execute(EmployeeLoan.__table__.insert(), loan_rows)
+    return company_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("payroll"), help=DATABASE_URL_HELP)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    parser.add_argument("--per-employee-limit", type=int, default=2000,
+                        help="skip the per-employee path above this many employees")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="PAYROLL_WORKER_PROCESSES for the batch path (1 = in-thread)")
+    args = parser.parse_args()
+    settings.PAYROLL_WORKER_PROCESSES = args.workers
+
+    rng = random.Random(5)
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[model.__table__ for model in (
+            User, Company, Employee, SalaryComponent, EmployeeSalaryStructure,
+            EmployeeTaxDeclaration, EmployeeLoan, PayrollSettings, ProfessionalTaxSlab,
+            PayrollRun, PayrollEntry,
+        )],
+        checkfirst=True,
+    )
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.append(1))
+    Session = sessionmaker(bind=engine)
+
+    print(f"{'employees':>10} {'path':<14} {'time':>10} {'queries':>8} {'per employee':>14}")
+    for size in args.sizes:
+        company_id = seed_company(engine, size, rng)
+        db = Session()
+        service = PayrollService(db)
+        employees = db.query(Employee).filter(Employee.company_id == company_id).all()
+
+        if size <= args.per_employee_limit:
+            queries.clear()
+            started = time.perf_counter()
+            for employee in employees:
+                service.calculate_employee_salary(employee, MONTH, YEAR)
+            elapsed = time.perf_counter() - started
+            print(f"{size:>10} {'per-employee':<14} {elapsed:>9.2f}s {len(queries):>8} {elapsed / size * 1000:>11.2f} ms")
+
+        run = PayrollRun(
+            company_id=company_id,
+            pay_period_month=MONTH,
+            pay_period_year=YEAR,
+            status=PayrollRunStatus.DRAFT,
+            total_employees=size,
+        )
+        db.add(run)
+        db.commit()
+
+        queries.clear()
+        started = time.perf_counter()
+        run = service.process_payroll(run.id)
+        elapsed = time.perf_counter() - started
+        print(f"{size:>10} {'batch':<14} {elapsed:>9.2f}s {len(queries):>8} {elapsed / size * 1000:>11.2f} ms"
+              f"  (processed {run.processed_employees}, net pay {run.total_net_pay})")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark per-account vs set-based financial reports in ReportService.
+
+Seeds a scratch ledger (default: 400 accounts, 1,000,000 transaction entries)
+and times the previous per-account path (one SUM query per account through
+``_get_account_balance_at_date``) against the grouped-aggregate path now used
+by ``get_trial_balance`` / ``get_balance_sheet`` / ``get_profit_loss`` /
+``get_account_summary``.
+
+Usage:
+    python benchmarks/report_service_benchmark.py
+    python benchmarks/report_service_benchmark.py --entries 200000 --accounts 400
+    python benchmarks/report_service_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.models import (
+    User, Company, Account, Transaction, TransactionEntry,
+    AccountType, TransactionStatus, VoucherType, ReferenceType,
+)
+from app.services.report_service import ReportService
+
+
+ACCOUNT_TYPES = [
+    AccountType.ASSET,
+    AccountType.LIABILITY,
+    AccountType.EQUITY,
+    AccountType.REVENUE,
+    AccountType.EXPENSE,
+]
+
+
+def seed_ledger(engine, accounts: int, entries: int, chunk_size: int = 10000) -> str:
+    """Create one company with a chart of accounts and a balanced ledger."""
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[
+            User.__table__,
+            Company.__table__,
+            Account.__table__,
+            Transaction.__table__,
+            TransactionEntry.__table__,
+        ],
+        checkfirst=True,
+    )
+
+    user_id = str(uuid.uuid4())
+    company_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    start = now - timedelta(days=5 * 365)
+    rng = random.Random(42)
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Report Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Report Benchmark Co",
+        }])
+        account_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "code": f"{1000 + i}",
+                "name": f"Account {i}",
+                "account_type": ACCOUNT_TYPES[i % len(ACCOUNT_TYPES)],
+                "is_active": True,
+            }
+            for i in range(accounts)
+        ]
+        conn.execute(Account.__table__.insert(), account_rows)
+    account_ids = [row["id"] for row in account_rows]
+
+    # Two entries (one debit, one credit) per transaction
+    transactions = entries // 2
+    seconds = int((now - start).total_seconds())
+    for offset in range(0, transactions, chunk_size):
+        txn_rows = []
+        entry_rows = []
+        for n in range(offset, min(offset + chunk_size, transactions)):
+            txn_id = str(uuid.uuid4())
+            amount = Decimal(rng.randint(100, 1000000)) / 100
+            txn_rows.append({
+                "id": txn_id,
+                "company_id": company_id,
+                "transaction_number": f"JV-{n + 1:07d}",
+                "transaction_date": start + timedelta(seconds=rng.randint(0, seconds)),
+                "voucher_type": VoucherType.JOURNAL,
+                "reference_type": ReferenceType.MANUAL,
+                "status": TransactionStatus.POSTED,
+                "total_debit": amount,
+                "total_credit": amount,
+            })
+            debit_account, credit_account = rng.sample(account_ids, 2)
+            entry_rows.append({
+                "id": str(uuid.uuid4()),
+                "transaction_id": txn_id,
+                "account_id": debit_account,
+                "debit_amount": amount,
+                "credit_amount": Decimal("0"),
+            })
+            entry_rows.append({
+                "id": str(uuid.uuid4()),
+                "transaction_id": txn_id,
+                "account_id": credit_account,
+                "debit_amount": Decimal("0"),
+                "credit_amount": amount,
+            })
+        with engine.begin() as conn:
+            conn.execute(Transaction.__table__.insert(), txn_rows)
+            conn.execute(TransactionEntry.__table__.insert(), entry_rows)
+
+    return company_id
+
+
+def per_account_balance_sheet(service: ReportService, company: Company, as_of_date: datetime):
+    """The previous balance sheet path: one SUM query per account."""
+    db = service.db
+    totals = {account_type: Decimal("0") for account_type in ACCOUNT_TYPES}
+    for account in db.query(Account).filter(Account.company_id == company.id).all():
+        totals[account.account_type] += service._get_account_balance_at_date(account, as_of_date)
+    return totals
+
+
+def per_account_profit_loss(service: ReportService, company: Company, from_date: datetime, to_date: datetime):
+    """The previous P&L path: one SUM query per revenue/expense account."""
+    db = service.db
+    total = Decimal("0")
+    for account in db.query(Account).filter(
+        Account.company_id == company.id,
+        Account.account_type.in_([AccountType.REVENUE, AccountType.EXPENSE]),
+    ).all():
+        total += service._get_account_balance_for_period(account, from_date, to_date)
+    return total
+
+
+def timed(label: str, fn, counter: dict, repeat: int):
+    best = None
+    for _ in range(repeat):
+        counter["queries"] = 0
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<38} {best * 1000:10.1f} ms  {counter['queries']:6d} queries")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("reports"), help=DATABASE_URL_HELP)
+    parser.add_argument("--accounts", type=int, default=400)
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    counter = {"queries": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["queries"] += 1
+
+    print(f"Seeding {args.accounts} accounts / {args.entries} entries ...")
+    started = time.perf_counter()
+    company_id = seed_ledger(engine, args.accounts, args.entries)
+    print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    db = sessionmaker(bind=engine)()
+    service = ReportService(db)
+    company = db.query(Company).filter(Company.id == company_id).first()
+    as_of_date = datetime.utcnow()
+    from_date = as_of_date - timedelta(days=365)
+
+    print("Balance sheet")
+    old = timed("per-account (previous)", lambda: per_account_balance_sheet(service, company, as_of_date), counter, args.repeat)
+    new = timed("grouped aggregate (get_balance_sheet)", lambda: service.get_balance_sheet(company, as_of_date), counter, args.repeat)
+    print(f"  speedup: {old / new:.1f}x")
+
+    print("Profit & loss (last 365 days)")
+    old = timed("per-account (previous)", lambda: per_account_profit_loss(service, company, from_date, as_of_date), counter, args.repeat)
+    new = timed("grouped aggregate (get_profit_loss)", lambda: service.get_profit_loss(company, from_date, as_of_date), counter, args.repeat)
+    print(f"  speedup: {old / new:.1f}x")
+
+    print("Trial balance / account summary")
+    timed("get_trial_balance", lambda: service.get_trial_balance(company, as_of_date), counter, args.repeat)
+    timed("get_account_summary", lambda: service.get_account_summary(company, as_of_date), counter, args.repeat)
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
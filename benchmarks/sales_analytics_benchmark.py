@@ -0,0 +1,259 @@
+"""Query-count regression benchmark for the sales dashboard analytics.
+
+``get_engineer_performance`` and ``get_sales_by_person`` used to run several
+queries per employee (about 800 for 200 employees); they, and the sales by
+brand / state / category reports, are now a fixed number of GROUP BY
+queries. This seeds a company, grows its sales team step by step (each new
+employee gets enquiries, quotations, invoices, tickets and a monthly
+target), times every report at each size, and fails if any report's query
+count changes as the team grows.
+
+Usage:
+    python benchmarks/sales_analytics_benchmark.py
+    python benchmarks/sales_analytics_benchmark.py --employees 10,100,400 --docs 20
+    python benchmarks/sales_analytics_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.models import (
+    User, Company, Customer, Brand, Category, Product, Invoice, InvoiceItem,
+    Enquiry, Quotation, SalesTicket, SalesTarget,
+    InvoiceStatus, SalesTicketStatus,
+)
+from app.database.payroll_models import Employee
+from app.services.sales_dashboard_service import SalesDashboardService
+
+
+STATES = [("Maharashtra", "27"), ("Karnataka", "29"), ("Tamil Nadu", "33"), ("Gujarat", "24")]
+
+
+def seed_company(engine) -> dict:
+    """Create a company with customers, brands, categories and products."""
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[model.__table__ for model in (
+            User, Company, Employee, Customer, Brand, Category, Product, Invoice, InvoiceItem,
+            Enquiry, Quotation, SalesTicket, SalesTarget,
+        )],
+        checkfirst=True,
+    )
+
+    user_id = str(uuid.uuid4())
+    company_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Sales Analytics Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Sales Analytics Benchmark Co",
+        }])
+        customers = [
+            {
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "name": f"Customer {i}",
+                "contact": f"98{i:08d}",
+                "billing_state": STATES[i % len(STATES)][0],
+                "billing_state_code": STATES[i % len(STATES)][1],
+            }
+            for i in range(50)
+        ]
+        conn.execute(Customer.__table__.insert(), customers)
+        brands = [{"id": str(uuid.uuid4()), "company_id": company_id, "name": f"Brand {i}"} for i in range(8)]
+        categories = [{"id": str(uuid.uuid4()), "company_id": company_id, "name": f"Category {i}"} for i in range(6)]
+        conn.execute(Brand.__table__.insert(), brands)
+        conn.execute(Category.__table__.insert(), categories)
+        products = [
+            {
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "name": f"Product {i}",
+                "created_by": user_id,
+                "brand_id": brands[i % len(brands)]["id"],
+                "category_id": categories[i % len(categories)]["id"],
+            }
+            for i in range(40)
+        ]
+        conn.execute(Product.__table__.insert(), products)
+
+    return {
+        "company_id": company_id,
+        "customer_ids": [row["id"] for row in customers],
+        "product_ids": [row["id"] for row in products],
+        "employees": 0,
+    }
+
+
+def add_employees(engine, seed: dict, count: int, docs: int, rng: random.Random) -> None:
+    """Add ``count`` employees, each with ``docs`` of every sales document."""
+    company_id = seed["company_id"]
+    now = datetime.utcnow()
+    employees, enquiries, quotations, invoices, items, tickets, targets = [], [], [], [], [], [], []
+    for _ in range(count):
+        seed["employees"] += 1
+        n = seed["employees"]
+        employee_id = str(uuid.uuid4())
+        employees.append({
+            "id": employee_id,
+            "company_id": company_id,
+            "employee_code": f"EMP{n:05d}",
+            "first_name": "Engineer",
+            "last_name": str(n),
+            "date_of_joining": now.date() - timedelta(days=365),
+        })
+        targets.append({
+            "id": str(uuid.uuid4()),
+            "company_id": company_id,
+            "employee_id": employee_id,
+            "target_year": now.year,
+            "target_month": now.month,
+            "target_amount": Decimal(rng.randint(100, 1000) * 1000),
+        })
+        for d in range(docs):
+            day = now - timedelta(days=rng.randint(0, 60))
+            amount = Decimal(rng.randint(1000, 500000)) / 100
+            enquiries.append({
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "enquiry_number": f"ENQ-{n}-{d}",
+                "enquiry_date": day,
+                "subject": "Benchmark enquiry",
+                "sales_person_id": employee_id,
+            })
+            quotations.append({
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "quotation_number": f"QT-{n}-{d}",
+                "quotation_date": day,
+                "sales_person_id": employee_id,
+                "subtotal": amount,
+            })
+            invoice_id = str(uuid.uuid4())
+            invoices.append({
+                "id": invoice_id,
+                "company_id": company_id,
+                "customer_id": rng.choice(seed["customer_ids"]),
+                "invoice_number": f"INV-{n}-{d}",
+                "invoice_date": day,
+                "sales_person_id": employee_id,
+                "status": rng.choice([InvoiceStatus.PENDING, InvoiceStatus.PAID, InvoiceStatus.DRAFT]),
+                "subtotal": amount,
+                "cgst_amount": amount * Decimal("0.09"),
+                "sgst_amount": amount * Decimal("0.09"),
+                "total_amount": amount * Decimal("1.18"),
+            })
+            items.append({
+                "id": str(uuid.uuid4()),
+                "invoice_id": invoice_id,
+                "product_id": rng.choice(seed["product_ids"]),
+                "description": "Benchmark item",
+                "quantity": Decimal(rng.randint(1, 10)),
+                "unit_price": amount,
+                "gst_rate": Decimal("18"),
+                "taxable_amount": amount,
+                "total_amount": amount * Decimal("1.18"),
+            })
+            tickets.append({
+                "id": str(uuid.uuid4()),
+                "company_id": company_id,
+                "ticket_number": f"TKT-{n}-{d}",
+                "sales_person_id": employee_id,
+                "status": rng.choice(list(SalesTicketStatus)),
+                "created_date": day,
+                "expected_value": amount,
+                "actual_value": amount,
+            })
+
+    with engine.begin() as conn:
+        conn.execute(Employee.__table__.insert(), employees)
+        conn.execute(SalesTarget.__table__.insert(), targets)
+        conn.execute(Enquiry.__table__.insert(), enquiries)
+        conn.execute(Quotation.__table__.insert(), quotations)
+        conn.execute(Invoice.__table__.insert(), invoices)
+        conn.execute(InvoiceItem.__table__.insert(), items)
+        conn.execute(SalesTicket.__table__.insert(), tickets)
+
+
+def timed(fn, counter: dict, repeat: int):
+    best = None
+    for _ in range(repeat):
+        counter["queries"] = 0
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, counter["queries"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("sales_analytics"), help=DATABASE_URL_HELP)
+    parser.add_argument("--employees", default="10,50,200", help="comma-separated team sizes")
+    parser.add_argument("--docs", type=int, default=10, help="documents of each kind per employee")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.employees.split(","))
+    engine = create_engine(args.database_url)
+    counter = {"queries": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["queries"] += 1
+
+    rng = random.Random(42)
+    seed = seed_company(engine)
+    company_id = seed["company_id"]
+    db = sessionmaker(bind=engine)()
+    service = SalesDashboardService(db)
+    from_date = datetime.utcnow().date() - timedelta(days=30)
+
+    reports = {
+        "get_engineer_performance": lambda: service.get_engineer_performance(company_id, from_date=from_date),
+        "get_sales_by_person": lambda: service.get_sales_by_person(company_id),
+        "get_sales_by_brand": lambda: service.get_sales_by_brand(company_id),
+        "get_sales_by_state": lambda: service.get_sales_by_state(company_id),
+        "get_sales_by_category": lambda: service.get_sales_by_category(company_id),
+    }
+    query_counts = {name: {} for name in reports}
+
+    for size in sizes:
+        add_employees(engine, seed, size - seed["employees"], args.docs, rng)
+        db.expire_all()
+        print(f"{size} employees")
+        for name, report in reports.items():
+            elapsed, queries = timed(report, counter, args.repeat)
+            query_counts[name][size] = queries
+            print(f"  {name:<28} {elapsed * 1000:10.1f} ms  {queries:6d} queries")
+
+    db.close()
+
+    failures = [name for name, counts in query_counts.items() if len(set(counts.values())) > 1]
+    for name in failures:
+        print(f"FAIL: {name} query count grows with employees: {query_counts[name]}")
+    if failures:
+        sys.exit(1)
+    print("OK: query counts are independent of the number of employees")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Scratch databases for the benchmarks.
+
+Benchmarks seed rows and never remove them, so ``--database-url`` must point
+at a scratch database. By default each benchmark uses its own SQLite file in
+the system temp directory, outside the repository.
+"""
+import os
+import tempfile
+
+DATABASE_URL_HELP = "scratch database only - seeded rows are not removed (default: SQLite in the temp directory)"
+
+
+def scratch_database_url(name: str) -> str:
+    """Default ``--database-url`` of the ``name`` benchmark."""
+    return "sqlite:///" + os.path.join(tempfile.gettempdir(), f"benchmark_{name}.db")
@@ -0,0 +1,192 @@
+"""Stress test concurrent stock movements on one fast-moving item.
+
+Several threads, each with its own session, record receipts and issues of
+the same product at once. After each run the product's current stock must
+equal the opening stock plus the sum of the committed movements:
+
+- previous: read ``current_stock`` into Python, add, write back (how
+  ``record_stock_in`` / ``record_stock_out`` / ``finalize_stock_reduction``
+  used to update stock) - concurrent updates overwrite each other;
+- atomic: ``InventoryService.record_stock_in`` / ``record_stock_out``, which
+  apply ``SET current_stock = current_stock + :delta`` on the server;
+- guarded: issues only - ``record_stock_out`` refuses issues beyond the
+  stock, and the stock never drops below zero.
+
+Refused issues are not movements; ``refused`` counts them.
+
+Usage:
+    python benchmarks/stock_concurrency_benchmark.py
+    python benchmarks/stock_concurrency_benchmark.py --threads 16 --movements 500
+    python benchmarks/stock_concurrency_benchmark.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scratch_db import DATABASE_URL_HELP, scratch_database_url
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base
+from app.database.models import (
+    User, Company, Product, Godown, Batch, StockEntry, StockBalance, StockBalanceSnapshot, StockCostLayer,
+    StockCostLayerConsumption, StockMovementType,
+)
+from app.services.inventory_service import InventoryService
+
+
+OPENING_STOCK = Decimal("1000")
+
+
+def seed_product(engine, opening: Decimal = OPENING_STOCK):
+    user_id, company_id, product_id = (str(uuid.uuid4()) for _ in range(3))
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "full_name": "Stock Concurrency Benchmark",
+        }])
+        conn.execute(Company.__table__.insert(), [{
+            "id": company_id,
+            "user_id": user_id,
+            "name": "Stock Concurrency Benchmark Co",
+        }])
+        conn.execute(Product.__table__.insert(), [{
+            "id": product_id,
+            "company_id": company_id,
+            "name": "Fast Mover",
+            "unit": "Nos",
+            "created_by": user_id,
+            "current_stock": opening,
+            "is_service": False,
+        }])
+    return company_id, product_id
+
+
+def previous_movement(db, company_id: str, product_id: str, quantity: Decimal) -> None:
+    """The previous implementation: read, add in Python, write back."""
+    product = db.query(Product).filter(Product.id == product_id).first()
+    db.add(StockEntry(
+        company_id=company_id,
+        product_id=product_id,
+        movement_type=StockMovementType.PURCHASE if quantity > 0 else StockMovementType.SALE,
+        quantity=quantity,
+        unit=product.unit,
+    ))
+    product.current_stock = (product.current_stock or Decimal("0")) + quantity
+    db.commit()
+
+
+def atomic_movement(db, company_id: str, product_id: str, quantity: Decimal) -> None:
+    service = InventoryService(db)
+    company = db.query(Company).filter(Company.id == company_id).first()
+    if quantity > 0:
+        service.record_stock_in(company, product_id, quantity, Decimal("10"))
+    else:
+        service.record_stock_out(company, product_id, -quantity)
+
+
+def run(Session, threads: int, movements: int, worker, seed: int, issues_only: bool = False):
+    """Run ``worker`` from several threads; return (applied sum, refused, errors, seconds)."""
+    applied, refused, errors = [], [0], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def thread_main(n):
+        rng = random.Random(seed + n)
+        db = Session()
+        barrier.wait()
+        try:
+            for _ in range(movements):
+                quantity = Decimal(rng.randrange(1, 20))
+                if issues_only or rng.random() < 0.5:
+                    quantity = -quantity
+                try:
+                    worker(db, quantity)
+                except ValueError:
+                    db.rollback()
+                    with lock:
+                        refused[0] += 1
+                    continue
+                except Exception as exc:  # lock timeouts and the like
+                    db.rollback()
+                    with lock:
+                        errors.append(repr(exc))
+                    continue
+                with lock:
+                    applied.append(quantity)
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=thread_main, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(applied, Decimal("0")), refused[0], errors, time.perf_counter() - started
+
+
+def report(label: str, Session, product_id: str, opening: Decimal, result) -> bool:
+    applied, refused, errors, elapsed = result
+    db = Session()
+    final = Decimal(str(db.query(Product.current_stock).filter(Product.id == product_id).scalar()))
+    db.close()
+    expected = opening + applied
+    ok = final == expected
+    print(f"{label:<10} {elapsed:>8.2f}s  expected {expected:>10}  final {final:>10}  "
+          f"{'OK' if ok else 'LOST ' + str(expected - final):<12} refused {refused:>5}  errors {len(errors)}")
+    if errors:
+        print(f"{'':<10} first error: {errors[0][:120]}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=scratch_database_url("stock_concurrency"), help=DATABASE_URL_HELP)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--movements", type=int, default=200, help="movements per thread")
+    args = parser.parse_args()
+
+    connect_args = {"timeout": 60, "check_same_thread": False} if args.database_url.startswith("sqlite") else {}
+    engine = create_engine(args.database_url, connect_args=connect_args, pool_size=args.threads + 2)
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[model.__table__ for model in (
+            User, Company, Product, Godown, Batch, StockEntry, StockBalance, StockBalanceSnapshot, StockCostLayer,
+            StockCostLayerConsumption,
+        )],
+        checkfirst=True,
+    )
+    Session = sessionmaker(bind=engine)
+    print(f"{args.threads} threads x {args.movements} movements on one product")
+
+    company_id, product_id = seed_product(engine)
+    result = run(Session, args.threads, args.movements,
+                 lambda db, qty: previous_movement(db, company_id, product_id, qty), seed=1)
+    report("previous", Session, product_id, OPENING_STOCK, result)
+
+    company_id, product_id = seed_product(engine)
+    result = run(Session, args.threads, args.movements,
+                 lambda db, qty: atomic_movement(db, company_id, product_id, qty), seed=1)
+    atomic_ok = report("atomic", Session, product_id, OPENING_STOCK, result)
+
+    # Issues only: the opening stock runs out part-way and later issues are refused
+    company_id, product_id = seed_product(engine)
+    result = run(Session, args.threads, args.movements,
+                 lambda db, qty: atomic_movement(db, company_id, product_id, qty), seed=2, issues_only=True)
+    guarded_ok = report("guarded", Session, product_id, OPENING_STOCK, result)
+
+    sys.exit(0 if atomic_ok and guarded_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,10 @@ from sqlalchemy.exc import OperationalError
 
 from app.config import settings
 from app.database.connection import init_db
+from app.api.execution import configure_worker_pools
+from app.services.tracking_hub import tracking_hub, InMemoryBackend
+from app.services.payroll_job_service import resume_stale_payroll_runs
+from app.services.invoice_export_service import resume_stale_invoice_exports
 from app.api import (
     auth_router,
     companies_router,
@@ -155,12 +159,32 @@ app.include_router(stock_journal_router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup."""
+    configure_worker_pools()
     try:
         init_db()
     except OperationalError as exc:
         # Keep API process alive so temporary DNS/DB outages do not crash local dev server.
         print("[WARN] Database init failed during startup. Server will continue in degraded mode.")
         print(f"[WARN] {exc}")
+    try:
+        resumed = resume_stale_payroll_runs()
+        if resumed:
+            print(f"[OK] Resumed {resumed} interrupted payroll run(s)")
+    except Exception as exc:
+        print(f"[WARN] Could not check for interrupted payroll runs: {exc}")
+    try:
+        resumed = resume_stale_invoice_exports()
+        if resumed:
+            print(f"[OK] Resumed {resumed} interrupted invoice export(s)")
+    except Exception as exc:
+        print(f"[WARN] Could not check for interrupted invoice exports: {exc}")
+    try:
+        await tracking_hub.start()
+    except Exception as exc:
+        # Multi-worker backend unavailable - live tracking still works per worker.
+        print(f"[WARN] Tracking hub backend failed to start, using in-memory backend: {exc}")
+        tracking_hub.backend = InMemoryBackend()
+        await tracking_hub.start()
     print(f"[OK] {settings.APP_NAME} v{settings.APP_VERSION} started!")
     print(f"[API] Docs: http://localhost:6768/api/docs")
     print(f"[WEB] Frontend: http://localhost:6767")
@@ -172,6 +196,12 @@ async def startup_event():
             print(f"  {route.methods} {route.path}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close live tracking subscriptions and backend connections."""
+    await tracking_hub.stop()
+
+
 @app.exception_handler(OperationalError)
 async def database_operational_error_handler(request: Request, exc: OperationalError):
     """Return a clean API response when database connectivity is temporarily unavailable."""
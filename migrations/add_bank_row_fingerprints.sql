@@ -0,0 +1,16 @@
+-- Streaming bank statement import: a content fingerprint per imported row
+-- (bank account, date, amount, reference, balance) so re-imported
+-- overlapping statements skip rows already stored.
+-- Required before deploying: the columns and unique indexes are not added at
+-- startup, and the import's ON CONFLICT dedupe needs the indexes.
+-- Fill fingerprints of existing rows with backfill_bank_fingerprints.py.
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+ALTER TABLE bank_imports ADD COLUMN IF NOT EXISTS duplicate_rows INTEGER DEFAULT 0;
+ALTER TABLE bank_import_rows ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64);
+ALTER TABLE bank_statement_entries ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_import_row_fingerprint
+    ON bank_import_rows (fingerprint);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_bank_statement_entry_fingerprint
+    ON bank_statement_entries (fingerprint);
@@ -0,0 +1,8 @@
+-- Geohash of customers.location_lat/lng for nearby / nearest customer
+-- lookups. Backfill existing rows with: python backfill_customer_geohash.py
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS geohash VARCHAR(12);
+
+CREATE INDEX IF NOT EXISTS idx_customer_company_geohash
+    ON customers (company_id, geohash);
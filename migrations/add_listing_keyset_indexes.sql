@@ -0,0 +1,12 @@
+-- Keyset pagination of document listings: pages are read newest first on
+-- (created_at, id) within a company (see app/services/listing_service.py).
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE INDEX IF NOT EXISTS idx_invoice_company_created
+    ON invoices (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_quotation_company_created
+    ON quotations (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_purchase_company_created
+    ON purchases (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_dc_company_created
+    ON delivery_challans (company_id, created_at, id);
@@ -0,0 +1,6 @@
+-- Composite index backing the duplicate-fix check of batched GPS uploads
+-- (POST /location/batch): same engineer, device and timestamp.
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE INDEX IF NOT EXISTS idx_location_engineer_device_time
+    ON location_logs (engineer_id, device_id, recorded_at);
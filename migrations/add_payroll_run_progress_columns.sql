@@ -0,0 +1,14 @@
+-- Background payroll processing: progress, per-employee errors and a
+-- heartbeat to resume crashed runs; one entry per employee per run so
+-- re-processed chunks upsert instead of duplicating.
+-- Required before deploying: these columns are not added at startup.
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+ALTER TABLE payroll_runs ADD COLUMN IF NOT EXISTS working_days INTEGER;
+ALTER TABLE payroll_runs ADD COLUMN IF NOT EXISTS failed_employees INTEGER DEFAULT 0;
+ALTER TABLE payroll_runs ADD COLUMN IF NOT EXISTS processing_errors JSON;
+ALTER TABLE payroll_runs ADD COLUMN IF NOT EXISTS processing_started_at TIMESTAMP;
+ALTER TABLE payroll_runs ADD COLUMN IF NOT EXISTS processing_heartbeat_at TIMESTAMP;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_payroll_entry_run_employee
+    ON payroll_entries (payroll_run_id, employee_id);
@@ -0,0 +1,6 @@
+-- Keyset pagination of the purchase order listing: pages are read newest
+-- first on (created_at, id) within a company (see app/services/listing_service.py).
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE INDEX IF NOT EXISTS idx_purchase_order_company_created
+    ON purchase_orders (company_id, created_at, id);
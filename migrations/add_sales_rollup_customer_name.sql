@@ -0,0 +1,11 @@
+-- Key the daily sales rollup by the customer name printed on the invoice as
+-- well as the customer id, so top customers keep walk-in names apart and a
+-- customer rename does not rewrite past invoices.
+-- Existing rows get '' and must be rebuilt with: python rebuild_sales_rollups.py
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+ALTER TABLE sales_daily_rollups ADD COLUMN IF NOT EXISTS customer_name VARCHAR(255) NOT NULL DEFAULT '';
+
+DROP INDEX IF EXISTS uq_sales_rollup_key;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_sales_rollup_key
+    ON sales_daily_rollups (company_id, sale_date, voucher_type, status, sales_person_key, customer_key, customer_name);
@@ -0,0 +1,20 @@
+-- Stock valuation: what each issue took from each cost layer, so deleting
+-- or editing the issue restores exactly those layers.
+-- Record it for existing issues with: python rebuild_stock_valuation.py
+-- (until then they are released as one layer at their average cost).
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE TABLE IF NOT EXISTS stock_cost_layer_consumptions (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    entry_id VARCHAR(36) NOT NULL,
+    layer_id VARCHAR(36) REFERENCES stock_cost_layers(id) ON DELETE CASCADE,
+    quantity NUMERIC(14, 3) NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_cost_consumption_entry
+    ON stock_cost_layer_consumptions (entry_id);
+CREATE INDEX IF NOT EXISTS idx_cost_consumption_layer
+    ON stock_cost_layer_consumptions (layer_id);
+CREATE INDEX IF NOT EXISTS idx_cost_consumption_company
+    ON stock_cost_layer_consumptions (company_id);
@@ -0,0 +1,30 @@
+-- Stock valuation: the cost of each stock movement (FIFO / LIFO / weighted
+-- average per company), stock value on balances and monthly snapshots, and
+-- the open cost layers issues are costed against.
+-- Required before deploying: these columns are not added at startup.
+-- Populate for existing data with: python rebuild_stock_valuation.py
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+ALTER TABLE stock_entries ADD COLUMN IF NOT EXISTS cost_value NUMERIC(14, 2);
+ALTER TABLE stock_balances ADD COLUMN IF NOT EXISTS value NUMERIC(18, 2) NOT NULL DEFAULT 0;
+ALTER TABLE stock_balance_snapshots ADD COLUMN IF NOT EXISTS closing_value NUMERIC(18, 2) NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS stock_cost_layers (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    product_id VARCHAR(36) NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    godown_key VARCHAR(36) NOT NULL DEFAULT '',
+    entry_id VARCHAR(36),
+    layer_date TIMESTAMP NOT NULL,
+    unit_cost NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    quantity NUMERIC(14, 3) NOT NULL DEFAULT 0,
+    remaining_quantity NUMERIC(14, 3) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_cost_layer_open
+    ON stock_cost_layers (product_id, godown_key, remaining_quantity);
+CREATE INDEX IF NOT EXISTS idx_cost_layer_entry
+    ON stock_cost_layers (entry_id);
+CREATE INDEX IF NOT EXISTS idx_cost_layer_company
+    ON stock_cost_layers (company_id);
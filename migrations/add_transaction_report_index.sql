@@ -0,0 +1,6 @@
+-- Composite index backing the grouped per-account aggregates used by
+-- trial balance, P&L and balance sheet reports.
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE INDEX IF NOT EXISTS idx_transaction_company_status_date
+    ON transactions (company_id, status, transaction_date);
@@ -0,0 +1,5 @@
+-- Cached GPS route of completed trips (GET /trips/{trip_id}/route).
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS route_polyline JSON;
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS route_raw_points INTEGER;
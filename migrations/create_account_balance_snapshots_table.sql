@@ -0,0 +1,15 @@
+-- Daily per-account balance snapshots (cumulative posted totals through snapshot_date)
+-- Populate for existing data with: python rebuild_balance_snapshots.py
+
+CREATE TABLE IF NOT EXISTS account_balance_snapshots (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    account_id VARCHAR(36) NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    snapshot_date DATE NOT NULL,
+    total_debit NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    total_credit NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_balance_snapshot_account_date
+    ON account_balance_snapshots(company_id, account_id, snapshot_date);
@@ -0,0 +1,15 @@
+-- Persistent per-company document number counters (invoices, vouchers, journal entries)
+-- Counters are seeded from existing documents the first time each sequence is used.
+
+CREATE TABLE IF NOT EXISTS document_sequences (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    sequence_key VARCHAR(100) NOT NULL,
+    financial_year VARCHAR(9) NOT NULL DEFAULT '',
+    current_value INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_document_sequence_key
+    ON document_sequences(company_id, sequence_key, financial_year);
@@ -0,0 +1,23 @@
+-- Cached GST return results (GSTR-1, GSTR-3B, GST summary, dashboard GST/ITC
+-- summaries) per company, return type and period. Locked GST periods are kept
+-- until a document dated inside them is written; open periods expire
+-- (expires_at). See app/services/gst_return_cache_service.py.
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE TABLE IF NOT EXISTS gst_return_cache (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    return_type VARCHAR(30) NOT NULL,
+    period_start TIMESTAMP NOT NULL,
+    period_end TIMESTAMP NOT NULL,
+    covers_from TIMESTAMP NOT NULL,
+    payload TEXT NOT NULL,
+    is_locked BOOLEAN NOT NULL DEFAULT FALSE,
+    expires_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_gst_return_cache_key
+    ON gst_return_cache (company_id, return_type, period_start, period_end);
+CREATE INDEX IF NOT EXISTS idx_gst_return_cache_cover
+    ON gst_return_cache (company_id, period_end, covers_from);
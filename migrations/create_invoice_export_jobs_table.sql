@@ -0,0 +1,32 @@
+-- Bulk invoice PDF export jobs: the date range, progress, per-invoice errors,
+-- a heartbeat to restart crashed jobs and the finished ZIP's location.
+-- The (company_id, invoice_date, id) index serves the export's keyset walk
+-- over a period's invoices.
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE TABLE IF NOT EXISTS invoice_export_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    requested_by VARCHAR(36) REFERENCES users(id) ON DELETE SET NULL,
+    from_date DATE NOT NULL,
+    to_date DATE NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT 'PENDING',
+    total_invoices INTEGER DEFAULT 0,
+    processed_invoices INTEGER DEFAULT 0,
+    failed_invoices INTEGER DEFAULT 0,
+    errors JSON,
+    error_message TEXT,
+    file_path VARCHAR(500),
+    file_size INTEGER,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_invoice_export_company
+    ON invoice_export_jobs (company_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_invoice_export_status
+    ON invoice_export_jobs (status);
+CREATE INDEX IF NOT EXISTS idx_invoice_company_date
+    ON invoices (company_id, invoice_date, id);
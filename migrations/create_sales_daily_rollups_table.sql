@@ -0,0 +1,33 @@
+-- Daily sales rollup: invoice count and summed amounts per company, day,
+-- voucher type, status, salesperson and customer, so dashboards no longer
+-- sum the whole invoices table. Salesperson/customer keys are '' for
+-- invoices without one.
+-- Populate for existing data with: python rebuild_sales_rollups.py
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE TABLE IF NOT EXISTS sales_daily_rollups (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    sale_date DATE NOT NULL,
+    voucher_type VARCHAR(20) NOT NULL DEFAULT '',
+    status VARCHAR(20) NOT NULL DEFAULT '',
+    sales_person_key VARCHAR(36) NOT NULL DEFAULT '',
+    customer_key VARCHAR(36) NOT NULL DEFAULT '',
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    subtotal NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    discount_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    cgst_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    sgst_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    igst_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    cess_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    total_tax NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    total_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    amount_paid NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    balance_due NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_sales_rollup_key
+    ON sales_daily_rollups (company_id, sale_date, voucher_type, status, sales_person_key, customer_key);
+CREATE INDEX IF NOT EXISTS idx_sales_rollup_company_status
+    ON sales_daily_rollups (company_id, status);
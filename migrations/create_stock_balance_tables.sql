@@ -0,0 +1,43 @@
+-- Maintained stock balances per product/godown/batch and monthly stock
+-- snapshots (cumulative inward/outward through the end of each month), so
+-- stock ledgers and per-warehouse stock no longer sum every stock entry.
+-- Godown/batch keys are '' for entries without one.
+-- Populate for existing data with: python rebuild_stock_balances.py
+-- Safe for PostgreSQL (uses IF NOT EXISTS)
+
+CREATE TABLE IF NOT EXISTS stock_balances (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    product_id VARCHAR(36) NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    godown_key VARCHAR(36) NOT NULL DEFAULT '',
+    batch_key VARCHAR(36) NOT NULL DEFAULT '',
+    quantity NUMERIC(18, 3) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_balance_key
+    ON stock_balances (product_id, godown_key, batch_key);
+CREATE INDEX IF NOT EXISTS idx_stock_balance_company
+    ON stock_balances (company_id);
+
+CREATE TABLE IF NOT EXISTS stock_balance_snapshots (
+    id VARCHAR(36) PRIMARY KEY,
+    company_id VARCHAR(36) NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    product_id VARCHAR(36) NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    godown_key VARCHAR(36) NOT NULL DEFAULT '',
+    batch_key VARCHAR(36) NOT NULL DEFAULT '',
+    period_start DATE NOT NULL,
+    total_inward NUMERIC(18, 3) NOT NULL DEFAULT 0,
+    total_outward NUMERIC(18, 3) NOT NULL DEFAULT 0,
+    closing_quantity NUMERIC(18, 3) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_snapshot_key_period
+    ON stock_balance_snapshots (product_id, godown_key, batch_key, period_start);
+CREATE INDEX IF NOT EXISTS idx_stock_snapshot_company
+    ON stock_balance_snapshots (company_id);
+
+-- Ledger pages and the entries after a snapshot are read by product and date
+CREATE INDEX IF NOT EXISTS idx_stock_entry_item_date
+    ON stock_entries (product_id, entry_date);
@@ -0,0 +1,32 @@
+"""Rebuild daily account balance snapshots from the posted ledger.
+
+Backfills `account_balance_snapshots` for existing data, or repairs it after
+bulk edits that bypassed the accounting services. Safe to run multiple times.
+
+Usage:
+    python rebuild_balance_snapshots.py                  # every company
+    python rebuild_balance_snapshots.py <company_id>     # one company
+"""
+import sys
+
+from app.database.connection import engine, Base, SessionLocal
+from app.database.models import AccountBalanceSnapshot
+from app.services.balance_snapshot_service import BalanceSnapshotService
+
+
+def rebuild_balance_snapshots(company_id: str = None) -> int:
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[AccountBalanceSnapshot.__table__],
+        checkfirst=True,
+    )
+    db = SessionLocal()
+    try:
+        return BalanceSnapshotService(db).rebuild(company_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    written = rebuild_balance_snapshots(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Balance snapshots rebuilt: {written} rows")
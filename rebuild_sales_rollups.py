@@ -0,0 +1,28 @@
+"""Rebuild the daily sales rollup from the invoices.
+
+Backfills `sales_daily_rollups` for existing invoices, or repairs it after
+bulk edits that bypassed the ORM. Safe to run multiple times.
+
+Usage:
+    python rebuild_sales_rollups.py                  # every company
+    python rebuild_sales_rollups.py <company_id>     # one company
+"""
+import sys
+
+from app.database.connection import engine, Base, SessionLocal
+from app.database.models import SalesDailyRollup
+from app.services.sales_rollup_service import SalesRollupService
+
+
+def rebuild_sales_rollups(company_id: str = None):
+    Base.metadata.create_all(bind=engine, tables=[SalesDailyRollup.__table__], checkfirst=True)
+    db = SessionLocal()
+    try:
+        return SalesRollupService(db).rebuild(company_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rows = rebuild_sales_rollups(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Sales rollups rebuilt: {rows} rows")
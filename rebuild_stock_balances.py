@@ -0,0 +1,32 @@
+"""Rebuild stock balances and monthly stock snapshots from the stock entries.
+
+Backfills `stock_balances` and `stock_balance_snapshots` for existing data, or
+repairs them after bulk edits that bypassed the ORM. Safe to run multiple times.
+
+Usage:
+    python rebuild_stock_balances.py                  # every company
+    python rebuild_stock_balances.py <company_id>     # one company
+"""
+import sys
+
+from app.database.connection import engine, Base, SessionLocal
+from app.database.models import StockBalance, StockBalanceSnapshot
+from app.services.stock_balance_service import StockBalanceService
+
+
+def rebuild_stock_balances(company_id: str = None):
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[StockBalance.__table__, StockBalanceSnapshot.__table__],
+        checkfirst=True,
+    )
+    db = SessionLocal()
+    try:
+        return StockBalanceService(db).rebuild(company_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    balances, snapshots = rebuild_stock_balances(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Stock balances rebuilt: {balances} balances, {snapshots} snapshots")
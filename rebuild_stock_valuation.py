@@ -0,0 +1,37 @@
+"""Re-cost stock entries and rebuild cost layers, stock values and snapshots.
+
+Replays each company's stock entries in date order with its valuation method
+(FIFO / LIFO / weighted average). Run once after adding valuation, or after
+backdated movements, which are costed in the order they were recorded.
+Safe to run multiple times.
+
+Usage:
+    python rebuild_stock_valuation.py                  # every company
+    python rebuild_stock_valuation.py <company_id>     # one company
+"""
+import sys
+
+from app.database.connection import engine, Base, SessionLocal
+from app.database.models import StockBalance, StockBalanceSnapshot, StockCostLayer, StockCostLayerConsumption
+from app.services.stock_valuation_service import StockValuationService
+
+
+def rebuild_stock_valuation(company_id: str = None):
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[
+            StockBalance.__table__, StockBalanceSnapshot.__table__,
+            StockCostLayer.__table__, StockCostLayerConsumption.__table__,
+        ],
+        checkfirst=True,
+    )
+    db = SessionLocal()
+    try:
+        return StockValuationService(db).rebuild(company_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    costed = rebuild_stock_valuation(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Stock valuation rebuilt: {costed} stock entries costed")